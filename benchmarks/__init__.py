@@ -0,0 +1,6 @@
+"""
+Benchmark suite for plan-lint.
+
+Run with ``python -m benchmarks`` (or ``make bench``). See
+``python -m benchmarks --help`` for filtering, recording and baseline options.
+"""
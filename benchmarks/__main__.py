@@ -0,0 +1,105 @@
+"""
+Command-line entry point: ``python -m benchmarks``.
+"""
+
+import argparse
+import sys
+from typing import Dict, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.runner import compare, load_results, run_cases, save_results
+from benchmarks.suite import build_cases
+
+console = Console()
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def _progress(name: str, timings: Dict[str, float]) -> None:
+    console.print(
+        f"{name:<50} {_format_time(timings['median']):>12} "
+        f"(± {_format_time(timings['stdev'])}, {timings['repeat']:.0f}×"
+        f"{timings['number']:.0f})",
+        soft_wrap=True,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmarks.
+
+    Args:
+        argv: Command-line arguments.
+
+    Returns:
+        Exit code: 1 if any case regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k", "--filter", action="append", help="Only run cases matching this glob"
+    )
+    parser.add_argument("--quick", action="store_true", help="Skip the largest plans")
+    parser.add_argument("-o", "--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown against the baseline (default: 0.2 = 20%%)",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per case")
+    parser.add_argument(
+        "--min-time", type=float, default=0.05, help="Minimum seconds per repetition"
+    )
+    parser.add_argument("--list", action="store_true", help="List cases and exit")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(quick=args.quick)
+    if args.list:
+        for case in cases:
+            console.print(case.name)
+        return 0
+
+    results = run_cases(
+        cases,
+        patterns=args.filter,
+        progress=_progress,
+        repeat=args.repeat,
+        min_time=args.min_time,
+    )
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+
+    regressions = compare(results, load_results(args.baseline), args.tolerance)
+    if not regressions:
+        console.print(f"[green]No regressions beyond {args.tolerance:.0%}[/]")
+        return 0
+
+    table = Table(title="Regressions")
+    table.add_column("Case", style="cyan")
+    for column in ("Baseline", "Current", "Change"):
+        table.add_column(column, justify="right")
+    for regression in regressions:
+        table.add_row(
+            regression.name,
+            _format_time(regression.baseline),
+            _format_time(regression.current),
+            f"[red]+{regression.ratio - 1:.0%}[/]",
+        )
+    console.print(table)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
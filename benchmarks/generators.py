@@ -0,0 +1,144 @@
+"""
+Synthetic plan and policy generators for benchmarks.
+
+Every generator is deterministic for a given seed, so results are comparable
+between runs and machines.
+"""
+
+import random
+import string
+from typing import Any, Dict, List
+
+from plan_lint.types import Plan, PlanStep, Policy
+
+TOOLS = ["db.query_ro", "db.query", "payments.transfer", "http.get", "email.send"]
+
+
+def _text(rng: random.Random, size: int) -> str:
+    return "".join(rng.choices(string.ascii_letters + " ", k=size))
+
+
+def step_id(index: int) -> str:
+    """Return the id of the step at an index."""
+    return f"step-{index:05d}"
+
+
+def make_args(
+    rng: random.Random, index: int, payload_bytes: int, ref_density: float
+) -> Dict[str, Any]:
+    """
+    Build the arguments of one step.
+
+    Args:
+        rng: Random number generator.
+        index: Index of the step.
+        payload_bytes: Approximate size of the free-text argument.
+        ref_density: Probability of referencing an earlier step's result.
+
+    Returns:
+        The step arguments.
+    """
+    args: Dict[str, Any] = {
+        "amount": rng.randint(0, 5_000),
+        "limit": rng.randint(1, 2_000),
+        "note": _text(rng, payload_bytes),
+    }
+    if index and rng.random() < ref_density:
+        args["input"] = f"{{{{{step_id(rng.randrange(index))}.result}}}}"
+    return args
+
+
+def make_plan(
+    steps: int,
+    payload_bytes: int = 64,
+    ref_density: float = 0.0,
+    seed: int = 0,
+) -> Plan:
+    """
+    Generate a plan.
+
+    Args:
+        steps: Number of steps.
+        payload_bytes: Approximate size of each step's free-text argument.
+        ref_density: Probability that a step references an earlier step, which
+            controls the density of the reference graph.
+        seed: Random seed.
+
+    Returns:
+        The generated plan.
+    """
+    rng = random.Random(seed)
+    return Plan(
+        goal="Synthetic benchmark plan",
+        context={"user_id": "bench", "budget": 5_000},
+        steps=[
+            PlanStep(
+                id=step_id(i),
+                tool=TOOLS[i % len(TOOLS)],
+                args=make_args(rng, i, payload_bytes, ref_density),
+            )
+            for i in range(steps)
+        ],
+    )
+
+
+def make_patterns(count: int) -> List[str]:
+    """
+    Generate deny patterns, mixing literals and character-class patterns.
+
+    Args:
+        count: Number of patterns.
+
+    Returns:
+        The patterns.
+    """
+    base = [
+        "AWS_SECRET",
+        "API_KEY",
+        r"sk_live_[0-9a-zA-Z]{24}",
+        r"[0-9]{13,16}",
+        r"password\s*=",
+    ]
+    patterns = base[:count]
+    patterns.extend(f"TOKEN_{i:04d}_[A-Z]+" for i in range(count - len(patterns)))
+    return patterns
+
+
+def make_bounds(count: int) -> Dict[str, Any]:
+    """
+    Generate bounds, cycling through the tools used by ``make_plan``.
+
+    Args:
+        count: Number of bounds.
+
+    Returns:
+        The bounds mapping.
+    """
+    bounds: Dict[str, Any] = {}
+    for i in range(count):
+        tool = TOOLS[i % len(TOOLS)]
+        arg = "amount" if i % 2 == 0 else "limit"
+        suffix = "" if i < 2 * len(TOOLS) else f"_{i}"
+        bounds[f"{tool}.{arg}{suffix}"] = [0, 5_000 + i]
+    return bounds
+
+
+def make_policy(patterns: int = 5, bounds: int = 2, max_steps: int = 100_000) -> Policy:
+    """
+    Generate a policy allowing every generated tool.
+
+    Args:
+        patterns: Number of deny patterns.
+        bounds: Number of bounds.
+        max_steps: Maximum number of steps.
+
+    Returns:
+        The generated policy.
+    """
+    return Policy(
+        allow_tools=list(TOOLS),
+        bounds=make_bounds(bounds),
+        deny_tokens_regex=make_patterns(patterns),
+        max_steps=max_steps,
+        fail_risk_threshold=1.0,
+    )
@@ -0,0 +1,256 @@
+"""
+Profile generated Rego with ``opa eval --profile``: ``python -m benchmarks.rego``.
+
+Compares the Rego ``policy_to_rego`` generates against the rule shapes it used
+to generate: tools looked up by iterating an array, a comparison per bound
+against every step's tool, and the step arguments serialised once per deny
+pattern. Both policies are written in the same syntax and report the same
+violations, so the difference is down to how OPA can evaluate them. Each is
+evaluated on synthetic plans of growing size, and the evaluation time and the
+most expensive expressions are reported.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.generators import make_plan, make_policy
+from plan_lint.core import split_bound_path
+from plan_lint.opa import plan_to_opa_input, policy_to_rego
+from plan_lint.types import Policy
+
+console = Console()
+
+STEPS = [100, 1_000, 10_000]
+
+
+def legacy_rego(policy: Policy) -> str:
+    """
+    Render a policy with the rule shapes older plan-lint versions generated.
+
+    Args:
+        policy: The policy.
+
+    Returns:
+        The Rego policy.
+    """
+    tools = ", ".join(json.dumps(tool) for tool in policy.allow_tools)
+    lines = [
+        "package planlint",
+        "",
+        "import rego.v1",
+        "",
+        "default allow := false",
+        "",
+        "allow if count(violations) == 0",
+        "",
+        f"allowed_tools := [{tools}]",
+        f"sensitive_patterns := {json.dumps(policy.deny_tokens_regex)}",
+        "",
+        "tool_allowed(tool) if tool == allowed_tools[_]",
+        "",
+        'violations contains {"step": i, "code": "TOOL_DENY", "msg": msg} if {',
+        "    some i, step in input.steps",
+        "    not tool_allowed(step.tool)",
+        "    msg := sprintf(\"Tool '%s' is not allowed by policy\", [step.tool])",
+        "}",
+        "",
+        'violations contains {"step": i, "code": "RAW_SECRET", "msg": msg} if {',
+        "    some i, step in input.steps",
+        "    some pattern in sensitive_patterns",
+        "    regex.match(pattern, json.marshal(step.args))",
+        "    msg := sprintf(\"Potentially sensitive data matching pattern '%s' "
+        'found in arguments", [pattern])',
+        "}",
+    ]
+    for bound_path, spec in policy.bounds.items():
+        parts = split_bound_path(bound_path)
+        if parts is None or not isinstance(spec, list) or len(spec) < 2:
+            continue
+        low, high = spec[0], spec[1]
+        tool_name, arg_name = parts
+        lines += [
+            "",
+            "violations contains "
+            '{"step": i, "code": "BOUND_VIOLATION", "msg": msg} if {',
+            "    some i, step in input.steps",
+            f"    step.tool == {json.dumps(tool_name)}",
+            f"    value := step.args[{json.dumps(arg_name)}]",
+            "    is_number(value)",
+            f"    not value >= {low}",
+            "    msg := sprintf(\"Argument '%s' value %v is outside bounds\", "
+            f"[{json.dumps(arg_name)}, value])",
+            "}",
+            "",
+            "violations contains "
+            '{"step": i, "code": "BOUND_VIOLATION", "msg": msg} if {',
+            "    some i, step in input.steps",
+            f"    step.tool == {json.dumps(tool_name)}",
+            f"    value := step.args[{json.dumps(arg_name)}]",
+            "    is_number(value)",
+            f"    not value <= {high}",
+            "    msg := sprintf(\"Argument '%s' value %v is outside bounds\", "
+            f"[{json.dumps(arg_name)}, value])",
+            "}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+class Profile(NamedTuple):
+    """Result of one profiled evaluation."""
+
+    eval_ns: int
+    violations: int
+    # (location, total time in ns, number of evaluations), slowest first
+    top: List[tuple]
+
+
+def parse_profile(output: Dict[str, Any], top: int = 5) -> Profile:
+    """
+    Extract timings from ``opa eval --profile --metrics --format json`` output.
+
+    Args:
+        output: The decoded output.
+        top: Number of expressions to keep.
+
+    Returns:
+        The profile.
+    """
+    metrics = output.get("metrics", {})
+    eval_ns = int(metrics.get("timer_rego_query_eval_ns", 0))
+    violations = 0
+    for result in output.get("result", []):
+        for expression in result.get("expressions", []):
+            violations += len(expression.get("value") or [])
+
+    rows = []
+    for entry in output.get("profile", []):
+        location = entry.get("location", {})
+        rows.append(
+            (
+                f"{os.path.basename(location.get('file', ''))}:{location.get('row')}",
+                int(entry.get("total_time_ns", 0)),
+                int(entry.get("num_eval", 0)),
+            )
+        )
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return Profile(eval_ns, violations, rows[:top])
+
+
+def profile_policy(rego: str, input_bytes: bytes, workdir: str, name: str) -> Profile:
+    """
+    Evaluate a policy's violations once under the OPA profiler.
+
+    Args:
+        rego: The Rego policy.
+        input_bytes: The plan as OPA input.
+        workdir: Directory to write the policy to.
+        name: File name for the policy.
+
+    Returns:
+        The profile.
+    """
+    path = os.path.join(workdir, name)
+    with open(path, "w") as f:
+        f.write(rego)
+    result = subprocess.run(
+        [
+            "opa",
+            "eval",
+            "--stdin-input",
+            "--profile",
+            "--metrics",
+            "--format",
+            "json",
+            "-d",
+            path,
+            "data.planlint.violations",
+        ],
+        input=input_bytes,
+        check=True,
+        capture_output=True,
+    )
+    return parse_profile(json.loads(result.stdout))
+
+
+def _ms(ns: int) -> str:
+    return f"{ns / 1e6:.2f} ms"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Profile legacy and generated Rego on plans of growing size.
+
+    Args:
+        argv: Command-line arguments.
+
+    Returns:
+        Exit code: 1 if OPA is not installed or the policies disagree.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.rego")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest plan")
+    parser.add_argument("--patterns", type=int, default=5, help="Deny patterns")
+    parser.add_argument("--bounds", type=int, default=20, help="Bounds")
+    parser.add_argument("--top", type=int, default=5, help="Expressions listed")
+    args = parser.parse_args(argv)
+
+    if not shutil.which("opa"):
+        console.print("[red]opa is not on the PATH[/]")
+        return 1
+
+    policy = make_policy(patterns=args.patterns, bounds=args.bounds)
+    policies = {"legacy": legacy_rego(policy), "generated": policy_to_rego(policy)}
+    steps = [n for n in STEPS if not (args.quick and n > 1_000)]
+
+    table = Table(title="opa eval --profile")
+    table.add_column("Steps", justify="right")
+    for name in policies:
+        table.add_column(name, justify="right")
+    table.add_column("Speedup", justify="right")
+
+    status = 0
+    hotspots: Dict[str, Profile] = {}
+    with tempfile.TemporaryDirectory(prefix="plan-lint-rego-") as workdir:
+        for count in steps:
+            input_bytes = plan_to_opa_input(make_plan(count, ref_density=0.0))
+            profiles = {
+                name: profile_policy(rego, input_bytes, workdir, f"{name}.rego")
+                for name, rego in policies.items()
+            }
+            legacy, generated = profiles["legacy"], profiles["generated"]
+            if legacy.violations != generated.violations:
+                console.print(
+                    f"[red]{count} steps: legacy found {legacy.violations} "
+                    f"violations, generated {generated.violations}[/]"
+                )
+                status = 1
+            table.add_row(
+                f"{count:,}",
+                _ms(legacy.eval_ns),
+                _ms(generated.eval_ns),
+                f"{legacy.eval_ns / max(generated.eval_ns, 1):.1f}×",
+            )
+            hotspots = profiles
+
+    console.print(table)
+    for name, profile in hotspots.items():
+        detail = Table(title=f"Slowest expressions: {name}, {steps[-1]:,} steps")
+        detail.add_column("Location")
+        detail.add_column("Time", justify="right")
+        detail.add_column("Evaluations", justify="right")
+        for location, total_ns, evaluations in profile.top:
+            detail.add_row(location, _ms(total_ns), f"{evaluations:,}")
+        console.print(detail)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
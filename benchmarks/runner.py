@@ -0,0 +1,172 @@
+"""
+Timing, recording and baseline comparison for benchmarks.
+"""
+
+import fnmatch
+import json
+import platform
+import statistics
+import time
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from benchmarks.suite import Case
+
+RESULTS_VERSION = 1
+
+
+def measure(
+    func: Callable[[], Any],
+    min_time: float = 0.05,
+    repeat: int = 5,
+    max_time: float = 10.0,
+) -> Dict[str, float]:
+    """
+    Time a callable.
+
+    The number of calls per repetition is calibrated so that each repetition
+    takes at least ``min_time``. Slow callables get fewer repetitions so that
+    a case stays within roughly ``max_time``.
+
+    Args:
+        func: The callable to time.
+        min_time: Minimum duration of one repetition, in seconds.
+        repeat: Number of repetitions.
+        max_time: Time budget for the case, in seconds.
+
+    Returns:
+        Per-call ``median``, ``min``, ``mean`` and ``stdev`` in seconds, plus
+        the ``number`` of calls per repetition and the ``repeat`` count.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    timings = [elapsed / number]
+    repeat = max(1, min(repeat, int(max_time / max(elapsed, 1e-9))))
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "number": number,
+        "repeat": len(timings),
+    }
+
+
+def _environment() -> Dict[str, str]:
+    try:
+        plan_lint_version = version("plan-lint")
+    except PackageNotFoundError:
+        plan_lint_version = "unknown"
+    return {
+        "plan_lint": plan_lint_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def run_cases(
+    cases: Iterable[Case],
+    patterns: Optional[List[str]] = None,
+    progress: Optional[Callable[[str, Dict[str, float]], None]] = None,
+    **measure_options: Any,
+) -> Dict[str, Any]:
+    """
+    Run benchmark cases.
+
+    Args:
+        cases: The cases to run.
+        patterns: Optional glob patterns; only matching case names run.
+        progress: Called with each case name and its timings.
+        **measure_options: Options passed to ``measure``.
+
+    Returns:
+        A JSON-serialisable results document.
+    """
+    results = {}
+    for case in cases:
+        if patterns and not any(fnmatch.fnmatch(case.name, p) for p in patterns):
+            continue
+        timings = measure(case.setup(), **measure_options)
+        results[case.name] = {"group": case.group, "params": case.params, **timings}
+        if progress is not None:
+            progress(case.name, timings)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": _environment(),
+        "results": results,
+    }
+
+
+class Comparison(NamedTuple):
+    """The change in median time of one case relative to the baseline."""
+
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2
+) -> List[Comparison]:
+    """
+    Find cases that got slower than the baseline allows.
+
+    Args:
+        current: Results document from ``run_cases``.
+        baseline: Baseline results document.
+        tolerance: Allowed slowdown as a fraction of the baseline median.
+
+    Returns:
+        The regressed cases, worst first. Cases missing from either document
+        are ignored.
+
+    Raises:
+        ValueError: If the baseline was recorded by an incompatible version.
+    """
+    if baseline.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported baseline version: {baseline.get('version')}")
+
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        comparison = Comparison(name, base["median"], result["median"])
+        if comparison.ratio > 1 + tolerance:
+            regressions.append(comparison)
+
+    return sorted(regressions, key=lambda c: c.ratio, reverse=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Load a results document."""
+    with open(path, "r") as f:
+        return json.load(f)  # type: ignore[no-any-return]
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    """Save a results document."""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,147 @@
+"""
+Benchmark cases for plan-lint.
+
+Each case varies one dimension around a default workload of 100 steps with
+64-byte payloads, 5 deny patterns, 2 bounds and a 10% reference density, so a
+regression can be attributed to the dimension that triggers it. Cases are
+grouped by path: ``builtin`` validation, ``multi`` (one plan against three
+policies with ``validate_plan_multi``), ``rules`` plugins and ``opa``.
+"""
+
+import shutil
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from benchmarks.generators import make_plan, make_policy
+from plan_lint import core
+from plan_lint.cli import load_rules
+from plan_lint.compiler import compile_policy
+
+DEFAULTS: Dict[str, Any] = {
+    "steps": 100,
+    "payload_bytes": 64,
+    "patterns": 5,
+    "bounds": 2,
+    "ref_density": 0.1,
+}
+
+SWEEPS: Dict[str, List[Any]] = {
+    "steps": [10, 100, 1_000, 10_000],
+    "payload_bytes": [16, 256, 4_096],
+    "patterns": [1, 25, 100],
+    "bounds": [0, 20, 100],
+    "ref_density": [0.0, 0.5, 1.0],
+}
+
+# Largest plan size used by the quick suite
+QUICK_MAX_STEPS = 1_000
+
+
+class Case(NamedTuple):
+    """A benchmark case: ``setup()`` builds the inputs and returns the callable."""
+
+    name: str
+    group: str
+    params: Dict[str, Any]
+    setup: Callable[[], Callable[[], Any]]
+
+
+def _workload(params: Dict[str, Any]) -> Any:
+    plan = make_plan(
+        params["steps"],
+        payload_bytes=params["payload_bytes"],
+        ref_density=params["ref_density"],
+    )
+    policy = make_policy(patterns=params["patterns"], bounds=params["bounds"])
+    return plan, policy
+
+
+def _builtin(params: Dict[str, Any]) -> Callable[[], Any]:
+    plan, policy = _workload(params)
+    compiled = compile_policy(policy)
+    return lambda: core.validate_plan(plan, compiled)
+
+
+def _multi(params: Dict[str, Any]) -> Callable[[], Any]:
+    plan, _ = _workload(params)
+    # Three policies sharing their deny patterns, with different bounds
+    policies = [
+        compile_policy(make_policy(patterns=params["patterns"], bounds=bounds))
+        for bounds in (params["bounds"], 10, 20)
+    ]
+    return lambda: core.validate_plan_multi(plan, policies)
+
+
+def _rule(name: str, params: Dict[str, Any]) -> Callable[[], Any]:
+    plan, policy = _workload(params)
+    check_plan = load_rules()[name]
+    return lambda: core.run_rule(name, check_plan, plan, policy)
+
+
+def _opa(params: Dict[str, Any]) -> Callable[[], Any]:
+    plan, policy = _workload(params)
+    return lambda: core.validate_plan(plan, policy, use_opa=True)
+
+
+def _label(params: Dict[str, Any]) -> str:
+    changed = [f"{k}={v}" for k, v in params.items() if DEFAULTS[k] != v]
+    return ",".join(changed) or "default"
+
+
+def _sweep(quick: bool) -> List[Dict[str, Any]]:
+    variants = [dict(DEFAULTS)]
+    for key, values in SWEEPS.items():
+        for value in values:
+            if value == DEFAULTS[key]:
+                continue
+            if quick and key == "steps" and value > QUICK_MAX_STEPS:
+                continue
+            variants.append({**DEFAULTS, key: value})
+    return variants
+
+
+def build_cases(quick: bool = False) -> List[Case]:
+    """
+    Build the benchmark cases.
+
+    Args:
+        quick: Skip the largest plans.
+
+    Returns:
+        The cases. OPA cases are only included when ``opa`` is on the PATH.
+    """
+    cases = []
+    for params in _sweep(quick):
+        name = f"builtin/{_label(params)}"
+        cases.append(Case(name, "builtin", params, partial(_builtin, params)))
+
+    # Multi-policy, rules and OPA only vary the plan size
+    steps_only = [
+        params
+        for params in _sweep(quick)
+        if all(params[k] == v for k, v in DEFAULTS.items() if k != "steps")
+    ]
+    for params in steps_only:
+        cases.append(
+            Case(f"multi/{_label(params)}", "multi", params, partial(_multi, params))
+        )
+    for rule in sorted(load_rules()):
+        for params in steps_only:
+            cases.append(
+                Case(
+                    f"rules/{rule}/{_label(params)}",
+                    "rules",
+                    params,
+                    partial(_rule, rule, params),
+                )
+            )
+
+    if shutil.which("opa"):
+        for params in steps_only:
+            if params["steps"] > QUICK_MAX_STEPS:
+                continue
+            cases.append(
+                Case(f"opa/{_label(params)}", "opa", params, partial(_opa, params))
+            )
+
+    return cases
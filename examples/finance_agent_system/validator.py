@@ -8,16 +8,19 @@ before they are executed, providing a critical security layer.
 import json
 import os
 import subprocess
-import tempfile
 from typing import Any, Dict, Optional, Tuple
 
+from plan_lint import jsonio
 from plan_lint.core import validate_plan
-from plan_lint.loader import is_rego_policy_file, load_policy, load_rego_policy
+from plan_lint.loader import is_rego_policy_file
+from plan_lint.opa import plan_to_opa_input
+from plan_lint.policy_store import PolicyStore
 from plan_lint.types import (
     ErrorCode,
     Plan,
     PlanError,
     PlanStep,
+    Policy,
     Status,
     ValidationResult,
 )
@@ -53,32 +56,24 @@ def direct_opa_evaluation(plan: Plan, rego_policy_path: str) -> ValidationResult
     Returns:
         ValidationResult with the evaluation results
     """
-    # Convert plan to JSON for OPA input
-    plan_json = json.loads(plan.json())
-
-    # Create temporary files for input
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".json", delete=False
-    ) as input_file:
-        json.dump(plan_json, input_file)
-        input_path = input_file.name
+    # Serialise the plan once and pipe it to OPA
+    input_bytes = plan_to_opa_input(plan)
 
     try:
         # Run OPA evaluation
         cmd = [
             "opa",
             "eval",
+            "--stdin-input",
             "-d",
             rego_policy_path,
-            "-i",
-            input_path,
             "data.planlint",  # Request the entire planlint package
         ]
 
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        result = subprocess.run(cmd, input=input_bytes, check=True, capture_output=True)
 
         # Parse the result
-        data = json.loads(result.stdout)
+        data = jsonio.loads(result.stdout)
 
         if "result" in data and len(data["result"]) > 0:
             result_data = data["result"][0]["expressions"][0]["value"]
@@ -133,10 +128,6 @@ def direct_opa_evaluation(plan: Plan, rego_policy_path: str) -> ValidationResult
             ],
             warnings=[],
         )
-    finally:
-        # Clean up temporary file
-        if os.path.exists(input_path):
-            os.unlink(input_path)
 
 
 class PlanValidator:
@@ -147,7 +138,12 @@ class PlanValidator:
     ensuring all operations conform to organizational security policies.
     """
 
-    def __init__(self, policy_path: Optional[str] = None, use_rego: bool = False):
+    def __init__(
+        self,
+        policy_path: Optional[str] = None,
+        use_rego: bool = False,
+        watch: bool = False,
+    ):
         """
         Initialize the plan validator with a policy.
 
@@ -155,8 +151,8 @@ class PlanValidator:
             policy_path: Path to the policy file (YAML or Rego).
                 If None, uses the default.
             use_rego: Whether to explicitly use the Rego policy.
+            watch: Whether to reload the policy when its file changes.
         """
-        self.rego_policy = None
         self.has_opa = is_opa_installed()
 
         # Determine which policy file to use
@@ -170,23 +166,24 @@ class PlanValidator:
         self.is_rego = use_rego or (policy_path and is_rego_policy_file(policy_path))
         self.rego_policy_path = policy_path if self.is_rego else None
 
-        # Load the policy and rego_policy (if applicable)
-        policy_obj, rego_policy_str = load_policy(policy_path)
-        self.policy = policy_obj  # Always a Policy object
+        # Load the policy; the store keeps it compiled and swaps in new versions
+        self.store = PolicyStore(policy_path)
+        if watch:
+            self.store.start()
 
-        if self.is_rego:
-            # Use the rego policy string returned or load it explicitly
-            self.rego_policy = rego_policy_str
+        # If OPA is not available, log a warning
+        if self.is_rego and not self.has_opa:
+            print("Warning: OPA is not installed. Falling back to built-in validation.")
 
-            # If rego_policy is still None, explicitly load it (fallback)
-            if self.rego_policy is None and os.path.exists(policy_path):
-                self.rego_policy = load_rego_policy(policy_path)
+    @property
+    def policy(self) -> Policy:
+        """The active policy."""
+        return self.store.current.policy
 
-            # If OPA is not available, log a warning
-            if not self.has_opa:
-                print(
-                    "Warning: OPA is not installed. Falling back to built-in validation."
-                )
+    @property
+    def rego_policy(self) -> Optional[str]:
+        """The active Rego policy, if the policy is a Rego file."""
+        return self.store.current.rego_policy if self.is_rego else None
 
     def validate_plan_json(self, plan_json: str) -> Dict[str, Any]:
         """
@@ -200,7 +197,7 @@ class PlanValidator:
         """
         try:
             # Parse JSON
-            plan_data = json.loads(plan_json)
+            plan_data = jsonio.loads(plan_json)
 
             # Create a Plan object
             return self.validate_plan_dict(plan_data)
@@ -255,6 +252,9 @@ class PlanValidator:
                 meta=plan_data.get("meta", {}),
             )
 
+            # Use one policy version for the whole validation
+            snapshot = self.store.current
+
             # Determine how to validate the plan
             if self.is_rego and self.has_opa and self.rego_policy_path:
                 # Use direct OPA evaluation for Rego policies
@@ -263,15 +263,15 @@ class PlanValidator:
                 # Use the plan-lint validation method (built-in or OPA)
                 validation_result = validate_plan(
                     plan,
-                    self.policy,
-                    rego_policy=self.rego_policy,
+                    snapshot.compiled,
+                    rego_policy=snapshot.rego_policy if self.is_rego else None,
                     use_opa=False,  # Always use built-in validation through plan-lint
                 )
 
             # Format the result
             result = {
                 "valid": validation_result.status != Status.ERROR
-                and validation_result.risk_score < self.policy.fail_risk_threshold,
+                and validation_result.risk_score < snapshot.policy.fail_risk_threshold,
                 "status": validation_result.status,
                 "risk_score": validation_result.risk_score,
                 "errors": [
@@ -1,7 +1,13 @@
 """Plan-Lint - Static analysis toolkit for LLM agent plans."""
 
-from plan_lint.core import validate_plan
-from plan_lint.types import PlanError, ValidationResult
+from plan_lint.core import validate_plan, validate_plan_multi
+from plan_lint.types import MultiValidationResult, PlanError, ValidationResult
 
 __version__ = "0.0.4"
-__all__ = ["validate_plan", "ValidationResult", "PlanError"]
+__all__ = [
+    "validate_plan",
+    "validate_plan_multi",
+    "ValidationResult",
+    "MultiValidationResult",
+    "PlanError",
+]
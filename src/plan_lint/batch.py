@@ -0,0 +1,147 @@
+"""
+Batch validation module for plan-linter.
+
+This module provides checks that operate across many plans at once. Numeric
+range bounds are gathered into one column per bound and compared in a single
+vectorised pass when NumPy is installed; otherwise an equivalent pure Python
+path is used. Both paths produce exactly the same errors as running
+``check_bounds`` step by step.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from plan_lint.bounds import CompiledBound
+from plan_lint.compiler import get_bounds_index
+from plan_lint.types import ErrorCode, Plan, PlanError
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None  # type: ignore[assignment]
+
+# Integers beyond this magnitude cannot be represented exactly as float64, so
+# columns containing them are compared in Python instead.
+_MAX_EXACT_INT = 2**53
+
+HAS_NUMPY = np is not None
+
+
+class _BoundColumn:
+    """Values gathered across a batch for a single constant-range bound."""
+
+    def __init__(self, bound: CompiledBound):
+        assert bound.simple is not None
+        self.bound = bound
+        self.min_val, self.max_val = bound.simple
+        self.values: List[Any] = []
+        self.plan_indices: List[int] = []
+        self.step_indices: List[int] = []
+        self.exact = True
+
+    def add(self, value: Any, plan_idx: int, step_idx: int) -> None:
+        self.values.append(value)
+        self.plan_indices.append(plan_idx)
+        self.step_indices.append(step_idx)
+        if type(value) is int and not -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+            self.exact = False
+
+    def violations(self, use_numpy: bool) -> List[int]:
+        """Return the positions of all values outside the bound."""
+        if not self.values:
+            return []
+
+        if use_numpy and self.exact:
+            column = np.asarray(self.values, dtype=np.float64)
+            mask = (column < self.min_val) | (column > self.max_val)
+            return np.flatnonzero(mask).tolist()  # type: ignore[no-any-return]
+
+        return [
+            pos
+            for pos, value in enumerate(self.values)
+            if value < self.min_val or value > self.max_val
+        ]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def check_bounds_batch(
+    plans: Sequence[Plan],
+    bounds: Dict[str, Any],
+    use_numpy: Optional[bool] = None,
+) -> List[List[PlanError]]:
+    """
+    Check argument bounds for every step of every plan in a batch.
+
+    Constant ``[min, max]`` bounds on top-level arguments are vectorised; any
+    other bound expressions are evaluated per step as they are gathered.
+
+    Args:
+        plans: The plans to check.
+        bounds: Dictionary mapping bound keys to bound values.
+        use_numpy: Force (True) or disable (False) the NumPy path. Defaults to
+            using NumPy whenever it is installed.
+
+    Returns:
+        A list with one entry per plan, each holding the bounds errors for that
+        plan in the same order ``check_bounds`` would report them.
+    """
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+    elif use_numpy and not HAS_NUMPY:
+        raise ImportError("NumPy is required for vectorised bounds checking")
+
+    index = get_bounds_index(bounds)
+    if not index:
+        return [[] for _ in plans]
+
+    columns: Dict[int, _BoundColumn] = {}
+    # Per plan: (step index, bound order, sequence, message, argument)
+    found: List[List[Tuple[int, int, int, str, str]]] = [[] for _ in plans]
+
+    # Gather every numeric value each simple bound applies to
+    for plan_idx, plan in enumerate(plans):
+        context = plan.context or {}
+        for step_idx, step in enumerate(plan.steps):
+            for bound in index.for_tool(step.tool):
+                if bound.simple is None:
+                    for seq, message in enumerate(bound.evaluate(step.args, context)):
+                        found[plan_idx].append(
+                            (step_idx, bound.order, seq, message, bound.arg)
+                        )
+                    continue
+
+                value = step.args.get(bound.selector)
+                if _is_number(value):
+                    column = columns.get(id(bound))
+                    if column is None:
+                        column = columns[id(bound)] = _BoundColumn(bound)
+                    column.add(value, plan_idx, step_idx)
+
+    # Evaluate each column and map violations back to (plan, step). The
+    # messages come from the bound's own check, so they read exactly as in
+    # per-plan validation, e.g. keeping the bound as written in the policy.
+    for column in columns.values():
+        bound = column.bound
+        for pos in column.violations(use_numpy):
+            plan_idx = column.plan_indices[pos]
+            step_idx = column.step_indices[pos]
+            plan = plans[plan_idx]
+            messages = bound.evaluate(plan.steps[step_idx].args, plan.context or {})
+            for seq, message in enumerate(messages):
+                found[plan_idx].append((step_idx, bound.order, seq, message, bound.arg))
+
+    results: List[List[PlanError]] = []
+    for plan_found in found:
+        plan_found.sort(key=lambda item: item[:3])
+        results.append(
+            [
+                PlanError(
+                    step=step_idx, code=ErrorCode.BOUND_VIOLATION, msg=message, arg=arg
+                )
+                for step_idx, _, _, message, arg in plan_found
+            ]
+        )
+
+    return results
@@ -0,0 +1,650 @@
+"""
+Bound expressions for plan-linter.
+
+This module parses the ``bounds`` section of a policy into evaluators that are
+built once and reused for every step of every plan.
+
+A bound key is a tool name followed by a selector into that tool's arguments,
+for example ``payments.transfer.amount`` or ``orders.create.items[*].qty``.
+Since tool names may contain dots, a key applies to a step whenever it equals
+``<step.tool>.<selector>``.
+
+A bound value can be:
+
+- ``[min, max]``: an inclusive numeric range (the original format).
+- An interval string such as ``"(0, 100]"`` or ``"[0, context.daily_limit]"``.
+  Either side may be left empty to leave it unbounded.
+- A comparison string such as ``"<= context.daily_limit"``.
+- A mapping with any of ``min``, ``max``, ``exclusive_min``, ``exclusive_max``,
+  ``range``, ``enum``, ``min_len`` and ``max_len``.
+
+Range limits may be numbers or arithmetic expressions over other arguments and
+the plan context, e.g. ``args.balance * 0.5`` or ``context.daily_limit - 10``.
+"""
+
+import operator
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Evaluates an operand against (args, context); None means "not resolvable"
+Operand = Callable[[Dict[str, Any], Dict[str, Any]], Optional[float]]
+
+# Checks one selected value; returns a violation message or None
+ValueCheck = Callable[[str, Any, Dict[str, Any], Dict[str, Any]], Optional[str]]
+
+_MISSING = object()
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op>[()\[\].+\-*/]))"
+)
+_NUMBER_RE = re.compile(r"^-?\d+(\.\d*)?$")
+_SELECTOR_RE = re.compile(r"([^.\[\]]+)|\[(\*|-?\d+)\]|\.")
+_COMPARISON_RE = re.compile(r"^\s*(<=|>=|<|>)\s*(.+?)\s*$")
+_INTERVAL_RE = re.compile(r"^\s*([\[(])([^,]*),([^,]*)([\])])\s*$")
+
+_BINARY_OPS: Dict[str, Callable[[float, float], float]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+_MAPPING_KEYS = {
+    "min",
+    "max",
+    "exclusive_min",
+    "exclusive_max",
+    "range",
+    "enum",
+    "min_len",
+    "max_len",
+}
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+# ---------------------------------------------------------------------------
+# Selectors
+# ---------------------------------------------------------------------------
+
+
+def parse_selector(selector: str) -> List[Any]:
+    """
+    Parse a JSONPath-lite selector into a list of segments.
+
+    Args:
+        selector: A selector such as ``amount``, ``payee.country`` or
+            ``items[*].qty``.
+
+    Returns:
+        A list of segments: strings for keys, ints for list indices and
+        ``"*"`` for list wildcards (stored as ``None``).
+
+    Raises:
+        ValueError: If the selector is malformed.
+    """
+    segments: List[Any] = []
+    pos = 0
+    expect_key = True
+    while pos < len(selector):
+        match = _SELECTOR_RE.match(selector, pos)
+        if match is None:
+            raise ValueError(f"Invalid selector '{selector}'")
+        key, index = match.group(1), match.group(2)
+        if key is not None:
+            if not expect_key:
+                raise ValueError(f"Invalid selector '{selector}'")
+            segments.append(key)
+            expect_key = False
+        elif index is not None:
+            if not segments:
+                raise ValueError(f"Invalid selector '{selector}'")
+            segments.append(None if index == "*" else int(index))
+            expect_key = False
+        else:
+            if expect_key:
+                raise ValueError(f"Invalid selector '{selector}'")
+            expect_key = True
+        pos = match.end()
+
+    if not segments or expect_key:
+        raise ValueError(f"Invalid selector '{selector}'")
+    return segments
+
+
+def _select(segments: List[Any], obj: Any, path: str) -> Iterator[Tuple[str, Any]]:
+    """Yield (path, value) pairs for every value a selector reaches."""
+    if not segments:
+        yield path, obj
+        return
+
+    segment, rest = segments[0], segments[1:]
+    if isinstance(segment, str):
+        if isinstance(obj, dict) and segment in obj:
+            child_path = f"{path}.{segment}" if path else segment
+            yield from _select(rest, obj[segment], child_path)
+    elif segment is None:
+        if isinstance(obj, list):
+            for i, item in enumerate(obj):
+                yield from _select(rest, item, f"{path}[{i}]")
+    elif isinstance(obj, list) and -len(obj) <= segment < len(obj):
+        yield from _select(rest, obj[segment], f"{path}[{segment}]")
+
+
+def _compile_selector(
+    selector: str,
+) -> Callable[[Dict[str, Any]], List[Tuple[str, Any]]]:
+    """Build a function returning the (path, value) pairs a selector reaches."""
+    segments = parse_selector(selector)
+
+    if len(segments) == 1:
+        # Fast path for plain top-level arguments
+        name = segments[0]
+
+        def select_arg(args: Dict[str, Any]) -> List[Tuple[str, Any]]:
+            value = args.get(name, _MISSING)
+            return [] if value is _MISSING else [(name, value)]
+
+        return select_arg
+
+    def select_path(args: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        return list(_select(segments, args, ""))
+
+    return select_path
+
+
+# ---------------------------------------------------------------------------
+# Expressions
+# ---------------------------------------------------------------------------
+
+
+class _ExpressionParser:
+    """Recursive descent parser for bound limit expressions."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    def _tokenize(self, text: str) -> List[Tuple[str, str]]:
+        tokens = []
+        pos = 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if match is None or match.end() == pos:
+                raise ValueError(f"Invalid bound expression '{self.text}'")
+            kind = match.lastgroup or ""
+            tokens.append((kind, match.group(kind)))
+            pos = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][1]
+        return None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ValueError(f"Unexpected end of bound expression '{self.text}'")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> Operand:
+        operand = self._expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Invalid bound expression '{self.text}'")
+        return operand
+
+    def _expr(self) -> Operand:
+        left = self._term()
+        while self._peek() in ("+", "-"):
+            left = _binary(_BINARY_OPS[self._next()[1]], left, self._term())
+        return left
+
+    def _term(self) -> Operand:
+        left = self._factor()
+        while self._peek() in ("*", "/"):
+            left = _binary(_BINARY_OPS[self._next()[1]], left, self._factor())
+        return left
+
+    def _factor(self) -> Operand:
+        kind, value = self._next()
+        if kind == "num":
+            return _constant(float(value) if not value.isdigit() else int(value))
+        if value == "-":
+            return _binary(operator.sub, _constant(0), self._factor())
+        if value == "(":
+            inner = self._expr()
+            if self._next()[1] != ")":
+                raise ValueError(f"Unbalanced parentheses in '{self.text}'")
+            return inner
+        if kind == "name" and value in ("args", "context"):
+            return self._reference(value)
+        raise ValueError(f"Invalid bound expression '{self.text}'")
+
+    def _reference(self, root: str) -> Operand:
+        segments: List[Any] = []
+        while self._peek() in (".", "["):
+            if self._next()[1] == ".":
+                kind, name = self._next()
+                if kind != "name":
+                    raise ValueError(f"Invalid reference in '{self.text}'")
+                segments.append(name)
+            else:
+                kind, index = self._next()
+                if kind != "num" or not index.isdigit() or self._next()[1] != "]":
+                    raise ValueError(f"Invalid reference in '{self.text}'")
+                segments.append(int(index))
+        if not segments:
+            raise ValueError(f"Invalid reference in '{self.text}'")
+        return _reference(root, segments)
+
+
+def _constant(value: float) -> Operand:
+    def constant(args: Dict[str, Any], context: Dict[str, Any]) -> Optional[float]:
+        return value
+
+    return constant
+
+
+def _binary(
+    func: Callable[[float, float], float], left: Operand, right: Operand
+) -> Operand:
+    def binary(args: Dict[str, Any], context: Dict[str, Any]) -> Optional[float]:
+        lhs = left(args, context)
+        rhs = right(args, context)
+        if lhs is None or rhs is None:
+            return None
+        try:
+            return func(lhs, rhs)
+        except ZeroDivisionError:
+            return None
+
+    return binary
+
+
+def _reference(root: str, segments: List[Any]) -> Operand:
+    use_args = root == "args"
+
+    def reference(args: Dict[str, Any], context: Dict[str, Any]) -> Optional[float]:
+        value: Any = args if use_args else context
+        for segment in segments:
+            try:
+                value = value[segment]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return value if _is_number(value) else None
+
+    return reference
+
+
+def parse_expression(text: str) -> Operand:
+    """
+    Parse a bound limit expression into an evaluator.
+
+    Args:
+        text: An expression such as ``100``, ``context.daily_limit`` or
+            ``args.balance * 0.5``.
+
+    Returns:
+        A function of (args, context) returning the numeric value, or None if a
+        referenced value is missing or not a number.
+
+    Raises:
+        ValueError: If the expression is malformed.
+    """
+    return _ExpressionParser(str(text)).parse()
+
+
+# ---------------------------------------------------------------------------
+# Constraints
+# ---------------------------------------------------------------------------
+
+
+class _Limit:
+    """One side of a range: a constant or an expression plus its display text."""
+
+    def __init__(self, spec: Any):
+        if isinstance(spec, bool):
+            raise ValueError(f"Invalid bound limit {spec!r}")
+        self.text = str(spec).strip()
+        self.constant: Optional[float] = None
+        if _is_number(spec):
+            self.constant = spec
+        elif _NUMBER_RE.match(self.text):
+            self.constant = float(self.text) if "." in self.text else int(self.text)
+
+        if self.constant is not None:
+            self.evaluate = _constant(self.constant)
+        else:
+            self.evaluate = parse_expression(self.text)
+
+    def describe(self, value: Optional[float]) -> str:
+        if self.constant is not None:
+            return self.text
+        return f"{self.text} ({value})"
+
+
+def _range_check(
+    low: Optional[_Limit],
+    high: Optional[_Limit],
+    exclusive_low: bool = False,
+    exclusive_high: bool = False,
+) -> ValueCheck:
+    """Build a numeric range check."""
+    left = "(" if exclusive_low or low is None else "["
+    right = ")" if exclusive_high or high is None else "]"
+
+    def check(
+        path: str, value: Any, args: Dict[str, Any], context: Dict[str, Any]
+    ) -> Optional[str]:
+        if not _is_number(value):
+            return None
+
+        low_val = low.evaluate(args, context) if low is not None else None
+        high_val = high.evaluate(args, context) if high is not None else None
+        try:
+            too_low = low_val is not None and (
+                value <= low_val if exclusive_low else value < low_val
+            )
+            too_high = high_val is not None and (
+                value >= high_val if exclusive_high else value > high_val
+            )
+        except TypeError:
+            return None
+
+        if not (too_low or too_high):
+            return None
+
+        low_text = low.describe(low_val) if low is not None else "-inf"
+        high_text = high.describe(high_val) if high is not None else "inf"
+        return (
+            f"Argument '{path}' value {value} is outside bounds "
+            f"{left}{low_text}, {high_text}{right}"
+        )
+
+    return check
+
+
+def _enum_check(allowed: List[Any]) -> ValueCheck:
+    try:
+        allowed_set: Any = frozenset(allowed)
+    except TypeError:
+        allowed_set = list(allowed)
+
+    def check(
+        path: str, value: Any, args: Dict[str, Any], context: Dict[str, Any]
+    ) -> Optional[str]:
+        try:
+            if value in allowed_set:
+                return None
+        except TypeError:
+            pass
+        return f"Argument '{path}' value {value!r} is not one of {allowed!r}"
+
+    return check
+
+
+def _length_check(min_len: Optional[int], max_len: Optional[int]) -> ValueCheck:
+    low = "-inf" if min_len is None else str(min_len)
+    high = "inf" if max_len is None else str(max_len)
+
+    def check(
+        path: str, value: Any, args: Dict[str, Any], context: Dict[str, Any]
+    ) -> Optional[str]:
+        if not isinstance(value, (str, list, dict)):
+            return None
+        length = len(value)
+        if (min_len is not None and length < min_len) or (
+            max_len is not None and length > max_len
+        ):
+            return (
+                f"Argument '{path}' length {length} is outside bounds "
+                f"[{low}, {high}]"
+            )
+        return None
+
+    return check
+
+
+def _parse_interval(text: str) -> ValueCheck:
+    match = _INTERVAL_RE.match(text)
+    if match is None:
+        raise ValueError(f"Invalid interval '{text}'")
+    left, low, high, right = match.groups()
+    return _range_check(
+        _Limit(low) if low.strip() else None,
+        _Limit(high) if high.strip() else None,
+        exclusive_low=left == "(",
+        exclusive_high=right == ")",
+    )
+
+
+def _parse_string(text: str) -> ValueCheck:
+    comparison = _COMPARISON_RE.match(text)
+    if comparison is None:
+        return _parse_interval(text)
+
+    op, limit = comparison.groups()
+    if op in ("<", "<="):
+        return _range_check(None, _Limit(limit), exclusive_high=op == "<")
+    return _range_check(_Limit(limit), None, exclusive_low=op == ">")
+
+
+def _parse_mapping(spec: Dict[str, Any]) -> List[ValueCheck]:
+    unknown = set(spec) - _MAPPING_KEYS
+    if unknown:
+        raise ValueError(f"Unknown bound options: {', '.join(sorted(unknown))}")
+
+    checks: List[ValueCheck] = []
+    if "range" in spec:
+        checks.append(_parse_interval(str(spec["range"])))
+    if "min" in spec or "max" in spec:
+        checks.append(
+            _range_check(
+                _Limit(spec["min"]) if spec.get("min") is not None else None,
+                _Limit(spec["max"]) if spec.get("max") is not None else None,
+                exclusive_low=bool(spec.get("exclusive_min", False)),
+                exclusive_high=bool(spec.get("exclusive_max", False)),
+            )
+        )
+    if "enum" in spec:
+        if not isinstance(spec["enum"], list):
+            raise ValueError("Bound 'enum' must be a list")
+        checks.append(_enum_check(spec["enum"]))
+    if "min_len" in spec or "max_len" in spec:
+        lengths = [spec.get("min_len"), spec.get("max_len")]
+        if any(v is not None and not isinstance(v, int) for v in lengths):
+            raise ValueError("Bound 'min_len' and 'max_len' must be integers")
+        checks.append(_length_check(lengths[0], lengths[1]))
+    return checks
+
+
+class CompiledBound:
+    """A single bound compiled into evaluator closures."""
+
+    def __init__(
+        self,
+        key: str,
+        selector: str,
+        order: int,
+        checks: List[ValueCheck],
+        simple: Optional[Tuple[float, float]] = None,
+    ):
+        self.key = key
+        self.selector = selector
+        self.order = order
+        self.checks = checks
+        self.select = _compile_selector(selector)
+        # Top-level argument the selector starts from
+        self.arg: str = parse_selector(selector)[0]
+        # (min, max) for constant inclusive ranges on a top-level argument,
+        # which batch evaluation can vectorise
+        self.simple = simple if "." not in selector and "[" not in selector else None
+
+    def evaluate(
+        self, args: Dict[str, Any], context: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """
+        Evaluate the bound against a step's arguments.
+
+        Args:
+            args: The step arguments.
+            context: The plan context, used by expressions referencing it.
+
+        Returns:
+            Violation messages; empty if the bound is satisfied.
+        """
+        messages = []
+        ctx = context or {}
+        for path, value in self.select(args):
+            for check in self.checks:
+                message = check(path, value, args, ctx)
+                if message is not None:
+                    messages.append(message)
+        return messages
+
+
+ParsedSpec = Tuple[List[ValueCheck], Optional[Tuple[float, float]]]
+
+
+class BoundsIndex:
+    """Compiled bounds indexed by tool name."""
+
+    def __init__(
+        self,
+        bounds: Dict[str, Any],
+        parse_spec: Optional[Callable[[str, Any], ParsedSpec]] = None,
+    ):
+        """
+        Compile a bounds mapping.
+
+        Args:
+            bounds: Dictionary mapping bound keys to bound values.
+            parse_spec: Optional replacement for the function parsing a bound
+                value into checks, such as a cached one that shares the checks
+                between policies.
+        """
+        self.bounds: List[CompiledBound] = []
+        self._by_tool: Dict[str, List[CompiledBound]] = {}
+        parse = parse_spec or parse_bound_spec
+
+        for order, (key, spec) in enumerate(bounds.items()):
+            checks, simple = parse(key, spec)
+            if not checks:
+                continue
+            # Register the bound under every possible tool/selector split
+            for pos in _split_points(key):
+                tool, selector = key[:pos], key[pos + 1 :]
+                try:
+                    parse_selector(selector)
+                except ValueError:
+                    continue
+                bound = CompiledBound(key, selector, order, checks, simple)
+                self.bounds.append(bound)
+                self._by_tool.setdefault(tool, []).append(bound)
+
+    def for_tool(self, tool: str) -> List[CompiledBound]:
+        """Return the bounds that apply to steps using the given tool."""
+        return self._by_tool.get(tool, [])
+
+    def simple_ranges(self) -> Dict[str, Dict[str, Tuple[float, float]]]:
+        """
+        Return the constant ``[min, max]`` ranges on top-level arguments.
+
+        Returns:
+            A mapping of tool name to argument name to (min, max).
+        """
+        ranges: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        for tool, bounds in self._by_tool.items():
+            for bound in bounds:
+                if bound.simple is not None:
+                    ranges.setdefault(tool, {})[bound.selector] = bound.simple
+        return ranges
+
+    def without_simple(self) -> "BoundsIndex":
+        """
+        Return an index of the bounds not covered by ``simple_ranges``.
+
+        Returns:
+            A BoundsIndex holding the expression, enum, length, mapping and
+            nested-selector bounds.
+        """
+        index = BoundsIndex({})
+        for tool, bounds in self._by_tool.items():
+            rest = [bound for bound in bounds if bound.simple is None]
+            if rest:
+                index._by_tool[tool] = rest
+                index.bounds.extend(rest)
+        return index
+
+    def __bool__(self) -> bool:
+        return bool(self.bounds)
+
+
+def _split_points(key: str) -> List[int]:
+    """Positions of the dots at which a key may split into tool and selector."""
+    end = key.find("[")
+    head = key if end == -1 else key[:end]
+    return [i for i, char in enumerate(head) if char == "." and 0 < i < len(key) - 1]
+
+
+def parse_bound_spec(key: str, spec: Any) -> ParsedSpec:
+    """
+    Parse a bound value into checks, plus its constant range if simple.
+
+    Args:
+        key: The bound key, for error messages.
+        spec: The bound value.
+
+    Returns:
+        A tuple of (checks, (min, max) or None). Lists shorter than two items
+        give no checks.
+
+    Raises:
+        ValueError: If the bound value cannot be parsed.
+    """
+    try:
+        if isinstance(spec, (list, tuple)):
+            # Original format: inclusive [min, max]; short lists are ignored
+            if len(spec) < 2:
+                return [], None
+            low, high = _Limit(spec[0]), _Limit(spec[1])
+            simple = None
+            if low.constant is not None and high.constant is not None:
+                simple = (low.constant, high.constant)
+            return [_range_check(low, high)], simple
+        if isinstance(spec, str):
+            return [_parse_string(spec)], None
+        if isinstance(spec, dict):
+            return _parse_mapping(spec), None
+    except ValueError as e:
+        raise ValueError(f"Invalid bound for '{key}': {e}") from e
+
+    raise ValueError(f"Invalid bound for '{key}': {spec!r}")
+
+
+def compile_bounds(
+    bounds: Dict[str, Any],
+    parse_spec: Optional[Callable[[str, Any], ParsedSpec]] = None,
+) -> BoundsIndex:
+    """
+    Compile a policy's bounds section.
+
+    Args:
+        bounds: Dictionary mapping bound keys to bound values.
+        parse_spec: Optional replacement for ``parse_bound_spec``.
+
+    Returns:
+        A BoundsIndex for evaluating the bounds against plan steps.
+
+    Raises:
+        ValueError: If a bound value cannot be parsed.
+    """
+    return BoundsIndex(bounds, parse_spec)
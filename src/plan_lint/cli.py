@@ -5,26 +5,83 @@ This module provides the main CLI entry point for the tool.
 """
 
 import importlib
+import logging
 import os
 import sys
-from typing import Callable, Dict, Optional
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+)
 
 import typer
 from rich.console import Console
+from typer.core import TyperGroup
 
-from plan_lint import core
-from plan_lint.loader import is_rego_policy_file, load_plan, load_policy
+from plan_lint import core, jsonio, policy_cache, policy_check, tracing
+from plan_lint.loader import (
+    load_plan,
+    load_plan_bytes,
+    load_plan_with_source_map,
+    load_policy_file,
+)
+from plan_lint.profiling import Collector, MemoryProfiler, ProfileAggregator
 from plan_lint.reporters import cli as cli_reporter
 from plan_lint.reporters import json as json_reporter
-from plan_lint.types import Status, ValidationResult
+from plan_lint.reporters import ndjson as ndjson_reporter
+from plan_lint.reporters import sarif as sarif_reporter
+from plan_lint.sourcemap import SourceMap, scan_source_map
+from plan_lint.stats import CorpusStats
+from plan_lint.types import (
+    ErrorCode,
+    Plan,
+    PlanError,
+    Policy,
+    Status,
+    ValidationMode,
+    ValidationResult,
+)
+
+DEFAULT_COMMAND = "lint"
+
+# Plans per task handed to a stats worker process
+_STATS_CHUNK_SIZE = 500
+
+
+class _DefaultCommandGroup(TyperGroup):
+    """Runs the lint command when no subcommand is named."""
+
+    def parse_args(self, ctx: Any, args: List[str]) -> List[str]:
+        if args and args[0] not in self.commands and args[0] not in ("--help",):
+            args = [DEFAULT_COMMAND, *args]
+        return super().parse_args(ctx, args)
+
 
 # Initialize the CLI app
 app = typer.Typer(
     name="plan-lint",
     help="A static analysis toolkit for LLM agent plans",
     add_completion=False,
+    cls=_DefaultCommandGroup,
 )
 
+policy_app = typer.Typer(help="Inspect policy files", no_args_is_help=True)
+app.add_typer(policy_app, name="policy")
+
 console = Console()
 
 
@@ -56,9 +113,290 @@ def load_rules() -> Dict[str, Callable]:
     return rules
 
 
-@app.command(name="")
+@contextmanager
+def _memory_profiling(enabled: bool) -> Iterator[None]:
+    """Trace phases with a MemoryProfiler and report it, if enabled."""
+    if not enabled:
+        yield
+        return
+
+    profiler = MemoryProfiler()
+    previous = tracing.get_tracer()
+    tracing.set_tracer(profiler)
+    try:
+        yield
+    finally:
+        tracing.set_tracer(previous)
+        profiler.stop()
+        profiler.report()
+
+
+def _lint(
+    plan: Plan,
+    policy_obj: Policy,
+    rego_policy: Optional[str],
+    use_opa: bool,
+    mode: ValidationMode,
+    rules: Dict[str, Callable],
+    collector: Optional[Collector],
+    opa_input: Optional[bytes] = None,
+) -> ValidationResult:
+    """Validate a loaded plan and run the rule plugins over it."""
+    # Validate the plan
+    if rego_policy or use_opa:
+        # Use OPA validation, sending it the plan file's bytes when available
+        base_result = core.validate_plan(
+            plan,
+            policy_obj,
+            rego_policy,
+            use_opa=True,
+            collector=collector,
+            opa_input=opa_input,
+        )
+    else:
+        # Use built-in validation
+        base_result = core.validate_plan(
+            plan, policy_obj, mode=mode, collector=collector
+        )
+
+    # Apply additional rules, unless a fail-fast mode can already stop
+    all_errors = list(base_result.errors)
+    tracker = core.FailFastTracker(mode, policy_obj)
+    tracker.add(all_errors)
+
+    for rule_name, check_plan in rules.items():
+        if tracker.stopped:
+            break
+        try:
+            rule_errors = core.run_rule(
+                rule_name, check_plan, plan, policy_obj, collector
+            )
+            all_errors.extend(rule_errors)
+            tracker.add(rule_errors)
+        except Exception as e:
+            console.print(f"[yellow]Warning: Rule {rule_name} failed: {e}[/]")
+
+    # Calculate final risk score
+    risk_score = core.calculate_risk_score(
+        all_errors, base_result.warnings, policy_obj.risk_weights
+    )
+
+    # Determine final status
+    status = Status.PASS
+    if all_errors:
+        status = Status.ERROR
+    elif base_result.warnings:
+        status = Status.WARN
+
+    # Override status based on risk threshold
+    if risk_score >= policy_obj.fail_risk_threshold:
+        status = Status.ERROR
+
+    # Create the final result
+    return ValidationResult(
+        status=status,
+        risk_score=risk_score,
+        errors=all_errors,
+        warnings=base_result.warnings,
+    )
+
+
+class _Linter:
+    """Loads plans and lints them against a policy loaded once."""
+
+    def __init__(
+        self,
+        policy_obj: Policy,
+        rego_policy: Optional[str],
+        use_opa: bool,
+        mode: ValidationMode,
+        rules: Dict[str, Callable],
+        collector: Optional[Collector],
+    ):
+        self.policy_obj = policy_obj
+        self.rego_policy = rego_policy
+        self.use_opa = use_opa
+        self.mode = mode
+        self.rules = rules
+        self.collector = collector
+
+    def load(
+        self, plan_file: str, with_source_map: bool = False
+    ) -> Tuple[Plan, Optional[SourceMap], Optional[bytes]]:
+        """
+        Load a plan file.
+
+        Returns:
+            A tuple of (plan, source_map, data). The file's bytes are kept only
+            when linting with OPA, which receives them as they are.
+        """
+        if self.use_opa:
+            plan, data = load_plan_bytes(plan_file)
+            source_map = (
+                scan_source_map(data.decode("utf-8")) if with_source_map else None
+            )
+            return plan, source_map, data
+        if with_source_map:
+            plan, source_map = load_plan_with_source_map(plan_file)
+            return plan, source_map, None
+        return load_plan(plan_file), None, None
+
+    def __call__(
+        self, plan: Plan, opa_input: Optional[bytes] = None
+    ) -> ValidationResult:
+        return _lint(
+            plan,
+            self.policy_obj,
+            self.rego_policy,
+            self.use_opa,
+            self.mode,
+            self.rules,
+            self.collector,
+            opa_input,
+        )
+
+
+def _make_linter(
+    policy_file: Optional[str],
+    policy_type: str,
+    fail_risk: float,
+    use_opa: bool,
+    mode: ValidationMode,
+    collector: Optional[Collector] = None,
+) -> Tuple[Policy, _Linter]:
+    """
+    Load a policy and the rule plugins once.
+
+    Returns:
+        A tuple of (policy, lint), where ``lint`` loads and validates plans.
+    """
+    # Load the policy, from the on-disk cache if PLAN_LINT_POLICY_CACHE is set.
+    # The file is read once and its format detected from what was read.
+    is_rego = False
+    policy_obj, rego_policy = Policy(), None
+    if policy_file:
+        policy_format = policy_type.lower()
+        loaded = load_policy_file(
+            policy_file,
+            cache=policy_cache.from_environment(),
+            policy_format=None if policy_format == "auto" else policy_format,
+        )
+        policy_obj, rego_policy, is_rego = (
+            loaded.policy,
+            loaded.rego_policy,
+            loaded.is_rego,
+        )
+    policy_obj.fail_risk_threshold = fail_risk
+
+    # Load rules
+    rules = load_rules()
+
+    return policy_obj, _Linter(
+        policy_obj, rego_policy, is_rego or use_opa, mode, rules, collector
+    )
+
+
+def _set_result_attributes(lint_span: tracing.Span, result: ValidationResult) -> None:
+    if lint_span.is_recording:
+        lint_span.set_attributes(
+            {
+                "plan_lint.status": result.status.value,
+                "plan_lint.findings": len(result.errors),
+                "plan_lint.risk_score": result.risk_score,
+            }
+        )
+
+
+def _load_failure(error: Exception, policy_obj: Policy) -> ValidationResult:
+    """Return the result reported for a plan that could not be loaded."""
+    errors = [PlanError(code=ErrorCode.SCHEMA_INVALID, msg=str(error))]
+    return ValidationResult(
+        status=Status.ERROR,
+        risk_score=core.calculate_risk_score(errors, [], policy_obj.risk_weights),
+        errors=errors,
+    )
+
+
+def _lint_batch(
+    plan_files: List[str],
+    lint: _Linter,
+    policy_obj: Policy,
+    output_format: str,
+    output_stream: TextIO,
+    compact: bool,
+    progress: bool,
+) -> Status:
+    """
+    Lint several plans, reporting each result as soon as it is available.
+
+    Returns:
+        ERROR if any plan failed, PASS otherwise.
+    """
+    status = Status.PASS
+    json_results: List[Dict[str, Any]] = []
+    writer: Any = None
+    if output_format == "ndjson":
+        writer = ndjson_reporter.NDJSONWriter(output_stream)
+    elif output_format == "sarif":
+        writer = sarif_reporter.SarifLog()
+    elif output_format != "json":
+        writer = cli_reporter.BatchReporter(
+            output_stream,
+            total=len(plan_files),
+            progress_console=(
+                Console(stderr=True) if output_stream is not sys.stdout else None
+            ),
+            show_progress=progress,
+        )
+
+    try:
+        for plan_file in plan_files:
+            plan: Optional[Plan] = None
+            source_map: Optional[SourceMap] = None
+            with tracing.span("plan_lint.lint") as lint_span:
+                try:
+                    plan, source_map, data = lint.load(
+                        plan_file, with_source_map=output_format == "sarif"
+                    )
+                except Exception as e:
+                    result = _load_failure(e, policy_obj)
+                else:
+                    result = lint(plan, data)
+                    del data
+                _set_result_attributes(lint_span, result)
+
+                with tracing.span("plan_lint.report"):
+                    if output_format == "json":
+                        json_results.append(
+                            {"plan": plan_file, **json_reporter.to_dict(result)}
+                        )
+                    elif output_format == "ndjson":
+                        writer.write(result, plan=plan_file)
+                    elif output_format == "sarif":
+                        writer.add(result, plan_file, source_map)
+                    else:
+                        writer.add(result, plan_file, plan)
+
+            if result.status == Status.ERROR:
+                status = Status.ERROR
+    finally:
+        if isinstance(writer, cli_reporter.BatchReporter):
+            writer.finish()
+
+    if output_format == "json":
+        output_stream.write(
+            jsonio.dumps(json_results, indent=None if compact else 2).decode("utf-8")
+        )
+    elif output_format == "sarif":
+        writer.write(output_stream, indent=None if compact else 2)
+    return status
+
+
+@app.command(name=DEFAULT_COMMAND)
 def lint_plan(
-    plan_file: str = typer.Argument(..., help="Path to the plan JSON file"),
+    plan_files: List[str] = typer.Argument(  # noqa: B008
+        ..., help="Path to the plan JSON file, or several plans to lint as a batch"
+    ),
     policy_file: Optional[str] = typer.Option(
         None, "--policy", "-p", help="Path to the policy file (YAML or Rego)"
     ),
@@ -66,13 +404,13 @@ def lint_plan(
         "auto",
         "--policy-type",
         "-t",
-        help="Policy type: 'yaml', 'rego', or 'auto' (detect automatically)",
+        help="Policy type: 'yaml', 'json', 'rego', or 'auto' (detect automatically)",
     ),
     schema_file: Optional[str] = typer.Option(
         None, "--schema", "-s", help="Path to the JSON schema file"
     ),
     output_format: str = typer.Option(
-        "cli", "--format", "-f", help="Output format (cli or json)"
+        "cli", "--format", "-f", help="Output format (cli, json, ndjson or sarif)"
     ),
     output_file: Optional[str] = typer.Option(
         None, "--output", "-o", help="Path to write output (default: stdout)"
@@ -83,90 +421,326 @@ def lint_plan(
     use_opa: bool = typer.Option(
         False, "--opa", help="Use OPA for validation even for YAML policies"
     ),
+    mode: str = typer.Option(
+        "all",
+        "--mode",
+        "-m",
+        help=(
+            "Validation mode: 'all' reports every finding, 'first_error' stops at "
+            "the first error, 'until_threshold' stops once --fail-risk is reached"
+        ),
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Print per-check and per-rule timings to stderr"
+    ),
+    compact: bool = typer.Option(
+        False, "--compact", help="Write JSON and SARIF output without indentation"
+    ),
+    memory_profile: bool = typer.Option(
+        False,
+        "--memory-profile",
+        help="Print per-phase memory use, measured with tracemalloc, to stderr",
+    ),
+    progress: bool = typer.Option(
+        True,
+        "--progress/--no-progress",
+        help="Show a progress bar when linting several plans in a terminal",
+    ),
 ) -> None:
     """
-    Validate a plan against a policy and schema.
+    Validate plans against a policy and schema.
     """
     try:
-        # Load the plan
-        plan = load_plan(plan_file)
-
-        # Determine policy type if auto
-        is_rego = False
-        if policy_file and policy_type.lower() in ("auto", "rego"):
-            if policy_type.lower() == "rego" or is_rego_policy_file(policy_file):
-                is_rego = True
-
-        # Load the policy
-        policy_obj, rego_policy = load_policy(policy_file)
-        policy_obj.fail_risk_threshold = fail_risk
-
-        # Load rules
-        rules = load_rules()
-
-        # Validate the plan
-        if is_rego or rego_policy or use_opa:
-            # Use OPA validation
-            base_result = core.validate_plan(
-                plan, policy_obj, rego_policy, use_opa=True
+        with _memory_profiling(memory_profile):
+            validation_mode = ValidationMode(mode.lower())
+            output_format = output_format.lower()
+
+            profiler = ProfileAggregator() if profile else None
+            policy_obj, lint = _make_linter(
+                policy_file, policy_type, fail_risk, use_opa, validation_mode, profiler
             )
+
+            output_stream = open(output_file, "w") if output_file else sys.stdout
+            try:
+                if len(plan_files) > 1:
+                    status = _lint_batch(
+                        plan_files,
+                        lint,
+                        policy_obj,
+                        output_format,
+                        output_stream,
+                        compact,
+                        progress,
+                    )
+                else:
+                    with tracing.span("plan_lint.lint") as lint_span:
+                        plan, source_map, data = lint.load(
+                            plan_files[0], with_source_map=output_format == "sarif"
+                        )
+                        result = lint(plan, data)
+                        del data
+                        status = result.status
+                        _set_result_attributes(lint_span, result)
+
+                        # Write the report
+                        with tracing.span("plan_lint.report"):
+                            if output_format == "json":
+                                json_reporter.report(
+                                    result, output_stream, indent=None if compact else 2
+                                )
+                            elif output_format == "ndjson":
+                                ndjson_reporter.report(
+                                    result, output_stream, plan=plan_files[0]
+                                )
+                            elif output_format == "sarif":
+                                sarif_reporter.report(
+                                    result,
+                                    output_stream,
+                                    uri=plan_files[0],
+                                    source_map=source_map,
+                                    indent=None if compact else 2,
+                                )
+                            else:
+                                cli_reporter.report(result, output_stream)
+            finally:
+                if output_file:
+                    output_stream.close()
+
+            if profiler is not None:
+                profiler.report()
+
+        # Exit with appropriate code
+        if status == Status.ERROR:
+            sys.exit(1)
+
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/]")
+        sys.exit(1)
+
+
+def _iter_plan_paths(paths: Iterable[str]) -> Iterator[str]:
+    """Yield plan files, expanding directories to the JSON files inside them."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _add_stats(
+    plan_files: Iterable[str],
+    lint: _Linter,
+    policy_obj: Policy,
+    stats: CorpusStats,
+) -> None:
+    for plan_file in plan_files:
+        plan: Optional[Plan] = None
+        try:
+            plan, _, data = lint.load(plan_file)
+        except Exception as e:
+            result = _load_failure(e, policy_obj)
         else:
-            # Use built-in validation
-            base_result = core.validate_plan(plan, policy_obj)
+            result = lint(plan, data)
+        stats.add(result, plan)
 
-        # Apply additional rules
-        all_errors = list(base_result.errors)
 
-        for rule_name, check_plan in rules.items():
-            try:
-                rule_errors = check_plan(plan, policy_obj)
-                all_errors.extend(rule_errors)
-            except Exception as e:
-                console.print(f"[yellow]Warning: Rule {rule_name} failed: {e}[/]")
-
-        # Calculate final risk score
-        risk_score = core.calculate_risk_score(
-            all_errors, base_result.warnings, policy_obj.risk_weights
-        )
+def _stats_shard(
+    plan_files: List[str],
+    policy_file: Optional[str],
+    policy_type: str,
+    fail_risk: float,
+    use_opa: bool,
+    mode: str,
+) -> Dict[str, Any]:
+    """Compute the statistics of one shard of a corpus, in a worker process."""
+    stats = CorpusStats()
+    policy_obj, lint = _make_linter(
+        policy_file,
+        policy_type,
+        fail_risk,
+        use_opa,
+        ValidationMode(mode),
+        stats.collect,
+    )
+    _add_stats(plan_files, lint, policy_obj, stats)
+    return stats.to_dict()
 
-        # Determine final status
-        status = Status.PASS
-        if all_errors:
-            status = Status.ERROR
-        elif base_result.warnings:
-            status = Status.WARN
-
-        # Override status based on risk threshold
-        if risk_score >= policy_obj.fail_risk_threshold:
-            status = Status.ERROR
-
-        # Create the final result
-        result = ValidationResult(
-            status=status,
-            risk_score=risk_score,
-            errors=all_errors,
-            warnings=base_result.warnings,
-        )
 
-        # Write the report
-        output_stream = open(output_file, "w") if output_file else sys.stdout
+@app.command(name="stats")
+def corpus_stats(
+    paths: Optional[List[str]] = typer.Argument(  # noqa: B008
+        None, help="Plan files, or directories searched for *.json plans"
+    ),
+    policy_file: Optional[str] = typer.Option(
+        None, "--policy", "-p", help="Path to the policy file (YAML or Rego)"
+    ),
+    policy_type: str = typer.Option(
+        "auto",
+        "--policy-type",
+        "-t",
+        help="Policy type: 'yaml', 'json', 'rego', or 'auto' (detect automatically)",
+    ),
+    fail_risk: float = typer.Option(
+        0.8, "--fail-risk", "-r", help="Risk score threshold for failure (0-1)"
+    ),
+    use_opa: bool = typer.Option(
+        False, "--opa", help="Use OPA for validation even for YAML policies"
+    ),
+    mode: str = typer.Option(
+        "all",
+        "--mode",
+        "-m",
+        help="Validation mode: all, first_error or until_threshold",
+    ),
+    merge_files: Optional[List[str]] = typer.Option(  # noqa: B008
+        None,
+        "--merge",
+        help="Statistics from other workers or shards (--format json) to merge in",
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", help="Number of worker processes validating plans"
+    ),
+    output_format: str = typer.Option(
+        "cli", "--format", "-f", help="Output format (cli or json)"
+    ),
+    output_file: Optional[str] = typer.Option(
+        None, "--output", "-o", help="Path to write output (default: stdout)"
+    ),
+    top: int = typer.Option(10, "--top", help="Number of tools listed"),
+) -> None:
+    """
+    Aggregate statistics across a corpus of plans.
+    """
+    try:
+        validation_mode = ValidationMode(mode.lower())
+        stats = CorpusStats()
+
+        for merge_file in merge_files or []:
+            with open(merge_file, "r") as f:
+                stats.merge(CorpusStats.from_dict(jsonio.loads(f.read())))
 
+        plan_paths = _iter_plan_paths(paths or [])
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                pending: Set[Future] = set()
+                for chunk in _chunks(plan_paths, _STATS_CHUNK_SIZE):
+                    # Bound the work in flight so huge corpora are not queued
+                    # up front
+                    if len(pending) >= 2 * jobs:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            stats.merge(CorpusStats.from_dict(future.result()))
+                    pending.add(
+                        executor.submit(
+                            _stats_shard,
+                            chunk,
+                            policy_file,
+                            policy_type,
+                            fail_risk,
+                            use_opa,
+                            validation_mode.value,
+                        )
+                    )
+                for future in pending:
+                    stats.merge(CorpusStats.from_dict(future.result()))
+        else:
+            shard = CorpusStats()
+            policy_obj, lint = _make_linter(
+                policy_file,
+                policy_type,
+                fail_risk,
+                use_opa,
+                validation_mode,
+                shard.collect,
+            )
+            _add_stats(plan_paths, lint, policy_obj, shard)
+            stats.merge(shard)
+
+        output_stream = open(output_file, "w") if output_file else sys.stdout
         try:
             if output_format.lower() == "json":
-                json_reporter.report(result, output_stream)
+                output_stream.write(
+                    jsonio.dumps(stats.to_dict(), indent=2).decode("utf-8")
+                )
             else:
-                cli_reporter.report(result, output_stream)
+                stats.report(Console(file=output_stream), top=top)
         finally:
-            if output_file and output_stream:
+            if output_file:
                 output_stream.close()
 
-        # Exit with appropriate code
-        if status == Status.ERROR:
-            sys.exit(1)
+    except Exception as e:
+        console.print(f"[red]Error: {e}[/]")
+        sys.exit(1)
+
+
+@policy_app.command(name="check")
+def check_policies(
+    policy_files: List[str] = typer.Argument(  # noqa: B008
+        ..., help="YAML policy files to check"
+    ),
+    measure: bool = typer.Option(
+        True,
+        "--measure/--no-measure",
+        help="Time each deny pattern on synthetic inputs",
+    ),
+    budget: float = typer.Option(
+        policy_check.DEFAULT_BUDGET,
+        "--budget",
+        help="Seconds a single timed search may take",
+    ),
+    strict: bool = typer.Option(False, "--strict", help="Fail on warnings too"),
+    output_format: str = typer.Option(
+        "cli", "--format", "-f", help="Output format (cli or json)"
+    ),
+) -> None:
+    """
+    Check policies for expensive regexes and bounds or tools that cannot apply.
 
+    Exits with status 1 if any policy has errors, or warnings with --strict.
+    """
+    failed = False
+    reports: Dict[str, Any] = {}
+    # The check reports everything the loader would warn about
+    loader_logger = logging.getLogger("plan_lint.loader")
+    level = loader_logger.level
+    loader_logger.setLevel(logging.ERROR)
+    try:
+        for policy_file in policy_files:
+            loaded = load_policy_file(policy_file)
+            if loaded.is_rego:
+                console.print(f"[yellow]Skipping Rego policy {policy_file}[/]")
+                continue
+            report = policy_check.check_policy(loaded.policy, measure, budget)
+            failed = failed or bool(report.errors or (strict and report.issues))
+            if output_format.lower() == "json":
+                reports[policy_file] = report.to_dict()
+            else:
+                report.report(console, title=policy_file)
     except Exception as e:
         console.print(f"[red]Error: {e}[/]")
         sys.exit(1)
+    finally:
+        loader_logger.setLevel(level)
+
+    if output_format.lower() == "json":
+        sys.stdout.write(jsonio.dumps(reports, indent=2).decode("utf-8") + "\n")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+"""
+Policy compiler for plan-linter.
+
+This module turns a Policy into a CompiledPolicy whose tool set, bounds and
+regex patterns are built once and reused across validations. Compiled
+components are cached by content, so compiling the same policy repeatedly is
+cheap.
+
+Individual regexes and bound checks are cached too, so policies that share
+most of their content, such as tenant policies extending a common base, share
+the compiled parts they have in common even when their tool sets, pattern
+lists or bounds sections differ.
+
+Besides the bounded caches of recent compilations, tool sets, bounds and
+pattern lists are interned by content for as long as any compiled policy uses
+them, so equal components stay shared however many policies are alive.
+"""
+
+import re
+import threading
+import weakref
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, List, Optional, Pattern, Tuple, Union
+
+from plan_lint.bounds import BoundsIndex, ParsedSpec, compile_bounds, parse_bound_spec
+from plan_lint.types import Policy
+
+
+def freeze(value: Any) -> Any:
+    """
+    Convert a policy value into a hashable equivalent.
+
+    Args:
+        value: A value made of dicts, lists and scalars.
+
+    Returns:
+        A nested tuple that compares equal only for identical values, suitable
+        as a cache key.
+    """
+    if isinstance(value, dict):
+        return (dict, tuple((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (list, tuple(freeze(v) for v in value))
+    # Keep the type so that e.g. 1, 1.0 and True are distinct keys
+    return (type(value), value)
+
+
+class _Frozen:
+    """Carries a value through a cache while hashing by its frozen form."""
+
+    __slots__ = ("key", "value")
+
+    def __init__(self, value: Any):
+        self.key = freeze(value)
+        self.value = value
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Frozen) and self.key == other.key
+
+
+class _Shared:
+    """A compiled component, interned while a compiled policy holds it."""
+
+    __slots__ = ("value", "__weakref__")
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+_interned: "weakref.WeakValueDictionary[Any, _Shared]" = weakref.WeakValueDictionary()
+_interned_lock = threading.Lock()
+
+
+def _intern(key: Any, build: Callable[[], Any]) -> _Shared:
+    """Return the live component for a content key, building it if needed."""
+    with _interned_lock:
+        shared = _interned.get(key)
+    if shared is not None:
+        return shared
+    built = _Shared(build())
+    with _interned_lock:
+        # Another thread may have built the same component meanwhile
+        return _interned.setdefault(key, built)
+
+
+@lru_cache(maxsize=256)
+def _compile_tools(tools: Tuple[str, ...]) -> _Shared:
+    return _intern(("tools", tools), lambda: frozenset(tools))
+
+
+@lru_cache(maxsize=4096)
+def _parse_bound(key: str, spec: _Frozen) -> ParsedSpec:
+    return parse_bound_spec(key, spec.value)
+
+
+def _shared_bound_spec(key: str, spec: Any) -> ParsedSpec:
+    return _parse_bound(key, _Frozen(spec))
+
+
+@lru_cache(maxsize=256)
+def _compile_bounds(bounds: _Frozen) -> _Shared:
+    return _intern(
+        ("bounds", bounds), lambda: compile_bounds(bounds.value, _shared_bound_spec)
+    )
+
+
+@lru_cache(maxsize=4096)
+def _compile_pattern(pattern: str) -> Optional[Pattern]:
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _build_patterns(patterns: Tuple[str, ...]) -> Tuple[Tuple[str, Pattern], ...]:
+    compiled = []
+    for pattern in patterns:
+        regex = _compile_pattern(pattern)
+        # Invalid patterns are skipped, as in the uncompiled checks
+        if regex is not None:
+            compiled.append((pattern, regex))
+    return tuple(compiled)
+
+
+@lru_cache(maxsize=256)
+def _compile_patterns(patterns: Tuple[str, ...]) -> _Shared:
+    return _intern(("patterns", patterns), lambda: _build_patterns(patterns))
+
+
+def get_bounds_index(bounds: Any) -> BoundsIndex:
+    """
+    Return the compiled form of a bounds mapping, using the shared cache.
+
+    Args:
+        bounds: Dictionary mapping bound keys to bound values.
+
+    Returns:
+        The compiled BoundsIndex.
+    """
+    return _compile_bounds(_Frozen(bounds)).value
+
+
+def get_patterns(patterns: List[str]) -> Tuple[Tuple[str, Pattern], ...]:
+    """
+    Return compiled regexes for a list of patterns, using the shared cache.
+
+    Args:
+        patterns: Regex pattern strings.
+
+    Returns:
+        Tuples of (pattern string, compiled regex). Invalid patterns are omitted.
+    """
+    return _compile_patterns(tuple(patterns)).value
+
+
+class CompiledPolicy:
+    """
+    A policy with its checks precompiled for repeated evaluation.
+
+    Scalar settings such as ``max_steps`` and ``fail_risk_threshold`` are read
+    from the wrapped policy, so later changes to them take effect immediately.
+    """
+
+    def __init__(self, policy: Policy):
+        """
+        Compile a policy.
+
+        Args:
+            policy: The policy to compile.
+
+        Raises:
+            ValueError: If the policy contains an invalid bound.
+        """
+        self.policy = policy
+        # Holding the interned components keeps them shared while in use
+        self._shared = (
+            _compile_tools(tuple(sorted(set(policy.allow_tools)))),
+            _compile_bounds(_Frozen(policy.bounds)),
+            _compile_patterns(tuple(policy.deny_tokens_regex)),
+        )
+        self.allowed_tools: FrozenSet[str] = self._shared[0].value
+        self.bounds: BoundsIndex = self._shared[1].value
+        self.deny_patterns: Tuple[Tuple[str, Pattern], ...] = self._shared[2].value
+
+
+def compile_policy(policy: Union[Policy, CompiledPolicy]) -> CompiledPolicy:
+    """
+    Compile a policy, reusing cached components where possible.
+
+    Args:
+        policy: A Policy, or an already compiled policy which is returned as is.
+
+    Returns:
+        The CompiledPolicy.
+    """
+    if isinstance(policy, CompiledPolicy):
+        return policy
+    return CompiledPolicy(policy)
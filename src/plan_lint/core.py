@@ -4,30 +4,56 @@ Core module for plan-linter.
 This module provides the main functionality for validating plans against policies.
 """
 
-import re
-from typing import Dict, List, Optional
+import time
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
+from plan_lint import metrics, scanning, tracing
+from plan_lint.bounds import CompiledBound
+from plan_lint.compiler import (
+    CompiledPolicy,
+    compile_policy,
+    get_bounds_index,
+    get_patterns,
+)
+from plan_lint.ordering import AdaptiveCheckOrder
+from plan_lint.profiling import CheckEvent, Collector, call_timed
 from plan_lint.types import (
     ErrorCode,
+    MultiValidationResult,
     Plan,
     PlanError,
     PlanStep,
     PlanWarning,
     Policy,
+    ScanLimits,
     Status,
+    ValidationMode,
     ValidationResult,
 )
 
 
 def check_tools_allowed(
-    step: PlanStep, allowed_tools: List[str], step_idx: int
+    step: PlanStep, allowed_tools: Collection[str], step_idx: int
 ) -> Optional[PlanError]:
     """
     Check if a step's tool is allowed by the policy.
 
     Args:
         step: The plan step to check.
-        allowed_tools: List of allowed tool names.
+        allowed_tools: Collection of allowed tool names.
         step_idx: Index of the step in the plan.
 
     Returns:
@@ -43,74 +69,117 @@ def check_tools_allowed(
     )
 
 
+def split_bound_path(bound_path: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a bound path into its tool name and argument name.
+
+    Tool names may themselves contain dots (e.g. ``payments.transfer``), so the
+    argument name is taken to be the last path segment.
+
+    Args:
+        bound_path: A ``tool.arg`` path from the policy bounds.
+
+    Returns:
+        A (tool_name, arg_name) tuple, or None if the path is malformed.
+    """
+    parts = bound_path.rsplit(".", 1)
+    if len(parts) != 2 or not parts[0] or not parts[1]:
+        return None
+
+    return parts[0], parts[1]
+
+
 def check_bounds(
-    step: PlanStep, bounds: Dict[str, List[float]], step_idx: int
+    step: PlanStep,
+    bounds: Dict[str, Any],
+    step_idx: int,
+    context: Optional[Dict[str, Any]] = None,
 ) -> List[PlanError]:
     """
     Check if a step's arguments are within bounds defined by the policy.
 
     Args:
         step: The plan step to check.
-        bounds: Dictionary mapping tool.arg paths to [min, max] bounds.
+        bounds: Dictionary mapping tool.arg paths to bound values.
         step_idx: Index of the step in the plan.
+        context: The plan context, used by bounds that reference it.
 
     Returns:
         List of errors for any bounds violations.
     """
-    errors = []
+    return _check_compiled_bounds(
+        step, get_bounds_index(bounds).for_tool(step.tool), step_idx, context
+    )
 
-    for bound_path, bound_values in bounds.items():
-        try:
-            # Split the path into tool name and arg name
-            parts = bound_path.split(".", 1)
-            if len(parts) != 2:
-                continue
-
-            tool_name, arg_name = parts
-
-            # Check if this bound applies to the current step
-            if step.tool != tool_name:
-                continue
-
-            # Check if the step has this argument
-            if arg_name not in step.args:
-                continue
-
-            # Get the argument value
-            arg_value = step.args[arg_name]
-
-            # Check if the value is a number
-            if not isinstance(arg_value, (int, float)):
-                continue
-
-            # Check if bound values has at least 2 elements
-            if len(bound_values) < 2:
-                continue
-
-            # Get the min and max values
-            min_val, max_val = bound_values[0], bound_values[1]
-
-            # Check if the value is within bounds
-            if arg_value < min_val or arg_value > max_val:
-                errors.append(
-                    PlanError(
-                        step=step_idx,
-                        code=ErrorCode.BOUND_VIOLATION,
-                        msg=(
-                            f"Argument '{arg_name}' value {arg_value} is outside "
-                            f"bounds [{min_val}, {max_val}]"
-                        ),
-                    )
-                )
-        except (ValueError, IndexError, TypeError):
-            # Log but continue if there's an issue with parsing the bounds
-            continue
 
+def _check_compiled_bounds(
+    step: PlanStep,
+    bounds: List[CompiledBound],
+    step_idx: int,
+    context: Optional[Dict[str, Any]],
+) -> List[PlanError]:
+    errors = []
+    for bound in bounds:
+        for message in bound.evaluate(step.args, context):
+            errors.append(
+                PlanError(
+                    step=step_idx,
+                    code=ErrorCode.BOUND_VIOLATION,
+                    msg=message,
+                    arg=bound.arg,
+                )
+            )
     return errors
 
 
+def iter_arg_text(value: Any) -> Iterator[str]:
+    """
+    Yield the text of every key and scalar value in step arguments.
+
+    Strings are yielded as they are, so scanning large arguments does not copy
+    them; other scalars are converted with ``str``.
+
+    Args:
+        value: Step arguments, or any value nested in them.
+
+    Yields:
+        Each key and scalar value as a string.
+    """
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key if isinstance(key, str) else str(key)
+            yield from iter_arg_text(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from iter_arg_text(item)
+    else:
+        yield str(value)
+
+
+def iter_step_text(step: PlanStep) -> Iterator[Tuple[str, str]]:
+    """
+    Yield the text of a step's arguments with the argument it belongs to.
+
+    Args:
+        step: The plan step.
+
+    Yields:
+        ``(arg, text)`` pairs: each top-level argument name paired with itself
+        and with every key and scalar value nested in it.
+    """
+    for key, value in step.args.items():
+        yield key, key
+        for text in iter_arg_text(value):
+            yield key, text
+
+
 def check_raw_secrets(
-    step: PlanStep, deny_patterns: List[str], step_idx: int
+    step: PlanStep,
+    deny_patterns: List[str],
+    step_idx: int,
+    limits: Optional[ScanLimits] = None,
 ) -> List[PlanError]:
     """
     Check if a step contains raw secrets or sensitive data.
@@ -119,35 +188,63 @@ def check_raw_secrets(
         step: The plan step to check.
         deny_patterns: List of regex patterns to deny.
         step_idx: Index of the step in the plan.
+        limits: Optional limits on how much text is scanned and for how long;
+            see ``plan_lint.scanning``.
 
     Returns:
-        List of errors for any detected secrets.
+        List of errors for any detected secrets, plus a SCAN_TIMEOUT error if
+        the scan ran out of time.
     """
-    errors = []
-    step_str = str(step.args)
-
-    for pattern in deny_patterns:
-        try:
-            matches = re.findall(pattern, step_str)
-
-            if matches:
-                errors.append(
-                    PlanError(
-                        step=step_idx,
-                        code=ErrorCode.RAW_SECRET,
-                        msg=(
-                            f"Potentially sensitive data matching pattern '{pattern}' "
-                            f"found in arguments"
-                        ),
-                    )
-                )
-        except re.error:
-            # Skip invalid regex patterns
-            continue
+    return _check_compiled_secrets(step, get_patterns(deny_patterns), step_idx, limits)
+
 
+def _check_compiled_secrets(
+    step: PlanStep,
+    deny_patterns: Sequence[Tuple[str, Pattern]],
+    step_idx: int,
+    limits: Optional[ScanLimits] = None,
+) -> List[PlanError]:
+    errors = []
+    texts = list(iter_step_text(step))
+
+    if limits is None or not scanning.is_limited(limits):
+        for pattern, regex in deny_patterns:
+            arg = _first_match(regex, texts)
+            if arg is not None:
+                errors.append(_secret_error(step_idx, pattern, arg))
+        return errors
+
+    scan = scanning.StepScan(limits)
+    for pattern, regex in deny_patterns:
+        arg = scan.first_match(regex, texts)
+        if arg is not None:
+            errors.append(_secret_error(step_idx, pattern, arg))
+    timeout = scan.error(step_idx)
+    if timeout is not None:
+        errors.append(timeout)
     return errors
 
 
+def _first_match(regex: Pattern, texts: List[Tuple[str, str]]) -> Optional[str]:
+    """Return the argument of the first text the regex matches, if any."""
+    for arg, text in texts:
+        if regex.search(text):
+            return arg
+    return None
+
+
+def _secret_error(step_idx: int, pattern: str, arg: str) -> PlanError:
+    return PlanError(
+        step=step_idx,
+        code=ErrorCode.RAW_SECRET,
+        msg=(
+            f"Potentially sensitive data matching pattern "
+            f"'{pattern}' found in arguments"
+        ),
+        arg=arg,
+    )
+
+
 def detect_cycles(plan: Plan) -> Optional[PlanError]:
     """
     Detect cycles in the plan's step dependencies.
@@ -165,9 +262,9 @@ def detect_cycles(plan: Plan) -> Optional[PlanError]:
 
     # Check for references to other steps
     for i, step in enumerate(plan.steps):
-        step_str = str(step.args)
+        texts = list(iter_arg_text(step.args))
         for step_id in step_ids:
-            if step_id in step_str and step_id != step.id:
+            if step_id != step.id and any(step_id in text for text in texts):
                 # Check for cycles (very naive implementation)
                 if step.id in visited:
                     return PlanError(
@@ -180,6 +277,21 @@ def detect_cycles(plan: Plan) -> Optional[PlanError]:
     return None
 
 
+def risk_key(code: Union[ErrorCode, str]) -> str:
+    """
+    Return the ``risk_weights`` key for an error or warning code.
+
+    Args:
+        code: The error or warning code.
+
+    Returns:
+        The lower-cased code name, e.g. ``tool_deny``.
+    """
+    if isinstance(code, ErrorCode):
+        return code.value.lower()
+    return str(code).lower()
+
+
 def calculate_risk_score(
     errors: List[PlanError], warnings: List[PlanWarning], risk_weights: Dict[str, float]
 ) -> float:
@@ -198,7 +310,7 @@ def calculate_risk_score(
         return 0.0
 
     score = 0.0
-    error_types = {str(error.code).lower() for error in errors}
+    error_types = {risk_key(error.code) for error in errors}
 
     # Add base score for each type of error
     for error_type in error_types:
@@ -209,52 +321,246 @@ def calculate_risk_score(
     return min(score, 1.0)
 
 
-def validate_plan_builtin(plan: Plan, policy: Policy) -> ValidationResult:
+class FailFastTracker:
+    """
+    Decides when a fail-fast validation has seen enough to stop.
+
+    Errors are added as checks or rules find them, and the risk score is
+    tracked incrementally, so the decision costs nothing per added error
+    beyond a set lookup.
+    """
+
+    def __init__(self, mode: Union[ValidationMode, str], policy: Policy):
+        """
+        Start tracking a validation.
+
+        Args:
+            mode: The validation mode; ``all`` never stops.
+            policy: The policy being validated against.
+        """
+        self.mode = ValidationMode(mode)
+        self.policy = policy
+        self.seen: Set[str] = set()
+        self.score = 0.0
+        self.stopped = False
+
+    def add(self, errors: List[PlanError]) -> bool:
+        """
+        Record newly found errors.
+
+        Args:
+            errors: Errors found by one check or rule.
+
+        Returns:
+            True if no further checks need to run, False otherwise.
+        """
+        if not errors or self.mode == ValidationMode.ALL:
+            return self.stopped
+        if self.mode == ValidationMode.FIRST_ERROR:
+            self.stopped = True
+            return True
+        for error in errors:
+            key = risk_key(error.code)
+            if key not in self.seen:
+                self.seen.add(key)
+                self.score += self.policy.risk_weights.get(key, 0.2)
+        self.stopped = min(self.score, 1.0) >= self.policy.fail_risk_threshold
+        return self.stopped
+
+
+def _check_max_steps(plan: Plan, compiled: CompiledPolicy) -> List[PlanError]:
+    max_steps = compiled.policy.max_steps
+    if len(plan.steps) <= max_steps:
+        return []
+
+    return [
+        PlanError(
+            code=ErrorCode.MAX_STEPS_EXCEEDED,
+            msg=f"Plan has {len(plan.steps)} steps, exceeding max of {max_steps}",
+        )
+    ]
+
+
+def _check_cycles(plan: Plan, compiled: CompiledPolicy) -> List[PlanError]:
+    cycle_error = detect_cycles(plan)
+    return [cycle_error] if cycle_error else []
+
+
+def _check_step_tool(
+    step: PlanStep, step_idx: int, compiled: CompiledPolicy, context: Dict[str, Any]
+) -> List[PlanError]:
+    tool_error = check_tools_allowed(step, compiled.allowed_tools, step_idx)
+    return [tool_error] if tool_error else []
+
+
+def _check_step_bounds(
+    step: PlanStep, step_idx: int, compiled: CompiledPolicy, context: Dict[str, Any]
+) -> List[PlanError]:
+    return _check_compiled_bounds(
+        step, compiled.bounds.for_tool(step.tool), step_idx, context
+    )
+
+
+def _check_step_secrets(
+    step: PlanStep, step_idx: int, compiled: CompiledPolicy, context: Dict[str, Any]
+) -> List[PlanError]:
+    return _check_compiled_secrets(
+        step, compiled.deny_patterns, step_idx, compiled.policy.secret_scan
+    )
+
+
+# Whole-plan checks and per-step checks, keyed by check name
+PLAN_CHECKS: Dict[str, Callable[[Plan, CompiledPolicy], List[PlanError]]] = {
+    "max_steps": _check_max_steps,
+    "cycles": _check_cycles,
+}
+STEP_CHECKS: Dict[
+    str, Callable[[PlanStep, int, CompiledPolicy, Dict[str, Any]], List[PlanError]]
+] = {
+    "tools": _check_step_tool,
+    "bounds": _check_step_bounds,
+    "secrets": _check_step_secrets,
+}
+
+# Order used by fail-fast modes: cheapest and most selective checks first
+FAIL_FAST_ORDER: Tuple[str, ...] = ("max_steps", "tools", "bounds", "secrets", "cycles")
+
+
+def _run_all_checks(
+    plan: Plan,
+    compiled: CompiledPolicy,
+    context: Dict[str, Any],
+    collector: Optional[Collector] = None,
+) -> List[PlanError]:
+    """Run every check, reporting errors in plan-then-step order."""
+    errors: List[PlanError] = []
+
+    if collector is not None:
+        for name, plan_check in PLAN_CHECKS.items():
+            errors.extend(call_timed(collector, name, None, plan_check, plan, compiled))
+        for i, step in enumerate(plan.steps):
+            for name, step_check in STEP_CHECKS.items():
+                errors.extend(
+                    call_timed(
+                        collector, name, i, step_check, step, i, compiled, context
+                    )
+                )
+        return errors
+
+    for plan_check in PLAN_CHECKS.values():
+        errors.extend(plan_check(plan, compiled))
+
+    step_checks = list(STEP_CHECKS.values())
+    for i, step in enumerate(plan.steps):
+        for step_check in step_checks:
+            errors.extend(step_check(step, i, compiled, context))
+
+    return errors
+
+
+def _run_fail_fast(
+    plan: Plan,
+    compiled: CompiledPolicy,
+    context: Dict[str, Any],
+    mode: ValidationMode,
+    order: Sequence[str],
+    ordering: Optional[AdaptiveCheckOrder] = None,
+    collector: Optional[Collector] = None,
+) -> List[PlanError]:
+    """Run checks one at a time in the given order until the mode says stop."""
+    errors: List[PlanError] = []
+    tracker = FailFastTracker(mode, compiled.policy)
+
+    def stop(found: List[PlanError]) -> bool:
+        errors.extend(found)
+        return tracker.add(found)
+
+    for name in order:
+        found_before = len(errors)
+        start = time.perf_counter_ns() if ordering is not None else 0
+
+        if name in PLAN_CHECKS:
+            plan_check = PLAN_CHECKS[name]
+            if collector is not None:
+                stopped = stop(
+                    call_timed(collector, name, None, plan_check, plan, compiled)
+                )
+            else:
+                stopped = stop(plan_check(plan, compiled))
+        elif collector is not None:
+            step_check = STEP_CHECKS[name]
+            stopped = any(
+                stop(
+                    call_timed(
+                        collector, name, i, step_check, step, i, compiled, context
+                    )
+                )
+                for i, step in enumerate(plan.steps)
+            )
+        else:
+            step_check = STEP_CHECKS[name]
+            stopped = any(
+                stop(step_check(step, i, compiled, context))
+                for i, step in enumerate(plan.steps)
+            )
+
+        if ordering is not None:
+            ordering.record(
+                name, time.perf_counter_ns() - start, len(errors) > found_before
+            )
+        if stopped:
+            break
+
+    return errors
+
+
+def validate_plan_builtin(
+    plan: Plan,
+    policy: Union[Policy, CompiledPolicy],
+    mode: Union[ValidationMode, str] = ValidationMode.ALL,
+    ordering: Optional[AdaptiveCheckOrder] = None,
+    collector: Optional[Collector] = None,
+) -> ValidationResult:
     """
     Validate a plan against a policy using built-in validation logic.
 
     Args:
         plan: The plan to validate.
-        policy: The policy to validate against.
+        policy: The policy to validate against, optionally precompiled.
+        mode: ``all`` collects every finding. ``first_error`` stops at the first
+            error and ``until_threshold`` stops once the risk score reaches the
+            policy's ``fail_risk_threshold``; both run the cheapest checks first.
+        ordering: Optional adaptive ordering used, and updated, by fail-fast
+            modes instead of the static ``FAIL_FAST_ORDER``.
+        collector: Optional profiling collector receiving a CheckEvent for
+            every check run.
 
     Returns:
         A ValidationResult object.
     """
-    errors: List[PlanError] = []
-    warnings: List[PlanWarning] = []
+    compiled = compile_policy(policy)
+    policy = compiled.policy
+    context = plan.context or {}
+    mode = ValidationMode(mode)
 
-    # Check if plan has too many steps
-    if len(plan.steps) > policy.max_steps:
-        errors.append(
-            PlanError(
-                code=ErrorCode.MAX_STEPS_EXCEEDED,
-                msg=(
-                    f"Plan has {len(plan.steps)} steps, "
-                    f"exceeding max of {policy.max_steps}"
-                ),
+    warnings: List[PlanWarning] = []
+    with scanning.plan_budget(policy.secret_scan):
+        if mode == ValidationMode.ALL:
+            errors = _run_all_checks(plan, compiled, context, collector)
+        else:
+            order = ordering.order if ordering is not None else FAIL_FAST_ORDER
+            errors = _run_fail_fast(
+                plan, compiled, context, mode, order, ordering, collector
             )
-        )
-
-    # Check for cycles
-    cycle_error = detect_cycles(plan)
-    if cycle_error:
-        errors.append(cycle_error)
-
-    # Validate each step
-    for i, step in enumerate(plan.steps):
-        # Check tools allowed
-        tool_error = check_tools_allowed(step, policy.allow_tools, i)
-        if tool_error:
-            errors.append(tool_error)
+            if ordering is not None:
+                ordering.plan_done()
 
-        # Check bounds
-        bound_errors = check_bounds(step, policy.bounds, i)
-        errors.extend(bound_errors)
+    return _make_result(errors, warnings, policy)
 
-        # Check for secrets
-        secret_errors = check_raw_secrets(step, policy.deny_tokens_regex, i)
-        errors.extend(secret_errors)
 
+def _make_result(
+    errors: List[PlanError], warnings: List[PlanWarning], policy: Policy
+) -> ValidationResult:
     # Calculate risk score
     risk_score = calculate_risk_score(errors, warnings, policy.risk_weights)
 
@@ -273,8 +579,178 @@ def validate_plan_builtin(plan: Plan, policy: Policy) -> ValidationResult:
     )
 
 
+class _ScanGroup:
+    """Policies of a multi-policy validation that scan under the same limits."""
+
+    def __init__(self, limits: ScanLimits):
+        self.limits = limits
+        self.policies: List[CompiledPolicy] = []
+        self.scanners: Dict[str, Pattern] = {}
+        # Time budgets are kept per policy, each measured on a clock that only
+        # runs while that policy's own patterns are searched
+        self.timed = (
+            limits.step_timeout_ms is not None or limits.plan_timeout_ms is not None
+        )
+        self.clocks: Dict[int, scanning.ScanClock] = {}
+        self.plans: Dict[int, Optional[scanning.PlanScan]] = {}
+
+    def add(self, policy: CompiledPolicy) -> None:
+        self.policies.append(policy)
+        for pattern, regex in policy.deny_patterns:
+            self.scanners.setdefault(pattern, regex)
+        if self.timed:
+            clock = self.clocks[id(policy)] = scanning.ScanClock()
+            self.plans[id(policy)] = (
+                scanning.PlanScan(self.limits.plan_timeout_ms, clock)
+                if self.limits.plan_timeout_ms is not None
+                else None
+            )
+
+    def scan(
+        self,
+        step_idx: int,
+        texts: List[Tuple[str, str]],
+        matches: Dict[Tuple[int, str], Optional[str]],
+        timeouts: Dict[int, PlanError],
+    ) -> None:
+        """Search a step's text, recording each policy's matches and timeout."""
+        if not self.timed:
+            # Without time budgets a search gives the same answer for every
+            # policy, so each distinct pattern is searched once
+            search = _first_match
+            if scanning.is_limited(self.limits):
+                search = scanning.StepScan(self.limits).first_match
+            for pattern, regex in self.scanners.items():
+                arg = search(regex, texts)
+                for c in self.policies:
+                    matches[id(c), pattern] = arg
+            return
+
+        for c in self.policies:
+            clock = self.clocks[id(c)]
+            with clock.running():
+                scan = scanning.StepScan(self.limits, self.plans[id(c)], clock)
+                for pattern, _ in c.deny_patterns:
+                    matches[id(c), pattern] = scan.first_match(
+                        self.scanners[pattern], texts
+                    )
+            timeout = scan.error(step_idx)
+            if timeout is not None:
+                timeouts[id(c)] = timeout
+
+
+def validate_plan_multi(
+    plan: Plan, policies: Sequence[Union[Policy, CompiledPolicy]]
+) -> MultiValidationResult:
+    """
+    Validate a plan against several policies in a single walk of the plan.
+
+    Each step's argument text is extracted once and every distinct deny
+    pattern is compiled once. Without scan time budgets a pattern is also
+    searched once, however many policies with the same ``secret_scan`` limits
+    list it; with them, each policy searches its own patterns under its own
+    budget, so one policy's slow patterns cannot time out another. Tool and
+    bounds checks then run per policy on the same step. Cycle detection does not
+    depend on the policy and runs once. The result for each policy is the same
+    as ``validate_plan_builtin`` in ``all`` mode would give.
+
+    Args:
+        plan: The plan to validate.
+        policies: The policies to validate against, optionally precompiled.
+
+    Returns:
+        A MultiValidationResult with one ValidationResult per policy, in order,
+        and a merged verdict: the worst status and the highest risk score.
+    """
+    active_metrics = metrics.ACTIVE
+    start = time.perf_counter() if active_metrics is not None else 0.0
+
+    with tracing.span("plan_lint.validate_plan_multi") as span:
+        compiled = [compile_policy(policy) for policy in policies]
+        context = plan.context or {}
+
+        cycle_errors = _check_cycles(plan, compiled[0]) if compiled else []
+        errors: List[List[PlanError]] = [
+            _check_max_steps(plan, c) + cycle_errors for c in compiled
+        ]
+
+        # Policies that scan under the same limits share their patterns
+        groups: Dict[Tuple[Any, ...], _ScanGroup] = {}
+        for c in compiled:
+            limits = c.policy.secret_scan
+            key = tuple(limits.model_dump().values())
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = _ScanGroup(limits)
+            group.add(c)
+
+        for i, step in enumerate(plan.steps):
+            matches: Dict[Tuple[int, str], Optional[str]] = {}
+            timeouts: Dict[int, PlanError] = {}
+            texts = (
+                list(iter_step_text(step))
+                if any(group.scanners for group in groups.values())
+                else []
+            )
+            for group in groups.values():
+                group.scan(i, texts, matches, timeouts)
+
+            for c, policy_errors in zip(compiled, errors, strict=True):
+                tool_error = check_tools_allowed(step, c.allowed_tools, i)
+                if tool_error:
+                    policy_errors.append(tool_error)
+                policy_errors.extend(
+                    _check_compiled_bounds(
+                        step, c.bounds.for_tool(step.tool), i, context
+                    )
+                )
+                for pattern, _ in c.deny_patterns:
+                    arg = matches[id(c), pattern]
+                    if arg is not None:
+                        policy_errors.append(_secret_error(i, pattern, arg))
+                if id(c) in timeouts:
+                    policy_errors.append(timeouts[id(c)])
+
+        results = [
+            _make_result(policy_errors, [], c.policy)
+            for c, policy_errors in zip(compiled, errors, strict=True)
+        ]
+        status = Status.PASS
+        if any(result.status == Status.ERROR for result in results):
+            status = Status.ERROR
+        elif any(result.status == Status.WARN for result in results):
+            status = Status.WARN
+        merged = MultiValidationResult(
+            status=status,
+            risk_score=max((result.risk_score for result in results), default=0.0),
+            results=results,
+        )
+
+        if span.is_recording:
+            span.set_attributes(
+                {
+                    "plan_lint.plan.steps": len(plan.steps),
+                    "plan_lint.policies": len(compiled),
+                    "plan_lint.status": merged.status.value,
+                    "plan_lint.risk_score": merged.risk_score,
+                }
+            )
+
+    if active_metrics is not None and results:
+        # The walk is shared, so each policy is charged an equal share of it
+        seconds = (time.perf_counter() - start) / len(results)
+        for result in results:
+            active_metrics.observe_validation(
+                result, len(plan.steps), seconds, "builtin"
+            )
+    return merged
+
+
 def validate_plan_opa(
-    plan: Plan, policy: Policy, rego_policy: Optional[str] = None
+    plan: Plan,
+    policy: Union[Policy, CompiledPolicy],
+    rego_policy: Optional[str] = None,
+    opa_input: Optional[bytes] = None,
 ) -> ValidationResult:
     """
     Validate a plan against a policy using OPA.
@@ -283,43 +759,152 @@ def validate_plan_opa(
         plan: The plan to validate.
         policy: The policy to validate against.
         rego_policy: Optional Rego policy string.
+        opa_input: Optional JSON bytes the plan was parsed from, sent to OPA
+            as they are instead of serialising the plan again.
 
     Returns:
         A ValidationResult object.
     """
-    # Import OPA validation here to avoid circular import
-    from plan_lint.opa import evaluate_with_opa, policy_to_rego
+    if isinstance(policy, CompiledPolicy):
+        policy = policy.policy
 
-    # If no Rego policy is provided, convert the YAML policy to Rego
-    if rego_policy is None:
-        rego_policy = policy_to_rego(policy)
+    # Import OPA validation here to avoid circular import
+    from plan_lint.opa import evaluate_with_opa
 
-    # Evaluate with OPA
-    return evaluate_with_opa(plan, policy, rego_policy)
+    # Without a Rego policy, OPA evaluates one generated from the YAML policy
+    return evaluate_with_opa(plan, policy, rego_policy, raw_input=opa_input)
 
 
 def validate_plan(
-    plan: Plan, policy: Policy, rego_policy: Optional[str] = None, use_opa: bool = False
+    plan: Plan,
+    policy: Union[Policy, CompiledPolicy],
+    rego_policy: Optional[str] = None,
+    use_opa: bool = False,
+    mode: Union[ValidationMode, str] = ValidationMode.ALL,
+    ordering: Optional[AdaptiveCheckOrder] = None,
+    collector: Optional[Collector] = None,
+    opa_input: Optional[bytes] = None,
 ) -> ValidationResult:
     """
     Validate a plan against a policy.
 
     Args:
         plan: The plan to validate.
-        policy: The policy to validate against.
+        policy: The policy to validate against. Passing a CompiledPolicy avoids
+            looking up the compiled checks on every call.
         rego_policy: Optional Rego policy string.
         use_opa: Whether to use OPA for validation.
+        mode: Validation mode for built-in validation (``all``, ``first_error``
+            or ``until_threshold``). OPA always evaluates the whole policy.
+        ordering: Optional adaptive check ordering for fail-fast modes.
+        collector: Optional profiling collector. OPA evaluation is reported as a
+            single ``opa`` event.
+        opa_input: Optional JSON bytes the plan was parsed from. OPA receives
+            them as they are instead of a fresh serialisation of the plan.
 
     Returns:
         A ValidationResult object.
     """
-    # If a Rego policy is provided or use_opa is True, use OPA for validation
-    if rego_policy is not None or use_opa:
-        try:
-            return validate_plan_opa(plan, policy, rego_policy)
-        except ImportError:
-            # Fall back to built-in validation if OPA is not available
-            return validate_plan_builtin(plan, policy)
-
-    # Otherwise use built-in validation
-    return validate_plan_builtin(plan, policy)
+    active_metrics = metrics.ACTIVE
+    start = time.perf_counter() if active_metrics is not None else 0.0
+    backend = "builtin"
+
+    with tracing.span("plan_lint.validate_plan") as span:
+        check_totals: Dict[str, List[int]] = {}
+        if span.is_recording:
+            span.set_attribute("plan_lint.plan.steps", len(plan.steps))
+            collector = _totals_collector(check_totals, collector)
+
+        # If a Rego policy is provided or use_opa is True, use OPA for validation
+        if rego_policy is not None or use_opa:
+            try:
+                if collector is not None:
+                    opa_start = time.perf_counter_ns()
+                    result = validate_plan_opa(plan, policy, rego_policy, opa_input)
+                    duration = time.perf_counter_ns() - opa_start
+                    collector(CheckEvent("opa", None, duration, len(result.errors)))
+                else:
+                    result = validate_plan_opa(plan, policy, rego_policy, opa_input)
+                backend = "opa"
+            except ImportError:
+                # Fall back to built-in validation if OPA is not available
+                result = validate_plan_builtin(plan, policy, mode, ordering, collector)
+        else:
+            # Otherwise use built-in validation
+            result = validate_plan_builtin(plan, policy, mode, ordering, collector)
+
+        if span.is_recording:
+            span.set_attributes(
+                {
+                    "plan_lint.backend": backend,
+                    "plan_lint.status": result.status.value,
+                    "plan_lint.findings": len(result.errors),
+                    "plan_lint.risk_score": result.risk_score,
+                }
+            )
+            for check, (duration_ns, findings) in check_totals.items():
+                span.set_attribute(
+                    f"plan_lint.check.{check}.duration_ms", duration_ns / 1e6
+                )
+                span.set_attribute(f"plan_lint.check.{check}.findings", findings)
+
+    if active_metrics is not None:
+        active_metrics.observe_validation(
+            result, len(plan.steps), time.perf_counter() - start, backend
+        )
+    return result
+
+
+def _totals_collector(
+    totals: Dict[str, List[int]], collector: Optional[Collector]
+) -> Collector:
+    """Return a collector summing durations and findings per check."""
+
+    def collect(event: CheckEvent) -> None:
+        total = totals.setdefault(event.check, [0, 0])
+        total[0] += event.duration_ns
+        total[1] += event.findings
+        if collector is not None:
+            collector(event)
+
+    return collect
+
+
+def run_rule(
+    name: str,
+    check_plan: Callable[[Plan, Policy], List[PlanError]],
+    plan: Plan,
+    policy: Policy,
+    collector: Optional[Collector] = None,
+) -> List[PlanError]:
+    """
+    Run a rule plugin, reporting its timing to a collector and to metrics.
+
+    Args:
+        name: The rule name.
+        check_plan: The rule's check_plan function.
+        plan: The plan to check.
+        policy: The policy to check against.
+        collector: Optional profiling collector; the rule is reported as a
+            ``rule:<name>`` event.
+
+    Returns:
+        The errors found by the rule.
+    """
+    with tracing.span("plan_lint.rule") as span:
+        if span.is_recording:
+            span.set_attribute("plan_lint.rule", name)
+        active_metrics = metrics.ACTIVE
+        if collector is None and active_metrics is None and not span.is_recording:
+            return check_plan(plan, policy)
+
+        start = time.perf_counter_ns()
+        errors = check_plan(plan, policy)
+        duration = time.perf_counter_ns() - start
+        if collector is not None:
+            collector(CheckEvent(f"rule:{name}", None, duration, len(errors)))
+        if active_metrics is not None:
+            active_metrics.observe_rule(name, duration / 1e9, len(errors))
+        if span.is_recording:
+            span.set_attribute("plan_lint.findings", len(errors))
+        return errors
@@ -0,0 +1,253 @@
+"""
+JSON codec module for plan-linter.
+
+This module provides the JSON encoding and decoding used for plan parsing,
+OPA output and reports. orjson or msgspec are used when installed (install the
+``fast`` extra), with the standard library ``json`` module as a fallback.
+
+The fast codecs are stricter than ``json`` about a few inputs (integers beyond
+64 bits, NaN, non-string keys). Anything they reject is retried with ``json``,
+so results and error types are the same whichever codec is active.
+
+``decode_plan`` additionally decodes plans straight into typed structures with
+msgspec, skipping the intermediate dictionaries.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Literal, Optional, Union
+
+from plan_lint.types import Plan, PlanStep
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None  # type: ignore[assignment]
+
+HAS_ORJSON = orjson is not None
+HAS_MSGSPEC = msgspec is not None
+
+JSONInput = Union[str, bytes]
+
+
+class Codec:
+    """A JSON codec. The base class uses the standard library."""
+
+    name = "json"
+
+    def loads(self, data: JSONInput) -> Any:
+        """
+        Decode JSON.
+
+        Args:
+            data: JSON text or UTF-8 bytes.
+
+        Returns:
+            The decoded value.
+
+        Raises:
+            json.JSONDecodeError: If the input is not valid JSON.
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        """
+        Encode a value as UTF-8 JSON.
+
+        Args:
+            obj: The value to encode.
+            indent: Pretty-print with this indent; compact when None.
+
+        Returns:
+            The encoded JSON.
+        """
+        if indent is None:
+            return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        return json.dumps(obj, indent=indent).encode("utf-8")
+
+
+class _FastCodec(Codec):
+    """Base for codecs that fall back to the standard library on rejection."""
+
+    _decode: Callable[[JSONInput], Any]
+    _errors: tuple = ()
+
+    def loads(self, data: JSONInput) -> Any:
+        try:
+            return self._decode(data)
+        except self._errors:
+            return super().loads(data)
+
+    def _encode(self, obj: Any, indent: Optional[int]) -> bytes:
+        raise NotImplementedError
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        try:
+            return self._encode(obj, indent)
+        except (TypeError, ValueError, OverflowError):
+            return super().dumps(obj, indent)
+
+
+class OrjsonCodec(_FastCodec):
+    """Codec backed by orjson."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        self._decode = orjson.loads
+        self._errors = (orjson.JSONDecodeError,)
+
+    def _encode(self, obj: Any, indent: Optional[int]) -> bytes:
+        if indent is None:
+            return orjson.dumps(obj)
+        if indent == 2:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        return super(_FastCodec, self).dumps(obj, indent)
+
+
+class MsgspecCodec(_FastCodec):
+    """Codec backed by msgspec."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self._decode = msgspec.json.decode
+        self._errors = (msgspec.DecodeError,)
+
+    def _encode(self, obj: Any, indent: Optional[int]) -> bytes:
+        data = msgspec.json.encode(obj)
+        if indent is None:
+            return data
+        return msgspec.json.format(data, indent=indent)
+
+
+def _default_codec() -> Codec:
+    preferred = os.environ.get("PLAN_LINT_JSON", "").lower()
+    if preferred:
+        return get_codec(preferred)
+    if HAS_ORJSON:
+        return OrjsonCodec()
+    if HAS_MSGSPEC:
+        return MsgspecCodec()
+    return Codec()
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Return a codec by name.
+
+    Args:
+        name: ``orjson``, ``msgspec`` or ``json``.
+
+    Returns:
+        The codec.
+
+    Raises:
+        ValueError: If the name is unknown or its package is not installed.
+    """
+    if name == "json":
+        return Codec()
+    if name == "orjson" and HAS_ORJSON:
+        return OrjsonCodec()
+    if name == "msgspec" and HAS_MSGSPEC:
+        return MsgspecCodec()
+    raise ValueError(f"JSON codec '{name}' is not available")
+
+
+def set_codec(codec: Union[Codec, str, None]) -> Codec:
+    """
+    Select the codec used by plan-lint.
+
+    Args:
+        codec: A codec, a codec name, or None for automatic detection.
+
+    Returns:
+        The selected codec.
+    """
+    global _codec
+    if codec is None:
+        _codec = _default_codec()
+    elif isinstance(codec, str):
+        _codec = get_codec(codec)
+    else:
+        _codec = codec
+    return _codec
+
+
+def get_active_codec() -> Codec:
+    """Return the codec used by plan-lint."""
+    return _codec
+
+
+def loads(data: JSONInput) -> Any:
+    """Decode JSON with the selected codec."""
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> bytes:
+    """Encode a value as UTF-8 JSON with the selected codec."""
+    return _codec.dumps(obj, indent)
+
+
+if HAS_MSGSPEC:
+
+    class _StepStruct(msgspec.Struct):
+        id: str
+        tool: str
+        args: Dict[str, Any]
+        on_fail: Literal["abort", "continue"] = "abort"
+
+    class _PlanStruct(msgspec.Struct):
+        goal: str
+        steps: List[_StepStruct]
+        context: Dict[str, Any] = {}
+        meta: Dict[str, Any] = {}
+
+    _plan_decoder = msgspec.json.Decoder(_PlanStruct)
+
+
+def decode_plan(data: JSONInput) -> Optional[Plan]:
+    """
+    Decode a plan with msgspec's typed decoder.
+
+    The typed decoder enforces the same constraints as the default plan
+    schema, so a plan it accepts needs no further validation.
+
+    Args:
+        data: JSON text or UTF-8 bytes.
+
+    Returns:
+        The plan, or None if msgspec is not installed or rejects the input;
+        callers should then fall back to schema validation, which reports
+        the problem.
+    """
+    if not HAS_MSGSPEC:
+        return None
+    try:
+        decoded = _plan_decoder.decode(data)
+    except (msgspec.DecodeError, msgspec.ValidationError):
+        return None
+
+    meta = decoded.meta
+    if not all(isinstance(meta.get(key, ""), str) for key in ("planner", "created_at")):
+        return None
+
+    return Plan.model_construct(
+        goal=decoded.goal,
+        context=decoded.context,
+        steps=[
+            PlanStep.model_construct(
+                id=step.id, tool=step.tool, args=step.args, on_fail=step.on_fail
+            )
+            for step in decoded.steps
+        ],
+        meta=meta,
+    )
+
+
+_codec: Codec = _default_codec()
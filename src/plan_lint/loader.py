@@ -4,15 +4,37 @@ Loader module for plan-linter.
 This module provides functionality for loading plans, schemas, and policies.
 """
 
+import functools
 import json
+import logging
+import mmap
 import os
-from typing import Any, Dict, Optional, Tuple
+import re
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import jsonschema
 import yaml
 
+from plan_lint import jsonio, tracing
+from plan_lint.compiler import get_bounds_index
+from plan_lint.policy_cache import PolicyCache
+from plan_lint.policy_check import analyze_pattern
+from plan_lint.sourcemap import SourceMap, scan_source_map
 from plan_lint.types import Plan, Policy
 
+logger = logging.getLogger(__name__)
+
 
 def load_schema(schema_path: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -32,6 +54,88 @@ def load_schema(schema_path: Optional[str] = None) -> Dict[str, Any]:
         return json.load(f)  # type: ignore[no-any-return]
 
 
+@functools.lru_cache(maxsize=None)
+def _plan_validator() -> Any:
+    """Return a validator for the default plan schema, built once."""
+    schema = load_schema()
+    validator_class = jsonschema.validators.validator_for(schema)
+    return validator_class(schema)
+
+
+def parse_plan(data: Union[str, bytes]) -> Plan:
+    """
+    Parse and validate a plan from JSON.
+
+    When msgspec is installed the plan is decoded straight into typed
+    structures that enforce the plan schema. Otherwise, or if the typed decoder
+    rejects the input, the JSON is parsed with the active codec and validated
+    against the schema, which produces the error message.
+
+    Args:
+        data: The plan as JSON text or UTF-8 bytes.
+
+    Returns:
+        The plan as a Plan object.
+
+    Raises:
+        ValueError: If the JSON is invalid or does not match the schema.
+    """
+    with tracing.span("plan_lint.schema") as span:
+        plan = jsonio.decode_plan(data)
+        if plan is not None:
+            if span.is_recording:
+                span.set_attribute("plan_lint.decoder", "msgspec")
+            return plan
+
+    plan_data = jsonio.loads(data)
+
+    # Validate against schema
+    with tracing.span("plan_lint.schema") as span:
+        if span.is_recording:
+            span.set_attribute("plan_lint.decoder", jsonio.get_active_codec().name)
+        error = jsonschema.exceptions.best_match(
+            _plan_validator().iter_errors(plan_data)
+        )
+        if error is not None:
+            raise ValueError(f"Plan validation failed: {error}")
+
+    return Plan.model_validate(plan_data)
+
+
+def _read_plan(
+    plan_path: str, with_source_map: bool, with_bytes: bool = False
+) -> Tuple[Plan, Optional[SourceMap], Optional[bytes]]:
+    with tracing.span("plan_lint.load_plan") as span:
+        data: Union[str, bytes]
+        if with_bytes:
+            # The caller forwards the bytes as they are, e.g. to OPA
+            with open(plan_path, "rb") as fb:
+                data = fb.read()
+        else:
+            # Read text rather than bytes: the stdlib codec would otherwise
+            # decode a second copy of the document before parsing it
+            with open(plan_path, "r") as f:
+                data = f.read()
+        size = len(data)
+        plan = parse_plan(data)
+        source_map = None
+        if with_source_map:
+            source_map = scan_source_map(
+                data.decode("utf-8") if isinstance(data, bytes) else data
+            )
+        raw = data if isinstance(data, bytes) else None
+        del data
+
+        if span.is_recording:
+            span.set_attributes(
+                {
+                    "plan_lint.plan.bytes": size,
+                    "plan_lint.plan.steps": len(plan.steps),
+                }
+            )
+        return plan, source_map, raw
+
+
 def load_plan(plan_path: str) -> Plan:
     """
     Load a plan from a JSON file.
@@ -42,17 +146,130 @@ def load_plan(plan_path: str) -> Plan:
     Returns:
         The plan as a Plan object.
     """
-    with open(plan_path, "r") as f:
-        plan_data = json.load(f)
+    return _read_plan(plan_path, with_source_map=False)[0]
 
-    # Validate against schema
-    schema = load_schema()
-    try:
-        jsonschema.validate(instance=plan_data, schema=schema)
-    except jsonschema.exceptions.ValidationError as e:
-        raise ValueError(f"Plan validation failed: {e}") from e
 
-    return Plan.model_validate(plan_data)
+def load_plan_bytes(plan_path: str) -> Tuple[Plan, bytes]:
+    """
+    Load a plan from a JSON file, keeping the bytes it was parsed from.
+
+    The bytes can be passed to ``validate_plan(..., opa_input=...)`` so OPA
+    receives the file as it is instead of a re-serialised plan.
+
+    Args:
+        plan_path: Path to a JSON plan file.
+
+    Returns:
+        A tuple of (plan, data), where data is the content of the file.
+    """
+    plan, _, raw = _read_plan(plan_path, with_source_map=False, with_bytes=True)
+    assert raw is not None
+    return plan, raw
+
+
+def load_plan_with_source_map(plan_path: str) -> Tuple[Plan, SourceMap]:
+    """
+    Load a plan from a JSON file, recording where its steps and args are.
+
+    Args:
+        plan_path: Path to a JSON plan file.
+
+    Returns:
+        A tuple of (plan, source_map), where the source map gives the line and
+        column of each step and top-level argument in the file.
+    """
+    plan, source_map, _ = _read_plan(plan_path, with_source_map=True)
+    assert source_map is not None
+    return plan, source_map
+
+
+# Policy formats, by file extension; other files are sniffed
+POLICY_FORMATS = ("yaml", "json", "rego")
+_EXTENSIONS = {".yaml": "yaml", ".yml": "yaml", ".json": "json", ".rego": "rego"}
+
+# Policy files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+
+# Bytes looked at to sniff the format of a file without a known extension
+_SNIFF_BYTES = 4096
+
+# A Rego package declaration on a line of its own, optionally followed by a
+# comment; a YAML key named ``package`` is followed by a colon
+_REGO_PACKAGE = re.compile(rb"package\s+[A-Za-z_][\w.\[\]\"-]*\s*(#.*)?$")
+
+
+class LoadedPolicy(NamedTuple):
+    """A policy file as loaded by ``load_policy_file``."""
+
+    path: str
+    # "yaml", "json" or "rego"
+    format: str
+    # The parsed policy; the defaults for a Rego policy
+    policy: Policy
+    # The Rego source of a Rego policy
+    rego_policy: Optional[str]
+
+    @property
+    def is_rego(self) -> bool:
+        """Whether the policy is written in Rego."""
+        return self.format == "rego"
+
+
+def sniff_policy_format(head: Union[bytes, mmap.mmap]) -> str:
+    """
+    Guess the format of a policy from the start of its content.
+
+    The first line that is neither blank nor a comment decides: a ``package``
+    declaration means Rego, an opening brace JSON, and anything else YAML.
+    Braces or the word ``package`` later in a YAML document do not matter.
+
+    Args:
+        head: The first few KB of the policy.
+
+    Returns:
+        "yaml", "json" or "rego".
+    """
+    for line in bytes(head[:_SNIFF_BYTES]).splitlines():
+        line = line.strip().lstrip(b"\xef\xbb\xbf")
+        if not line or line.startswith(b"#"):
+            continue
+        if line.startswith(b"{"):
+            return "json"
+        if _REGO_PACKAGE.match(line):
+            return "rego"
+        return "yaml"
+    return "yaml"
+
+
+@functools.lru_cache(maxsize=256)
+def _sniff_file(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, "rb") as f:
+        return sniff_policy_format(f.read(_SNIFF_BYTES))
+
+
+def detect_policy_format(policy_path: str) -> str:
+    """
+    Detect the format of a policy file.
+
+    The extension decides when it is ``.yaml``, ``.yml``, ``.json`` or
+    ``.rego``. Other files are sniffed from their first few KB; the result is
+    cached until the file changes, so callers may detect the format of the
+    same file repeatedly.
+
+    Args:
+        policy_path: Path to the policy file.
+
+    Returns:
+        "yaml", "json" or "rego".
+
+    Raises:
+        OSError: If the file has no known extension and cannot be read.
+    """
+    policy_format = _EXTENSIONS.get(os.path.splitext(policy_path)[1].lower())
+    if policy_format is not None:
+        return policy_format
+    stat = os.stat(policy_path)
+    return _sniff_file(os.path.abspath(policy_path), stat.st_mtime_ns, stat.st_size)
 
 
 def is_rego_policy_file(filepath: str) -> bool:
@@ -65,29 +282,53 @@ def is_rego_policy_file(filepath: str) -> bool:
     Returns:
         True if the file is likely a Rego policy, False otherwise
     """
-    # Check file extension
-    if filepath.endswith(".rego"):
-        return True
-
-    # Check content for Rego syntax
     try:
-        with open(filepath, "r") as f:
-            content = f.read(1000)  # Read first 1000 chars to check
-            return "package" in content and any(
-                rule in content for rule in ["default ", " = ", "{", "input."]
-            )
-    except Exception:
+        return detect_policy_format(filepath) == "rego"
+    except OSError:
         return False
 
-    return False
 
-
-def load_policy(policy_path: Optional[str] = None) -> Tuple[Policy, Optional[str]]:
+@contextmanager
+def _policy_buffer(policy_path: str) -> Iterator[Union[bytes, mmap.mmap]]:
+    """Read a policy file once, memory-mapping it if it is large."""
+    with open(policy_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def _policy_document(data: Any, policy_path: str) -> Dict[str, Any]:
+    """Check that a parsed policy document is a mapping."""
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"Policy {policy_path} is not a mapping")
+    return data
+
+
+def load_policy(
+    policy_path: Optional[str] = None,
+    files: Optional[List[str]] = None,
+    read_base: Optional[Callable[[str], Dict[str, Any]]] = None,
+    cache: Optional[PolicyCache] = None,
+) -> Tuple[Policy, Optional[str]]:
     """
     Load a policy file.
 
+    A YAML policy may name policies it builds on with ``extends``; see
+    ``load_policy_data``.
+
     Args:
         policy_path: Path to policy file (YAML or Rego format)
+        files: Optional list to append the paths of every file read to,
+            including the policies the policy extends.
+        read_base: Optional function reading the base policies a YAML policy
+            extends; see ``load_policy_data``.
+        cache: Optional on-disk cache to read YAML policies from, and to store
+            them in after parsing.
 
     Returns:
         A tuple of (Policy object, Optional Rego policy string)
@@ -98,38 +339,268 @@ def load_policy(policy_path: Optional[str] = None) -> Tuple[Policy, Optional[str
     if policy_path is None:
         return Policy(), None
 
-    try:
-        # Check if this is a Rego policy file
-        if is_rego_policy_file(policy_path):
-            # Load the Rego policy as a string
-            with open(policy_path, "r") as f:
-                rego_content = f.read()
-
-            # Return a default Policy object and the Rego content
-            return Policy(), rego_content
-
-        # Otherwise, treat as YAML policy
-        with open(policy_path, "r") as f:
-            policy_data = yaml.safe_load(f)
-
-        if policy_data is None:
-            return Policy(), None
-
-        # Process the bounds to ensure they are proper lists of numbers
-        if "bounds" in policy_data and policy_data["bounds"]:
-            for key, value in policy_data["bounds"].items():
-                if not isinstance(value, list):
-                    # Try to convert to a list if possible
-                    try:
-                        policy_data["bounds"][key] = list(value)
-                    except (TypeError, ValueError) as err:
-                        raise ValueError(
-                            f"Invalid bounds format for {key}: {value}"
-                        ) from err
-
-        return Policy.model_validate(policy_data), None
-    except Exception as e:
-        raise ValueError(f"Failed to load policy from {policy_path}: {e}") from e
+    loaded = load_policy_file(policy_path, files, read_base, cache)
+    return loaded.policy, loaded.rego_policy
+
+
+def load_policy_file(
+    policy_path: str,
+    files: Optional[List[str]] = None,
+    read_base: Optional[Callable[[str], Dict[str, Any]]] = None,
+    cache: Optional[PolicyCache] = None,
+    policy_format: Optional[str] = None,
+) -> LoadedPolicy:
+    """
+    Load a policy file, reading it once.
+
+    The format is taken from the extension, or sniffed from the start of the
+    content already read (see ``sniff_policy_format``). Files of
+    ``MMAP_THRESHOLD`` bytes or more are memory-mapped: YAML is parsed from
+    the mapping as a stream, and a cached policy is found by hashing it,
+    without copying the file into memory.
+
+    Args:
+        policy_path: Path to the policy file.
+        files: Optional list to append the paths of every file read to,
+            including the policies the policy extends.
+        read_base: Optional function reading the base policies a YAML policy
+            extends; see ``load_policy_data``.
+        cache: Optional on-disk cache to read YAML and JSON policies from, and
+            to store them in after parsing.
+        policy_format: "yaml", "json" or "rego" to skip detection.
+
+    Returns:
+        The loaded policy.
+
+    Raises:
+        ValueError: If the policy cannot be read or is invalid.
+    """
+    with tracing.span("plan_lint.load_policy") as span:
+        try:
+            loaded = _load_policy_file(
+                policy_path, files, read_base, cache, policy_format
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to load policy from {policy_path}: {e}") from e
+        if span.is_recording:
+            span.set_attributes(
+                {
+                    "plan_lint.policy.rego": loaded.is_rego,
+                    "plan_lint.policy.format": loaded.format,
+                }
+            )
+        return loaded
+
+
+def _load_policy_file(
+    policy_path: str,
+    files: Optional[List[str]],
+    read_base: Optional[Callable[[str], Dict[str, Any]]],
+    cache: Optional[PolicyCache],
+    policy_format: Optional[str],
+) -> LoadedPolicy:
+    if policy_format is not None and policy_format not in POLICY_FORMATS:
+        raise ValueError(f"Unknown policy format: {policy_format}")
+    policy_format = policy_format or _EXTENSIONS.get(
+        os.path.splitext(policy_path)[1].lower()
+    )
+
+    with _policy_buffer(policy_path) as buffer:
+        if policy_format is None:
+            policy_format = sniff_policy_format(buffer)
+
+        if policy_format == "rego":
+            rego_policy = str(buffer, "utf-8")
+            if files is not None:
+                files.append(os.path.abspath(policy_path))
+            return LoadedPolicy(policy_path, policy_format, Policy(), rego_policy)
+
+        if cache is not None:
+            policy = cache.get(policy_path, buffer, files)
+            if policy is not None:
+                return LoadedPolicy(policy_path, policy_format, policy, None)
+
+        if policy_format == "json":
+            data = jsonio.loads(bytes(buffer))
+        else:
+            # PyYAML reads a mapping as a stream, in chunks, without copying it
+            data = yaml.safe_load(buffer)
+        document = _policy_document(data, policy_path)
+
+        read: List[str] = []
+        policy_data = load_policy_data(
+            policy_path, read_base or read_policy_document, read, document
+        )
+        policy = parse_policy_data(policy_data)
+        if cache is not None:
+            cache.put(policy_path, buffer, policy, read)
+        if files is not None:
+            files.extend(read)
+        return LoadedPolicy(policy_path, policy_format, policy, None)
+
+
+def parse_policy_data(policy_data: Dict[str, Any]) -> Policy:
+    """
+    Build a Policy from the contents of a YAML policy.
+
+    Deny patterns prone to catastrophic backtracking are logged as warnings;
+    ``plan_lint.policy_check`` has the full check.
+
+    Args:
+        policy_data: The policy as a mapping, with ``extends`` already resolved.
+
+    Returns:
+        The policy as a Policy object.
+
+    Raises:
+        ValueError: If the policy is invalid.
+    """
+    if not policy_data:
+        return Policy()
+
+    # Process the bounds to ensure they are lists, expressions or mappings
+    if "bounds" in policy_data and policy_data["bounds"]:
+        bounds = dict(policy_data["bounds"])
+        for key, value in bounds.items():
+            if not isinstance(value, (list, str, dict)):
+                # Try to convert to a list if possible
+                try:
+                    bounds[key] = list(value)
+                except (TypeError, ValueError) as err:
+                    raise ValueError(
+                        f"Invalid bounds format for {key}: {value}"
+                    ) from err
+        policy_data = {**policy_data, "bounds": bounds}
+
+    policy = Policy.model_validate(policy_data)
+
+    # Compile the bounds now so malformed expressions fail at load time
+    get_bounds_index(policy.bounds)
+
+    for pattern in policy.deny_tokens_regex:
+        for issue in analyze_pattern(pattern):
+            logger.warning("Deny pattern %r: %s", pattern, issue.message)
+
+    return policy
+
+
+def read_policy_document(policy_path: str) -> Dict[str, Any]:
+    """
+    Read one YAML policy file as it is, without resolving ``extends``.
+
+    Args:
+        policy_path: Path to a YAML policy file.
+
+    Returns:
+        The document as a mapping; empty for an empty file.
+
+    Raises:
+        ValueError: If the document is not a mapping.
+    """
+    with open(policy_path, "r") as f:
+        return _policy_document(yaml.safe_load(f), policy_path)
+
+
+def merge_policy_data(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a policy overlay to a base policy.
+
+    Mapping sections such as ``bounds`` and ``risk_weights`` are merged key by
+    key, and a key set to null in the overlay removes it from the base. Other
+    settings, lists included, are replaced. Neither argument is modified.
+
+    Args:
+        base: The base policy as a mapping.
+        overlay: The overriding policy as a mapping.
+
+    Returns:
+        The merged policy as a mapping.
+    """
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            section = dict(merged[key])
+            for name, item in value.items():
+                if item is None:
+                    section.pop(name, None)
+                else:
+                    section[name] = item
+            merged[key] = section
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_policy_data(
+    policy_path: str,
+    read_base: Callable[[str], Dict[str, Any]] = read_policy_document,
+    files: Optional[List[str]] = None,
+    document: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Read a YAML policy and merge it over the policies it extends.
+
+    ``extends`` names one base policy file, or a list of them merged in order,
+    relative to the extending file. Bases may extend other policies in turn.
+
+    Args:
+        policy_path: Path to a YAML policy file.
+        read_base: Function reading a base policy document, given its absolute
+            path. Registries pass a caching reader so shared bases are parsed
+            once.
+        files: Optional list to append the absolute path of every file read to.
+        document: The policy document, if it has already been read.
+
+    Returns:
+        The merged policy as a mapping, without ``extends``.
+
+    Raises:
+        ValueError: If ``extends`` is malformed or policies extend each other
+            in a cycle.
+    """
+    read = read_policy_document
+    if document is not None:
+        read = functools.partial(_read_document, document)
+    return _resolve_policy(os.path.abspath(policy_path), read, read_base, (), files)
+
+
+def _read_document(document: Dict[str, Any], policy_path: str) -> Dict[str, Any]:
+    return document
+
+
+def _resolve_policy(
+    path: str,
+    read: Callable[[str], Dict[str, Any]],
+    read_base: Callable[[str], Dict[str, Any]],
+    chain: Tuple[str, ...],
+    files: Optional[List[str]],
+) -> Dict[str, Any]:
+    if path in chain:
+        cycle = " -> ".join(chain + (path,))
+        raise ValueError(f"Policies extend each other in a cycle: {cycle}")
+    policy_data = read(path)
+    if files is not None:
+        files.append(path)
+
+    extends = policy_data.get("extends")
+    if extends is None:
+        return policy_data
+    if isinstance(extends, str):
+        extends = [extends]
+    if not isinstance(extends, list) or not all(isinstance(e, str) for e in extends):
+        raise ValueError(f"'extends' in {path} must be a path or a list of paths")
+
+    merged: Dict[str, Any] = {}
+    directory = os.path.dirname(path)
+    for base in extends:
+        base_path = os.path.abspath(os.path.join(directory, base))
+        base_data = _resolve_policy(
+            base_path, read_base, read_base, chain + (path,), files
+        )
+        merged = merge_policy_data(merged, base_data)
+
+    overlay = {key: value for key, value in policy_data.items() if key != "extends"}
+    return merge_policy_data(merged, overlay)
 
 
 def load_yaml_policy(policy_path: str) -> Policy:
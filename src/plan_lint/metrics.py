@@ -0,0 +1,473 @@
+"""
+Metrics module for plan-linter.
+
+This module keeps Prometheus-style counters and histograms for validation
+throughput, findings, risk scores and latencies, and renders them in the
+OpenMetrics text format.
+
+Metrics are off by default. Call ``enable()`` to start recording from
+``validate_plan``, the OPA backend and rule plugins, then either embed
+``registry.render()`` in an existing endpoint or call ``start_http_server()``
+to serve ``/metrics`` from a background thread.
+
+Each thread records into its own shard, so the hot path takes no locks; shards
+are only summed when metrics are rendered. When a thread exits its shard is
+folded into a retired total, so thread-per-request servers do not accumulate
+shards.
+"""
+
+import bisect
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from plan_lint.types import ValidationResult
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+RISK_BUCKETS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+STEP_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for metrics with per-thread shards."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, Any]] = []
+        self._retired: Dict[LabelValues, Any] = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[LabelValues, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # The thread-local drops its values when the thread exits, which
+            # fires the finalizer and retires the shard.
+            self._local.sentinel = sentinel = _Sentinel()
+            weakref.finalize(
+                sentinel,
+                _retire_shard,
+                shard,
+                self._shards,
+                self._retired,
+                self._shards_lock,
+                type(self)._merge,
+            )
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    @staticmethod
+    def _merge(total: Dict[LabelValues, Any], shard: Dict[LabelValues, Any]) -> None:
+        """Add the values of one shard into a running total."""
+        raise NotImplementedError
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([str(labels[name]) for name in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(
+            f"Metric {self.name} expects labels {list(self.labelnames)}, "
+            f"got {sorted(labels)}"
+        )
+
+    def _snapshot(self) -> List[Dict[LabelValues, Any]]:
+        with self._shards_lock:
+            return [dict(self._retired)] + [dict(shard) for shard in self._shards]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Sentinel:
+    """Weak-referenceable marker whose lifetime is tied to a thread."""
+
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(
+    shard: Dict[LabelValues, Any],
+    shards: List[Dict[LabelValues, Any]],
+    retired: Dict[LabelValues, Any],
+    lock: threading.Lock,
+    merge: Any,
+) -> None:
+    """Fold the shard of an exited thread into the retired total."""
+    with lock:
+        merge(retired, shard)
+        for i, existing in enumerate(shards):
+            if existing is shard:
+                del shards[i]
+                break
+
+
+class Counter(_Metric):
+    """A monotonically increasing counter."""
+
+    kind = "counter"
+
+    @staticmethod
+    def _merge(total: Dict[LabelValues, Any], shard: Dict[LabelValues, Any]) -> None:
+        for key, value in shard.items():
+            total[key] = total.get(key, 0.0) + value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Increment the counter.
+
+        Args:
+            amount: Amount to add; must not be negative.
+            **labels: A value for each of the counter's label names.
+        """
+        key = self._label_values(labels) if labels or self.labelnames else ()
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the current total for a label combination."""
+        key = self._label_values(labels) if labels or self.labelnames else ()
+        return sum(float(shard.get(key, 0.0)) for shard in self._snapshot())
+
+    def render(self) -> List[str]:
+        totals: Dict[LabelValues, float] = {}
+        for shard in self._snapshot():
+            self._merge(totals, shard)
+
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} "
+            f"{_format_value(value)}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+class _HistogramState:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """A histogram with fixed bucket upper bounds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    @staticmethod
+    def _merge(total: Dict[LabelValues, Any], shard: Dict[LabelValues, Any]) -> None:
+        for key, state in shard.items():
+            merged = total.get(key)
+            if merged is None:
+                merged = total[key] = _HistogramState(len(state.counts))
+            for i, bucket_count in enumerate(state.counts):
+                merged.counts[i] += bucket_count
+            merged.sum += state.sum
+            merged.count += state.count
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value.
+            **labels: A value for each of the histogram's label names.
+        """
+        key = self._label_values(labels) if labels or self.labelnames else ()
+        shard = self._shard()
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = _HistogramState(len(self.buckets) + 1)
+        # Index of the first bucket whose upper bound is >= value
+        state.counts[bisect.bisect_left(self.buckets, value)] += 1
+        state.sum += value
+        state.count += 1
+
+    def render(self) -> List[str]:
+        merged: Dict[LabelValues, _HistogramState] = {}
+        for shard in self._snapshot():
+            self._merge(merged, shard)
+
+        lines = []
+        for key, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets + (float("inf"),), state.counts, strict=True
+            ):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {state.count}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(state.sum)}")
+        return lines
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class MetricsRegistry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric: The metric to add.
+
+        Returns:
+            The metric.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render every metric in the OpenMetrics text format.
+
+        Returns:
+            The exposition text, terminated by ``# EOF``.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class PlanLintMetrics:
+    """The metrics recorded by plan-lint's instrumentation."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        Create the plan-lint metrics in a registry.
+
+        Args:
+            registry: Registry to add the metrics to. A new one is created if
+                not given.
+        """
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.plans = r.counter(
+            "plan_lint_plans_validated",
+            "Plans validated, by backend and status",
+            ["backend", "status"],
+        )
+        self.findings = r.counter(
+            "plan_lint_findings", "Errors found, by error code", ["code"]
+        )
+        self.risk_score = r.histogram(
+            "plan_lint_risk_score",
+            "Risk score of validated plans",
+            buckets=RISK_BUCKETS,
+        )
+        self.steps = r.histogram(
+            "plan_lint_plan_steps", "Steps per validated plan", buckets=STEP_BUCKETS
+        )
+        self.duration = r.histogram(
+            "plan_lint_validation_duration_seconds",
+            "Time spent validating a plan, by backend",
+            ["backend"],
+        )
+        self.opa_evaluations = r.counter(
+            "plan_lint_opa_evaluations", "OPA evaluations, by outcome", ["outcome"]
+        )
+        self.opa_duration = r.histogram(
+            "plan_lint_opa_duration_seconds", "Time spent in OPA evaluation"
+        )
+        self.rule_findings = r.counter(
+            "plan_lint_rule_findings", "Errors found by rule plugins", ["rule"]
+        )
+        self.rule_duration = r.histogram(
+            "plan_lint_rule_duration_seconds", "Time spent in rule plugins", ["rule"]
+        )
+        self.policy_reloads = r.counter(
+            "plan_lint_policy_reloads", "Policy reloads, by outcome", ["outcome"]
+        )
+
+    def observe_validation(
+        self, result: ValidationResult, steps: int, seconds: float, backend: str
+    ) -> None:
+        """Record a completed validate_plan call."""
+        self.plans.inc(backend=backend, status=result.status.value)
+        for error in result.errors:
+            self.findings.inc(code=error.code.value)
+        self.risk_score.observe(result.risk_score)
+        self.steps.observe(steps)
+        self.duration.observe(seconds, backend=backend)
+
+    def observe_opa(self, seconds: float, ok: bool) -> None:
+        """Record an OPA evaluation."""
+        self.opa_evaluations.inc(outcome="ok" if ok else "error")
+        self.opa_duration.observe(seconds)
+
+    def observe_rule(self, rule: str, seconds: float, findings: int) -> None:
+        """Record a rule plugin run."""
+        if findings:
+            self.rule_findings.inc(findings, rule=rule)
+        self.rule_duration.observe(seconds, rule=rule)
+
+    def observe_policy_reload(self, ok: bool) -> None:
+        """Record a policy reload."""
+        self.policy_reloads.inc(outcome="ok" if ok else "error")
+
+
+# The active metrics, or None when metrics are disabled
+ACTIVE: Optional[PlanLintMetrics] = None
+
+
+def enable(registry: Optional[MetricsRegistry] = None) -> PlanLintMetrics:
+    """
+    Start recording plan-lint metrics.
+
+    Args:
+        registry: Registry to record into. A new one is created if not given.
+
+    Returns:
+        The active PlanLintMetrics; render it with ``.registry.render()``.
+    """
+    global ACTIVE
+    ACTIVE = PlanLintMetrics(registry)
+    return ACTIVE
+
+
+def disable() -> None:
+    """Stop recording plan-lint metrics."""
+    global ACTIVE
+    ACTIVE = None
+
+
+def start_http_server(
+    port: int,
+    addr: str = "127.0.0.1",
+    registry: Optional[MetricsRegistry] = None,
+) -> ThreadingHTTPServer:
+    """
+    Serve metrics at ``/metrics`` from a daemon thread.
+
+    Args:
+        port: Port to listen on; 0 picks a free port.
+        addr: Address to bind to.
+        registry: Registry to serve. Defaults to the active metrics, enabling
+            them if needed.
+
+    Returns:
+        The running server; call ``shutdown()`` to stop it.
+    """
+    if registry is None:
+        registry = (ACTIVE or enable()).registry
+    served = registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = served.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            return
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
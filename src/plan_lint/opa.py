@@ -5,19 +5,63 @@ This module provides functionality for evaluating plans against
 policies written in Rego for the Open Policy Agent (OPA).
 """
 
+import hashlib
 import json
 import logging
 import os
+import re
+import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Union
-
-from plan_lint.types import ErrorCode, Plan, PlanError, Policy, Status, ValidationResult
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pydantic import TypeAdapter
+
+from plan_lint import jsonio, metrics, tracing
+from plan_lint.compiler import get_bounds_index
+from plan_lint.core import _check_compiled_bounds, calculate_risk_score
+from plan_lint.types import (
+    ErrorCode,
+    Plan,
+    PlanError,
+    PlanStep,
+    Policy,
+    Status,
+    ValidationResult,
+)
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+_PLAN_ADAPTER = TypeAdapter(Plan)
+
+# Set once `opa version` has succeeded
+_opa_available = False
+
+# Rego policies written to disk, keyed by content hash, least recently used
+# first. A file is only deleted once no evaluation is using it.
+_MAX_POLICY_FILES = 64
+_policy_dir: Optional[tempfile.TemporaryDirectory] = None
+_policy_paths: "OrderedDict[str, str]" = OrderedDict()
+_policy_users: Dict[str, int] = {}
+_policy_lock = threading.Lock()
+
 
 class OPAError(Exception):
     """Exception raised for OPA-related errors."""
@@ -25,279 +69,802 @@ class OPAError(Exception):
     pass
 
 
+def _rego_value(value: Any) -> str:
+    """Render a JSON-compatible value as a Rego literal."""
+    # JSON strings, numbers, arrays and objects are valid Rego literals
+    return json.dumps(value)
+
+
+def _rego_bounds(policy: Policy) -> Dict[str, Dict[str, Tuple[float, float]]]:
+    """Group the constant ``[min, max]`` bounds of a policy by tool."""
+    return get_bounds_index(policy.bounds).simple_ranges()
+
+
+def builtin_bound_errors(plan: Plan, policy: Policy) -> List[PlanError]:
+    """
+    Check the bounds that ``policy_to_rego`` does not translate.
+
+    Expression, enum, length and mapping bounds, and bounds on nested
+    selectors, are evaluated by the built-in checks so that validating with a
+    generated Rego policy enforces every bound.
+
+    Args:
+        plan: The plan to check.
+        policy: The plan-lint policy the Rego policy was generated from.
+
+    Returns:
+        The bound violations, as the built-in validator reports them.
+    """
+    index = get_bounds_index(policy.bounds).without_simple()
+    if not index:
+        return []
+    context = plan.context or {}
+    errors: List[PlanError] = []
+    for i, step in enumerate(plan.steps):
+        errors.extend(
+            _check_compiled_bounds(step, index.for_tool(step.tool), i, context)
+        )
+    return errors
+
+
 def policy_to_rego(policy: Policy) -> str:
     """
     Convert a plan-lint Policy to a Rego policy.
 
+    The policy is generated in Rego v1 syntax (``import rego.v1``), which OPA
+    0.59 and later accept, and is shaped so OPA evaluates it without scanning:
+    allowed tools form a set and bounds an object keyed by tool, so each step's
+    checks are hash lookups on ``step.tool``, and each step's arguments are
+    serialised once for all deny patterns. Only constant ``[min, max]`` bounds
+    on top-level arguments are translated. The other bounds are not in the
+    generated Rego; ``evaluate_with_opa`` and ``OPAPool`` check them with
+    ``builtin_bound_errors`` and merge the results.
+
     Args:
         policy: The plan-lint Policy object
 
     Returns:
         A Rego policy as a string
     """
-    # Start with the package declaration
-    rego_policy = "package planlint\n\n"
+    lines = [
+        "package planlint",
+        "",
+        "import rego.v1",
+        "",
+        "default allow := false",
+        "",
+        "allow if count(violations) == 0",
+        "",
+        f"max_steps := {policy.max_steps}",
+        "",
+        'violations contains {"code": "MAX_STEPS_EXCEEDED", "msg": msg} if {',
+        "    count(input.steps) > max_steps",
+        '    msg := sprintf("Plan has %d steps, exceeding max of %d", '
+        "[count(input.steps), max_steps])",
+        "}",
+    ]
 
-    # Default rule - deny by default, allow explicit
-    rego_policy += "default allow = false\n\n"
-
-    # Create allow rule based on tool allowlist
     if policy.allow_tools:
-        tools_str = ", ".join([f'"{tool}"' for tool in policy.allow_tools])
-        rego_policy += f"allowed_tools = [{tools_str}]\n\n"
-        rego_policy += "allow {\n"
-        rego_policy += "    # Check all steps use allowed tools\n"
-        rego_policy += "    all_tools_allowed\n"
-        rego_policy += "    # Check no bounds violations\n"
-        rego_policy += "    no_bounds_violations\n"
-        rego_policy += "    # Check no sensitive data\n"
-        rego_policy += "    no_sensitive_data\n"
-        rego_policy += "    # Check max steps not exceeded\n"
-        rego_policy += "    steps_within_limit\n"
-        rego_policy += "}\n\n"
-
-        # Tool allowlist rule
-        rego_policy += "all_tools_allowed {\n"
-        rego_policy += "    # For each step\n"
-        rego_policy += "    step := input.steps[_]\n"
-        rego_policy += "    # The tool must be in the allowed list\n"
-        rego_policy += "    tool := step.tool\n"
-        rego_policy += "    tool == allowed_tools[_]\n"
-        rego_policy += "}\n\n"
-
-    # Bounds check
-    if policy.bounds:
-        rego_policy += "no_bounds_violations {\n"
-        rego_policy += "    # For each step\n"
-        rego_policy += "    step := input.steps[_]\n"
-        rego_policy += "    tool := step.tool\n"
-        rego_policy += "    args := step.args\n"
-
-        # Add specific bound checks
-        for bound_path, bound_values in policy.bounds.items():
-            if len(bound_values) >= 2:
-                min_val, max_val = bound_values[0], bound_values[1]
-                parts = bound_path.split(".", 1)
-                if len(parts) == 2:
-                    tool_name, arg_name = parts
-                    rego_policy += f"    # Check bounds for {bound_path}\n"
-                    rego_policy += f'    tool == "{tool_name}" {{\n'
-                    rego_policy += f'        args["{arg_name}"] >= {min_val}\n'
-                    rego_policy += f'        args["{arg_name}"] <= {max_val}\n'
-                    rego_policy += "    }\n"
-
-        rego_policy += "}\n\n"
-
-    # Sensitive data check using deny_tokens_regex
+        tools = sorted(set(policy.allow_tools))
+        lines += [
+            "",
+            "# A set, so membership is a single lookup",
+            f"allowed_tools := {{{', '.join(_rego_value(t) for t in tools)}}}",
+            "",
+            "violations contains " '{"step": i, "code": "TOOL_DENY", "msg": msg} if {',
+            "    some i, step in input.steps",
+            "    not allowed_tools[step.tool]",
+            "    msg := sprintf(\"Tool '%s' is not allowed by policy\", [step.tool])",
+            "}",
+        ]
+
+    bounds = _rego_bounds(policy)
+    if bounds:
+        lines += [
+            "",
+            "# [min, max] per argument, keyed by tool so each step only visits",
+            "# the bounds of its own tool",
+            f"bounds := {_rego_value(bounds)}",
+            "",
+            "violations contains "
+            '{"step": i, "code": "BOUND_VIOLATION", "msg": msg} if {',
+            "    some i, step in input.steps",
+            "    some arg, limits in bounds[step.tool]",
+            "    value := step.args[arg]",
+            "    is_number(value)",
+            "    [low, high] := limits",
+            "    out_of_bounds(value, low, high)",
+            "    msg := sprintf(\"Argument '%s' value %v is outside bounds [%v, %v]\", "
+            "[arg, value, low, high])",
+            "}",
+            "",
+            "out_of_bounds(value, low, _) if value < low",
+            "",
+            "out_of_bounds(value, _, high) if value > high",
+        ]
+
     if policy.deny_tokens_regex:
-        patterns_str = ", ".join(
-            [f'"{pattern}"' for pattern in policy.deny_tokens_regex]
+        lines += [
+            "",
+            f"sensitive_patterns := {_rego_value(policy.deny_tokens_regex)}",
+            "",
+            "# Each step's arguments are serialised once, for every pattern",
+            "args_text[i] := json.marshal(step.args) if {",
+            "    some i, step in input.steps",
+            "}",
+            "",
+            "violations contains " '{"step": i, "code": "RAW_SECRET", "msg": msg} if {',
+            "    some i, text in args_text",
+            "    some pattern in sensitive_patterns",
+            "    regex.match(pattern, text)",
+            "    msg := sprintf(\"Potentially sensitive data matching pattern '%s' "
+            'found in arguments", [pattern])',
+            "}",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+def plan_to_opa_input(plan: Plan) -> bytes:
+    """
+    Serialise a plan as OPA input.
+
+    The plan is serialised once, directly to JSON bytes.
+
+    Args:
+        plan: The plan to serialise.
+
+    Returns:
+        The plan as UTF-8 encoded JSON.
+    """
+    return _PLAN_ADAPTER.dump_json(plan)
+
+
+def check_opa_installed() -> None:
+    """
+    Check that the ``opa`` executable can be run.
+
+    A successful check is remembered for the life of the process.
+
+    Raises:
+        OPAError: If OPA is not installed.
+    """
+    global _opa_available
+    if _opa_available:
+        return
+    try:
+        subprocess.run(["opa", "version"], check=True, capture_output=True)
+    except (subprocess.SubprocessError, FileNotFoundError) as err:
+        raise OPAError(
+            "OPA executable not found. Please install OPA and ensure "
+            "it's in your PATH."
+        ) from err
+    _opa_available = True
+
+
+@contextmanager
+def _policy_file(rego_policy: str) -> Iterator[str]:
+    """Provide a file containing a Rego policy, writing it on first use."""
+    path = _acquire_policy([rego_policy], directory=False)
+    try:
+        yield path
+    finally:
+        _release_policy(path)
+
+
+@contextmanager
+def _modules_dir(modules: List[str]) -> Iterator[str]:
+    """Provide a directory containing Rego modules, writing it on first use."""
+    path = _acquire_policy(modules, directory=True)
+    try:
+        yield path
+    finally:
+        _release_policy(path)
+
+
+def _acquire_policy(modules: List[str], directory: bool) -> str:
+    """
+    Return a file or directory of Rego modules named by their content hash.
+
+    The path is kept on disk until a matching ``_release_policy`` call.
+    """
+    digest = hashlib.sha256("\0".join(modules).encode("utf-8")).hexdigest()
+    if directory:
+        digest = "d" + digest
+
+    with _policy_lock:
+        path = _policy_paths.get(digest)
+        if path is None or not os.path.exists(path):
+            path = _write_policy(modules, directory, digest)
+            _policy_paths[digest] = path
+            _evict_policies()
+        _policy_paths.move_to_end(digest)
+        _policy_users[path] = _policy_users.get(path, 0) + 1
+        return path
+
+
+def _release_policy(path: str) -> None:
+    """Mark a path from ``_acquire_policy`` as no longer in use."""
+    with _policy_lock:
+        users = _policy_users.pop(path, 1) - 1
+        if users > 0:
+            _policy_users[path] = users
+        _evict_policies()
+
+
+def _write_policy(modules: List[str], directory: bool, digest: str) -> str:
+    global _policy_dir
+    if _policy_dir is None:
+        _policy_dir = tempfile.TemporaryDirectory(prefix="plan-lint-opa-")
+    if directory:
+        path = os.path.join(_policy_dir.name, digest[:24])
+        os.makedirs(path, exist_ok=True)
+        for i, module in enumerate(modules):
+            with open(os.path.join(path, f"{i}.rego"), "w") as f:
+                f.write(module)
+    else:
+        path = os.path.join(_policy_dir.name, f"{digest[:24]}.rego")
+        with open(path, "w") as f:
+            f.write(modules[0])
+    return path
+
+
+def _evict_policies() -> None:
+    """Delete least recently used policy files that are not in use."""
+    excess = len(_policy_paths) - _MAX_POLICY_FILES
+    if excess <= 0:
+        return
+    for digest in [d for d, p in _policy_paths.items() if p not in _policy_users]:
+        old_path = _policy_paths.pop(digest)
+        if os.path.isdir(old_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+        elif os.path.exists(old_path):
+            os.unlink(old_path)
+        excess -= 1
+        if excess == 0:
+            break
+
+
+# Runs ``opa`` with the given arguments and standard input, returning its output
+OPARunner = Callable[[List[str], bytes], bytes]
+
+
+def run_opa(args: List[str], input_bytes: bytes = b"") -> bytes:
+    """
+    Run the ``opa`` executable.
+
+    Args:
+        args: The arguments after ``opa``.
+        input_bytes: Data piped to its standard input.
+
+    Returns:
+        Its standard output.
+
+    Raises:
+        OPAError: If OPA is not installed or exits with an error.
+    """
+    check_opa_installed()
+    try:
+        result = subprocess.run(
+            ["opa", *args], input=input_bytes, check=True, capture_output=True
         )
-        rego_policy += f"sensitive_patterns = [{patterns_str}]\n\n"
-        rego_policy += "no_sensitive_data {\n"
-        rego_policy += "    # For each step\n"
-        rego_policy += "    step := input.steps[_]\n"
-        rego_policy += "    args_str := json.marshal(step.args)\n"
-        rego_policy += "    # For each pattern\n"
-        rego_policy += "    pattern := sensitive_patterns[_]\n"
-        rego_policy += "    # No match should be found\n"
-        rego_policy += "    not regex.match(pattern, args_str)\n"
-        rego_policy += "}\n\n"
-
-    # Max steps check
-    rego_policy += "steps_within_limit {\n"
-    rego_policy += f"    count(input.steps) <= {policy.max_steps}\n"
-    rego_policy += "}\n\n"
-
-    # Violations for detailed error reporting
-    rego_policy += "# Gather violations for detailed error reporting\n"
-    rego_policy += 'violations[{"step": step_idx, "code": "TOOL_DENY", "msg": msg}] {\n'
-    rego_policy += "    step := input.steps[step_idx]\n"
-    rego_policy += "    tool := step.tool\n"
-    rego_policy += "    not tool == allowed_tools[_]\n"
-    rego_policy += (
-        '    msg := concat("", ["Tool \'", tool, "\' is not allowed by policy"])\n'
-    )
-    rego_policy += "}\n\n"
+    except subprocess.SubprocessError as e:
+        raise OPAError(f"OPA evaluation failed: {e}") from e
+    return result.stdout
 
-    # Bounds violations
-    rego_policy += (
-        'violations[{"step": step_idx, "code": "BOUND_VIOLATION", "msg": msg}] {\n'
-    )
-    rego_policy += "    step := input.steps[step_idx]\n"
-    rego_policy += "    tool := step.tool\n"
-    rego_policy += "    args := step.args\n"
-
-    # Add specific bound violation checks
-    for bound_path, bound_values in policy.bounds.items():
-        if len(bound_values) >= 2:
-            min_val, max_val = bound_values[0], bound_values[1]
-            parts = bound_path.split(".", 1)
-            if len(parts) == 2:
-                tool_name, arg_name = parts
-                rego_policy += f"    # Check violation for {bound_path}\n"
-                rego_policy += f'    tool == "{tool_name}"\n'
-                rego_policy += f'    arg_val := args["{arg_name}"]\n'
-                rego_policy += f"    arg_val < {min_val} or arg_val > {max_val})\n"
-                rego_policy += '    msg := concat("", ["Argument \'", '
-                rego_policy += f'"{arg_name}", "\' value ", '
-                rego_policy += "to_string(arg_val), "
-                rego_policy += f'" is outside bounds [{min_val}, {max_val}]"])\n'
-
-    rego_policy += "}\n\n"
-
-    # Sensitive data violations
-    rego_policy += (
-        'violations[{"step": step_idx, "code": "RAW_SECRET", "msg": msg}] {\n'
-    )
-    rego_policy += "    step := input.steps[step_idx]\n"
-    rego_policy += "    args_str := json.marshal(step.args)\n"
-    rego_policy += "    pattern := sensitive_patterns[_]\n"
-    rego_policy += "    regex.match(pattern, args_str)\n"
-    rego_policy += '    msg := concat("", ["Potentially sensitive data matching '
-    rego_policy += 'pattern \'", pattern, "\' found in arguments"])\n'
-    rego_policy += "}\n\n"
 
-    # Max steps exceeded violation
-    rego_policy += 'violations[{"code": "MAX_STEPS_EXCEEDED", "msg": msg}] {\n'
-    rego_policy += f"    count(input.steps) > {policy.max_steps}\n"
-    rego_policy += '    msg := concat("", ["Plan has ", '
-    rego_policy += "to_string(count(input.steps)), "
-    rego_policy += f'" steps, exceeding max of {policy.max_steps}"])\n'
-    rego_policy += "}\n"
+def _evaluate(
+    args: List[str], input_bytes: bytes, plan: Plan, runner: OPARunner
+) -> Any:
+    """Run one evaluation of a plan, traced and timed, and return its value."""
+    start = time.perf_counter()
+    try:
+        with tracing.span("plan_lint.opa_eval") as span:
+            output = runner(args, input_bytes)
+            if span.is_recording:
+                span.set_attributes(
+                    {
+                        "plan_lint.plan.steps": len(plan.steps),
+                        "plan_lint.plan.bytes": len(input_bytes),
+                    }
+                )
+    except OPAError:
+        if metrics.ACTIVE is not None:
+            metrics.ACTIVE.observe_opa(time.perf_counter() - start, ok=False)
+        raise
+
+    if metrics.ACTIVE is not None:
+        metrics.ACTIVE.observe_opa(time.perf_counter() - start, ok=True)
 
-    return rego_policy
+    opa_result = jsonio.loads(output)
+    if "result" in opa_result and len(opa_result["result"]) > 0:
+        return opa_result["result"][0].get("expressions", [{}])[0].get("value")
+    return None
+
+
+def _to_result(
+    violations: List[Dict[str, Any]],
+    policy: Policy,
+    plan: Optional[Plan] = None,
+) -> ValidationResult:
+    """
+    Convert OPA violations to a validation result.
+
+    When the plan is given, the policy's bounds that the generated Rego does
+    not cover are checked too.
+    """
+    # Convert violations to PlanError objects
+    errors = []
+    for v in violations:
+        errors.append(
+            PlanError(
+                step=v.get("step"),
+                code=getattr(ErrorCode, v.get("code", "SCHEMA_INVALID")),
+                msg=v.get("msg", "Unknown error"),
+            )
+        )
+
+    if plan is not None:
+        errors.extend(builtin_bound_errors(plan, policy))
+
+    # Calculate risk score using plan-lint's logic
+    risk_score = calculate_risk_score(errors, [], policy.risk_weights)
+
+    # Determine status
+    status = Status.PASS
+    if errors:
+        status = Status.ERROR
+
+    # Override status based on risk threshold
+    if risk_score >= policy.fail_risk_threshold:
+        status = Status.ERROR
+
+    return ValidationResult(
+        status=status, risk_score=risk_score, errors=errors, warnings=[]
+    )
 
 
 def evaluate_with_opa(
-    plan: Plan, policy: Policy, rego_policy: Optional[str] = None
+    plan: Plan,
+    policy: Policy,
+    rego_policy: Optional[str] = None,
+    raw_input: Optional[bytes] = None,
 ) -> ValidationResult:
     """
     Evaluate a plan against a policy using OPA.
 
+    The plan is piped to ``opa eval --stdin-input``. The Rego policy is
+    written to a file once and reused for later evaluations.
+
     Args:
         plan: The plan to evaluate
         policy: The plan-lint Policy object
         rego_policy: Optional pre-generated Rego policy as a string
+        raw_input: Optional JSON bytes the plan was parsed from. When given
+            they are sent to OPA as they are instead of serialising the plan.
 
     Returns:
         ValidationResult object with errors and risk score
     """
-    # Convert plan to JSON for OPA input
-    plan_json = json.loads(plan.json())
-
     # Generate Rego policy if not provided
+    generated = rego_policy is None
     if rego_policy is None:
         rego_policy = policy_to_rego(policy)
 
-    # Create temporary files for policy and input
-    policy_path = None
-    input_path = None
+    input_bytes = raw_input if raw_input is not None else plan_to_opa_input(plan)
 
-    try:
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".rego", delete=False
-        ) as policy_file:
-            policy_file.write(rego_policy)
-            policy_path = policy_file.name
-
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix=".json", delete=False
-        ) as input_file:
-            json.dump(plan_json, input_file)
-            input_path = input_file.name
-
-        # Run OPA evaluation
-        try:
-            # Check if OPA is installed
-            try:
-                subprocess.run(["opa", "version"], check=True, capture_output=True)
-            except (subprocess.SubprocessError, FileNotFoundError) as err:
-                raise OPAError(
-                    "OPA executable not found. Please install OPA and ensure "
-                    "it's in your PATH."
-                ) from err
-
-            # Evaluate policy
-            result = subprocess.run(
-                [
-                    "opa",
-                    "eval",
-                    "-d",
-                    policy_path,
-                    "-i",
-                    input_path,
-                    "data.planlint.allow",
-                    "data.planlint.violations",
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
+    # Check if OPA is installed
+    check_opa_installed()
 
-            # Parse OPA output
-            opa_result = json.loads(result.stdout)
-
-            # Process OPA results
-            if "result" in opa_result and len(opa_result["result"]) > 0:
-                # We don't need to store this result as it's not used
-                # Just access the data directly
-                violations = (
-                    opa_result["result"][0]
-                    .get("expressions", [{}])[0]
-                    .get("value", {})
-                    .get("violations", [])
-                )
-
-            # Convert violations to PlanError objects
-            errors = []
-            for v in violations:
-                errors.append(
-                    PlanError(
-                        step=v.get("step"),
-                        code=getattr(ErrorCode, v.get("code", "SCHEMA_INVALID")),
-                        msg=v.get("msg", "Unknown error"),
-                    )
-                )
-
-            # Calculate risk score using plan-lint's logic
-            from plan_lint.core import calculate_risk_score
-
-            risk_score = calculate_risk_score(errors, [], policy.risk_weights)
-
-            # Determine status
-            status = Status.PASS
-            if errors:
-                status = Status.ERROR
+    with _policy_file(rego_policy) as policy_path:
+        value = _evaluate(
+            ["eval", "--stdin-input", "-d", policy_path, "data.planlint"],
+            input_bytes,
+            plan,
+            run_opa,
+        )
+    violations = (value or {}).get("violations", [])
+    return _to_result(violations, policy, plan if generated else None)
+
+
+class Residual(NamedTuple):
+    """What remains of a policy's step rules once the tool is known."""
+
+    tool: str
+    # Rule bodies that each produce ``violation``; none if the tool never
+    # violates the policy
+    queries: List[str]
+    # Modules defining the rules the bodies refer to
+    support: List[str]
+
+
+# Built-in functions that Rego writes as infix operators
+_INFIX_OPERATORS = {
+    "eq": "=",
+    "assign": ":=",
+    "equal": "==",
+    "neq": "!=",
+    "lt": "<",
+    "lte": "<=",
+    "gt": ">",
+    "gte": ">=",
+    "plus": "+",
+    "minus": "-",
+    "mul": "*",
+    "div": "/",
+    "rem": "%",
+    "and": "&",
+    "or": "|",
+    "internal.member_2": "in",
+}
+
+_REGO_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+_REGO_KEYWORDS = {
+    "as",
+    "contains",
+    "default",
+    "else",
+    "every",
+    "false",
+    "if",
+    "import",
+    "in",
+    "not",
+    "null",
+    "package",
+    "some",
+    "true",
+    "with",
+}
+
+
+class _RegoPrinter:
+    """
+    Print the JSON AST of ``opa eval --partial --format json`` as Rego v1.
 
-            # Override status based on risk threshold
-            if risk_score >= policy.fail_risk_threshold:
-                status = Status.ERROR
+    References to ``data.partial`` and the packages of support modules are
+    moved under ``namespace`` so residuals of different tools do not clash.
+    """
 
-            return ValidationResult(
-                status=status, risk_score=risk_score, errors=errors, warnings=[]
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def module(self, module: Dict[str, Any]) -> str:
+        package = self.ref(module["package"]["path"])
+        lines = [f"package {package.removeprefix('data.')}", "", "import rego.v1"]
+        for imported in module.get("imports") or []:
+            path = self.term(imported["path"])
+            if path.startswith(("future.", "rego.")):
+                continue
+            alias = imported.get("alias")
+            lines.append(f"import {path} as {alias}" if alias else f"import {path}")
+        for rule in module.get("rules") or []:
+            lines += [""] + self.rule(rule)
+        return "\n".join(lines) + "\n"
+
+    def rule(self, rule: Dict[str, Any]) -> List[str]:
+        head = rule["head"]
+        ref = head.get("ref") or [{"type": "var", "value": head["name"]}]
+        name = self.ref(ref)
+        if head.get("args") is not None:
+            name += "(" + ", ".join(self.term(arg) for arg in head["args"]) + ")"
+        operator = ":=" if head.get("assign") else "="
+        if rule.get("default"):
+            return [f"default {name} {operator} {self.term(head['value'])}"]
+        if "value" not in head:
+            text = f"{name} contains {self.term(head['key'])}"
+        else:
+            if "key" in head and len(ref) == 1:
+                name += f"[{self.term(head['key'])}]"
+            text = f"{name} {operator} {self.term(head['value'])}"
+        lines = [f"{text} if {{"] + self.body(rule["body"]) + ["}"]
+        alternative = rule.get("else")
+        while alternative is not None:
+            value = self.term(alternative["head"]["value"])
+            lines[-1] = f"}} else {operator} {value} if {{"
+            lines += self.body(alternative["body"]) + ["}"]
+            alternative = alternative.get("else")
+        return lines
+
+    def body(self, body: List[Dict[str, Any]]) -> List[str]:
+        return [f"    {self.expr(expr)}" for expr in body]
+
+    def expr(self, expr: Dict[str, Any]) -> str:
+        terms = expr["terms"]
+        if isinstance(terms, list):
+            text = self.call(terms[0], terms[1:], nested=False)
+        elif "type" in terms:
+            text = self.term(terms)
+        else:
+            raise OPAError(f"Cannot print Rego expression: {json.dumps(expr)}")
+        if expr.get("negated"):
+            text = f"not {text}"
+        for modifier in expr.get("with") or []:
+            target = self.term(modifier["target"])
+            text += f" with {target} as {self.term(modifier['value'])}"
+        return text
+
+    def call(
+        self, operator: Dict[str, Any], args: List[Dict[str, Any]], nested: bool
+    ) -> str:
+        name = self.term(operator)
+        symbol = _INFIX_OPERATORS.get(name)
+        if symbol is not None and len(args) == 2:
+            text = f"{self.term(args[0])} {symbol} {self.term(args[1])}"
+        elif name == "internal.member_3" and len(args) == 3:
+            key, value, collection = (self.term(arg) for arg in args)
+            text = f"{key}, {value} in {collection}"
+        else:
+            return f"{name}({', '.join(self.term(arg) for arg in args)})"
+        return f"({text})" if nested else text
+
+    def ref(self, terms: List[Dict[str, Any]]) -> str:
+        if (
+            len(terms) > 1
+            and terms[0] == {"type": "var", "value": "data"}
+            and terms[1] == {"type": "string", "value": "partial"}
+        ):
+            terms = (
+                terms[:2] + [{"type": "string", "value": self.namespace}] + terms[2:]
             )
+        text = self.term(terms[0])
+        for term in terms[1:]:
+            value = term.get("value")
+            if (
+                term["type"] == "string"
+                and _REGO_IDENTIFIER.match(value)
+                and value not in _REGO_KEYWORDS
+            ):
+                text += f".{value}"
+            else:
+                text += f"[{self.term(term)}]"
+        return text
+
+    def term(self, term: Dict[str, Any]) -> str:
+        kind = term["type"]
+        value = term.get("value")
+        if kind in ("null", "boolean", "number", "string"):
+            return _rego_value(value)
+        if kind == "var":
+            return value
+        if kind == "ref":
+            return self.ref(value)
+        if kind == "call":
+            return self.call(value[0], value[1:], nested=True)
+        if kind == "array":
+            return "[" + ", ".join(self.term(item) for item in value) + "]"
+        if kind == "set":
+            if not value:
+                return "set()"
+            return "{" + ", ".join(self.term(item) for item in value) + "}"
+        if kind == "object":
+            items = (f"{self.term(k)}: {self.term(v)}" for k, v in value)
+            return "{" + ", ".join(items) + "}"
+        if kind.endswith("comprehension"):
+            body = "; ".join(self.expr(expr) for expr in value["body"])
+            if kind == "arraycomprehension":
+                return f"[{self.term(value['term'])} | {body}]"
+            if kind == "setcomprehension":
+                return f"{{{self.term(value['term'])} | {body}}}"
+            key, item = self.term(value["key"]), self.term(value["value"])
+            return f"{{{key}: {item} | {body}}}"
+        raise OPAError(f"Cannot print Rego term of type {kind!r}")
+
+
+# Everything in the input but the step's tool is unknown during partial
+# evaluation
+_UNKNOWNS = [f"input.step.{name}" for name in PlanStep.model_fields if name != "tool"]
+_UNKNOWNS += [f"input.{name}" for name in Plan.model_fields]
+
+
+class PartialPolicy:
+    """
+    A Rego policy specialised per tool by OPA partial evaluation.
+
+    Policies opt in by writing their per-step rules as a set
+    ``step_violations`` in package ``planlint`` over a single step,
+    ``input.step``, and keeping rules about the plan as a whole in
+    ``violations``. For every tool in a plan, ``opa eval --partial`` evaluates
+    ``step_violations`` once with ``input.step.tool`` known and the rest of the
+    input unknown, and the residual rules are cached. Each step is then
+    evaluated against its own tool's residual only: rules about other tools
+    are gone, and conditions on the tool have been decided. All steps are
+    still evaluated in a single ``opa eval`` per plan.
+
+    At most ``max_tools`` tools are specialised; steps with other tools are
+    evaluated against the original ``step_violations``. Policies should refer
+    to ``input.step.tool`` directly: a tool read through a copy of
+    ``input.step`` cannot be decided during partial evaluation.
+    """
 
-        except subprocess.SubprocessError as e:
-            raise OPAError(f"OPA evaluation failed: {e}") from e
-
-    finally:
-        # Clean up temporary files
-        for path in [policy_path, input_path]:
-            if path and os.path.exists(path):
-                os.unlink(path)
-
-    # This should never be reached, but just in case
-    return ValidationResult(
-        status=Status.ERROR,
-        risk_score=1.0,
-        errors=[
-            PlanError(
-                code=ErrorCode.SCHEMA_INVALID, msg="OPA evaluation failed unexpectedly"
-            )
-        ],
-        warnings=[],
-    )
+    def __init__(
+        self,
+        rego_policy: str,
+        tools: Optional[Iterable[str]] = None,
+        runner: Optional[OPARunner] = None,
+        max_tools: int = 256,
+    ):
+        """
+        Create a specialised policy.
+
+        Args:
+            rego_policy: The Rego policy.
+            tools: Tools to specialise for right away, e.g. the allowed tools.
+                Other tools are specialised when first seen in a plan.
+            runner: Runs ``opa``; defaults to ``run_opa``.
+            max_tools: The most tools to specialise for.
+        """
+        self.rego_policy = rego_policy
+        self.max_tools = max_tools
+        self._runner = runner or run_opa
+        self._residuals: Dict[str, Residual] = {}
+        self._modules: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        if tools:
+            self.specialise(tools)
+
+    @property
+    def tools(self) -> List[str]:
+        """The tools specialised for so far."""
+        return list(self._residuals)
+
+    def residual(self, tool: str) -> Residual:
+        """
+        Partially evaluate the step rules for one tool.
+
+        Args:
+            tool: The tool name.
+
+        Returns:
+            The residual rules, with their support modules moved to a package
+            of their own so residuals of different tools do not clash.
+
+        Raises:
+            OPAError: If partial evaluation fails, or its result cannot be
+                printed as Rego.
+        """
+        args = ["eval", "--partial", "--format", "json", "--stdin-input"]
+        for unknown in _UNKNOWNS:
+            args += ["--unknowns", unknown]
+        input_bytes = json.dumps({"step": {"tool": tool}}).encode("utf-8")
+
+        with (
+            tracing.span("plan_lint.opa_partial") as span,
+            _policy_file(self.rego_policy) as policy_path,
+        ):
+            args += ["-d", policy_path, "data.planlint.step_violations[violation]"]
+            output = self._runner(args, input_bytes)
+            if span.is_recording:
+                span.set_attribute("plan_lint.tool", tool)
+        try:
+            partial = jsonio.loads(output).get("partial") or {}
+        except ValueError as e:
+            raise OPAError(f"Invalid partial evaluation output: {e}") from e
+
+        namespace = "t" + hashlib.sha256(tool.encode("utf-8")).hexdigest()[:16]
+        printer = _RegoPrinter(namespace)
+        queries = [
+            "\n".join(printer.expr(expr) for expr in query)
+            for query in partial.get("queries") or []
+        ]
+        support = [printer.module(module) for module in partial.get("support") or []]
+        return Residual(tool, queries, support)
+
+    def specialise(self, tools: Iterable[str]) -> None:
+        """
+        Compute and cache the residuals of tools not yet specialised for.
+
+        Args:
+            tools: The tool names.
+
+        Raises:
+            OPAError: If partial evaluation fails.
+        """
+        with self._lock:
+            for tool in tools:
+                if tool in self._residuals:
+                    continue
+                if len(self._residuals) >= self.max_tools:
+                    break
+                self._residuals[tool] = self.residual(tool)
+                self._modules = None
+
+    def modules(self) -> List[str]:
+        """
+        Return the modules that evaluate plans against the residuals.
+
+        The first defines ``data.planlint_specialised.violations``: the
+        original policy's ``violations``, plus each step's residual
+        violations tagged with the step's index. The others are the support
+        modules of the residuals.
+
+        Returns:
+            The Rego modules.
+        """
+        with self._lock:
+            if self._modules is not None:
+                return self._modules
+            residuals = list(self._residuals.values())
+            tools = ", ".join(_rego_value(r.tool) for r in residuals)
+            lines = [
+                "package planlint_specialised",
+                "",
+                "import rego.v1",
+                "",
+                (
+                    f"specialised_tools := {{{tools}}}"
+                    if tools
+                    else "specialised_tools := set()"
+                ),
+            ]
+            for residual in residuals:
+                for query in residual.queries:
+                    lines += [
+                        "",
+                        "step_violations contains violation if {",
+                        f"    input.step.tool == {_rego_value(residual.tool)}",
+                    ]
+                    lines += [f"    {line}" for line in query.splitlines()]
+                    lines.append("}")
+            lines += [
+                "",
+                "step_violations contains violation if {",
+                "    not specialised_tools[input.step.tool]",
+                "    some violation in data.planlint.step_violations",
+                "}",
+                "",
+                "violations contains violation if {",
+                "    some violation in data.planlint.violations",
+                "}",
+                "",
+                "violations contains tagged if {",
+                "    some i, step in input.steps",
+                "    found := step_violations with input.step as step",
+                "    some violation in found",
+                '    tagged := object.union(violation, {"step": i})',
+                "}",
+            ]
+            modules = ["\n".join(lines) + "\n"]
+            for residual in residuals:
+                modules += residual.support
+            self._modules = modules
+            return modules
+
+    def evaluate(
+        self, plan: Plan, policy: Policy, raw_input: Optional[bytes] = None
+    ) -> ValidationResult:
+        """
+        Evaluate a plan against the specialised policy.
+
+        Args:
+            plan: The plan to evaluate.
+            policy: The plan-lint policy, for risk weights and threshold.
+            raw_input: Optional JSON bytes the plan was parsed from.
+
+        Returns:
+            The validation result.
+
+        Raises:
+            OPAError: If OPA fails.
+        """
+        self.specialise(step.tool for step in plan.steps)
+        input_bytes = raw_input if raw_input is not None else plan_to_opa_input(plan)
+        with (
+            _policy_file(self.rego_policy) as policy_path,
+            _modules_dir(self.modules()) as modules_path,
+        ):
+            args = [
+                "eval",
+                "--stdin-input",
+                "-d",
+                policy_path,
+                "-d",
+                modules_path,
+                "data.planlint_specialised.violations",
+            ]
+            violations = _evaluate(args, input_bytes, plan, self._runner)
+        return _to_result(violations or [], policy)
 
 
 def is_rego_policy(policy_content: str) -> bool:
@@ -0,0 +1,520 @@
+"""
+Pool of warm OPA servers for plan-linter.
+
+``evaluate_with_opa`` starts ``opa eval`` for every plan, which parses and
+compiles the policy again each time, and evaluates one plan at a time. An
+OPAPool keeps a number of ``opa run --server`` processes running with the
+policy loaded and hands plans to whichever is free through a bounded work
+queue, so a batch is evaluated on as many cores as there are servers.
+
+Servers are replaced after a number of evaluations, when their memory has
+grown by more than a limit since they started, and when they fail. Submitting
+to a full queue blocks, or raises OPAPoolFull when a timeout is given, so a
+producer cannot queue more work than the pool can absorb.
+"""
+
+import http.client
+import logging
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from plan_lint import jsonio, metrics, tracing
+from plan_lint.opa import (
+    OPAError,
+    _acquire_policy,
+    _release_policy,
+    _to_result,
+    check_opa_installed,
+    plan_to_opa_input,
+    policy_to_rego,
+)
+from plan_lint.types import Plan, Policy, ValidationResult
+
+logger = logging.getLogger(__name__)
+
+
+class OPAPoolFull(OPAError):
+    """Raised when a plan cannot be queued because the pool is saturated."""
+
+    pass
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """An HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class OPAServer:
+    """An ``opa run --server`` process serving one policy on a Unix socket."""
+
+    def __init__(
+        self,
+        policy_path: str,
+        startup_timeout: float = 10.0,
+        request_timeout: float = 30.0,
+    ):
+        """
+        Start a server and wait until it is healthy.
+
+        Args:
+            policy_path: The Rego policy file to load.
+            startup_timeout: Seconds to wait for the server to become healthy.
+            request_timeout: Seconds to wait for an evaluation.
+
+        Raises:
+            OPAError: If OPA is not installed or the server does not start.
+        """
+        check_opa_installed()
+        self._dir = tempfile.mkdtemp(prefix="plan-lint-opa-server-")
+        self.socket_path = os.path.join(self._dir, "opa.sock")
+        self._log_path = os.path.join(self._dir, "opa.log")
+        self._timeout = request_timeout
+        self._connection: Optional[_UnixHTTPConnection] = None
+        with open(self._log_path, "wb") as log:
+            self.process = subprocess.Popen(
+                [
+                    "opa",
+                    "run",
+                    "--server",
+                    "--addr",
+                    f"unix://{self.socket_path}",
+                    "--log-level",
+                    "error",
+                    policy_path,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+            )
+
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                log_text = self._log()
+                self.close()
+                raise OPAError(f"OPA server exited on startup: {log_text}")
+            try:
+                status, _ = self._request("GET", "/health")
+                if status == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                self.close()
+                raise OPAError(
+                    f"OPA server did not become healthy in {startup_timeout:g}s"
+                )
+            time.sleep(0.02)
+
+    @property
+    def pid(self) -> int:
+        """The server's process ID."""
+        return self.process.pid
+
+    def _log(self) -> str:
+        try:
+            with open(self._log_path, "rb") as f:
+                return f.read()[-2000:].decode("utf-8", "replace").strip()
+        except OSError:
+            return ""
+
+    def _request(
+        self, method: str, path: str, body: Optional[bytes] = None
+    ) -> Tuple[int, bytes]:
+        """Send a request on the kept-alive connection, reconnecting once."""
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = _UnixHTTPConnection(self.socket_path, self._timeout)
+            try:
+                headers = {"Content-Type": "application/json"} if body else {}
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+        raise AssertionError("unreachable")
+
+    def evaluate(self, input_bytes: bytes) -> Any:
+        """
+        Evaluate ``data.planlint`` for one plan.
+
+        Args:
+            input_bytes: The plan as JSON.
+
+        Returns:
+            The value of ``data.planlint``.
+
+        Raises:
+            OPAError: If the evaluation fails.
+        """
+        try:
+            status, data = self._request(
+                "POST", "/v1/data/planlint", b'{"input":' + input_bytes + b"}"
+            )
+        except (OSError, http.client.HTTPException) as e:
+            raise OPAError(f"OPA server {self.pid} failed: {e}") from e
+        if status != 200:
+            raise OPAError(
+                f"OPA server {self.pid} returned {status}: "
+                f"{data[:500].decode('utf-8', 'replace')}"
+            )
+        return jsonio.loads(data).get("result")
+
+    def rss(self) -> Optional[int]:
+        """
+        Return the server's resident memory in bytes.
+
+        Returns:
+            The resident set size, or None where it cannot be read.
+        """
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def close(self) -> None:
+        """Stop the server and remove its socket."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+class _Task(NamedTuple):
+    plan: Plan
+    input_bytes: bytes
+    future: "Future[ValidationResult]"
+
+
+class OPAPool:
+    """
+    Evaluates plans on a pool of warm OPA servers.
+
+    Use it as a context manager, or call ``close`` when done:
+
+        with OPAPool(policy, size=8) as pool:
+            results = list(pool.map(plans))
+    """
+
+    def __init__(
+        self,
+        policy: Policy,
+        size: Optional[int] = None,
+        rego_policy: Optional[str] = None,
+        max_evaluations: Optional[int] = 10_000,
+        max_memory_growth: Optional[int] = 256 * 1024 * 1024,
+        queue_size: Optional[int] = None,
+        worker_factory: Optional[Callable[[str], OPAServer]] = None,
+    ):
+        """
+        Start the servers.
+
+        Args:
+            policy: The plan-lint policy, for risk weights and threshold.
+            size: Number of servers; defaults to the number of CPUs.
+            rego_policy: The Rego policy; generated from ``policy`` if not given.
+            max_evaluations: Replace a server after this many evaluations.
+            max_memory_growth: Replace a server once its resident memory has
+                grown by more than this many bytes since it started.
+            queue_size: Most plans waiting for a server; defaults to four per
+                server.
+            worker_factory: Starts a server for a policy file; defaults to
+                ``OPAServer``.
+
+        Raises:
+            OPAError: If a server cannot be started.
+        """
+        size = size or os.cpu_count() or 1
+        self.policy = policy
+        self.max_evaluations = max_evaluations
+        self.max_memory_growth = max_memory_growth
+        self.recycled = 0
+        # Bounds a generated policy leaves out are checked by plan-lint
+        self._generated = rego_policy is None
+        # Held until close, as replacement servers load the same file
+        self._policy_path = _acquire_policy(
+            [rego_policy or policy_to_rego(policy)], directory=False
+        )
+        self._factory = worker_factory or OPAServer
+        self._queue: "queue.Queue[Optional[_Task]]" = queue.Queue(
+            maxsize=queue_size or 4 * size
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+
+        workers: List[OPAServer] = []
+        try:
+            for _ in range(size):
+                workers.append(self._factory(self._policy_path))
+        except BaseException:
+            for worker in workers:
+                worker.close()
+            _release_policy(self._policy_path)
+            raise
+
+        self._threads = [
+            threading.Thread(
+                target=self._run, args=(worker,), name=f"plan-lint-opa-{i}", daemon=True
+            )
+            for i, worker in enumerate(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def size(self) -> int:
+        """Number of servers."""
+        return len(self._threads)
+
+    @property
+    def pending(self) -> int:
+        """Number of plans waiting for a server."""
+        return self._queue.qsize()
+
+    def submit(
+        self,
+        plan: Plan,
+        raw_input: Optional[bytes] = None,
+        timeout: Optional[float] = None,
+    ) -> "Future[ValidationResult]":
+        """
+        Queue a plan for evaluation.
+
+        Blocks while the queue is full.
+
+        Args:
+            plan: The plan to evaluate.
+            raw_input: Optional JSON bytes the plan was parsed from.
+            timeout: Seconds to wait for room in the queue; None waits for as
+                long as it takes and 0 does not wait.
+
+        Returns:
+            A future for the validation result.
+
+        Raises:
+            OPAPoolFull: If the queue stayed full for ``timeout`` seconds.
+            OPAError: If the pool is closed.
+        """
+        if self._closed:
+            raise OPAError("OPA pool is closed")
+        input_bytes = raw_input if raw_input is not None else plan_to_opa_input(plan)
+        future: "Future[ValidationResult]" = Future()
+        try:
+            self._queue.put(_Task(plan, input_bytes, future), timeout=timeout)
+        except queue.Full:
+            raise OPAPoolFull(
+                f"OPA pool queue is full ({self._queue.maxsize} plans waiting)"
+            ) from None
+        # The pool may have closed while this plan waited for room; unless a
+        # server has already picked it up, nothing will evaluate it
+        if self._closed and future.cancel():
+            raise OPAError("OPA pool is closed")
+        return future
+
+    def evaluate(
+        self, plan: Plan, raw_input: Optional[bytes] = None
+    ) -> ValidationResult:
+        """
+        Evaluate one plan and wait for the result.
+
+        Args:
+            plan: The plan to evaluate.
+            raw_input: Optional JSON bytes the plan was parsed from.
+
+        Returns:
+            The validation result.
+
+        Raises:
+            OPAError: If the evaluation fails.
+        """
+        return self.submit(plan, raw_input).result()
+
+    def map(self, plans: Iterable[Plan]) -> Iterator[ValidationResult]:
+        """
+        Evaluate plans in parallel, yielding results in order.
+
+        Plans are submitted as the queue has room for them.
+
+        Args:
+            plans: The plans to evaluate.
+
+        Yields:
+            The validation result of each plan.
+
+        Raises:
+            OPAError: If an evaluation fails.
+        """
+        futures: "queue.SimpleQueue[Future[ValidationResult]]" = queue.SimpleQueue()
+        in_flight = 0
+        for plan in plans:
+            # Collect finished results first rather than blocking on the queue
+            while in_flight > self._queue.maxsize + self.size:
+                yield futures.get().result()
+                in_flight -= 1
+            futures.put(self.submit(plan))
+            in_flight += 1
+        while in_flight:
+            yield futures.get().result()
+            in_flight -= 1
+
+    def close(self) -> None:
+        """
+        Finish queued plans and stop the servers.
+
+        Plans still queued once every server has stopped fail with
+        ``OPAError``.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        stops = len(self._threads)
+        while stops and any(thread.is_alive() for thread in self._threads):
+            # Only running servers make room in the queue
+            try:
+                self._queue.put(None, timeout=0.1)
+            except queue.Full:
+                continue
+            stops -= 1
+        for thread in self._threads:
+            thread.join()
+        # Fail plans no server is left to evaluate
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None and task.future.set_running_or_notify_cancel():
+                task.future.set_exception(OPAError("OPA pool is closed"))
+        _release_policy(self._policy_path)
+
+    def __enter__(self) -> "OPAPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _start(self) -> Optional[OPAServer]:
+        try:
+            return self._factory(self._policy_path)
+        except Exception:
+            logger.exception("Could not start an OPA server")
+            return None
+
+    def _should_recycle(
+        self, worker: OPAServer, evaluations: int, baseline: Optional[int]
+    ) -> bool:
+        if self.max_evaluations is not None and evaluations >= self.max_evaluations:
+            return True
+        if self.max_memory_growth is None or baseline is None:
+            return False
+        rss = worker.rss()
+        return rss is not None and rss - baseline > self.max_memory_growth
+
+    def _run(self, worker: Optional[OPAServer]) -> None:
+        """Evaluate queued plans on one server until the pool is closed."""
+        evaluations = 0
+        baseline = worker.rss() if worker is not None else None
+        while True:
+            task = self._queue.get()
+            if task is None:
+                if worker is not None:
+                    worker.close()
+                return
+            if not task.future.set_running_or_notify_cancel():
+                continue
+
+            if worker is None:
+                worker = self._start()
+                if worker is None:
+                    task.future.set_exception(OPAError("No OPA server is running"))
+                    continue
+                evaluations = 0
+                baseline = worker.rss()
+
+            start = time.perf_counter()
+            try:
+                with tracing.span("plan_lint.opa_eval") as span:
+                    value = worker.evaluate(task.input_bytes)
+                    if span.is_recording:
+                        span.set_attributes(
+                            {
+                                "plan_lint.plan.steps": len(task.plan.steps),
+                                "plan_lint.plan.bytes": len(task.input_bytes),
+                            }
+                        )
+            except Exception as e:
+                if metrics.ACTIVE is not None:
+                    metrics.ACTIVE.observe_opa(time.perf_counter() - start, ok=False)
+                task.future.set_exception(e)
+                # The server may be broken; start afresh
+                logger.warning("Replacing OPA server after an error: %s", e)
+                try:
+                    worker.close()
+                except Exception:
+                    logger.exception("Could not stop an OPA server")
+                worker = None
+                continue
+
+            if metrics.ACTIVE is not None:
+                metrics.ACTIVE.observe_opa(time.perf_counter() - start, ok=True)
+            try:
+                violations = (value or {}).get("violations", [])
+                task.future.set_result(
+                    _to_result(
+                        violations,
+                        self.policy,
+                        task.plan if self._generated else None,
+                    )
+                )
+            except Exception as e:
+                task.future.set_exception(e)
+
+            evaluations += 1
+            if self._should_recycle(worker, evaluations, baseline):
+                worker.close()
+                worker = self._start()
+                evaluations = 0
+                baseline = worker.rss() if worker is not None else None
+                with self._lock:
+                    self.recycled += 1
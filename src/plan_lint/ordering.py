@@ -0,0 +1,217 @@
+"""
+Adaptive check ordering for plan-linter.
+
+This module records how long each fail-fast check takes and how often it
+rejects a plan, and periodically reorders the checks so that the expected time
+to the first rejection is as small as possible. For independent checks that is
+achieved by running them in ascending order of cost / rejection rate, the same
+rule databases use to order selective predicates.
+
+Statistics can be exported and used to seed new instances so that replicas
+start with a warm ordering.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+STATS_VERSION = 1
+
+# Rejection rate assumed for checks that have never rejected anything, so that
+# cheap checks are still preferred over expensive ones
+_MIN_HIT_RATE = 1e-3
+
+
+class CheckStats:
+    """Rolling cost and rejection-rate statistics for a single check."""
+
+    def __init__(self, cost_ns: float = 0.0, hit_rate: float = 0.0, runs: int = 0):
+        self.cost_ns = cost_ns
+        self.hit_rate = hit_rate
+        self.runs = runs
+
+    def update(self, cost_ns: float, hit: bool, alpha: float) -> None:
+        """
+        Fold one observation into the rolling averages.
+
+        Args:
+            cost_ns: Time the check took, in nanoseconds.
+            hit: Whether the check found at least one error.
+            alpha: Weight of the new observation. The first observations use
+                a plain mean so early samples are not swamped by the prior.
+        """
+        self.runs += 1
+        weight = max(alpha, 1.0 / self.runs)
+        self.cost_ns += weight * (cost_ns - self.cost_ns)
+        self.hit_rate += weight * ((1.0 if hit else 0.0) - self.hit_rate)
+
+    @property
+    def rank(self) -> float:
+        """Expected cost per rejection; lower runs earlier."""
+        return self.cost_ns / max(self.hit_rate, _MIN_HIT_RATE)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"cost_ns": self.cost_ns, "hit_rate": self.hit_rate, "runs": self.runs}
+
+
+class AdaptiveCheckOrder:
+    """
+    Orders fail-fast checks by their observed cost and rejection rate.
+
+    Pass an instance to ``validate_plan(..., ordering=...)``. Statistics are
+    only collected in fail-fast modes, and the order is recomputed every
+    ``reorder_every`` validated plans.
+    """
+
+    def __init__(
+        self,
+        checks: Optional[Sequence[str]] = None,
+        alpha: float = 0.05,
+        reorder_every: int = 100,
+        seed: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize the ordering.
+
+        Args:
+            checks: Names of the checks to order, in their initial order.
+                Defaults to the built-in fail-fast order. Built-in checks left
+                out are appended in their default order, so none is skipped.
+            alpha: Weight of each new observation in the rolling averages.
+            reorder_every: Number of plans between reorderings.
+            seed: Statistics previously produced by ``export``.
+
+        Raises:
+            ValueError: If a check name is not a built-in check.
+        """
+        checks = _complete_order(checks or ())
+
+        self.alpha = alpha
+        self.reorder_every = reorder_every
+        self.stats: Dict[str, CheckStats] = {name: CheckStats() for name in checks}
+        self._order: Tuple[str, ...] = tuple(checks)
+        self._plans = 0
+        self._lock = threading.Lock()
+
+        if seed:
+            self.load(seed)
+
+    @property
+    def order(self) -> Tuple[str, ...]:
+        """The order in which checks should currently run."""
+        return self._order
+
+    def record(self, name: str, cost_ns: float, hit: bool) -> None:
+        """
+        Record one run of a check.
+
+        Args:
+            name: The check name.
+            cost_ns: Time the check took, in nanoseconds.
+            hit: Whether the check found at least one error.
+        """
+        stats = self.stats.get(name)
+        if stats is None:
+            return
+        with self._lock:
+            stats.update(cost_ns, hit, self.alpha)
+
+    def plan_done(self) -> None:
+        """Note that a plan has been validated, reordering when due."""
+        with self._lock:
+            self._plans += 1
+            due = self._plans % self.reorder_every == 0
+        if due:
+            self.reorder()
+
+    def reorder(self) -> Tuple[str, ...]:
+        """
+        Recompute the check order from the current statistics.
+
+        Checks that have not run yet keep their relative position at the front
+        so they get measured.
+
+        Returns:
+            The new order.
+        """
+        with self._lock:
+            position = {name: i for i, name in enumerate(self._order)}
+            self._order = tuple(
+                sorted(
+                    self._order,
+                    key=lambda name: (
+                        self.stats[name].runs > 0,
+                        self.stats[name].rank,
+                        position[name],
+                    ),
+                )
+            )
+            return self._order
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Export the statistics and current order.
+
+        Returns:
+            A JSON-serialisable dictionary accepted by ``load`` and ``seed``.
+        """
+        with self._lock:
+            return {
+                "version": STATS_VERSION,
+                "order": list(self._order),
+                "checks": {name: s.to_dict() for name, s in self.stats.items()},
+            }
+
+    def load(self, data: Dict[str, Any]) -> None:
+        """
+        Seed statistics and order from a previous ``export``.
+
+        Checks missing from the data keep their current statistics and
+        position.
+
+        Args:
+            data: Exported statistics.
+
+        Raises:
+            ValueError: If the data was exported by an incompatible version or
+                names a check that is not a built-in check.
+        """
+        if data.get("version") != STATS_VERSION:
+            raise ValueError(
+                f"Unsupported ordering statistics version: {data.get('version')}"
+            )
+        _complete_order([*data.get("order", []), *data.get("checks", {})])
+
+        with self._lock:
+            for name, values in data.get("checks", {}).items():
+                if name in self.stats:
+                    self.stats[name] = CheckStats(
+                        cost_ns=float(values.get("cost_ns", 0.0)),
+                        hit_rate=float(values.get("hit_rate", 0.0)),
+                        runs=int(values.get("runs", 0)),
+                    )
+            self._order = _merge_order(data.get("order", []), self._order)
+
+
+def _complete_order(checks: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Validate check names and append the built-in checks they leave out.
+
+    Raises:
+        ValueError: If a name is not a built-in fail-fast check.
+    """
+    from plan_lint.core import FAIL_FAST_ORDER
+
+    order = tuple(dict.fromkeys(checks))
+    unknown = [name for name in order if name not in FAIL_FAST_ORDER]
+    if unknown:
+        raise ValueError(
+            f"Unknown checks {unknown}; expected names from {list(FAIL_FAST_ORDER)}"
+        )
+    return order + tuple(name for name in FAIL_FAST_ORDER if name not in order)
+
+
+def _merge_order(preferred: Iterable[str], current: Sequence[str]) -> Tuple[str, ...]:
+    """Order known checks as preferred, keeping any others in their place."""
+    known = [name for name in preferred if name in current]
+    rest = [name for name in current if name not in known]
+    return tuple(known + rest)
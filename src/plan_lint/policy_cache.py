@@ -0,0 +1,173 @@
+"""
+On-disk policy cache for plan-linter.
+
+Parsing a YAML policy is slow compared to everything else a short-lived worker
+does before its first validation. This module keeps each loaded policy, with
+``extends`` resolved and validated, as a JSON entry in a cache directory, so
+later processes can skip the YAML parser.
+
+Entries are keyed by a hash of the plan-lint version, the cache format, the
+policy's path and its contents, and record a hash of every base policy it
+extends, so an entry is used only while none of those files have changed.
+Entries are plain JSON, decoded with the active ``jsonio`` codec and checked
+against the Policy model, so a cache directory never needs to be trusted the
+way a pickle would. Compiled regexes and bound checks cannot be stored and are
+rebuilt from the cached policy, which is fast.
+
+Set ``PLAN_LINT_POLICY_CACHE`` to a directory to enable the cache for the CLI.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Union
+
+from plan_lint import __version__, jsonio
+from plan_lint.types import Policy
+
+CACHE_FORMAT = 1
+CACHE_ENV = "PLAN_LINT_POLICY_CACHE"
+
+# Policy file contents, read or memory-mapped
+Content = Union[bytes, mmap.mmap]
+
+
+def _file_digest(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+class PolicyCache:
+    """A directory of cached, validated policies."""
+
+    def __init__(self, directory: str):
+        """
+        Open a cache directory, creating it if needed.
+
+        Args:
+            directory: Path of the cache directory.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, policy_path: str, content: Content) -> str:
+        digest = hashlib.sha256()
+        key = f"{CACHE_FORMAT}\0{__version__}\0{os.path.abspath(policy_path)}\0"
+        digest.update(key.encode("utf-8"))
+        digest.update(content)
+        return os.path.join(self.directory, f"{digest.hexdigest()[:40]}.json")
+
+    def get(
+        self, policy_path: str, content: Content, files: Optional[List[str]] = None
+    ) -> Optional[Policy]:
+        """
+        Look up a policy.
+
+        Args:
+            policy_path: Path of the policy file.
+            content: Current contents of the policy file.
+            files: Optional list to append the paths of the policy file and the
+                files it extends to, on a hit.
+
+        Returns:
+            The cached policy, or None if there is no valid entry for it.
+        """
+        try:
+            with open(self._entry_path(policy_path, content), "rb") as f:
+                entry = jsonio.loads(f.read())
+            if entry.get("format") != CACHE_FORMAT:
+                raise ValueError("Unsupported cache format")
+            bases: List[List[str]] = entry["bases"]
+            if any(_file_digest(path) != digest for path, digest in bases):
+                raise ValueError("A base policy has changed")
+            policy = Policy.model_validate(entry["policy"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self.misses += 1
+            return None
+
+        if files is not None:
+            files.append(os.path.abspath(policy_path))
+            files.extend(path for path, _ in bases)
+        self.hits += 1
+        return policy
+
+    def put(
+        self,
+        policy_path: str,
+        content: Content,
+        policy: Policy,
+        files: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Store a policy. Failures to write are ignored.
+
+        Args:
+            policy_path: Path of the policy file.
+            content: Contents of the policy file the policy was loaded from.
+            policy: The loaded policy.
+            files: Paths of the policy file and the files it extends, as
+                collected by ``load_policy``.
+        """
+        root = os.path.abspath(policy_path)
+        bases = []
+        for path in dict.fromkeys(files or []):
+            if path == root:
+                continue
+            digest = _file_digest(path)
+            if digest is None:
+                return
+            bases.append([path, digest])
+
+        entry: Dict[str, Any] = {
+            "format": CACHE_FORMAT,
+            "plan_lint": __version__,
+            "source": root,
+            "bases": bases,
+            "policy": policy.model_dump(mode="json"),
+        }
+        # Write to a temporary file first so readers never see a partial entry
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(jsonio.dumps(entry))
+            os.replace(tmp_path, self._entry_path(policy_path, content))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".tmp")):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def from_environment() -> Optional[PolicyCache]:
+    """
+    Open the cache named by ``PLAN_LINT_POLICY_CACHE``.
+
+    Returns:
+        The cache, or None if the variable is unset or the directory cannot
+        be created.
+    """
+    directory = os.environ.get(CACHE_ENV)
+    if not directory:
+        return None
+    try:
+        return PolicyCache(directory)
+    except OSError:
+        return None
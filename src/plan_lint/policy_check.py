@@ -0,0 +1,612 @@
+"""
+Static policy analysis for plan-linter.
+
+Every ``deny_tokens_regex`` pattern is searched against every string argument
+of every plan step, and arguments have no size limit, so one pattern that
+backtracks catastrophically can pin a worker's CPU on a single plan. This
+module checks a policy before it is deployed:
+
+- Patterns are parsed and inspected for constructs that make Python's
+  backtracking engine slow: quantifiers nested under an unbounded repeat that
+  can consume the start of the next iteration, such as ``(\\w+\\s?)*``, and
+  alternations under an unbounded repeat whose branches can start with the
+  same character, such as ``(a|aa)*``.
+- Optionally, each pattern is timed on a seeded synthetic corpus and on inputs
+  built to provoke backtracking, which confirms or clears the static findings
+  and reports what the pattern costs per kilobyte of argument text.
+- Bounds and tools are checked for entries that can never apply or never pass.
+
+``check_policy`` runs every check; the loader logs the static findings of each
+policy it loads, and ``reject_unsafe`` can be passed as the ``check`` of a
+PolicyStore or PolicyRegistry to refuse policies with errors::
+
+    store = PolicyStore("policy.yaml", check=reject_unsafe)
+"""
+
+import random
+import re
+import string
+import time
+from functools import lru_cache
+from re import _constants as sre  # type: ignore[attr-defined]
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+from plan_lint.compiler import get_bounds_index
+from plan_lint.types import Policy
+
+ERROR = "error"
+WARNING = "warning"
+
+# Budget for a single timed search; longer runs abort the measurement
+DEFAULT_BUDGET = 0.05
+# Corpus cost above which a pattern is reported as slow
+DEFAULT_SLOW_US_PER_KB = 100.0
+
+# Repeats with a higher upper bound than this count as unbounded
+_LARGE_REPEAT = 32
+# Inputs up to this length that exceed the budget indicate exponential time
+_CATASTROPHIC_LENGTH = 64
+_ATTACK_LENGTHS = tuple(range(8, _CATASTROPHIC_LENGTH + 1, 2)) + tuple(
+    2**i for i in range(7, 14)
+)
+# Attack inputs timed per pattern, at most
+_MAX_ATTACKS = 8
+
+# Characters the analysis reasons about, in order of preference for samples
+_ALPHABET = (
+    string.ascii_lowercase
+    + string.ascii_uppercase
+    + string.digits
+    + string.punctuation
+    + " \t\n\r\x0b\x0c\x00 éß中"
+)
+_CORPUS_ALPHABET = string.ascii_letters + string.digits + " _-.:/=+,;'\"@"
+_FAIL_CHARS = "!\x00\n a0"
+
+_REPEATS = (sre.MAX_REPEAT, sre.MIN_REPEAT)
+_CATEGORIES = {
+    sre.CATEGORY_DIGIT: re.compile(r"\d"),
+    sre.CATEGORY_NOT_DIGIT: re.compile(r"\D"),
+    sre.CATEGORY_SPACE: re.compile(r"\s"),
+    sre.CATEGORY_NOT_SPACE: re.compile(r"\S"),
+    sre.CATEGORY_WORD: re.compile(r"\w"),
+    sre.CATEGORY_NOT_WORD: re.compile(r"\W"),
+}
+
+Chars = FrozenSet[str]
+_ALL: Chars = frozenset(_ALPHABET)
+_NONE: Chars = frozenset()
+
+
+class PolicyIssue(NamedTuple):
+    """A problem found in a policy."""
+
+    severity: str
+    code: str
+    subject: str
+    message: str
+
+
+class PatternCost(NamedTuple):
+    """Measured cost of a deny pattern."""
+
+    pattern: str
+    us_per_kb: Optional[float]
+    worst_length: int
+    worst_seconds: float
+    catastrophic: bool = False
+
+
+class PolicyReport(NamedTuple):
+    """Result of checking a policy."""
+
+    issues: List[PolicyIssue]
+    costs: List[PatternCost]
+
+    @property
+    def errors(self) -> List[PolicyIssue]:
+        """The issues that should prevent deploying the policy."""
+        return [issue for issue in self.issues if issue.severity == ERROR]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the report as JSON-serialisable data."""
+        return {
+            "issues": [issue._asdict() for issue in self.issues],
+            "costs": [cost._asdict() for cost in self.costs],
+        }
+
+    def report(self, console: Optional[Console] = None, title: str = "") -> None:
+        """
+        Print the issues and pattern costs as tables.
+
+        Args:
+            console: Console to print to. Defaults to stdout.
+            title: Title of the issues table, such as the policy file.
+        """
+        console = console or Console()
+        if not self.issues:
+            console.print(f"[green]✓ {title or 'Policy'}: no issues found[/]")
+        else:
+            table = Table(title=title or None)
+            table.add_column("Severity")
+            table.add_column("Code", style="cyan")
+            table.add_column("Subject")
+            table.add_column("Message")
+            for issue in self.issues:
+                style = "red" if issue.severity == ERROR else "yellow"
+                table.add_row(
+                    f"[{style}]{issue.severity}[/]",
+                    issue.code,
+                    issue.subject,
+                    issue.message,
+                )
+            console.print(table)
+
+        if self.costs:
+            costs = Table(title="Pattern cost")
+            costs.add_column("Pattern")
+            costs.add_column("us/KB", justify="right")
+            costs.add_column("Worst search", justify="right")
+            for cost in self.costs:
+                costs.add_row(
+                    cost.pattern,
+                    "-" if cost.us_per_kb is None else f"{cost.us_per_kb:.1f}",
+                    (
+                        f"{cost.worst_seconds * 1000:.2f} ms / "
+                        f"{cost.worst_length} chars"
+                        if cost.worst_length
+                        else "-"
+                    ),
+                )
+            console.print(costs)
+
+
+class _Attack(NamedTuple):
+    prefix: str
+    pump: str
+    fail: str
+
+
+class _Analyzer:
+    """Walks a parsed pattern, collecting findings and attack inputs."""
+
+    def __init__(self, ignore_case: bool):
+        self.ignore_case = ignore_case
+        self.findings: Dict[str, str] = {}
+        self.attacks: List[_Attack] = []
+
+    def _chars(self, chars: Iterable[str]) -> Chars:
+        found = frozenset(chars)
+        if self.ignore_case:
+            found |= {c.swapcase() for c in found if c.swapcase() in _ALL}
+        return found
+
+    def first(self, seq: Any) -> Tuple[Chars, bool]:
+        """Characters a sequence can start with, and whether it can be empty."""
+        chars: Chars = _NONE
+        for op, av in seq:
+            node_chars, nullable = self.first_node(op, av)
+            chars |= node_chars
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def first_node(self, op: Any, av: Any) -> Tuple[Chars, bool]:
+        if op is sre.LITERAL:
+            return self._chars(chr(av)), False
+        if op is sre.NOT_LITERAL:
+            return _ALL - self._chars(chr(av)), False
+        if op is sre.ANY:
+            return _ALL - {"\n"}, False
+        if op is sre.IN:
+            return self._chars(c for c in _ALPHABET if _in_class(av, c)), False
+        if op is sre.SUBPATTERN:
+            return self.first(av[-1])
+        if op is sre.ATOMIC_GROUP:
+            return self.first(av)
+        if op in _REPEATS or op is sre.POSSESSIVE_REPEAT:
+            chars, nullable = self.first(av[2])
+            return chars, nullable or av[0] == 0
+        if op is sre.BRANCH:
+            chars, nullable = _NONE, False
+            for alternative in av[1]:
+                alt_chars, alt_nullable = self.first(alternative)
+                chars |= alt_chars
+                nullable = nullable or alt_nullable
+            return chars, nullable
+        if op is sre.GROUPREF_EXISTS:
+            yes_chars, yes_nullable = self.first(av[1])
+            if av[2] is None:
+                return yes_chars, True
+            no_chars, no_nullable = self.first(av[2])
+            return yes_chars | no_chars, yes_nullable or no_nullable
+        if op in (sre.AT, sre.ASSERT, sre.ASSERT_NOT):
+            return _NONE, True
+        # Backreferences and anything unknown may match anything
+        return _ALL, True
+
+    def sample(self, seq: Any) -> str:
+        """A short string the sequence matches, approximately."""
+        return "".join(self.sample_node(op, av) for op, av in seq)
+
+    def sample_node(self, op: Any, av: Any) -> str:
+        if op is sre.LITERAL:
+            return chr(av)
+        if op in (sre.NOT_LITERAL, sre.ANY, sre.IN):
+            return _pick(self.first_node(op, av)[0])
+        if op is sre.SUBPATTERN:
+            return self.sample(av[-1])
+        if op is sre.ATOMIC_GROUP:
+            return self.sample(av)
+        if op in _REPEATS or op is sre.POSSESSIVE_REPEAT:
+            return self.sample(av[2]) * int(av[0])
+        if op is sre.BRANCH:
+            return self.sample(av[1][0])
+        if op is sre.GROUPREF_EXISTS:
+            return self.sample(av[1])
+        return ""
+
+    def walk(self, seq: Any, prefix: str, loop: Optional[Chars]) -> None:
+        """
+        Inspect a sequence.
+
+        Args:
+            seq: The parsed sequence.
+            prefix: A string leading up to the sequence.
+            loop: Characters that can follow the sequence within the nearest
+                enclosing unbounded repeat, or None outside of one.
+        """
+        items = list(seq)
+        for i, (op, av) in enumerate(items):
+            here = prefix + self.sample(items[:i])
+            follow: Optional[Chars] = None
+            if loop is not None:
+                follow, nullable = self.first(items[i + 1 :])
+                if nullable:
+                    follow |= loop
+
+            if op in _REPEATS:
+                low, high, body = av
+                if high != sre.MAXREPEAT and high <= _LARGE_REPEAT:
+                    self.walk(body, here, loop)
+                    continue
+                body_first, _ = self.first(body)
+                pump = self.sample(body) or _pick(body_first)
+                if pump:
+                    self.attacks.append(_Attack(here, pump, _pick_fail(body_first)))
+                if follow is not None and body_first & follow:
+                    self.findings.setdefault(
+                        "NESTED_QUANTIFIER",
+                        "Nested quantifier can split the same input in many "
+                        "ways, which backtracks exponentially on near-matches",
+                    )
+                self.walk(body, here + pump * low, body_first)
+            elif op is sre.BRANCH:
+                if follow is not None and self._overlapping(av[1], follow):
+                    self.findings.setdefault(
+                        "OVERLAPPING_ALTERNATION",
+                        "Alternatives under an unbounded repeat can match the "
+                        "same characters, which backtracks exponentially",
+                    )
+                for alternative in av[1]:
+                    self.walk(alternative, here, follow)
+            elif op is sre.SUBPATTERN:
+                self.walk(av[-1], here, follow)
+            elif op is sre.GROUPREF_EXISTS:
+                self.walk(av[1], here, follow)
+                if av[2] is not None:
+                    self.walk(av[2], here, follow)
+            # Possessive repeats and atomic groups never backtrack into their
+            # contents, and lookarounds are not repeated, so they are skipped
+
+    def _overlapping(self, alternatives: Any, follow: Chars) -> bool:
+        seen: Chars = _NONE
+        for alternative in alternatives:
+            chars, nullable = self.first(alternative)
+            if nullable:
+                # An empty alternative leaves the next character to what follows
+                chars |= follow
+            if chars & seen:
+                return True
+            seen |= chars
+        return False
+
+
+def _in_class(items: Any, char: str) -> bool:
+    negate = False
+    hit = False
+    code = ord(char)
+    for op, av in items:
+        if op is sre.NEGATE:
+            negate = True
+        elif op is sre.LITERAL:
+            hit = hit or code == av
+        elif op in (sre.RANGE, sre.RANGE_UNI_IGNORE):
+            hit = hit or av[0] <= code <= av[1]
+        elif op is sre.CATEGORY:
+            category = _CATEGORIES.get(av)
+            hit = hit or category is None or bool(category.match(char))
+    return hit != negate
+
+
+def _pick(chars: Chars) -> str:
+    for char in _ALPHABET:
+        if char in chars:
+            return char
+    return ""
+
+
+def _pick_fail(chars: Chars) -> str:
+    for char in _FAIL_CHARS:
+        if char not in chars:
+            return char
+    return "中"
+
+
+@lru_cache(maxsize=4096)
+def _analyze(pattern: str) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[_Attack, ...]]:
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (re.error, RecursionError, OverflowError) as e:
+        return (("INVALID_REGEX", f"Invalid regular expression: {e}"),), ()
+    analyzer = _Analyzer(bool(parsed.state.flags & re.IGNORECASE))
+    analyzer.walk(parsed, "", None)
+    attacks = tuple(dict.fromkeys(analyzer.attacks))[:_MAX_ATTACKS]
+    return tuple(analyzer.findings.items()), attacks
+
+
+def analyze_pattern(pattern: str) -> List[PolicyIssue]:
+    """
+    Inspect a regex for constructs prone to catastrophic backtracking.
+
+    The analysis does not run the pattern and is cached per pattern, so it is
+    cheap enough to run whenever a policy is loaded. Findings are heuristic and
+    reported as warnings; only an invalid pattern is an error.
+
+    Args:
+        pattern: The regex pattern string.
+
+    Returns:
+        The issues found, if any.
+    """
+    findings, _ = _analyze(pattern)
+    return [
+        PolicyIssue(ERROR if code == "INVALID_REGEX" else WARNING, code, pattern, msg)
+        for code, msg in findings
+    ]
+
+
+def _time_search(regex: "re.Pattern[str]", text: str) -> float:
+    start = time.perf_counter()
+    regex.search(text)
+    return time.perf_counter() - start
+
+
+@lru_cache(maxsize=1)
+def _corpus() -> Tuple[str, ...]:
+    """64KB of seeded pseudo-random argument text."""
+    rng = random.Random(0x9E3779B9)
+    return tuple(
+        "".join(rng.choice(_CORPUS_ALPHABET) for _ in range(1024)) for _ in range(64)
+    )
+
+
+def measure_pattern(pattern: str, budget: float = DEFAULT_BUDGET) -> PatternCost:
+    """
+    Time a regex on inputs built to make it backtrack, then on a corpus.
+
+    Each unbounded repeat in the pattern is fed a string that repeats what it
+    matches, followed by a character that makes the match fail, at growing
+    lengths. Measuring stops as soon as one search exceeds the budget, so a
+    catastrophic pattern costs a few times the budget to detect. Patterns that
+    stay within the budget are then timed on 64KB of synthetic text.
+
+    Args:
+        pattern: The regex pattern string.
+        budget: Seconds a single search may take before measuring stops.
+
+    Returns:
+        The pattern's cost. ``us_per_kb`` is None if the corpus was skipped
+        because the pattern exceeded the budget, and ``catastrophic`` is set
+        if it did so on a short input.
+
+    Raises:
+        re.error: If the pattern is invalid.
+    """
+    regex = re.compile(pattern)
+    _, attacks = _analyze(pattern)
+    worst_length, worst_seconds = 0, 0.0
+    for attack in attacks:
+        for length in _ATTACK_LENGTHS:
+            text = attack.prefix + attack.pump * length + attack.fail
+            seconds = _time_search(regex, text)
+            if seconds > worst_seconds:
+                worst_length, worst_seconds = len(text), seconds
+            if seconds > budget:
+                catastrophic = length <= _CATASTROPHIC_LENGTH
+                return PatternCost(pattern, None, len(text), seconds, catastrophic)
+
+    best = min(sum(_time_search(regex, text) for text in _corpus()) for _ in range(3))
+    kilobytes = sum(len(text) for text in _corpus()) / 1024
+    return PatternCost(pattern, best * 1e6 / kilobytes, worst_length, worst_seconds)
+
+
+def _cost_issues(cost: PatternCost, budget: float, slow: float) -> List[PolicyIssue]:
+    issues = []
+    if cost.worst_seconds > budget:
+        millis = cost.worst_seconds * 1000
+        if cost.catastrophic:
+            issues.append(
+                PolicyIssue(
+                    ERROR,
+                    "CATASTROPHIC_BACKTRACKING",
+                    cost.pattern,
+                    f"Search took {millis:.0f} ms on a {cost.worst_length}-character "
+                    "input; time grows exponentially with input length",
+                )
+            )
+        else:
+            issues.append(
+                PolicyIssue(
+                    WARNING,
+                    "SUPERLINEAR_REGEX",
+                    cost.pattern,
+                    f"Search took {millis:.0f} ms on a {cost.worst_length}-character "
+                    "input; time grows faster than input length",
+                )
+            )
+    if cost.us_per_kb is not None and cost.us_per_kb > slow:
+        issues.append(
+            PolicyIssue(
+                WARNING,
+                "SLOW_REGEX",
+                cost.pattern,
+                f"Costs {cost.us_per_kb:.0f} us per KB of argument text",
+            )
+        )
+    return issues
+
+
+def _bound_issues(policy: Policy) -> List[PolicyIssue]:
+    issues = []
+    index = get_bounds_index(policy.bounds)
+    tools: Dict[str, List[str]] = {}
+    for bound in index.bounds:
+        tool = bound.key[: len(bound.key) - len(bound.selector) - 1]
+        tools.setdefault(bound.key, []).append(tool)
+
+    allowed = set(policy.allow_tools)
+    for key, spec in policy.bounds.items():
+        if isinstance(spec, list) and len(spec) < 2:
+            issues.append(
+                PolicyIssue(
+                    WARNING,
+                    "IGNORED_BOUND",
+                    key,
+                    "Bound lists need a minimum and a maximum; this one is ignored",
+                )
+            )
+            continue
+        if key not in tools:
+            issues.append(
+                PolicyIssue(
+                    WARNING,
+                    "UNREACHABLE_BOUND",
+                    key,
+                    "Key does not split into a tool name and an argument selector",
+                )
+            )
+        elif allowed and not allowed.intersection(tools[key]):
+            issues.append(
+                PolicyIssue(
+                    WARNING,
+                    "UNREACHABLE_BOUND",
+                    key,
+                    "Bound applies to a tool that allow_tools does not allow",
+                )
+            )
+        if isinstance(spec, list):
+            low, high = spec[0], spec[1]
+            numeric = (int, float)
+            if isinstance(low, numeric) and isinstance(high, numeric) and low > high:
+                issues.append(
+                    PolicyIssue(
+                        ERROR,
+                        "UNSATISFIABLE_BOUND",
+                        key,
+                        f"Minimum {low} is greater than maximum {high}, so every "
+                        "value fails",
+                    )
+                )
+    return issues
+
+
+def _duplicates(items: List[str]) -> List[str]:
+    seen = set()
+    duplicates: Dict[str, None] = {}
+    for item in items:
+        if item in seen:
+            duplicates[item] = None
+        seen.add(item)
+    return list(duplicates)
+
+
+def check_policy(
+    policy: Policy,
+    measure: bool = True,
+    budget: float = DEFAULT_BUDGET,
+    slow_us_per_kb: float = DEFAULT_SLOW_US_PER_KB,
+) -> PolicyReport:
+    """
+    Check a policy for expensive patterns and entries that cannot apply.
+
+    Args:
+        policy: The policy to check.
+        measure: Whether to time each pattern, which takes up to a few times the
+            budget for each pattern that is slow, and well under a second for
+            the rest. Without it only the static checks run.
+        budget: Seconds a single search may take while measuring.
+        slow_us_per_kb: Corpus cost above which a pattern is reported as slow.
+
+    Returns:
+        A PolicyReport with the issues found and, when measuring, the cost of
+        each valid pattern.
+    """
+    issues: List[PolicyIssue] = []
+    costs: List[PatternCost] = []
+
+    for tool in _duplicates(policy.allow_tools):
+        issues.append(
+            PolicyIssue(WARNING, "DUPLICATE_TOOL", tool, "Tool is listed twice")
+        )
+    for pattern in _duplicates(policy.deny_tokens_regex):
+        issues.append(
+            PolicyIssue(
+                WARNING, "DUPLICATE_PATTERN", pattern, "Pattern is listed twice"
+            )
+        )
+
+    for pattern in dict.fromkeys(policy.deny_tokens_regex):
+        found = analyze_pattern(pattern)
+        issues.extend(found)
+        if any(issue.code == "INVALID_REGEX" for issue in found):
+            continue
+        if re.compile(pattern).search("") is not None:
+            issues.append(
+                PolicyIssue(
+                    WARNING,
+                    "EMPTY_MATCH",
+                    pattern,
+                    "Pattern matches the empty string, so it flags every argument",
+                )
+            )
+        if measure:
+            cost = measure_pattern(pattern, budget)
+            costs.append(cost)
+            issues.extend(_cost_issues(cost, budget, slow_us_per_kb))
+
+    issues.extend(_bound_issues(policy))
+    return PolicyReport(issues, costs)
+
+
+def reject_unsafe(snapshot: Any) -> None:
+    """
+    Refuse a policy whose check finds errors.
+
+    Meant as the ``check`` of a PolicyStore or PolicyRegistry, so a policy with
+    a catastrophic pattern or an unsatisfiable bound is never activated.
+
+    Args:
+        snapshot: The PolicySnapshot about to be activated.
+
+    Raises:
+        ValueError: If the policy has errors.
+    """
+    errors = check_policy(snapshot.policy).errors
+    if errors:
+        details = "; ".join(f"{e.subject}: {e.message}" for e in errors)
+        raise ValueError(f"Policy check failed: {details}")
@@ -0,0 +1,418 @@
+"""
+Policy store for plan-linter.
+
+This module keeps a policy loaded and compiled for long-running services and
+reloads it when its file changes, without restarting.
+
+A PolicyStore watches the policy file, and any policies it extends, from a
+background thread, using inotify on Linux and polling elsewhere. When a file
+changes, the new policy is parsed, compiled and checked before it is
+activated; a policy that fails to load is reported through the store's
+counters and ``last_error`` while the previous policy stays active.
+
+Each load produces an immutable PolicySnapshot, and activating it is a single
+reference assignment. Validations read ``store.current`` once and use that
+snapshot throughout, so they never wait for a reload or see a policy that is
+only half built::
+
+    store = PolicyStore("policy.yaml")
+    store.start()
+    result = store.validate(plan)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from types import TracebackType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from plan_lint import metrics, tracing
+from plan_lint.compiler import CompiledPolicy
+from plan_lint.core import validate_plan
+from plan_lint.loader import load_policy, read_policy_document
+from plan_lint.policy_cache import PolicyCache
+from plan_lint.types import Plan, Policy, ValidationResult
+
+# inotify event masks, from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_ATTRIB
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PolicySnapshot(NamedTuple):
+    """A loaded policy, ready to validate against. Snapshots never change."""
+
+    policy: Policy
+    compiled: CompiledPolicy
+    rego_policy: Optional[str]
+    version: int
+    loaded_at: float
+    # The policy file and the files it extends
+    sources: Tuple[str, ...] = ()
+
+
+Signature = Optional[Tuple[int, int, int]]
+
+
+def load_snapshot(
+    policy_path: str,
+    version: int = 1,
+    read_base: Callable[[str], Dict[str, Any]] = read_policy_document,
+    check: Optional[Callable[[PolicySnapshot], None]] = None,
+    cache: Optional[PolicyCache] = None,
+) -> PolicySnapshot:
+    """
+    Load and compile a policy into a snapshot.
+
+    Args:
+        policy_path: Path to the policy file (YAML or Rego).
+        version: Version number to give the snapshot.
+        read_base: Function reading the base policies a YAML policy extends.
+        check: Optional callable run on the snapshot before it is returned. It
+            rejects the policy by raising.
+        cache: Optional on-disk cache of parsed policies.
+
+    Returns:
+        The snapshot.
+
+    Raises:
+        ValueError: If the policy cannot be loaded or compiled.
+    """
+    with tracing.span("plan_lint.policy_store.load") as span:
+        files: List[str] = []
+        policy, rego_policy = load_policy(policy_path, files, read_base, cache)
+        if rego_policy is not None:
+            # Equal Rego texts loaded for different policies share one string
+            rego_policy = sys.intern(rego_policy)
+        snapshot = PolicySnapshot(
+            policy=policy,
+            compiled=CompiledPolicy(policy),
+            rego_policy=rego_policy,
+            version=version,
+            loaded_at=time.time(),
+            sources=tuple(dict.fromkeys(files)),
+        )
+        if check is not None:
+            check(snapshot)
+        if span.is_recording:
+            span.set_attribute("plan_lint.policy.version", version)
+        return snapshot
+
+
+def file_signature(path: str) -> Signature:
+    """
+    Return what identifies the current version of a file.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        The file's modification time, size and inode, or None if it is missing.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class _PollWatcher:
+    """Detects changes by comparing file modification times, sizes and inodes."""
+
+    def __init__(self, paths: List[str], interval: float):
+        self.paths = paths
+        self.interval = interval
+        self._signatures = {path: file_signature(path) for path in paths}
+        self._closed = threading.Event()
+
+    def wait(self) -> bool:
+        """Wait up to one interval; return whether any file changed."""
+        if self._closed.wait(self.interval):
+            return False
+        changed = False
+        for path in self.paths:
+            signature = file_signature(path)
+            if signature != self._signatures[path]:
+                self._signatures[path] = signature
+                changed = True
+        return changed
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class _InotifyWatcher:
+    """
+    Detects changes with inotify.
+
+    The directories holding the files are watched rather than the files, so
+    editors and deploy tools that replace a file by renaming a new one over it
+    are noticed too.
+    """
+
+    def __init__(self, paths: List[str], interval: float, settle: float = 0.05):
+        self.paths = paths
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.interval = interval
+        self.settle = settle
+        self._names: Dict[int, set] = {}
+        try:
+            for path in paths:
+                directory, name = os.path.split(os.path.abspath(path))
+                wd = libc.inotify_add_watch(
+                    self._fd, os.fsencode(directory), _IN_WATCH_MASK
+                )
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+                self._names.setdefault(wd, set()).add(os.fsencode(name))
+        except Exception:
+            os.close(self._fd)
+            self._fd = -1
+            raise
+        # Closing the write end wakes wait() up when the watcher is closed
+        self._wake_read, self._wake_write = os.pipe()
+
+    def _drain(self) -> bool:
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if name in self._names.get(wd, ()):
+                    changed = True
+
+    def wait(self) -> bool:
+        """Wait up to one interval; return whether any file changed."""
+        ready, _, _ = select.select([self._fd, self._wake_read], [], [], self.interval)
+        if self._wake_read in ready or self._fd not in ready:
+            return False
+        changed = self._drain()
+        if changed:
+            # Let a burst of writes finish before the file is read
+            while select.select([self._fd], [], [], self.settle)[0]:
+                self._drain()
+        return changed
+
+    def close(self) -> None:
+        if self._wake_write >= 0:
+            os.close(self._wake_write)
+            self._wake_write = -1
+
+    def __del__(self) -> None:
+        for fd in (self._fd, getattr(self, "_wake_read", -1)):
+            if fd >= 0:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+
+def _make_watcher(paths: List[str], interval: float, watcher: str) -> Any:
+    if watcher == "inotify" or (watcher == "auto" and sys.platform == "linux"):
+        try:
+            return _InotifyWatcher(paths, interval)
+        except (OSError, AttributeError, TypeError):
+            if watcher == "inotify":
+                raise
+    return _PollWatcher(paths, interval)
+
+
+class PolicyStore:
+    """
+    Holds the active policy and reloads it when the policy file changes.
+
+    The policy is loaded when the store is created; call ``start()`` to watch
+    the file from a background thread, or ``reload()`` to reload on demand.
+    """
+
+    def __init__(
+        self,
+        policy_path: str,
+        interval: float = 1.0,
+        watcher: str = "auto",
+        check: Optional[Callable[[PolicySnapshot], None]] = None,
+        cache: Optional[PolicyCache] = None,
+    ):
+        """
+        Load the policy.
+
+        Args:
+            policy_path: Path to the policy file (YAML or Rego).
+            interval: Seconds between checks of the file when polling.
+            watcher: ``inotify``, ``poll``, or ``auto`` to use inotify where
+                it is available and poll otherwise.
+            check: Optional callable run on every newly loaded policy before
+                it is activated. It rejects the policy by raising.
+            cache: Optional on-disk cache of parsed policies.
+
+        Raises:
+            ValueError: If the policy cannot be loaded, or watcher is unknown.
+                Errors raised by ``check`` are passed on as they are.
+        """
+        if watcher not in ("auto", "inotify", "poll"):
+            raise ValueError(f"Unknown watcher: {watcher}")
+        self.policy_path = policy_path
+        self.interval = interval
+        self.watcher = watcher
+        self.check = check
+        self.cache = cache
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_reload: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._watch_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._watcher: Any = None
+        self._snapshot = load_snapshot(policy_path, check=check, cache=cache)
+
+    @property
+    def current(self) -> PolicySnapshot:
+        """The active policy. Read it once per validation."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Version of the active policy, starting at 1."""
+        return self._snapshot.version
+
+    def reload(self) -> bool:
+        """
+        Load the policy file again and activate it if it is valid.
+
+        If loading, compiling or the ``check`` callable fails, the previous
+        policy stays active and the error is recorded in ``last_error``.
+
+        Returns:
+            True if the new policy was activated.
+        """
+        with self._lock:
+            try:
+                snapshot = load_snapshot(
+                    self.policy_path,
+                    self._snapshot.version + 1,
+                    check=self.check,
+                    cache=self.cache,
+                )
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                ok = False
+            else:
+                self._snapshot = snapshot
+                self.reloads += 1
+                self.last_error = None
+                self.last_reload = snapshot.loaded_at
+                ok = True
+
+        if metrics.ACTIVE is not None:
+            metrics.ACTIVE.observe_policy_reload(ok)
+        return ok
+
+    def validate(self, plan: Plan, **kwargs: Any) -> ValidationResult:
+        """
+        Validate a plan against the active policy.
+
+        Args:
+            plan: The plan to validate.
+            **kwargs: Further arguments for ``validate_plan``.
+
+        Returns:
+            A ValidationResult object.
+        """
+        snapshot = self._snapshot
+        return validate_plan(
+            plan, snapshot.compiled, rego_policy=snapshot.rego_policy, **kwargs
+        )
+
+    def _run(self) -> None:
+        watcher = self._watcher
+        while self._thread is not None:
+            if not watcher.wait():
+                continue
+            self.reload()
+            # Follow changes to the files the policy extends
+            sources = list(self._snapshot.sources)
+            if sources != watcher.paths:
+                with self._watch_lock:
+                    if self._thread is None:
+                        break
+                    watcher.close()
+                    watcher = self._watcher = _make_watcher(
+                        sources, self.interval, self.watcher
+                    )
+
+    def start(self) -> "PolicyStore":
+        """
+        Start watching the policy file from a daemon thread.
+
+        Returns:
+            The store.
+        """
+        if self._thread is not None:
+            return self
+        self._watcher = _make_watcher(
+            list(self._snapshot.sources), self.interval, self.watcher
+        )
+        self._thread = threading.Thread(
+            target=self._run,
+            name="plan-lint-policy-watcher",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop watching the policy file and wait for the thread to exit."""
+        with self._watch_lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._watcher.close()
+        thread.join()
+        self._watcher = None
+
+    def __enter__(self) -> "PolicyStore":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
@@ -0,0 +1,343 @@
+"""
+Profiling hooks for plan-linter.
+
+Validation functions accept an optional ``collector``: any callable that
+receives a CheckEvent for every check run, with the check name, step index,
+duration and number of findings. When no collector is given nothing is timed.
+
+ProfileAggregator is a ready-made collector that keeps per-check durations and
+reports count, total and p50/p95/p99 latencies.
+
+MemoryProfiler is a tracer that uses tracemalloc to measure the memory each
+traced phase allocates, retains and peaks at.
+"""
+
+import math
+import os
+import random
+import time
+import tracemalloc
+from types import TracebackType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+
+from rich.console import Console
+from rich.table import Table
+
+from plan_lint.tracing import Attributes, Span, Tracer
+from plan_lint.types import PlanError
+
+
+class CheckEvent(NamedTuple):
+    """A single timed run of a check."""
+
+    check: str
+    step: Optional[int]
+    duration_ns: int
+    findings: int
+
+
+Collector = Callable[[CheckEvent], None]
+
+
+def call_timed(
+    collector: Collector,
+    check: str,
+    step: Optional[int],
+    func: Callable[..., List[PlanError]],
+    *args: Any,
+) -> List[PlanError]:
+    """
+    Call a check function and report its duration to a collector.
+
+    Args:
+        collector: The collector to notify.
+        check: The check name reported in the event.
+        step: The step index, or None for whole-plan checks.
+        func: The check function.
+        *args: Arguments for the check function.
+
+    Returns:
+        The errors returned by the check function.
+    """
+    start = time.perf_counter_ns()
+    errors = func(*args)
+    collector(CheckEvent(check, step, time.perf_counter_ns() - start, len(errors)))
+    return errors
+
+
+def percentile(sorted_values: List[int], pct: float) -> float:
+    """
+    Return the nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values: Values in ascending order.
+        pct: Percentile between 0 and 100.
+
+    Returns:
+        The percentile value, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return float(sorted_values[min(rank, len(sorted_values) - 1)])
+
+
+class _CheckProfile:
+    """Durations and totals for one check."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.findings = 0
+        self.samples: List[int] = []
+
+
+class ProfileAggregator:
+    """
+    Collector that aggregates check timings.
+
+    Durations are kept per check up to ``max_samples``; beyond that a uniform
+    reservoir sample is kept, so memory stays bounded for long runs.
+    """
+
+    def __init__(self, max_samples: int = 100_000):
+        """
+        Initialize the aggregator.
+
+        Args:
+            max_samples: Maximum number of durations kept per check.
+        """
+        self.max_samples = max_samples
+        self.checks: Dict[str, _CheckProfile] = {}
+        self._random = random.Random(0)
+
+    def __call__(self, event: CheckEvent) -> None:
+        profile = self.checks.get(event.check)
+        if profile is None:
+            profile = self.checks[event.check] = _CheckProfile()
+
+        profile.count += 1
+        profile.total_ns += event.duration_ns
+        profile.findings += event.findings
+        if len(profile.samples) < self.max_samples:
+            profile.samples.append(event.duration_ns)
+        else:
+            slot = self._random.randrange(profile.count)
+            if slot < self.max_samples:
+                profile.samples[slot] = event.duration_ns
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarise the collected timings.
+
+        Returns:
+            Dictionary mapping check names to count, findings, total_ms and
+            p50_us/p95_us/p99_us latencies, slowest total first.
+        """
+        result = {}
+        for name, profile in sorted(
+            self.checks.items(), key=lambda item: item[1].total_ns, reverse=True
+        ):
+            samples = sorted(profile.samples)
+            result[name] = {
+                "count": profile.count,
+                "findings": profile.findings,
+                "total_ms": profile.total_ns / 1e6,
+                "p50_us": percentile(samples, 50) / 1e3,
+                "p95_us": percentile(samples, 95) / 1e3,
+                "p99_us": percentile(samples, 99) / 1e3,
+            }
+        return result
+
+    def report(self, console: Optional[Console] = None) -> None:
+        """
+        Print the summary as a table.
+
+        Args:
+            console: Console to print to. Defaults to stderr.
+        """
+        console = console or Console(stderr=True)
+        table = Table(title="Validation Profile")
+        table.add_column("Check", style="cyan")
+        for column in ("Count", "Findings", "Total ms", "p50 µs", "p95 µs", "p99 µs"):
+            table.add_column(column, justify="right")
+
+        for name, stats in self.summary().items():
+            table.add_row(
+                name,
+                str(stats["count"]),
+                str(stats["findings"]),
+                f"{stats['total_ms']:.3f}",
+                f"{stats['p50_us']:.1f}",
+                f"{stats['p95_us']:.1f}",
+                f"{stats['p99_us']:.1f}",
+            )
+
+        console.print(table)
+
+
+# Allocations made by imports and by tracemalloc itself are not interesting
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+)
+
+
+class _PhaseMemory:
+    """Memory totals for one phase."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.retained = 0
+        self.peak = 0
+        self.top: List[Tuple[str, int]] = []
+
+
+class _MemorySpan(Span):
+    is_recording = True
+
+    def __init__(self, profiler: "MemoryProfiler", name: str):
+        self._profiler = profiler
+        self.name = name
+        self.start = 0
+        self.peak = 0
+
+    def __enter__(self) -> Span:
+        self._profiler._enter(self)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._profiler._exit(self)
+
+
+class MemoryProfiler(Tracer):
+    """
+    Tracer that measures memory per phase with tracemalloc.
+
+    Install it with ``tracing.set_tracer()``. For every span it records the
+    memory retained when the phase ends and the peak above the memory in use
+    when it started, including nested phases. At the end of each top-level
+    phase, and of each phase directly inside one, a tracemalloc snapshot is
+    compared with the previous one to find the source lines that retained the
+    most memory.
+    """
+
+    def __init__(self, top: int = 3):
+        """
+        Initialize the profiler and start tracemalloc if needed.
+
+        Args:
+            top: Number of retaining source lines reported per phase; 0
+                disables snapshots.
+        """
+        self.top = top
+        self.phases: Dict[str, _PhaseMemory] = {}
+        self._stack: List[_MemorySpan] = []
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        self._snapshot = (
+            tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            if top
+            else None
+        )
+
+    def start_span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        return _MemorySpan(self, name)
+
+    def _enter(self, span: _MemorySpan) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, peak)
+        tracemalloc.reset_peak()
+        span.start = span.peak = current
+        self._stack.append(span)
+
+    def _exit(self, span: _MemorySpan) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        span.peak = max(span.peak, peak)
+        self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, span.peak)
+        tracemalloc.reset_peak()
+
+        phase = self.phases.get(span.name)
+        if phase is None:
+            phase = self.phases[span.name] = _PhaseMemory()
+        phase.calls += 1
+        phase.retained += current - span.start
+        phase.peak = max(phase.peak, span.peak - span.start)
+
+        if len(self._stack) <= 1 and self._snapshot is not None:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            diff = snapshot.compare_to(self._snapshot, "lineno")[: self.top]
+            phase.top = [
+                (
+                    f"{os.path.basename(stat.traceback[0].filename)}:"
+                    f"{stat.traceback[0].lineno}",
+                    stat.size_diff,
+                )
+                for stat in diff
+                if stat.size_diff > 0
+            ]
+            self._snapshot = snapshot
+
+    def stop(self) -> None:
+        """Stop tracemalloc if this profiler started it."""
+        if self._started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started = False
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarise memory use per phase.
+
+        Returns:
+            Dictionary mapping span names to ``calls``, ``retained`` and
+            ``peak`` bytes and the ``top`` retaining source lines, in the
+            order the phases first ended.
+        """
+        return {
+            name: {
+                "calls": phase.calls,
+                "retained": phase.retained,
+                "peak": phase.peak,
+                "top": list(phase.top),
+            }
+            for name, phase in self.phases.items()
+        }
+
+    def report(self, console: Optional[Console] = None) -> None:
+        """
+        Print the summary as a table.
+
+        Args:
+            console: Console to print to. Defaults to stderr.
+        """
+        console = console or Console(stderr=True)
+        table = Table(title="Memory Profile")
+        table.add_column("Phase", style="cyan")
+        for column in ("Calls", "Retained KiB", "Peak KiB"):
+            table.add_column(column, justify="right")
+        table.add_column("Top retaining lines")
+
+        for name, stats in self.summary().items():
+            table.add_row(
+                name,
+                str(stats["calls"]),
+                f"{stats['retained'] / 1024:.1f}",
+                f"{stats['peak'] / 1024:.1f}",
+                "\n".join(
+                    f"{line} ({size / 1024:.1f} KiB)" for line, size in stats["top"]
+                ),
+            )
+
+        console.print(table)
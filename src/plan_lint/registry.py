@@ -0,0 +1,218 @@
+"""
+Policy registry for plan-linter.
+
+This module serves many policies, one per tenant, from a directory of policy
+files such as ``policies/<tenant>.yaml``. Tenant policies usually extend a
+shared base (``extends: base.yaml``) and override a few settings.
+
+Tenant policies are loaded on first use and kept compiled in a bounded LRU, so
+memory stays flat however many tenants there are. A cached tenant policy is
+reloaded when its file changes. Base policies are parsed once and reused while
+their files are unchanged; a tenant is not reloaded when only its base
+changes, so call ``invalidate`` after editing a base. The compiled regexes,
+tool sets and bound checks that tenants have in common are shared through the
+compiler's content-keyed caches, so compiling a tenant that differs from its
+base in a few settings costs little more than merging the overlay::
+
+    registry = PolicyRegistry("policies/")
+    result = registry.validate("acme", plan)
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from plan_lint import tracing
+from plan_lint.core import validate_plan
+from plan_lint.loader import read_policy_document
+from plan_lint.policy_cache import PolicyCache
+from plan_lint.policy_store import (
+    PolicySnapshot,
+    Signature,
+    file_signature,
+    load_snapshot,
+)
+from plan_lint.types import Plan, ValidationResult
+
+_TENANT = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+
+class PolicyRegistry:
+    """
+    Loads tenant policies on demand and keeps the most recently used compiled.
+
+    The registry is safe to use from several threads; a tenant's policy may be
+    loaded twice if two threads miss on it at once, and the later load wins.
+    Each lookup checks the tenant file's modification time, size and inode,
+    and reloads the policy if the file has changed.
+    """
+
+    def __init__(
+        self,
+        policy_dir: str,
+        max_policies: int = 1024,
+        suffixes: Sequence[str] = (".yaml", ".yml", ".rego"),
+        cache: Optional[PolicyCache] = None,
+        check: Optional[Callable[[PolicySnapshot], None]] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            policy_dir: Directory holding one policy file per tenant, named
+                after the tenant. Paths in ``extends`` are resolved relative to
+                the extending file as usual.
+            max_policies: Number of compiled tenant policies to keep.
+            suffixes: File suffixes to look for, in order of preference.
+            cache: Optional on-disk cache of parsed policies, so new worker
+                processes skip parsing tenant policies.
+            check: Optional function run on each tenant policy after it is
+                loaded, which refuses the policy by raising ValueError; see
+                ``policy_check.reject_unsafe``.
+
+        Raises:
+            ValueError: If max_policies is less than 1.
+        """
+        if max_policies < 1:
+            raise ValueError("max_policies must be at least 1")
+        self.policy_dir = policy_dir
+        self.max_policies = max_policies
+        self.suffixes = tuple(suffixes)
+        self.cache = cache
+        self.check = check
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Tenant -> (policy file, its signature when loaded, snapshot)
+        self._policies: "OrderedDict[str, Tuple[str, Signature, PolicySnapshot]]" = (
+            OrderedDict()
+        )
+        self._bases: Dict[str, Tuple[Signature, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._bases_lock = threading.Lock()
+
+    def path(self, tenant: str) -> str:
+        """
+        Return the policy file of a tenant.
+
+        Args:
+            tenant: The tenant name.
+
+        Returns:
+            Path of the first existing file named after the tenant.
+
+        Raises:
+            ValueError: If the name is not a valid tenant name.
+            KeyError: If the tenant has no policy file.
+        """
+        if not _TENANT.match(tenant):
+            raise ValueError(f"Invalid tenant name: {tenant!r}")
+        for suffix in self.suffixes:
+            path = os.path.join(self.policy_dir, tenant + suffix)
+            if os.path.isfile(path):
+                return path
+        raise KeyError(tenant)
+
+    def _read_base(self, path: str) -> Dict[str, Any]:
+        """Read a base policy document, reusing it while the file is unchanged."""
+        signature = file_signature(path)
+        with self._bases_lock:
+            cached = self._bases.get(path)
+        if cached is not None and signature is not None and cached[0] == signature:
+            return cached[1]
+        policy_data = read_policy_document(path)
+        with self._bases_lock:
+            self._bases[path] = (signature, policy_data)
+        return policy_data
+
+    def get(self, tenant: str) -> PolicySnapshot:
+        """
+        Return the compiled policy of a tenant, loading it if needed.
+
+        Args:
+            tenant: The tenant name.
+
+        Returns:
+            The tenant's policy snapshot.
+
+        Raises:
+            ValueError: If the name is invalid or the policy cannot be loaded.
+            KeyError: If the tenant has no policy file.
+        """
+        with self._lock:
+            cached = self._policies.get(tenant)
+        if cached is not None:
+            path, signature, snapshot = cached
+            if signature is not None and file_signature(path) == signature:
+                with self._lock:
+                    if tenant in self._policies:
+                        self._policies.move_to_end(tenant)
+                    self.hits += 1
+                return snapshot
+        with self._lock:
+            self.misses += 1
+
+        path = self.path(tenant)
+        signature = file_signature(path)
+
+        with tracing.span("plan_lint.registry.load") as span:
+            if span.is_recording:
+                span.set_attribute("plan_lint.tenant", tenant)
+            snapshot = load_snapshot(
+                path,
+                read_base=self._read_base,
+                check=self.check,
+                cache=self.cache,
+            )
+
+        with self._lock:
+            self._policies[tenant] = (path, signature, snapshot)
+            self._policies.move_to_end(tenant)
+            while len(self._policies) > self.max_policies:
+                self._policies.popitem(last=False)
+                self.evictions += 1
+        return snapshot
+
+    def validate(self, tenant: str, plan: Plan, **kwargs: Any) -> ValidationResult:
+        """
+        Validate a plan against a tenant's policy.
+
+        Args:
+            tenant: The tenant name.
+            plan: The plan to validate.
+            **kwargs: Further arguments for ``validate_plan``.
+
+        Returns:
+            A ValidationResult object.
+        """
+        snapshot = self.get(tenant)
+        return validate_plan(
+            plan, snapshot.compiled, rego_policy=snapshot.rego_policy, **kwargs
+        )
+
+    def invalidate(self, tenant: Optional[str] = None) -> None:
+        """
+        Drop compiled policies so they are loaded again on next use.
+
+        Tenant files are checked for changes on every lookup, and base policies
+        whenever a tenant is loaded, so after editing a base, invalidating
+        every tenant is enough.
+
+        Args:
+            tenant: The tenant to drop, or None to drop all of them.
+        """
+        with self._lock:
+            if tenant is None:
+                self._policies.clear()
+            else:
+                self._policies.pop(tenant, None)
+
+    def __len__(self) -> int:
+        return len(self._policies)
+
+    def __contains__(self, tenant: object) -> bool:
+        return tenant in self._policies
@@ -2,17 +2,36 @@
 CLI reporter for plan-linter.
 
 This module provides functionality for rendering validation results as CLI output.
+``report`` renders a single result in detail; ``BatchReporter`` prints one line
+per plan as results arrive and a summary table at the end.
 """
 
+import heapq
 import sys
-from typing import TextIO
+import time
+from collections import Counter
+from typing import Dict, List, Optional, TextIO, Tuple
 
 from rich.console import Console
 from rich.panel import Panel
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    ProgressColumn,
+    Task,
+    TimeElapsedColumn,
+)
 from rich.table import Table
 from rich.text import Text
 
-from plan_lint.types import Status, ValidationResult
+from plan_lint.types import Plan, Status, ValidationResult
+
+STATUS_STYLES = {
+    Status.PASS: "green",
+    Status.WARN: "yellow",
+    Status.ERROR: "red",
+}
 
 
 def report(result: ValidationResult, output: TextIO = sys.stdout) -> None:
@@ -26,11 +45,7 @@ def report(result: ValidationResult, output: TextIO = sys.stdout) -> None:
     console = Console(file=output)
 
     # Create header
-    status_color = {
-        Status.PASS: "green",
-        Status.WARN: "yellow",
-        Status.ERROR: "red",
-    }.get(result.status, "white")
+    status_color = STATUS_STYLES.get(result.status, "white")
 
     status_text = Text(f"Status: {result.status.upper()}", style=status_color)
     risk_text = Text(f"Risk score: {result.risk_score:.2f}", style=status_color)
@@ -83,3 +98,174 @@ def report(result: ValidationResult, output: TextIO = sys.stdout) -> None:
         console.print(f"Found {', '.join(summary)}")
     else:
         console.print("Plan validation passed with no issues", style="green")
+
+
+class _ThroughputColumn(ProgressColumn):
+    """Shows the number of plans linted per second."""
+
+    def render(self, task: Task) -> Text:
+        speed = task.finished_speed or task.speed
+        if speed is None:
+            return Text("- plans/s", style="progress.data.speed")
+        return Text(f"{speed:,.0f} plans/s", style="progress.data.speed")
+
+
+class BatchReporter:
+    """
+    Reports the results of linting many plans.
+
+    Each result is printed as a single line when it is added, while a progress
+    bar shows how many plans are done and the throughput. ``finish`` prints one
+    summary table with totals by status, error code and tool and the plans with
+    the highest risk. Only these aggregates are kept, so memory does not grow
+    with the number of plans.
+    """
+
+    def __init__(
+        self,
+        output: TextIO = sys.stdout,
+        total: Optional[int] = None,
+        progress_console: Optional[Console] = None,
+        show_progress: bool = True,
+        worst: int = 5,
+    ):
+        """
+        Initialize the reporter.
+
+        Args:
+            output: File-like object to write result lines and the summary to.
+            total: Number of plans expected, for the progress bar.
+            progress_console: Console for the progress bar. Defaults to the
+                output console.
+            show_progress: Whether to show the progress bar. It is only shown
+                when its console is a terminal.
+            worst: Number of highest-risk plans listed in the summary.
+        """
+        self.console = Console(file=output, highlight=False)
+        self.worst = worst
+        self.count = 0
+        self.by_status: Counter = Counter()
+        self.by_code: Counter = Counter()
+        self.by_tool: Counter = Counter()
+        self._worst: List[Tuple[float, int, str]] = []
+        self._start = time.perf_counter()
+
+        progress_console = progress_console or self.console
+        self._progress = Progress(
+            BarColumn(),
+            MofNCompleteColumn(),
+            _ThroughputColumn(),
+            TimeElapsedColumn(),
+            console=progress_console,
+            transient=True,
+            disable=not show_progress or not progress_console.is_terminal,
+        )
+        self._task = self._progress.add_task("Linting", total=total)
+        self._progress.start()
+
+    def add(
+        self, result: ValidationResult, name: str, plan: Optional[Plan] = None
+    ) -> None:
+        """
+        Print a line for a result and add it to the summary.
+
+        Args:
+            result: The validation result.
+            name: Name of the plan, such as its file path.
+            plan: The plan, if available, so errors can be counted by tool.
+        """
+        self.count += 1
+        self.by_status[result.status] += 1
+
+        codes: Dict[str, int] = {}
+        for error in result.errors:
+            code = error.code.value
+            codes[code] = codes.get(code, 0) + 1
+            if plan is not None and error.step is not None:
+                if 0 <= error.step < len(plan.steps):
+                    self.by_tool[plan.steps[error.step].tool] += 1
+        self.by_code.update(codes)
+
+        entry = (result.risk_score, -self.count, name)
+        if len(self._worst) < self.worst:
+            heapq.heappush(self._worst, entry)
+        elif entry > self._worst[0]:
+            heapq.heapreplace(self._worst, entry)
+
+        style = STATUS_STYLES.get(result.status, "white")
+        line = Text.assemble(
+            (f"{result.status.value.upper():<5}", style),
+            f" {result.risk_score:.2f} ",
+            name,
+        )
+        if codes:
+            line.append(
+                "  "
+                + ", ".join(
+                    code if count == 1 else f"{code} x{count}"
+                    for code, count in codes.items()
+                ),
+                style="dim",
+            )
+        self.console.print(line, soft_wrap=True)
+        self._progress.advance(self._task)
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Return the aggregated results.
+
+        Returns:
+            Dictionary with ``plans``, ``seconds``, counts ``by_status``,
+            ``by_code`` and ``by_tool``, and the ``worst`` plans as
+            ``(name, risk_score)`` pairs, highest risk first.
+        """
+        return {
+            "plans": self.count,
+            "seconds": time.perf_counter() - self._start,
+            "by_status": {status.value: n for status, n in self.by_status.items()},
+            "by_code": dict(self.by_code.most_common()),
+            "by_tool": dict(self.by_tool.most_common()),
+            "worst": self._worst_plans(),
+        }
+
+    def _worst_plans(self) -> List[Tuple[str, float]]:
+        return [
+            (name, risk)
+            for risk, _, name in sorted(self._worst, reverse=True)
+            if risk > 0
+        ]
+
+    def finish(self) -> None:
+        """Stop the progress bar and print the summary table."""
+        self._progress.stop()
+        seconds = time.perf_counter() - self._start
+
+        table = Table(title="Batch Summary")
+        table.add_column("Group", style="cyan")
+        table.add_column("Name")
+        table.add_column("Count", justify="right")
+
+        table.add_row("Plans", "total", str(self.count))
+        for status in Status:
+            table.add_row(
+                "Plans",
+                Text(status.value, style=STATUS_STYLES[status]),
+                str(self.by_status[status]),
+            )
+        rate = self.count / seconds if seconds > 0 else 0.0
+        table.add_row("Plans", "plans/s", f"{rate:,.0f}", end_section=True)
+
+        for code, count in self.by_code.most_common():
+            table.add_row("Error code", code, str(count))
+        if self.by_code:
+            table.rows[-1].end_section = True
+
+        for tool, count in self.by_tool.most_common(10):
+            table.add_row("Tool", tool, str(count))
+        if self.by_tool:
+            table.rows[-1].end_section = True
+
+        for name, risk in self._worst_plans():
+            table.add_row("Worst risk", name, f"{risk:.2f}")
+
+        self.console.print(table)
@@ -4,9 +4,9 @@ JSON reporter for plan-linter.
 This module provides functionality for rendering validation results as JSON.
 """
 
-import json
 from typing import Dict, Optional, TextIO
 
+from plan_lint import jsonio
 from plan_lint.types import ValidationResult
 
 
@@ -23,19 +23,24 @@ def to_dict(result: ValidationResult) -> Dict:
     return result.model_dump()
 
 
-def report(result: ValidationResult, output: Optional[TextIO] = None) -> str:
+def report(
+    result: ValidationResult,
+    output: Optional[TextIO] = None,
+    indent: Optional[int] = 2,
+) -> str:
     """
     Generate a JSON report from a validation result.
 
     Args:
         result: The validation result to report.
         output: Optional file-like object to write the report to.
+        indent: Indent for pretty printing, or None for compact output.
 
     Returns:
         The JSON report as a string.
     """
     report_dict = to_dict(result)
-    report_json = json.dumps(report_dict, indent=2)
+    report_json = jsonio.dumps(report_dict, indent=indent).decode("utf-8")
 
     if output:
         output.write(report_json)
@@ -0,0 +1,187 @@
+"""
+NDJSON reporter for plan-linter.
+
+This module writes validation results as newline-delimited JSON, one compact
+line per result, for batch runs and audit logs. The first line is a header
+listing the error codes; errors refer to codes by their index in that list.
+Empty ``warnings``, ``step`` and ``arg`` fields are omitted.
+
+Example output::
+
+    {"format":"plan-lint-ndjson","version":1,"codes":["SCHEMA_INVALID",...]}
+    {"plan":"a.json","status":"error","risk_score":0.4,"errors":[{"code":1,"msg":"..."}]}
+    {"plan":"b.json","status":"pass","risk_score":0.0,"errors":[]}
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from plan_lint import jsonio
+from plan_lint.types import (
+    ErrorCode,
+    PlanError,
+    PlanWarning,
+    Status,
+    ValidationResult,
+)
+
+FORMAT = "plan-lint-ndjson"
+VERSION = 1
+
+# Error codes in header order; an error's "code" is an index into this list
+CODES = [code.value for code in ErrorCode]
+_CODE_IDS = {code: i for i, code in enumerate(ErrorCode)}
+
+
+def header() -> Dict[str, Any]:
+    """Return the header record written before any results."""
+    return {"format": FORMAT, "version": VERSION, "codes": CODES}
+
+
+def to_record(
+    result: ValidationResult, plan: Optional[str] = None, omit_empty: bool = True
+) -> Dict[str, Any]:
+    """
+    Convert a ValidationResult to a compact record.
+
+    Args:
+        result: The validation result to convert.
+        plan: Optional identifier of the plan, such as its file path.
+        omit_empty: Leave out empty warnings and missing steps and arguments.
+
+    Returns:
+        Dictionary representation of the result.
+    """
+    record: Dict[str, Any] = {}
+    if plan is not None:
+        record["plan"] = plan
+    record["status"] = result.status.value
+    record["risk_score"] = result.risk_score
+
+    errors = []
+    for error in result.errors:
+        item: Dict[str, Any] = {}
+        if error.step is not None or not omit_empty:
+            item["step"] = error.step
+        item["code"] = _CODE_IDS[error.code]
+        item["msg"] = error.msg
+        if error.arg is not None or not omit_empty:
+            item["arg"] = error.arg
+        errors.append(item)
+    record["errors"] = errors
+
+    if result.warnings or not omit_empty:
+        record["warnings"] = [
+            warning.model_dump(exclude_none=omit_empty) for warning in result.warnings
+        ]
+    return record
+
+
+class NDJSONWriter:
+    """
+    Writes results to a stream one line at a time.
+
+    The header is written when the writer is created, so an empty run still
+    produces a valid file.
+    """
+
+    def __init__(self, output: TextIO, omit_empty: bool = True):
+        """
+        Initialize the writer and write the header.
+
+        Args:
+            output: Text stream to write to.
+            omit_empty: Leave out empty warnings and missing steps and arguments.
+        """
+        self.output = output
+        self.omit_empty = omit_empty
+        self.count = 0
+        self._write(header())
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self.output.write(jsonio.dumps(record).decode("utf-8"))
+        self.output.write("\n")
+
+    def write(self, result: ValidationResult, plan: Optional[str] = None) -> None:
+        """
+        Write one result.
+
+        Args:
+            result: The validation result to write.
+            plan: Optional identifier of the plan, such as its file path.
+        """
+        self._write(to_record(result, plan, self.omit_empty))
+        self.count += 1
+
+
+def report(
+    result: ValidationResult,
+    output: Optional[TextIO] = None,
+    plan: Optional[str] = None,
+) -> str:
+    """
+    Generate an NDJSON report, header included, from a validation result.
+
+    Args:
+        result: The validation result to report.
+        output: Optional file-like object to write the report to.
+        plan: Optional identifier of the plan, such as its file path.
+
+    Returns:
+        The NDJSON report as a string.
+    """
+    lines = [
+        jsonio.dumps(header()).decode("utf-8"),
+        jsonio.dumps(to_record(result, plan)).decode("utf-8"),
+    ]
+    report_ndjson = "\n".join(lines) + "\n"
+
+    if output:
+        output.write(report_ndjson)
+
+    return report_ndjson
+
+
+def read(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], ValidationResult]]:
+    """
+    Read results back from NDJSON output.
+
+    Args:
+        lines: Lines of NDJSON output, such as an open file.
+
+    Yields:
+        ``(plan, result)`` pairs; ``plan`` is None when it was not recorded.
+
+    Raises:
+        ValueError: If the header is missing or has an unsupported version, or
+            a line refers to an unknown error code.
+    """
+    codes: Optional[list] = None
+    for line in lines:
+        if not line.strip():
+            continue
+        record = jsonio.loads(line)
+        if codes is None:
+            if record.get("format") != FORMAT or record.get("version") != VERSION:
+                raise ValueError("Not a plan-lint NDJSON report")
+            codes = [ErrorCode(code) for code in record["codes"]]
+            continue
+
+        try:
+            errors = [
+                PlanError(
+                    step=e.get("step"),
+                    code=codes[e["code"]],
+                    msg=e["msg"],
+                    arg=e.get("arg"),
+                )
+                for e in record.get("errors", [])
+            ]
+        except IndexError as e:
+            raise ValueError(f"Unknown error code in NDJSON record: {line}") from e
+        warnings = [PlanWarning(**w) for w in record.get("warnings", [])]
+        yield record.get("plan"), ValidationResult(
+            status=Status(record["status"]),
+            risk_score=record["risk_score"],
+            errors=errors,
+            warnings=warnings,
+        )
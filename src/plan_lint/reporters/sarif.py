@@ -0,0 +1,184 @@
+"""
+SARIF reporter for plan-linter.
+
+This module renders validation results as SARIF 2.1.0 for code scanning tools.
+When a plan was loaded with ``load_plan_with_source_map``, each finding points
+to the line and column of the offending argument, or of its step.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+from plan_lint import __version__, jsonio
+from plan_lint.sourcemap import SourceMap
+from plan_lint.types import ErrorCode, ValidationResult
+
+SARIF_VERSION = "2.1.0"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+INFORMATION_URI = "https://github.com/cirbuk/plan-lint"
+
+RULE_DESCRIPTIONS = {
+    ErrorCode.SCHEMA_INVALID: "The plan does not match the plan schema",
+    ErrorCode.TOOL_DENY: "A step uses a tool the policy does not allow",
+    ErrorCode.BOUND_VIOLATION: "A step argument is outside the policy bounds",
+    ErrorCode.RAW_SECRET: "A step argument contains sensitive data",
+    ErrorCode.LOOP_DETECTED: "The plan's step references form a cycle",
+    ErrorCode.MAX_STEPS_EXCEEDED: "The plan has more steps than the policy allows",
+    ErrorCode.MISSING_HANDLER: "A step has no failure handler",
+    ErrorCode.SCAN_TIMEOUT: "Scanning a step for sensitive data ran out of time",
+}
+_RULE_INDEX = {code.value: i for i, code in enumerate(ErrorCode)}
+
+
+def _rules() -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": code.value,
+            "name": "".join(part.title() for part in code.value.split("_")),
+            "shortDescription": {"text": RULE_DESCRIPTIONS.get(code, code.value)},
+            "defaultConfiguration": {"level": "error"},
+        }
+        for code in ErrorCode
+    ]
+
+
+def _location(
+    uri: Optional[str],
+    source_map: Optional[SourceMap],
+    step: Optional[int],
+    arg: Optional[str],
+) -> List[Dict[str, Any]]:
+    if uri is None:
+        return []
+
+    physical: Dict[str, Any] = {"artifactLocation": {"uri": uri}}
+    span = source_map.locate(step, arg) if source_map is not None else None
+    if span is not None:
+        physical["region"] = {
+            "startLine": span.start_line,
+            "startColumn": span.start_column,
+            "endLine": span.end_line,
+            "endColumn": span.end_column,
+        }
+
+    location: Dict[str, Any] = {"physicalLocation": physical}
+    if step is not None:
+        name = f"steps[{step}]" + (f".args.{arg}" if arg is not None else "")
+        location["logicalLocations"] = [{"fullyQualifiedName": name}]
+    return [location]
+
+
+class SarifLog:
+    """
+    Builds a SARIF log with one run covering any number of plans.
+
+    Results are converted as they are added, so source maps do not need to be
+    kept until the log is written.
+    """
+
+    def __init__(self) -> None:
+        self.results: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        result: ValidationResult,
+        uri: Optional[str] = None,
+        source_map: Optional[SourceMap] = None,
+    ) -> None:
+        """
+        Add the findings of one plan.
+
+        Args:
+            result: The validation result.
+            uri: Path or URI of the plan file. Findings have no location
+                without it.
+            source_map: Source map of the plan, for line and column locations.
+        """
+        if uri is not None:
+            uri = Path(uri).as_posix()
+
+        for error in result.errors:
+            self.results.append(
+                {
+                    "ruleId": error.code.value,
+                    "ruleIndex": _RULE_INDEX[error.code.value],
+                    "level": "error",
+                    "message": {"text": error.msg},
+                    "locations": _location(uri, source_map, error.step, error.arg),
+                }
+            )
+        for warning in result.warnings:
+            self.results.append(
+                {
+                    "ruleId": warning.code,
+                    "level": "warning",
+                    "message": {"text": warning.msg},
+                    "locations": _location(uri, source_map, warning.step, None),
+                }
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the SARIF log as a dictionary."""
+        return {
+            "$schema": SARIF_SCHEMA,
+            "version": SARIF_VERSION,
+            "runs": [
+                {
+                    "tool": {
+                        "driver": {
+                            "name": "plan-lint",
+                            "version": __version__,
+                            "informationUri": INFORMATION_URI,
+                            "rules": _rules(),
+                        }
+                    },
+                    "columnKind": "unicodeCodePoints",
+                    "results": self.results,
+                }
+            ],
+        }
+
+    def write(self, output: TextIO, indent: Optional[int] = 2) -> str:
+        """
+        Write the SARIF log.
+
+        Args:
+            output: File-like object to write to.
+            indent: Indent for pretty printing, or None for compact output.
+
+        Returns:
+            The SARIF log as a string.
+        """
+        sarif_json = jsonio.dumps(self.to_dict(), indent=indent).decode("utf-8")
+        output.write(sarif_json)
+        return sarif_json
+
+
+def report(
+    result: ValidationResult,
+    output: Optional[TextIO] = None,
+    uri: Optional[str] = None,
+    source_map: Optional[SourceMap] = None,
+    indent: Optional[int] = 2,
+) -> str:
+    """
+    Generate a SARIF report from a validation result.
+
+    Args:
+        result: The validation result to report.
+        output: Optional file-like object to write the report to.
+        uri: Path or URI of the plan file.
+        source_map: Source map of the plan, for line and column locations.
+        indent: Indent for pretty printing, or None for compact output.
+
+    Returns:
+        The SARIF report as a string.
+    """
+    log = SarifLog()
+    log.add(result, uri, source_map)
+    report_json = jsonio.dumps(log.to_dict(), indent=indent).decode("utf-8")
+
+    if output:
+        output.write(report_json)
+
+    return report_json
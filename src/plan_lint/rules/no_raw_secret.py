@@ -5,11 +5,27 @@ This rule checks if any step contains raw secrets or sensitive information.
 """
 
 import re
-from typing import List
+from typing import List, Optional, Tuple
 
+from plan_lint import scanning
+from plan_lint.core import iter_step_text
 from plan_lint.types import ErrorCode, Plan, PlanError, PlanStep, Policy
 
 
+def _find(
+    pattern: str,
+    texts: List[Tuple[str, str]],
+    scan: Optional[scanning.StepScan] = None,
+) -> Optional[str]:
+    """Return the argument of the first text matching a pattern."""
+    if scan is not None:
+        return scan.first_match(re.compile(pattern), texts)
+    for arg, text in texts:
+        if re.search(pattern, text):
+            return arg
+    return None
+
+
 def check_step(step: PlanStep, policy: Policy, step_idx: int) -> List[PlanError]:
     """
     Check if a step contains raw secrets or sensitive information.
@@ -23,13 +39,15 @@ def check_step(step: PlanStep, policy: Policy, step_idx: int) -> List[PlanError]
         List of errors for any detected secrets.
     """
     errors = []
-    step_str = str(step.args)
+    texts = list(iter_step_text(step))
+    scan = None
+    if scanning.is_limited(policy.secret_scan):
+        scan = scanning.StepScan(policy.secret_scan)
 
     # Check for patterns defined in policy
     for pattern in policy.deny_tokens_regex:
-        matches = re.findall(pattern, step_str)
-
-        if matches:
+        arg = _find(pattern, texts, scan)
+        if arg is not None:
             errors.append(
                 PlanError(
                     step=step_idx,
@@ -38,6 +56,7 @@ def check_step(step: PlanStep, policy: Policy, step_idx: int) -> List[PlanError]
                         f"Potentially sensitive data matching pattern '{pattern}' "
                         f"found in arguments"
                     ),
+                    arg=arg,
                 )
             )
 
@@ -56,19 +75,23 @@ def check_step(step: PlanStep, policy: Policy, step_idx: int) -> List[PlanError]
     ]
 
     for pattern in builtin_patterns:
-        matches = re.findall(pattern, step_str)
-
-        if matches:
+        arg = _find(pattern, texts, scan)
+        if arg is not None:
             errors.append(
                 PlanError(
                     step=step_idx,
                     code=ErrorCode.RAW_SECRET,
                     msg="Potentially sensitive data detected in arguments",
+                    arg=arg,
                 )
             )
             # Only report once for built-in patterns
             break
 
+    timeout = scan.error(step_idx) if scan is not None else None
+    if timeout is not None:
+        errors.append(timeout)
+
     return errors
 
 
@@ -85,8 +108,9 @@ def check_plan(plan: Plan, policy: Policy) -> List[PlanError]:
     """
     errors = []
 
-    for i, step in enumerate(plan.steps):
-        step_errors = check_step(step, policy, i)
-        errors.extend(step_errors)
+    with scanning.plan_budget(policy.secret_scan):
+        for i, step in enumerate(plan.steps):
+            step_errors = check_step(step, policy, i)
+            errors.extend(step_errors)
 
     return errors
@@ -0,0 +1,230 @@
+"""
+Budgeted secret scanning for plan-linter.
+
+Deny patterns are searched against every string in a step's arguments, and
+neither the strings nor the time a search takes are bounded by default. A
+policy's ``secret_scan`` section (see ScanLimits) bounds both:
+
+- ``max_value_chars`` scans only the start of each value.
+- ``chunk_chars`` and ``chunk_overlap`` scan long values in overlapping
+  windows, searching each with ``pos``/``endpos`` so no copy is made. A match
+  is found as long as it fits in a window, i.e. is no longer than the overlap
+  or starts in the window.
+- ``step_timeout_ms`` and ``plan_timeout_ms`` stop scanning once a step, or all
+  steps of the plan together, have used their budget, and report a
+  ``SCAN_TIMEOUT`` error so the plan is not passed unscanned.
+
+Python's regex engine cannot be interrupted while it runs, so the budgets are
+checked before every search rather than enforced by a signal or a second
+thread; this works the same in every thread of a server. A search can overrun
+the budget by at most the time of one search, which chunking keeps short for
+any pattern that is not catastrophic (see ``plan_lint.policy_check``).
+
+Budgets are measured with ``time.monotonic`` unless a ScanClock is given, as
+when several policies are scanned together and each is charged only for the
+time spent on its own patterns.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Pattern, Tuple
+
+from plan_lint.types import ErrorCode, PlanError, ScanLimits
+
+
+def is_limited(limits: Optional[ScanLimits]) -> bool:
+    """
+    Return whether scanning under the given limits differs from unbounded scanning.
+
+    Args:
+        limits: The limits, or None.
+
+    Returns:
+        True if any limit is set.
+    """
+    return limits is not None and (
+        limits.max_value_chars is not None
+        or limits.chunk_chars is not None
+        or limits.step_timeout_ms is not None
+        or limits.plan_timeout_ms is not None
+    )
+
+
+class ScanClock:
+    """A clock that only advances while it is running."""
+
+    __slots__ = ("elapsed", "started")
+
+    def __init__(self) -> None:
+        self.elapsed = 0.0
+        self.started: Optional[float] = None
+
+    def __call__(self) -> float:
+        if self.started is None:
+            return self.elapsed
+        return self.elapsed + time.monotonic() - self.started
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        """Advance the clock for the duration of the block."""
+        self.started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.elapsed += time.monotonic() - self.started
+            self.started = None
+
+
+class PlanScan:
+    """The scan budget shared by the steps of one plan."""
+
+    __slots__ = ("timeout_ms", "clock", "deadline", "exhausted", "reported")
+
+    def __init__(self, timeout_ms: float, clock: Optional[Callable[[], float]] = None):
+        self.timeout_ms = timeout_ms
+        self.clock = clock or time.monotonic
+        self.deadline = self.clock() + timeout_ms / 1000
+        self.exhausted = False
+        self.reported = False
+
+
+_PLAN_SCAN: ContextVar[Optional[PlanScan]] = ContextVar(
+    "plan_lint_plan_scan", default=None
+)
+
+
+@contextmanager
+def plan_budget(limits: Optional[ScanLimits]) -> Iterator[Optional[PlanScan]]:
+    """
+    Start the plan-wide scan budget for the steps scanned in this block.
+
+    The budget is held in a context variable, so validations running at once
+    in different threads each have their own.
+
+    Args:
+        limits: The policy's scan limits.
+
+    Yields:
+        The plan budget, or None if the limits set no plan timeout.
+    """
+    if limits is None or limits.plan_timeout_ms is None:
+        yield None
+        return
+    plan = PlanScan(limits.plan_timeout_ms)
+    token = _PLAN_SCAN.set(plan)
+    try:
+        yield plan
+    finally:
+        _PLAN_SCAN.reset(token)
+
+
+class StepScan:
+    """Searches a step's argument text for deny patterns within the limits."""
+
+    __slots__ = ("limits", "plan", "clock", "deadline", "timed_out")
+
+    def __init__(
+        self,
+        limits: ScanLimits,
+        plan: Optional[PlanScan] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        """
+        Start scanning a step.
+
+        Args:
+            limits: The policy's scan limits.
+            plan: The plan budget; defaults to the one set by ``plan_budget``.
+            clock: Clock the budgets are measured with; defaults to the plan
+                budget's, or ``time.monotonic``.
+        """
+        self.limits = limits
+        self.plan = plan if plan is not None else _PLAN_SCAN.get()
+        if clock is None:
+            clock = self.plan.clock if self.plan is not None else time.monotonic
+        self.clock = clock
+        deadline = None
+        if limits.step_timeout_ms is not None:
+            deadline = clock() + limits.step_timeout_ms / 1000
+        if self.plan is not None:
+            deadline = min(deadline or self.plan.deadline, self.plan.deadline)
+        self.deadline = deadline
+        self.timed_out = self.plan is not None and self.plan.exhausted
+
+    def _expired(self) -> bool:
+        if self.deadline is None or self.clock() <= self.deadline:
+            return False
+        self.timed_out = True
+        if self.plan is not None and self.clock() > self.plan.deadline:
+            self.plan.exhausted = True
+        return True
+
+    def first_match(
+        self, regex: Pattern, texts: List[Tuple[str, str]]
+    ) -> Optional[str]:
+        """
+        Return the argument of the first text the regex matches, if any.
+
+        Once the budget is used up, no further searches run and None is
+        returned; ``timed_out`` is then set.
+
+        Args:
+            regex: The compiled deny pattern.
+            texts: ``(arg, text)`` pairs as produced by ``iter_step_text``.
+
+        Returns:
+            The top-level argument name of the first match, or None.
+        """
+        if self.timed_out:
+            return None
+        max_chars = self.limits.max_value_chars
+        chunk = self.limits.chunk_chars
+        overlap = self.limits.chunk_overlap
+
+        for arg, text in texts:
+            end = len(text) if max_chars is None else min(len(text), max_chars)
+            if chunk is None or end <= chunk:
+                if self._expired():
+                    return None
+                if regex.search(text, 0, end):
+                    return arg
+                continue
+            for start in range(0, end - overlap, chunk - overlap):
+                if self._expired():
+                    return None
+                if regex.search(text, start, min(start + chunk, end)):
+                    return arg
+        return None
+
+    def error(self, step_idx: int) -> Optional[PlanError]:
+        """
+        Return the SCAN_TIMEOUT error for the step, if scanning ran out of time.
+
+        A plan budget running out is reported once, on the first step it
+        affects.
+
+        Args:
+            step_idx: Index of the step in the plan.
+
+        Returns:
+            The error, or None.
+        """
+        if not self.timed_out:
+            return None
+        if self.plan is not None and self.plan.exhausted:
+            if self.plan.reported:
+                return None
+            self.plan.reported = True
+            msg = (
+                f"Scanning for sensitive data stopped after the plan budget of "
+                f"{self.plan.timeout_ms:g} ms; this step and later steps were "
+                f"not fully scanned"
+            )
+        else:
+            msg = (
+                f"Scanning for sensitive data stopped after the step budget of "
+                f"{self.limits.step_timeout_ms:g} ms; the step was not fully "
+                f"scanned"
+            )
+        return PlanError(step=step_idx, code=ErrorCode.SCAN_TIMEOUT, msg=msg)
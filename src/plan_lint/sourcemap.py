@@ -0,0 +1,229 @@
+"""
+Source map module for plan-linter.
+
+This module finds where each step and argument of a plan appears in its JSON
+text, so findings can point to a line and column in the plan file.
+
+``scan_source_map`` walks the text once, recording the offsets of every step
+in ``steps`` and of every top-level key in each step's ``args``; nested values
+are skipped with a single bracket-matching scan. Offsets are turned into lines
+and columns only when a location is looked up, using a table of line starts.
+The text must be valid JSON, so scan it after it has been parsed.
+"""
+
+import bisect
+import json
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+_WS = re.compile(r"[ \t\n\r]*")
+# A member key with its colon, and a separator or closing bracket, each with
+# the whitespace around them, so every token takes a single match
+_KEY = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:[ \t\n\r]*', re.DOTALL)
+_SEP = re.compile(r"[ \t\n\r]*([,\]}])[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^,\]} \t\n\r]+")
+# Strings are matched whole so that brackets inside them are not counted
+_NESTED = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', re.DOTALL)
+_NEWLINE = re.compile(r"\n")
+
+
+class SourceSpan(NamedTuple):
+    """A region of the plan text; lines and columns start at 1."""
+
+    start_line: int
+    start_column: int
+    end_line: int
+    end_column: int
+
+
+class SourceMap:
+    """Locations of the steps and arguments of a plan in its JSON text."""
+
+    def __init__(
+        self,
+        line_starts: List[int],
+        steps: List[Tuple[int, int]],
+        args: Dict[Tuple[int, str], Tuple[int, int]],
+    ):
+        self._line_starts = line_starts
+        self._steps = steps
+        self._args = args
+
+    def _position(self, offset: int) -> Tuple[int, int]:
+        line = bisect.bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
+
+    def _span(self, start: int, end: int) -> SourceSpan:
+        return SourceSpan(*self._position(start), *self._position(end))
+
+    def step(self, index: int) -> Optional[SourceSpan]:
+        """
+        Return the location of a step.
+
+        Args:
+            index: Index of the step in the plan.
+
+        Returns:
+            The span of the step object, or None if the plan has no such step.
+        """
+        if not 0 <= index < len(self._steps):
+            return None
+        return self._span(*self._steps[index])
+
+    def arg(self, index: int, name: str) -> Optional[SourceSpan]:
+        """
+        Return the location of a step argument.
+
+        Args:
+            index: Index of the step in the plan.
+            name: Name of a top-level argument of the step.
+
+        Returns:
+            The span from the argument's key to the end of its value, or None
+            if the step has no such argument.
+        """
+        offsets = self._args.get((index, name))
+        return self._span(*offsets) if offsets is not None else None
+
+    def locate(
+        self, index: Optional[int], name: Optional[str] = None
+    ) -> Optional[SourceSpan]:
+        """
+        Return the most precise location known for a finding.
+
+        Args:
+            index: Index of the step, or None for findings about the whole plan.
+            name: Name of the argument, if the finding is about one.
+
+        Returns:
+            The argument's span if known, else the step's, else None.
+        """
+        if index is None:
+            return None
+        if name is not None:
+            span = self.arg(index, name)
+            if span is not None:
+                return span
+        return self.step(index)
+
+
+class _Scanner:
+    """Walks JSON text, calling back for the object members it cares about."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def ws(self, pos: int) -> int:
+        return _WS.match(self.text, pos).end()  # type: ignore[union-attr]
+
+    def skip(self, pos: int) -> int:
+        """Return the offset just after the value starting at pos."""
+        char = self.text[pos]
+        if char == '"':
+            return _STRING.match(self.text, pos).end()  # type: ignore[union-attr]
+        if char not in "{[":
+            return _SCALAR.match(self.text, pos).end()  # type: ignore[union-attr]
+
+        depth = 0
+        for match in _NESTED.finditer(self.text, pos):
+            token = match.group()
+            if token in "{[":
+                depth += 1
+            elif token in "}]":
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise ValueError("Unterminated JSON value")
+
+    def members(self, pos: int, on_member: Callable[[str, int, int], int]) -> int:
+        """
+        Walk the object starting at pos.
+
+        ``on_member(key, key_start, value_start)`` is called for each member
+        and returns the offset just after the member's value.
+        """
+        text = self.text
+        pos = self.ws(pos + 1)
+        if text[pos] == "}":
+            return pos + 1
+        while True:
+            key_match = _KEY.match(text, pos)
+            assert key_match is not None
+            key = key_match.group(1)
+            if "\\" in key:
+                key = json.loads(f'"{key}"')
+            sep = _SEP.match(text, on_member(key, pos, key_match.end()))
+            assert sep is not None
+            if sep.group(1) == "}":
+                return sep.start(1) + 1
+            pos = sep.end()
+
+    def items(self, pos: int, on_item: Callable[[int, int], int]) -> int:
+        """
+        Walk the array starting at pos.
+
+        ``on_item(index, start)`` is called for each item and returns the
+        offset just after it.
+        """
+        text = self.text
+        pos = self.ws(pos + 1)
+        if text[pos] == "]":
+            return pos + 1
+        index = 0
+        while True:
+            sep = _SEP.match(text, on_item(index, pos))
+            assert sep is not None
+            if sep.group(1) == "]":
+                return sep.start(1) + 1
+            pos = sep.end()
+            index += 1
+
+
+def scan_source_map(text: str) -> SourceMap:
+    """
+    Build the source map of a plan's JSON text in a single pass.
+
+    Args:
+        text: The plan as JSON text. It must be valid JSON.
+
+    Returns:
+        The source map.
+    """
+    scanner = _Scanner(text)
+    steps: List[Tuple[int, int]] = []
+    args: Dict[Tuple[int, str], Tuple[int, int]] = {}
+
+    def on_item(index: int, start: int) -> int:
+        def on_step_member(key: str, key_start: int, value_start: int) -> int:
+            if key != "args" or text[value_start] != "{":
+                return scanner.skip(value_start)
+
+            def on_arg(name: str, arg_start: int, arg_value: int) -> int:
+                end = scanner.skip(arg_value)
+                args[(index, name)] = (arg_start, end)
+                return end
+
+            return scanner.members(value_start, on_arg)
+
+        if text[start] == "{":
+            end = scanner.members(start, on_step_member)
+        else:
+            end = scanner.skip(start)
+        steps.append((start, end))
+        return end
+
+    def on_member(key: str, key_start: int, value_start: int) -> int:
+        if key == "steps" and text[value_start] == "[":
+            del steps[:]
+            args.clear()
+            return scanner.items(value_start, on_item)
+        return scanner.skip(value_start)
+
+    start = scanner.ws(0)
+    if start < len(text) and text[start] == "{":
+        scanner.members(start, on_member)
+
+    line_starts = [0]
+    line_starts.extend(match.end() for match in _NEWLINE.finditer(text))
+    return SourceMap(line_starts, steps, args)
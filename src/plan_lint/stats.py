@@ -0,0 +1,483 @@
+"""
+Corpus statistics for plan-linter.
+
+This module aggregates validation results across many plans: counts per
+status, error code and check or rule, the tools that trigger most findings,
+and histograms of risk scores and step counts. Every aggregate uses a fixed
+amount of memory however many plans are added, and can be merged with the same
+aggregate from another worker or shard, so a corpus can be split up, processed
+in parallel and combined.
+
+- ``LinearHistogram`` and ``LogHistogram`` are bucketed histograms in the
+  style of HDR histograms: linear buckets for bounded values such as risk
+  scores, and log-linear buckets with a fixed relative error for unbounded
+  values such as step counts.
+- ``TopK`` is a Space-Saving summary of the most frequent keys.
+- ``CorpusStats`` combines them, and serialises to and from JSON.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+from plan_lint.profiling import CheckEvent
+from plan_lint.types import Plan, ValidationResult
+
+STATS_VERSION = 1
+
+# LogHistogram bucket for zero, below every other bucket
+_ZERO_BUCKET = -(2**31)
+
+
+class _BucketHistogram:
+    """A histogram keeping a count per bucket; merged by adding counts."""
+
+    kind = ""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index(self, value: float) -> int:
+        raise NotImplementedError
+
+    def _value(self, index: int) -> float:
+        """Return the value reported for a bucket."""
+        raise NotImplementedError
+
+    def record(self, value: float, count: int = 1) -> None:
+        """
+        Record a value.
+
+        Args:
+            value: The value; must not be negative.
+            count: Number of times to record it.
+        """
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "_BucketHistogram") -> None:
+        """Add the counts of another histogram of the same kind."""
+        if type(other) is not type(self):
+            raise ValueError("Cannot merge histograms of different kinds")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Return an approximate quantile.
+
+        Args:
+            q: Quantile between 0 and 1.
+
+        Returns:
+            The value of the bucket holding the quantile, clamped to the
+            observed range, or 0.0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(q * self.count), 1)
+        if rank >= self.count:
+            return self.max
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": {str(index): n for index, n in sorted(self.buckets.items())},
+        }
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        if data.get("kind") != self.kind:
+            raise ValueError(f"Expected a {self.kind} histogram")
+        self.buckets = {int(index): n for index, n in data["buckets"].items()}
+        self.count = data["count"]
+        self.total = data["total"]
+        if self.count:
+            self.min = data["min"]
+            self.max = data["max"]
+
+
+class LinearHistogram(_BucketHistogram):
+    """Equal-width buckets over ``[0, upper]``; larger values share the last."""
+
+    kind = "linear"
+
+    def __init__(self, upper: float = 1.0, buckets: int = 100):
+        """
+        Initialize the histogram.
+
+        Args:
+            upper: Upper end of the range.
+            buckets: Number of buckets; values are reported to within
+                ``upper / buckets``.
+        """
+        super().__init__()
+        self.upper = upper
+        self.size = buckets
+        self._width = upper / buckets
+
+    def _index(self, value: float) -> int:
+        return min(int(round(value / self._width)), self.size)
+
+    def _value(self, index: int) -> float:
+        return index * self._width
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data.update(upper=self.upper, size=self.size)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LinearHistogram":
+        histogram = cls(data["upper"], data["size"])
+        histogram._load(data)
+        return histogram
+
+    def merge(self, other: "_BucketHistogram") -> None:
+        if isinstance(other, LinearHistogram) and (other.upper, other.size) != (
+            self.upper,
+            self.size,
+        ):
+            raise ValueError("Cannot merge linear histograms with different buckets")
+        super().merge(other)
+
+
+class LogHistogram(_BucketHistogram):
+    """
+    Log-linear buckets: each power of two is split into ``precision`` buckets.
+
+    Values are reported to within a relative error of ``1 / precision``, and
+    integers up to ``precision`` are exact.
+    """
+
+    kind = "log"
+
+    def __init__(self, precision: int = 16):
+        """
+        Initialize the histogram.
+
+        Args:
+            precision: Buckets per power of two.
+        """
+        super().__init__()
+        self.precision = precision
+
+    def _index(self, value: float) -> int:
+        if value <= 0:
+            return _ZERO_BUCKET
+        mantissa, exponent = math.frexp(value)
+        return exponent * self.precision + int((mantissa * 2 - 1) * self.precision)
+
+    def _value(self, index: int) -> float:
+        if index == _ZERO_BUCKET:
+            return 0.0
+        exponent, sub = divmod(index, self.precision)
+        return math.ldexp(1 + sub / self.precision, exponent - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data["precision"] = self.precision
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LogHistogram":
+        histogram = cls(data["precision"])
+        histogram._load(data)
+        return histogram
+
+    def merge(self, other: "_BucketHistogram") -> None:
+        if isinstance(other, LogHistogram) and other.precision != self.precision:
+            raise ValueError("Cannot merge log histograms with different precision")
+        super().merge(other)
+
+
+class TopK:
+    """
+    Space-Saving summary of the most frequent keys.
+
+    At most ``capacity`` keys are tracked. When a new key arrives and the
+    summary is full, it replaces the key with the smallest count and inherits
+    that count, recorded as its possible overestimate. Counts are therefore
+    upper bounds, exact for keys that never had to be evicted, and any key
+    with a true count above ``total / capacity`` is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize the summary.
+
+        Args:
+            capacity: Maximum number of keys tracked.
+        """
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Count occurrences of a key."""
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            evicted = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(evicted)
+            del self.errors[evicted]
+            self.counts[key] = floor + count
+            self.errors[key] = floor
+
+    def merge(self, other: "TopK") -> None:
+        """
+        Add the counts of another summary, keeping the largest keys.
+
+        A full summary may have evicted a key it lacks, after counting it up
+        to its smallest count, so that count is added to the key's count and
+        to its possible overestimate. Merged counts stay upper bounds.
+        """
+        own_floor, other_floor = self._floor(), other._floor()
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        for key in list(self.counts) + [
+            k for k in other.counts if k not in self.counts
+        ]:
+            own = key in self.counts
+            theirs = key in other.counts
+            counts[key] = (self.counts[key] if own else own_floor) + (
+                other.counts[key] if theirs else other_floor
+            )
+            errors[key] = (self.errors[key] if own else own_floor) + (
+                other.errors[key] if theirs else other_floor
+            )
+        self.total += other.total
+        if len(counts) > self.capacity:
+            kept = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+            counts = dict(kept[: self.capacity])
+        self.counts = counts
+        self.errors = {key: errors[key] for key in counts}
+
+    def _floor(self) -> int:
+        """Most times a key missing from the summary can have occurred."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values(), default=0)
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Return the most frequent keys.
+
+        Args:
+            k: Number of keys to return; all tracked keys if None.
+
+        Returns:
+            ``(key, count)`` pairs, most frequent first.
+        """
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if k is None else ranked[:k]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counts": dict(self.top()),
+            "errors": {key: n for key, n in self.errors.items() if n},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopK":
+        summary = cls(data["capacity"])
+        summary.total = data["total"]
+        summary.counts = dict(data["counts"])
+        summary.errors = {key: data["errors"].get(key, 0) for key in summary.counts}
+        return summary
+
+
+class CorpusStats:
+    """
+    Aggregate statistics over a corpus of validated plans.
+
+    Add each result with ``add``. Pass ``collect`` as the ``collector`` of
+    ``validate_plan`` and ``run_rule`` to also count findings per check and
+    rule plugin.
+    """
+
+    def __init__(self, tool_capacity: int = 1000):
+        """
+        Initialize empty statistics.
+
+        Args:
+            tool_capacity: Number of tools tracked by the top-k summaries.
+        """
+        self.plans = 0
+        self.by_status: Counter = Counter()
+        self.by_code: Counter = Counter()
+        self.by_check: Counter = Counter()
+        self.tools = TopK(tool_capacity)
+        self.offending_tools = TopK(tool_capacity)
+        self.risk_scores = LinearHistogram(1.0, 100)
+        self.steps = LogHistogram()
+
+    def collect(self, event: CheckEvent) -> None:
+        """Collector counting findings per check and rule plugin."""
+        if event.findings:
+            self.by_check[event.check] += event.findings
+
+    def add(self, result: ValidationResult, plan: Optional[Plan] = None) -> None:
+        """
+        Add the result of validating one plan.
+
+        Args:
+            result: The validation result.
+            plan: The plan, if it could be loaded, for step and tool counts.
+        """
+        self.plans += 1
+        self.by_status[result.status.value] += 1
+        self.risk_scores.record(result.risk_score)
+        for error in result.errors:
+            self.by_code[error.code.value] += 1
+
+        if plan is None:
+            return
+        self.steps.record(len(plan.steps))
+        for step in plan.steps:
+            self.tools.add(step.tool)
+        for error in result.errors:
+            if error.step is not None and 0 <= error.step < len(plan.steps):
+                self.offending_tools.add(plan.steps[error.step].tool)
+
+    def merge(self, other: "CorpusStats") -> "CorpusStats":
+        """
+        Add the statistics of another worker or shard.
+
+        Args:
+            other: The statistics to merge in.
+
+        Returns:
+            This object.
+        """
+        self.plans += other.plans
+        self.by_status.update(other.by_status)
+        self.by_code.update(other.by_code)
+        self.by_check.update(other.by_check)
+        self.tools.merge(other.tools)
+        self.offending_tools.merge(other.offending_tools)
+        self.risk_scores.merge(other.risk_scores)
+        self.steps.merge(other.steps)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the statistics as a JSON-serialisable dictionary."""
+        return {
+            "version": STATS_VERSION,
+            "plans": self.plans,
+            "by_status": dict(self.by_status.most_common()),
+            "by_code": dict(self.by_code.most_common()),
+            "by_check": dict(self.by_check.most_common()),
+            "tools": self.tools.to_dict(),
+            "offending_tools": self.offending_tools.to_dict(),
+            "risk_scores": self.risk_scores.to_dict(),
+            "steps": self.steps.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CorpusStats":
+        """
+        Load statistics written by ``to_dict``.
+
+        Args:
+            data: The dictionary.
+
+        Returns:
+            The statistics.
+
+        Raises:
+            ValueError: If the data has an unsupported version.
+        """
+        if data.get("version") != STATS_VERSION:
+            raise ValueError(f"Unsupported stats version: {data.get('version')}")
+        stats = cls()
+        stats.plans = data["plans"]
+        stats.by_status = Counter(data["by_status"])
+        stats.by_code = Counter(data["by_code"])
+        stats.by_check = Counter(data["by_check"])
+        stats.tools = TopK.from_dict(data["tools"])
+        stats.offending_tools = TopK.from_dict(data["offending_tools"])
+        stats.risk_scores = LinearHistogram.from_dict(data["risk_scores"])
+        stats.steps = LogHistogram.from_dict(data["steps"])
+        return stats
+
+    def report(self, console: Optional[Console] = None, top: int = 10) -> None:
+        """
+        Print the statistics as a table.
+
+        Args:
+            console: Console to print to. Defaults to stdout.
+            top: Number of tools listed.
+        """
+        console = console or Console()
+        table = Table(title="Corpus Statistics")
+        table.add_column("Group", style="cyan")
+        table.add_column("Name")
+        table.add_column("Value", justify="right")
+
+        table.add_row("Plans", "total", str(self.plans))
+        for status, count in self.by_status.most_common():
+            table.add_row("Plans", status, str(count))
+        table.rows[-1].end_section = True
+
+        sections = [
+            ("Error code", self.by_code.most_common()),
+            ("Check", self.by_check.most_common()),
+            ("Offending tool", self.offending_tools.top(top)),
+            ("Tool", self.tools.top(top)),
+        ]
+        for group, rows in sections:
+            for name, count in rows:
+                table.add_row(group, name, str(count))
+            if rows:
+                table.rows[-1].end_section = True
+
+        for group, histogram, fmt in (
+            ("Risk score", self.risk_scores, "{:.2f}"),
+            ("Steps", self.steps, "{:,.0f}"),
+        ):
+            if not histogram.count:
+                continue
+            table.add_row(group, "mean", fmt.format(histogram.mean))
+            for q in (0.5, 0.9, 0.99):
+                table.add_row(group, f"p{q * 100:g}", fmt.format(histogram.quantile(q)))
+            table.add_row(group, "max", fmt.format(histogram.max), end_section=True)
+
+        console.print(table)
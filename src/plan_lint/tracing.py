@@ -0,0 +1,252 @@
+"""
+Tracing module for plan-linter.
+
+This module wraps the phases of linting a plan (loading, schema validation,
+policy checks, rules and OPA evaluation) in spans. By default the tracer is a
+no-op; install another with ``set_tracer()``:
+
+- ``InMemoryTracer`` keeps finished spans in a list, for tests.
+- ``OpenTelemetryTracer`` forwards spans to an OpenTelemetry tracer.
+
+Custom tracers subclass ``Tracer`` and return a ``Span`` from ``start_span``.
+Attributes are only computed when ``span.is_recording`` is true, so the no-op
+default costs one function call per phase.
+"""
+
+import contextvars
+import itertools
+import time
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Type
+
+Attributes = Dict[str, Any]
+
+
+class Span:
+    """
+    A span around one phase of work.
+
+    The base class records nothing and is what the default tracer returns.
+    """
+
+    is_recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute on the span."""
+
+    def set_attributes(self, attributes: Attributes) -> None:
+        """Set several attributes on the span."""
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        return None
+
+
+_NOOP_SPAN = Span()
+
+
+class Tracer:
+    """
+    Creates spans. The base class is a no-op tracer.
+    """
+
+    def start_span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        """
+        Create a span, to be used as a context manager.
+
+        Args:
+            name: The span name.
+            attributes: Initial attributes.
+
+        Returns:
+            The span.
+        """
+        return _NOOP_SPAN
+
+
+class RecordedSpan:
+    """A finished span kept by InMemoryTracer."""
+
+    def __init__(
+        self,
+        name: str,
+        span_id: int,
+        parent_id: Optional[int],
+        attributes: Attributes,
+    ):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def __repr__(self) -> str:
+        return f"RecordedSpan({self.name!r}, attributes={self.attributes!r})"
+
+
+class _InMemorySpan(Span):
+    is_recording = True
+
+    def __init__(self, tracer: "InMemoryTracer", record: RecordedSpan):
+        self._tracer = tracer
+        self._record = record
+        self._token: Optional[contextvars.Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._record.attributes[key] = value
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._record.span_id)
+        self._record.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._record.end_ns = time.perf_counter_ns()
+        if exc is not None:
+            self._record.error = f"{type(exc).__name__}: {exc}"
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self._tracer.spans.append(self._record)
+
+
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "plan_lint_current_span", default=None
+)
+
+
+class InMemoryTracer(Tracer):
+    """Tracer that keeps finished spans in ``spans``, in the order they end."""
+
+    def __init__(self) -> None:
+        self.spans: List[RecordedSpan] = []
+        self._ids = itertools.count(1)
+
+    def start_span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        record = RecordedSpan(
+            name, next(self._ids), _current_span.get(), dict(attributes or {})
+        )
+        return _InMemorySpan(self, record)
+
+    def find(self, name: str) -> List[RecordedSpan]:
+        """
+        Return finished spans with the given name.
+
+        Args:
+            name: The span name.
+
+        Returns:
+            The matching spans, in the order they ended.
+        """
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self) -> None:
+        """Discard all finished spans."""
+        self.spans.clear()
+
+
+class _OpenTelemetrySpan(Span):
+    is_recording = True
+
+    def __init__(self, context_manager: Any):
+        self._context_manager = context_manager
+        self._span: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._span.set_attribute(key, value)
+
+    def __enter__(self) -> Span:
+        self._span = self._context_manager.__enter__()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self._context_manager.__exit__(exc_type, exc, tb)
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer that forwards spans to OpenTelemetry."""
+
+    def __init__(self, tracer: Any = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            tracer: An OpenTelemetry tracer. Defaults to the global tracer
+                provider's ``plan_lint`` tracer.
+
+        Raises:
+            ImportError: If no tracer is given and opentelemetry-api is not
+                installed.
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace  # type: ignore[import-not-found]
+            except ImportError as e:
+                raise ImportError(
+                    "OpenTelemetry tracing requires the opentelemetry-api package. "
+                    "Install it with `pip install plan-lint[tracing]`."
+                ) from e
+            tracer = trace.get_tracer("plan_lint")
+        self._tracer = tracer
+
+    def start_span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        return _OpenTelemetrySpan(
+            self._tracer.start_as_current_span(name, attributes=attributes)
+        )
+
+
+_tracer: Tracer = Tracer()
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """
+    Install the tracer used by plan-lint.
+
+    Args:
+        tracer: The tracer, or None to restore the no-op tracer.
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the tracer used by plan-lint."""
+    return _tracer
+
+
+def span(name: str, attributes: Optional[Attributes] = None) -> Span:
+    """
+    Start a span with the installed tracer.
+
+    Args:
+        name: The span name.
+        attributes: Initial attributes.
+
+    Returns:
+        The span, to be used as a context manager.
+    """
+    return _tracer.start_span(name, attributes)
@@ -5,7 +5,7 @@ Type definitions for plan-linter.
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class Status(str, Enum):
@@ -16,6 +16,14 @@ class Status(str, Enum):
     ERROR = "error"
 
 
+class ValidationMode(str, Enum):
+    """How much of a plan to validate before returning a result."""
+
+    ALL = "all"
+    FIRST_ERROR = "first_error"
+    UNTIL_THRESHOLD = "until_threshold"
+
+
 class ErrorCode(str, Enum):
     """Error codes for plan validation failures."""
 
@@ -26,6 +34,7 @@ class ErrorCode(str, Enum):
     LOOP_DETECTED = "LOOP_DETECTED"
     MAX_STEPS_EXCEEDED = "MAX_STEPS_EXCEEDED"
     MISSING_HANDLER = "MISSING_HANDLER"
+    SCAN_TIMEOUT = "SCAN_TIMEOUT"
 
 
 class PlanError(BaseModel):
@@ -34,6 +43,8 @@ class PlanError(BaseModel):
     step: Optional[int] = None
     code: ErrorCode
     msg: str
+    # Top-level argument of the step the error is about, if known
+    arg: Optional[str] = None
 
 
 class PlanWarning(BaseModel):
@@ -76,15 +87,38 @@ class PolicyRule(BaseModel):
     description: str
 
 
+class ScanLimits(BaseModel):
+    """Limits on scanning step arguments for deny patterns."""
+
+    # Only the first max_value_chars characters of each value are scanned
+    max_value_chars: Optional[int] = Field(default=None, gt=0)
+    # Longer values are scanned in windows of chunk_chars characters that
+    # overlap by chunk_overlap, so no single search runs over a whole value
+    chunk_chars: Optional[int] = Field(default=None, gt=0)
+    chunk_overlap: int = Field(default=256, ge=0)
+    # Scanning stops once a step or the whole plan has taken this long
+    step_timeout_ms: Optional[float] = Field(default=None, gt=0)
+    plan_timeout_ms: Optional[float] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def _check_overlap(self) -> "ScanLimits":
+        if self.chunk_chars is not None and self.chunk_overlap >= self.chunk_chars:
+            raise ValueError("chunk_overlap must be smaller than chunk_chars")
+        return self
+
+
 class Policy(BaseModel):
     """A complete policy for plan validation."""
 
     allow_tools: List[str] = Field(default_factory=list)
-    bounds: Dict[str, List[Union[int, float]]] = Field(default_factory=lambda: {})
+    bounds: Dict[str, Union[List[Union[int, float, str]], str, Dict[str, Any]]] = Field(
+        default_factory=lambda: {}
+    )
     deny_tokens_regex: List[str] = Field(default_factory=list)
     max_steps: int = 100
     risk_weights: Dict[str, float] = Field(default_factory=lambda: {})
     fail_risk_threshold: float = 0.8
+    secret_scan: ScanLimits = Field(default_factory=ScanLimits)
 
 
 class ValidationResult(BaseModel):
@@ -94,3 +128,11 @@ class ValidationResult(BaseModel):
     risk_score: float
     errors: List[PlanError] = Field(default_factory=list)
     warnings: List[PlanWarning] = Field(default_factory=list)
+
+
+class MultiValidationResult(BaseModel):
+    """Result of validating one plan against several policies."""
+
+    status: Status
+    risk_score: float
+    results: List[ValidationResult] = Field(default_factory=list)
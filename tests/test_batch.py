@@ -0,0 +1,147 @@
+"""
+Tests for the batch validation module.
+"""
+
+import random
+
+import pytest
+
+from plan_lint import batch, core
+from plan_lint.types import ErrorCode, Plan, PlanStep
+
+BOUNDS = {
+    "payments.transfer.amount": [0.01, 5000.0],
+    "db.query_ro.limit": [1, 1000],
+    "notify.customer.priority": [1, 3],
+    "malformed": [0, 1],
+    "short.bound": [1],
+}
+
+
+def make_plans(count=50, seed=7):
+    """Build a batch of random plans touching the bounded tools."""
+    rng = random.Random(seed)
+    tools = [
+        ("payments.transfer", "amount"),
+        ("db.query_ro", "limit"),
+        ("notify.customer", "priority"),
+        ("analytics.summarize", "limit"),
+    ]
+    plans = []
+    for _ in range(count):
+        steps = []
+        for i in range(rng.randint(0, 8)):
+            tool, arg = rng.choice(tools)
+            value = rng.choice(
+                [rng.uniform(-10, 6000), rng.randint(-5, 2000), "100", None, True]
+            )
+            steps.append(PlanStep(id=f"step-{i}", tool=tool, args={arg: value}))
+        plans.append(Plan(goal="batch", steps=steps))
+    return plans
+
+
+def scalar_results(plans, bounds):
+    """Run the per-step bounds check over every plan."""
+    return [
+        [
+            error
+            for i, step in enumerate(plan.steps)
+            for error in core.check_bounds(step, bounds, i)
+        ]
+        for plan in plans
+    ]
+
+
+def test_check_bounds_dotted_tool_names():
+    """Bounds on tools whose names contain dots are applied."""
+    step = PlanStep(id="s1", tool="payments.transfer", args={"amount": 9000})
+    errors = core.check_bounds(step, BOUNDS, 0)
+    assert len(errors) == 1
+    assert errors[0].code == ErrorCode.BOUND_VIOLATION
+
+
+def test_batch_matches_scalar_pure_python():
+    """The pure Python batch path matches the scalar check exactly."""
+    plans = make_plans()
+    expected = scalar_results(plans, BOUNDS)
+    assert any(expected)
+    assert batch.check_bounds_batch(plans, BOUNDS, use_numpy=False) == expected
+
+
+def test_batch_matches_scalar_numpy():
+    """The NumPy batch path matches the scalar check exactly."""
+    pytest.importorskip("numpy")
+    plans = make_plans(count=200, seed=11)
+    expected = scalar_results(plans, BOUNDS)
+    assert batch.check_bounds_batch(plans, BOUNDS, use_numpy=True) == expected
+
+
+def test_batch_large_ints_use_exact_comparison():
+    """Integers that do not fit in a float64 are still compared exactly."""
+    pytest.importorskip("numpy")
+    limit = 2**60
+    bounds = {"counter.add.value": [0, limit]}
+    plans = [
+        Plan(
+            goal="ints",
+            steps=[PlanStep(id="s1", tool="counter.add", args={"value": limit + 1})],
+        )
+    ]
+    expected = scalar_results(plans, bounds)
+    assert len(expected[0]) == 1
+    assert batch.check_bounds_batch(plans, bounds, use_numpy=True) == expected
+
+
+def test_batch_empty_inputs():
+    """Empty batches and empty bounds produce empty results."""
+    assert batch.check_bounds_batch([], BOUNDS) == []
+    plans = make_plans(count=3)
+    assert batch.check_bounds_batch(plans, {}) == [[], [], []]
+
+
+def test_batch_matches_scalar_with_expressions():
+    """Bound expressions are evaluated alongside vectorised ranges."""
+    bounds = dict(BOUNDS)
+    bounds["payments.transfer.amount"] = "[0.01, context.daily_limit]"
+    bounds["db.query_ro.limit"] = {"min": 1, "max": 1000, "exclusive_max": True}
+    plans = make_plans(count=100, seed=3)
+    for plan in plans:
+        plan.context = {"daily_limit": 2500}
+
+    expected = [
+        [
+            error
+            for i, step in enumerate(plan.steps)
+            for error in core.check_bounds(step, bounds, i, plan.context)
+        ]
+        for plan in plans
+    ]
+    assert any(expected)
+    assert batch.check_bounds_batch(plans, bounds, use_numpy=False) == expected
+    if batch.HAS_NUMPY:
+        assert batch.check_bounds_batch(plans, bounds, use_numpy=True) == expected
+
+
+def test_batch_messages_keep_bound_text():
+    """Non-canonical numeric bounds are reported as written in both modes."""
+    bounds = {
+        "payments.transfer.amount": ["0.50", "1000.0"],
+        "db.query_ro.limit": [1.0, "10"],
+    }
+    plans = [
+        Plan(
+            goal="text",
+            steps=[
+                PlanStep(id="s1", tool="payments.transfer", args={"amount": 0.1}),
+                PlanStep(id="s2", tool="db.query_ro", args={"limit": 50}),
+            ],
+        )
+    ]
+    expected = scalar_results(plans, bounds)
+    assert [e.msg for e in expected[0]] == [
+        "Argument 'amount' value 0.1 is outside bounds [0.50, 1000.0]",
+        "Argument 'limit' value 50 is outside bounds [1.0, 10]",
+    ]
+    assert batch.check_bounds_batch(plans, bounds, use_numpy=False) == expected
+    if batch.HAS_NUMPY:
+        assert batch.check_bounds_batch(plans, bounds, use_numpy=True) == expected
@@ -0,0 +1,109 @@
+"""
+Tests for the benchmark suite helpers.
+"""
+
+import pytest
+
+from benchmarks.generators import make_plan, make_policy
+from benchmarks.rego import legacy_rego, parse_profile
+from benchmarks.runner import RESULTS_VERSION, compare, measure, run_cases
+from benchmarks.suite import Case, build_cases
+from plan_lint import core
+
+
+def test_generators_are_deterministic():
+    """The same parameters always produce the same plan."""
+    plan = make_plan(50, payload_bytes=32, ref_density=1.0, seed=3)
+    assert plan == make_plan(50, payload_bytes=32, ref_density=1.0, seed=3)
+    assert len(plan.steps) == 50
+    assert len(plan.steps[0].args["note"]) == 32
+    assert all("input" in step.args for step in plan.steps[1:])
+
+
+def test_generated_plans_pass_generated_policies():
+    """Synthetic workloads exercise the checks without failing them."""
+    policy = make_policy(patterns=30, bounds=40)
+    assert len(policy.deny_tokens_regex) == 30
+    assert len(policy.bounds) == 40
+
+    result = core.validate_plan(make_plan(20, ref_density=0.0), policy)
+    assert result.errors == []
+
+
+def test_quick_cases_skip_large_plans():
+    """The quick suite leaves out the 10,000-step plans."""
+    names = {case.name for case in build_cases(quick=True)}
+    assert "builtin/default" in names
+    assert "builtin/patterns=100" in names
+    assert not any("steps=10000" in name for name in names)
+
+
+def test_run_cases_filters_and_records():
+    """Only matching cases run, and timings are recorded per call."""
+    calls = []
+    cases = [
+        Case("a/one", "a", {}, lambda: lambda: calls.append(1)),
+        Case("b/two", "b", {}, lambda: lambda: calls.append(2)),
+    ]
+    results = run_cases(cases, patterns=["a/*"], repeat=2, min_time=0.001)
+
+    assert set(results["results"]) == {"a/one"}
+    assert set(calls) == {1}
+    assert results["results"]["a/one"]["repeat"] == 2
+
+
+def test_measure_limits_repetitions_of_slow_calls():
+    """Calls slower than the budget are only repeated once."""
+    timings = measure(lambda: sum(range(10_000)), min_time=0.0, max_time=0.0)
+    assert timings["repeat"] == 1
+    assert timings["number"] == 1
+
+
+def test_compare_reports_regressions():
+    """Cases slower than the tolerance allows are reported, worst first."""
+
+    def document(**medians):
+        return {
+            "version": RESULTS_VERSION,
+            "results": {name: {"median": m} for name, m in medians.items()},
+        }
+
+    baseline = document(fast=1.0, slow=1.0, steady=1.0, gone=1.0)
+    current = document(fast=0.5, slow=1.5, steady=1.1, new=9.0)
+
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert [(r.name, r.ratio) for r in regressions] == [("slow", 1.5)]
+
+    with pytest.raises(ValueError):
+        compare(current, {"version": 0, "results": {}})
+
+
+def test_rego_profile_parsing():
+    """Profiler output is reduced to evaluation time and hot expressions."""
+    output = {
+        "result": [{"expressions": [{"value": [{"code": "TOOL_DENY"}]}]}],
+        "metrics": {"timer_rego_query_eval_ns": 2_500_000},
+        "profile": [
+            {"total_time_ns": 10, "num_eval": 1, "location": {"file": "/a.rego"}},
+            {
+                "total_time_ns": 900,
+                "num_eval": 100,
+                "location": {"file": "/tmp/b.rego", "row": 7},
+            },
+        ],
+    }
+    profile = parse_profile(output, top=1)
+
+    assert profile.eval_ns == 2_500_000
+    assert profile.violations == 1
+    assert profile.top == [("b.rego:7", 900, 100)]
+
+
+def test_legacy_rego_shapes():
+    """The legacy baseline keeps the shapes the generator no longer emits."""
+    policy = make_policy(patterns=3, bounds=2)
+    legacy = legacy_rego(policy)
+
+    assert "allowed_tools[_]" in legacy
+    assert "regex.match(pattern, json.marshal(step.args))" in legacy
+    assert legacy.count("BOUND_VIOLATION") == 4
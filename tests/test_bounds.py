@@ -0,0 +1,113 @@
+"""
+Tests for the bound expressions module.
+"""
+
+import pytest
+
+from plan_lint import core
+from plan_lint.bounds import compile_bounds, parse_expression, parse_selector
+from plan_lint.types import ErrorCode, Plan, PlanStep, Policy
+
+
+def evaluate(bounds, tool, args, context=None):
+    """Evaluate bounds for a single step and return the messages."""
+    index = compile_bounds(bounds)
+    return [
+        msg for bound in index.for_tool(tool) for msg in bound.evaluate(args, context)
+    ]
+
+
+def test_parse_selector():
+    """Selectors support keys, indices and wildcards."""
+    assert parse_selector("amount") == ["amount"]
+    assert parse_selector("payee.country") == ["payee", "country"]
+    assert parse_selector("items[*].qty") == ["items", None, "qty"]
+    assert parse_selector("items[0]") == ["items", 0]
+
+    for bad in ["", "a..b", "[0]", "a.", "a[x]"]:
+        with pytest.raises(ValueError):
+            parse_selector(bad)
+
+
+def test_parse_expression():
+    """Expressions support arithmetic over args and context."""
+    args = {"balance": 200, "items": [{"price": 5}]}
+    context = {"daily_limit": 500}
+
+    assert parse_expression("10")(args, context) == 10
+    assert parse_expression("context.daily_limit - 100")(args, context) == 400
+    assert parse_expression("args.balance * 0.5")(args, context) == 100
+    assert parse_expression("(args.balance + 10) / 2")(args, context) == 105
+    assert parse_expression("-args.items[0].price")(args, context) == -5
+    assert parse_expression("context.missing")(args, context) is None
+
+    for bad in ["", "foo", "1 +", "(1", "args", "context.1"]:
+        with pytest.raises(ValueError):
+            parse_expression(bad)
+
+
+def test_legacy_range_message():
+    """The original [min, max] format keeps its message."""
+    messages = evaluate(
+        {"payments.transfer.amount": [0.01, 5000.0]},
+        "payments.transfer",
+        {"amount": 9000},
+    )
+    assert messages == ["Argument 'amount' value 9000 is outside bounds [0.01, 5000.0]"]
+
+
+def test_interval_and_comparison_strings():
+    """Interval strings honour exclusive ends and comparisons reference context."""
+    bounds = {"t.x.a": "(0, 10]", "t.x.b": "<= context.daily_limit"}
+    context = {"daily_limit": 500}
+
+    assert evaluate(bounds, "t.x", {"a": 10, "b": 500}, context) == []
+    messages = evaluate(bounds, "t.x", {"a": 0, "b": 501}, context)
+    assert messages == [
+        "Argument 'a' value 0 is outside bounds (0, 10]",
+        "Argument 'b' value 501 is outside bounds (-inf, context.daily_limit (500)]",
+    ]
+
+    # Unresolvable references do not produce violations
+    assert evaluate(bounds, "t.x", {"b": 10**9}, {}) == []
+
+
+def test_mapping_constraints():
+    """Mappings support enums, lengths and cross-argument limits."""
+    bounds = {
+        "pay.send.currency": {"enum": ["USD", "EUR"]},
+        "pay.send.memo": {"max_len": 5},
+        "pay.send.amount": {"min": 0, "exclusive_min": True, "max": "args.balance"},
+    }
+    args = {"currency": "GBP", "memo": "too long", "amount": 300, "balance": 200}
+
+    messages = evaluate(bounds, "pay.send", args)
+    assert len(messages) == 3
+    assert "is not one of ['USD', 'EUR']" in messages[0]
+    assert "length 8" in messages[1]
+    assert "args.balance (200)" in messages[2]
+
+    with pytest.raises(ValueError):
+        compile_bounds({"pay.send.amount": {"maximum": 1}})
+
+
+def test_nested_and_wildcard_selectors():
+    """Nested selectors report the path of each offending value."""
+    bounds = {"orders.create.items[*].qty": [1, 10]}
+    args = {"items": [{"qty": 1}, {"qty": 50}, {"sku": "x"}]}
+
+    messages = evaluate(bounds, "orders.create", args)
+    assert messages == ["Argument 'items[1].qty' value 50 is outside bounds [1, 10]"]
+
+
+def test_validate_plan_uses_context():
+    """Builtin validation evaluates bounds against the plan context."""
+    plan = Plan(
+        goal="pay",
+        context={"daily_limit": 100},
+        steps=[PlanStep(id="s1", tool="payments.transfer", args={"amount": 150})],
+    )
+    policy = Policy(bounds={"payments.transfer.amount": "[0.01, context.daily_limit]"})
+
+    result = core.validate_plan(plan, policy)
+    assert [e.code for e in result.errors] == [ErrorCode.BOUND_VIOLATION]
@@ -8,6 +8,7 @@ import pytest
 from typer.testing import CliRunner
 
 from plan_lint.cli import app
+from plan_lint.types import Status, ValidationResult
 
 
 @pytest.fixture
@@ -56,3 +57,113 @@ def test_cli_json_output(runner, sample_plan_file, sample_policy_file, tmp_path)
     assert output_data["status"] == "error"
     assert "risk_score" in output_data
     assert "errors" in output_data
+
+
+def test_cli_first_error_mode(runner, sample_plan_file, sample_policy_file, tmp_path):
+    """Test CLI stopping at the first error."""
+    output_file = tmp_path / "output.json"
+
+    result = runner.invoke(
+        app,
+        [
+            str(sample_plan_file),
+            "--policy",
+            str(sample_policy_file),
+            "--mode",
+            "first_error",
+            "--format",
+            "json",
+            "--output",
+            str(output_file),
+        ],
+    )
+
+    assert result.exit_code == 1
+
+    with open(output_file, "r") as f:
+        output_data = json.load(f)
+
+    assert len(output_data["errors"]) == 1
+    assert output_data["errors"][0]["code"] == "TOOL_DENY"
+
+
+def test_cli_batch(runner, sample_plan_file, tmp_path):
+    """Several plans are linted as a batch with one line each."""
+    clean_plan = tmp_path / "clean.json"
+    clean_plan.write_text(
+        json.dumps(
+            {"goal": "ok", "steps": [{"id": "s1", "tool": "api.call", "args": {}}]}
+        )
+    )
+    broken_plan = tmp_path / "broken.json"
+    broken_plan.write_text("{")
+
+    result = runner.invoke(
+        app, [str(clean_plan), str(sample_plan_file), str(broken_plan)]
+    )
+
+    assert result.exit_code == 1
+    assert "Batch Summary" in result.output
+    lines = result.output.splitlines()
+    assert lines[0].split() == ["PASS", "0.00", str(clean_plan)]
+    assert lines[2].startswith("ERROR") and "SCHEMA_INVALID" in lines[2]
+
+
+def test_cli_batch_json(runner, sample_plan_file, tmp_path):
+    """Batch JSON output is a list of results tagged with their plan."""
+    output_file = tmp_path / "output.json"
+    result = runner.invoke(
+        app,
+        [
+            str(sample_plan_file),
+            str(sample_plan_file),
+            "--format",
+            "json",
+            "--output",
+            str(output_file),
+        ],
+    )
+
+    assert result.exit_code == 1
+    with open(output_file) as f:
+        output_data = json.load(f)
+    assert [item["plan"] for item in output_data] == [str(sample_plan_file)] * 2
+    assert all(item["status"] == "error" for item in output_data)
+
+
+def test_cli_policy_detection(runner, sample_plan_file, tmp_path):
+    """A YAML policy with braces and no extension is not taken for Rego."""
+    policy_file = tmp_path / "policy"
+    policy_file.write_text(
+        "# Policy for the package service\n"
+        'bounds: {"payments.transfer.amount": [0, 100]}\n'
+        "allow_tools: [sql.query, payments.transfer]\n"
+    )
+    result = runner.invoke(
+        app, [str(sample_plan_file), "--policy", str(policy_file), "-f", "json"]
+    )
+    assert json.loads(result.output)["status"] in ("pass", "error")
+    assert "OPA" not in result.output
+
+    result = runner.invoke(
+        app, [str(sample_plan_file), "--policy", str(policy_file), "-t", "rego"]
+    )
+    assert result.exit_code == 1
+    assert "OPA" in result.output
+
+
+def test_cli_opa_receives_plan_bytes(runner, sample_plan_file, monkeypatch):
+    """With --opa the plan file's bytes are sent to OPA as they are."""
+    from plan_lint import core
+
+    received = []
+
+    def fake_validate(plan, policy, rego_policy=None, opa_input=None):
+        received.append(opa_input)
+        return ValidationResult(status=Status.PASS, risk_score=0.0)
+
+    monkeypatch.setattr(core, "validate_plan_opa", fake_validate)
+    result = runner.invoke(app, [str(sample_plan_file), "--opa", "-f", "json"])
+
+    assert "status" in json.loads(result.output)
+    assert received == [sample_plan_file.read_bytes()]
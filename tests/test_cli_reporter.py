@@ -0,0 +1,78 @@
+"""
+Tests for the CLI reporter.
+"""
+
+import io
+
+from plan_lint.reporters.cli import BatchReporter
+from plan_lint.types import (
+    ErrorCode,
+    Plan,
+    PlanError,
+    PlanStep,
+    Status,
+    ValidationResult,
+)
+
+PLAN = Plan(
+    goal="batch",
+    steps=[
+        PlanStep(id="s1", tool="sql.write", args={}),
+        PlanStep(id="s2", tool="api.call", args={}),
+    ],
+)
+
+
+def make_result(risk, *errors):
+    """Build a result with the given risk score and errors."""
+    return ValidationResult(
+        status=Status.ERROR if errors else Status.PASS,
+        risk_score=risk,
+        errors=[PlanError(step=step, code=code, msg="m") for step, code in errors],
+    )
+
+
+def test_batch_reporter_lines_and_summary():
+    """Each result gets a line and the summary aggregates them."""
+    output = io.StringIO()
+    reporter = BatchReporter(output, total=3, worst=2)
+    reporter.add(make_result(0.0), "ok.json", PLAN)
+    reporter.add(
+        make_result(
+            0.6,
+            (0, ErrorCode.TOOL_DENY),
+            (0, ErrorCode.TOOL_DENY),
+            (1, ErrorCode.RAW_SECRET),
+        ),
+        "bad.json",
+        PLAN,
+    )
+    reporter.add(make_result(0.2, (None, ErrorCode.LOOP_DETECTED)), "loop.json")
+
+    lines = output.getvalue().splitlines()
+    assert lines[0].split() == ["PASS", "0.00", "ok.json"]
+    assert lines[1].split(None, 3) == [
+        "ERROR",
+        "0.60",
+        "bad.json",
+        "TOOL_DENY x2, RAW_SECRET",
+    ]
+
+    summary = reporter.summary()
+    assert summary["plans"] == 3
+    assert summary["by_status"] == {"pass": 1, "error": 2}
+    assert summary["by_code"] == {"TOOL_DENY": 2, "RAW_SECRET": 1, "LOOP_DETECTED": 1}
+    assert summary["by_tool"] == {"sql.write": 2, "api.call": 1}
+    assert summary["worst"] == [("bad.json", 0.6), ("loop.json", 0.2)]
+
+    reporter.finish()
+    assert "Batch Summary" in output.getvalue()
+
+
+def test_batch_reporter_no_progress_outside_terminal():
+    """The progress bar is not drawn into files."""
+    output = io.StringIO()
+    reporter = BatchReporter(output, total=1)
+    reporter.add(make_result(0.0), "ok.json")
+    reporter.finish()
+    assert "plans/s" not in output.getvalue().splitlines()[0]
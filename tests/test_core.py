@@ -3,7 +3,7 @@ Tests for the core module.
 """
 
 from plan_lint import core
-from plan_lint.types import ErrorCode, Plan, PlanStep, Policy, Status
+from plan_lint.types import ErrorCode, Plan, PlanError, PlanStep, Policy, Status
 
 
 def test_check_tools_allowed():
@@ -46,6 +46,20 @@ def test_check_bounds():
     assert discount < min_allowed, "Expected value to be outside bounds for this test"
 
 
+def test_findings_name_their_argument():
+    """Bounds and secrets findings record the top-level argument involved."""
+    step = PlanStep(
+        id="step-001",
+        tool="payments.transfer",
+        args={"memo": "ok", "payee": {"amount": 10, "note": ["AWS_SECRET_1"]}},
+    )
+
+    bounds = {"payments.transfer.payee.amount": [0, 5]}
+    assert [error.arg for error in core.check_bounds(step, bounds, 0)] == ["payee"]
+    secrets = core.check_raw_secrets(step, ["AWS_SECRET", "memo"], 0)
+    assert [error.arg for error in secrets] == ["payee", "memo"]
+
+
 def test_check_raw_secrets():
     """Test checking for raw secrets in arguments."""
     step = PlanStep(
@@ -59,6 +73,7 @@ def test_check_raw_secrets():
     result = core.check_raw_secrets(step, patterns, 0)
     assert len(result) == 1
     assert result[0].code == ErrorCode.RAW_SECRET
+    assert result[0].arg == "auth_token"
 
     # No secret pattern matched
     patterns = ["AZURE_KEY"]
@@ -66,6 +81,27 @@ def test_check_raw_secrets():
     assert not result
 
 
+def test_deny_patterns_match_each_key_and_value():
+    """Patterns apply to one key or value at a time, not to the args' repr."""
+    step = PlanStep(
+        id="step-001",
+        tool="api.call",
+        args={"user": "bob", "password": "hunter2", "opts": {"key": "sk-abc123"}},
+    )
+
+    def matched(pattern):
+        return [e.arg for e in core.check_raw_secrets(step, [pattern], 0)]
+
+    # Anchors apply to a single key or value, at any depth
+    assert matched(r"^sk-[a-z0-9]+$") == ["opts"]
+    assert matched(r"^password$") == ["password"]
+    assert matched(r"^hunter") == ["password"]
+    # Patterns spanning a key and its value, or adjacent fields, do not match
+    assert matched(r"'password': '") == []
+    assert matched(r"bob.*password") == []
+    assert matched(r"^\{") == []
+
+
 def test_validate_plan():
     """Test validating a complete plan."""
     plan = Plan(
@@ -100,3 +136,135 @@ def test_validate_plan():
     error_codes = [error.code for error in result.errors]
     assert ErrorCode.TOOL_DENY in error_codes
     assert ErrorCode.RAW_SECRET in error_codes
+
+
+def _fail_fast_plan():
+    """A plan whose first step leaks a secret and second uses a denied tool."""
+    return Plan(
+        goal="Test goal",
+        steps=[
+            PlanStep(id="step-001", tool="api.call", args={"token": "AWS_SECRET_1"}),
+            PlanStep(id="step-002", tool="sql.write", args={"query": "DROP"}),
+            PlanStep(id="step-003", tool="sql.write", args={"query": "DROP"}),
+        ],
+    )
+
+
+def test_risk_weights_applied():
+    """Risk weights are looked up by lower-cased error code."""
+    plan = _fail_fast_plan()
+    policy = Policy(allow_tools=["api.call"], risk_weights={"tool_deny": 0.05})
+
+    result = core.validate_plan(plan, policy)
+    assert result.risk_score == 0.05
+
+
+def test_validate_plan_first_error():
+    """first_error mode stops at the first error from the cheapest check."""
+    plan = _fail_fast_plan()
+    policy = Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET"])
+
+    result = core.validate_plan(plan, policy, mode="first_error")
+    assert result.status == Status.ERROR
+    assert len(result.errors) == 1
+    assert result.errors[0].code == ErrorCode.TOOL_DENY
+    assert result.errors[0].step == 1
+
+    # The default mode still reports everything
+    full = core.validate_plan(plan, policy)
+    assert [e.code for e in full.errors] == [
+        ErrorCode.RAW_SECRET,
+        ErrorCode.TOOL_DENY,
+        ErrorCode.TOOL_DENY,
+    ]
+
+
+def test_validate_plan_until_threshold():
+    """until_threshold mode stops once the risk threshold is reached."""
+    plan = _fail_fast_plan()
+    policy = Policy(
+        allow_tools=["api.call"],
+        deny_tokens_regex=["AWS_SECRET"],
+        risk_weights={"tool_deny": 0.3, "raw_secret": 0.6},
+        fail_risk_threshold=0.8,
+    )
+
+    result = core.validate_plan(plan, policy, mode="until_threshold")
+    # Both denied tools are scanned, then the secret pushes risk over 0.8
+    assert [e.code for e in result.errors] == [
+        ErrorCode.TOOL_DENY,
+        ErrorCode.TOOL_DENY,
+        ErrorCode.RAW_SECRET,
+    ]
+    assert result.risk_score >= 0.8
+
+    # A passing plan is fully scanned and passes
+    policy.allow_tools.append("sql.write")
+    policy.deny_tokens_regex = []
+    assert core.validate_plan(plan, policy, mode="until_threshold").errors == []
+
+
+def test_fail_fast_tracker():
+    """The tracker stops on the first error, or once the threshold is reached."""
+    policy = Policy(
+        risk_weights={"tool_deny": 0.5, "raw_secret": 0.5}, fail_risk_threshold=0.8
+    )
+    deny = [PlanError(code=ErrorCode.TOOL_DENY, msg="denied")]
+    secret = [PlanError(code=ErrorCode.RAW_SECRET, msg="secret")]
+
+    assert core.FailFastTracker("first_error", policy).add(deny)
+    assert not core.FailFastTracker("all", policy).add(deny + secret)
+
+    tracker = core.FailFastTracker("until_threshold", policy)
+    assert not tracker.add([])
+    assert not tracker.add(deny)
+    # A repeated error type adds no further risk
+    assert not tracker.add(deny)
+    assert tracker.add(secret)
+    assert tracker.stopped
+
+
+def test_validate_plan_multi_matches_single():
+    """Each policy's result equals validating against it alone."""
+    plan = _fail_fast_plan()
+    plan.steps.append(
+        PlanStep(id="step-004", tool="pay.send", args={"amount": 500, "to": "step-001"})
+    )
+    policies = [
+        Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET", "DROP"]),
+        Policy(
+            allow_tools=["api.call", "sql.write", "pay.send"],
+            bounds={"pay.send.amount": [0, 100]},
+            deny_tokens_regex=["DROP"],
+            max_steps=2,
+        ),
+        Policy(),
+    ]
+
+    multi = core.validate_plan_multi(plan, policies)
+
+    assert multi.results == [core.validate_plan(plan, p) for p in policies]
+    assert multi.status == Status.ERROR
+    assert multi.risk_score == max(r.risk_score for r in multi.results)
+    assert multi.results[2].status == Status.PASS
+
+
+def test_validate_plan_multi_scans_shared_patterns_once(monkeypatch):
+    """A pattern listed by several policies is searched once per step."""
+    plan = _fail_fast_plan()
+    searched = []
+    first_match = core._first_match
+
+    def counting(regex, texts):
+        searched.append(regex.pattern)
+        return first_match(regex, texts)
+
+    monkeypatch.setattr(core, "_first_match", counting)
+    policies = [Policy(deny_tokens_regex=["AWS_SECRET", "DROP"])] * 2 + [
+        Policy(deny_tokens_regex=["DROP"])
+    ]
+    multi = core.validate_plan_multi(plan, policies)
+
+    assert sorted(searched) == ["AWS_SECRET"] * 3 + ["DROP"] * 3
+    assert [len(r.errors) for r in multi.results] == [3, 3, 2]
+    assert core.validate_plan_multi(plan, []).status == Status.PASS
@@ -0,0 +1,104 @@
+"""
+Tests for the JSON codec module.
+"""
+
+import json
+import math
+
+import pytest
+
+from plan_lint import jsonio
+from plan_lint.loader import parse_plan
+from plan_lint.reporters import json as json_reporter
+from plan_lint.types import Plan, Status, ValidationResult
+
+CODECS = [
+    name
+    for name, available in (
+        ("json", True),
+        ("orjson", jsonio.HAS_ORJSON),
+        ("msgspec", jsonio.HAS_MSGSPEC),
+    )
+    if available
+]
+
+PLAN_JSON = json.dumps(
+    {
+        "goal": "Test goal",
+        "steps": [
+            {"id": "step-001", "tool": "sql.query", "args": {"query": "SELECT 1"}},
+            {
+                "id": "step-002",
+                "tool": "email.send",
+                "args": {"to": "a@example.com", "n": 2**70},
+                "on_fail": "continue",
+            },
+        ],
+        "meta": {"planner": "test"},
+    }
+)
+
+
+@pytest.fixture(params=CODECS)
+def codec(request):
+    """Run a test with each available codec selected."""
+    yield jsonio.set_codec(request.param)
+    jsonio.set_codec(None)
+
+
+def test_codec_round_trip(codec):
+    """Every codec decodes and encodes the same values."""
+    value = {"a": [1, 2.5, None, True], "b": "ü", "big": 2**70}
+    assert codec.loads(codec.dumps(value)) == value
+    assert json.loads(codec.dumps(value, indent=2)) == value
+    assert b"\n" not in codec.dumps(value)
+
+
+def test_codec_falls_back_to_stdlib(codec):
+    """Inputs rejected by fast codecs are handled like the json module."""
+    assert math.isnan(jsonio.loads('{"a": NaN}')["a"])
+    with pytest.raises(json.JSONDecodeError):
+        jsonio.loads("{not json")
+
+
+def test_get_codec_unknown():
+    """Unknown codec names are rejected."""
+    with pytest.raises(ValueError):
+        jsonio.get_codec("yaml")
+
+
+def test_parse_plan_matches_model_validation(codec):
+    """The fast and fallback paths produce the same plan."""
+    plan = parse_plan(PLAN_JSON)
+    assert plan == Plan.model_validate_json(PLAN_JSON)
+    assert plan.steps[1].on_fail == "continue"
+    assert plan.steps[1].args["n"] == 2**70
+
+
+@pytest.mark.skipif(not jsonio.HAS_MSGSPEC, reason="msgspec not installed")
+def test_decode_plan_enforces_schema():
+    """The typed decoder rejects anything the plan schema rejects."""
+    assert jsonio.decode_plan(PLAN_JSON) is not None
+    invalid = [
+        '{"steps": []}',
+        '{"goal": 1, "steps": []}',
+        '{"goal": "g", "steps": [{"id": "a", "tool": "t"}]}',
+        '{"goal": "g", "steps": [{"id": "a", "tool": "t", "args": {}, '
+        '"on_fail": "retry"}]}',
+        '{"goal": "g", "steps": [], "context": null}',
+        '{"goal": "g", "steps": [], "meta": {"planner": 1}}',
+    ]
+    for text in invalid:
+        assert jsonio.decode_plan(text) is None, text
+        with pytest.raises(ValueError, match="Plan validation failed"):
+            parse_plan(text)
+
+
+def test_json_reporter_compact():
+    """The JSON reporter can write compact output."""
+    result = ValidationResult(status=Status.PASS, risk_score=0.0)
+    pretty = json_reporter.report(result)
+    compact = json_reporter.report(result, indent=None)
+
+    assert "\n" in pretty and "\n" not in compact
+    assert json.loads(pretty) == json.loads(compact) == json_reporter.to_dict(result)
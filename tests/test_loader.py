@@ -0,0 +1,134 @@
+"""
+Tests for loading policies.
+"""
+
+import builtins
+
+import pytest
+
+from plan_lint import loader
+from plan_lint.loader import (
+    detect_policy_format,
+    is_rego_policy_file,
+    load_policy_file,
+    sniff_policy_format,
+)
+from plan_lint.policy_cache import PolicyCache
+
+REGO = "# Tools\npackage planlint\n\ndefault allow := false\n"
+# The old heuristic took anything containing "package" and a brace for Rego
+YAML_WITH_BRACES = (
+    "# Policy for the package service\n"
+    "allow_tools: [sql.query]\n"
+    'bounds: {"payments.transfer.amount": [0, 100]}\n'
+)
+
+
+@pytest.mark.parametrize(
+    "head, expected",
+    [
+        (REGO, "rego"),
+        ("package planlint.tools\n", "rego"),
+        ("package foo.bar  # main policy\n", "rego"),
+        ("package foo.bar# main\n", "rego"),
+        ("package: foo  # main\n", "yaml"),
+        ('\ufeffpackage data["x"]\n', "rego"),
+        (YAML_WITH_BRACES, "yaml"),
+        ("package: planlint\n{}", "yaml"),
+        ("---\nmax_steps: 3\n", "yaml"),
+        ('\n  {"max_steps": 3}', "json"),
+        ("# only a comment\n", "yaml"),
+    ],
+)
+def test_sniff_policy_format(head, expected):
+    """The first significant line decides the format."""
+    assert sniff_policy_format(head.encode("utf-8")) == expected
+
+
+def test_detect_policy_format(tmp_path):
+    """Extensions decide without reading; other files are sniffed once."""
+    assert detect_policy_format(str(tmp_path / "missing.rego")) == "rego"
+    assert detect_policy_format(str(tmp_path / "missing.YML")) == "yaml"
+
+    policy_file = tmp_path / "policy.conf"
+    policy_file.write_text(REGO)
+    hits = loader._sniff_file.cache_info().hits
+    assert is_rego_policy_file(str(policy_file))
+    assert is_rego_policy_file(str(policy_file))
+    assert loader._sniff_file.cache_info().hits == hits + 1
+
+    policy_file.write_text(YAML_WITH_BRACES + "\n")
+    assert not is_rego_policy_file(str(policy_file))
+    assert not is_rego_policy_file(str(tmp_path / "missing"))
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Paths passed to open(), in order."""
+    paths = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        paths.append(str(file))
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    return paths
+
+
+@pytest.mark.parametrize("mmap_threshold", [loader.MMAP_THRESHOLD, 0])
+def test_load_policy_file_reads_once(tmp_path, monkeypatch, opened, mmap_threshold):
+    """Each format is read once, whether it is read or memory-mapped."""
+    monkeypatch.setattr(loader, "MMAP_THRESHOLD", mmap_threshold)
+    yaml_file = tmp_path / "policy.conf"
+    yaml_file.write_text(YAML_WITH_BRACES)
+    rego_file = tmp_path / "policy"
+    rego_file.write_text(REGO)
+    json_file = tmp_path / "policy.json"
+    json_file.write_text('{"max_steps": 3}')
+
+    loaded = load_policy_file(str(yaml_file))
+    assert loaded.format == "yaml" and not loaded.is_rego
+    assert loaded.policy.bounds == {"payments.transfer.amount": [0, 100]}
+
+    loaded = load_policy_file(str(rego_file))
+    assert loaded.is_rego
+    assert loaded.rego_policy == REGO
+
+    loaded = load_policy_file(str(json_file))
+    assert (loaded.format, loaded.policy.max_steps) == ("json", 3)
+
+    assert opened == [str(yaml_file), str(rego_file), str(json_file)]
+
+
+def test_load_policy_file_with_cache(tmp_path, monkeypatch, opened):
+    """A cache hit on a memory-mapped policy does not parse it."""
+    monkeypatch.setattr(loader, "MMAP_THRESHOLD", 0)
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text(YAML_WITH_BRACES)
+    cache = PolicyCache(str(tmp_path / "cache"))
+    files = []
+
+    first = load_policy_file(str(policy_file), files, cache=cache)
+    monkeypatch.setattr(loader.yaml, "safe_load", None)
+    second = load_policy_file(str(policy_file), files, cache=cache)
+
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert second.policy == first.policy
+    assert files == [str(policy_file)] * 2
+    assert opened.count(str(policy_file)) == 2
+
+
+def test_load_policy_file_errors(tmp_path):
+    """Bad documents and forced formats are reported as ValueError."""
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text("- a list\n")
+    with pytest.raises(ValueError, match="not a mapping"):
+        load_policy_file(str(policy_file))
+
+    policy_file.write_text(REGO)
+    with pytest.raises(ValueError, match="Failed to load policy"):
+        load_policy_file(str(policy_file), policy_format="json")
+    assert load_policy_file(str(policy_file), policy_format="rego").is_rego
+    with pytest.raises(ValueError, match="Unknown policy format"):
+        load_policy_file(str(policy_file), policy_format="toml")
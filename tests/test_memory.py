@@ -0,0 +1,105 @@
+"""
+Tests for memory use on large plans.
+
+The documented budget: peak traced memory while loading and validating a plan
+stays within 2.5x the size of the plan file, and validation itself does not
+copy argument text.
+"""
+
+import json
+import tracemalloc
+
+import pytest
+from typer.testing import CliRunner
+
+from plan_lint import core, tracing
+from plan_lint.cli import app, load_rules
+from plan_lint.loader import load_plan
+from plan_lint.profiling import MemoryProfiler
+from plan_lint.types import Policy
+
+DOCUMENT_BYTES = 4_000_000
+
+
+@pytest.fixture
+def large_plan_file(tmp_path):
+    """A plan file dominated by one large embedded document."""
+    plan = {
+        "goal": "Store a document",
+        "steps": [
+            {
+                "id": "step-001",
+                "tool": "doc.store",
+                "args": {"body": "x" * DOCUMENT_BYTES},
+            },
+            {"id": "step-002", "tool": "doc.index", "args": {"ref": "step-001"}},
+        ],
+    }
+    path = tmp_path / "large_plan.json"
+    path.write_text(json.dumps(plan))
+    return path
+
+
+def test_peak_memory_budget(large_plan_file):
+    """Loading, validating and running rules stays within the memory budget."""
+    size = large_plan_file.stat().st_size
+    policy = Policy(deny_tokens_regex=["AWS_SECRET", "API_KEY"])
+
+    tracemalloc.start()
+    try:
+        plan = load_plan(str(large_plan_file))
+        _, load_peak = tracemalloc.get_traced_memory()
+
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        core.validate_plan(plan, policy)
+        for name, check_plan in load_rules().items():
+            core.run_rule(name, check_plan, plan, policy)
+        _, validate_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert load_peak < 2.5 * size
+    assert validate_peak - before < 0.1 * size
+
+
+def test_memory_profiler_phases(large_plan_file):
+    """The memory profiler records retained and peak memory per span."""
+    profiler = MemoryProfiler()
+    tracing.set_tracer(profiler)
+    try:
+        plan = load_plan(str(large_plan_file))
+        core.validate_plan(plan, Policy())
+    finally:
+        tracing.set_tracer(None)
+        profiler.stop()
+
+    summary = profiler.summary()
+    assert list(summary) == [
+        "plan_lint.schema",
+        "plan_lint.load_plan",
+        "plan_lint.validate_plan",
+    ]
+    load = summary["plan_lint.load_plan"]
+    assert load["retained"] >= DOCUMENT_BYTES
+    assert load["peak"] >= load["retained"]
+    assert load["top"]
+    assert summary["plan_lint.validate_plan"]["peak"] < DOCUMENT_BYTES / 10
+
+
+def test_cli_memory_profile(sample_plan_file, sample_policy_file):
+    """Test CLI memory profiling output."""
+    result = CliRunner().invoke(
+        app,
+        [
+            str(sample_plan_file),
+            "--policy",
+            str(sample_policy_file),
+            "--memory-profile",
+        ],
+    )
+
+    assert result.exit_code == 1
+    assert "Memory Profile" in result.output
+    assert "plan_lint.load_plan" in result.output
+    assert type(tracing.get_tracer()) is tracing.Tracer
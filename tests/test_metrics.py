@@ -0,0 +1,146 @@
+"""
+Tests for the metrics module.
+"""
+
+import threading
+import urllib.request
+
+import pytest
+
+from plan_lint import core, metrics
+from plan_lint.metrics import Counter, Histogram, MetricsRegistry
+from plan_lint.types import Plan, PlanStep, Policy
+
+PLAN = Plan(
+    goal="Test goal",
+    steps=[
+        PlanStep(id="step-001", tool="api.call", args={"token": "AWS_SECRET_1"}),
+        PlanStep(id="step-002", tool="sql.write", args={"query": "DROP"}),
+    ],
+)
+POLICY = Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET"])
+
+
+@pytest.fixture
+def active_metrics():
+    """Enable metrics for a test and disable them afterwards."""
+    active = metrics.enable()
+    yield active
+    metrics.disable()
+
+
+def test_counter_sums_thread_shards():
+    """Counts recorded from several threads are summed when read."""
+    counter = Counter("requests", "Requests", ["kind"])
+
+    def work():
+        for _ in range(1000):
+            counter.inc(kind="a")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value(kind="a") == 4000
+    assert counter.render() == ['requests_total{kind="a"} 4000']
+
+    with pytest.raises(ValueError):
+        counter.inc(other="b")
+
+
+def test_exited_thread_shards_are_retired():
+    """Shards of finished threads are folded in, so shard count stays bounded."""
+    counter = Counter("requests", "Requests")
+    histogram = Histogram("latency", "Latency", buckets=(0.1, 1.0))
+
+    def work():
+        counter.inc()
+        histogram.observe(0.5)
+
+    for _ in range(200):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    assert len(counter._shards) <= 1
+    assert len(histogram._shards) <= 1
+    assert counter.value() == 200
+    assert "latency_count 200" in histogram.render()
+
+
+def test_histogram_render():
+    """Histogram buckets are rendered cumulatively with count and sum."""
+    histogram = Histogram("latency", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.render() == [
+        'latency_bucket{le="0.1"} 2',
+        'latency_bucket{le="1"} 3',
+        'latency_bucket{le="+Inf"} 4',
+        "latency_count 4",
+        "latency_sum 2.65",
+    ]
+
+
+def test_registry_render_openmetrics():
+    """The registry renders type and help lines and ends with EOF."""
+    registry = MetricsRegistry()
+    registry.counter("plans", 'Plans "validated"').inc()
+
+    assert registry.render() == (
+        "# TYPE plans counter\n"
+        '# HELP plans Plans \\"validated\\"\n'
+        "plans_total 1\n"
+        "# EOF\n"
+    )
+    with pytest.raises(ValueError):
+        registry.counter("plans", "Duplicate")
+
+
+def test_validate_plan_records_metrics(active_metrics):
+    """validate_plan records status, findings, risk and latency."""
+    core.validate_plan(PLAN, POLICY)
+
+    assert active_metrics.plans.value(backend="builtin", status="error") == 1
+    assert active_metrics.findings.value(code="TOOL_DENY") == 1
+    assert active_metrics.findings.value(code="RAW_SECRET") == 1
+
+    text = active_metrics.registry.render()
+    assert "plan_lint_validation_duration_seconds_count" in text
+    assert 'plan_lint_plan_steps_bucket{le="2"} 1' in text
+
+
+def test_run_rule_records_metrics(active_metrics):
+    """Rule plugins are timed and their findings counted."""
+    errors = core.run_rule(
+        "always", lambda plan, policy: [object(), object()], PLAN, POLICY
+    )
+
+    assert len(errors) == 2
+    assert active_metrics.rule_findings.value(rule="always") == 2
+
+
+def test_metrics_disabled_by_default():
+    """Nothing is recorded unless metrics are enabled."""
+    assert metrics.ACTIVE is None
+    core.validate_plan(PLAN, POLICY)
+
+
+def test_http_endpoint(active_metrics):
+    """The HTTP server exposes the registry at /metrics."""
+    core.validate_plan(PLAN, POLICY)
+    server = metrics.start_http_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'plan_lint_plans_validated_total{backend="builtin",status="error"} 1' in body
+    assert body.endswith("# EOF\n")
@@ -0,0 +1,109 @@
+"""
+Tests for the NDJSON reporter.
+"""
+
+import io
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from plan_lint.cli import app
+from plan_lint.reporters import ndjson
+from plan_lint.types import (
+    ErrorCode,
+    PlanError,
+    PlanWarning,
+    Status,
+    ValidationResult,
+)
+
+RESULT = ValidationResult(
+    status=Status.ERROR,
+    risk_score=0.5,
+    errors=[
+        PlanError(step=1, code=ErrorCode.RAW_SECRET, msg="secret"),
+        PlanError(code=ErrorCode.LOOP_DETECTED, msg="loop"),
+    ],
+)
+
+
+def test_header_lists_codes():
+    """The header maps code indices to error codes."""
+    header = json.loads(ndjson.report(RESULT).splitlines()[0])
+    assert header["format"] == "plan-lint-ndjson"
+    assert header["codes"] == [code.value for code in ErrorCode]
+
+
+def test_record_is_compact():
+    """Records use code indices and omit empty fields."""
+    line = ndjson.report(RESULT, plan="a.json").splitlines()[1]
+    assert " " not in line.replace('"msg":"secret"', "")
+    record = json.loads(line)
+    assert record == {
+        "plan": "a.json",
+        "status": "error",
+        "risk_score": 0.5,
+        "errors": [
+            {"step": 1, "code": ndjson.CODES.index("RAW_SECRET"), "msg": "secret"},
+            {"code": ndjson.CODES.index("LOOP_DETECTED"), "msg": "loop"},
+        ],
+    }
+
+
+def test_record_without_omission():
+    """Empty fields are kept when omit_empty is False."""
+    record = ndjson.to_record(RESULT, omit_empty=False)
+    assert record["warnings"] == []
+    assert record["errors"][1]["step"] is None
+
+
+def test_writer_streams_and_round_trips():
+    """Each result is written as one line and can be read back."""
+    other = ValidationResult(
+        status=Status.WARN,
+        risk_score=0.1,
+        warnings=[PlanWarning(code="SLOW", msg="slow tool")],
+    )
+    output = io.StringIO()
+    writer = ndjson.NDJSONWriter(output)
+    writer.write(RESULT, plan="a.json")
+    assert output.getvalue().count("\n") == 2
+    writer.write(other)
+
+    assert writer.count == 2
+    assert list(ndjson.read(output.getvalue().splitlines())) == [
+        ("a.json", RESULT),
+        (None, other),
+    ]
+
+
+def test_read_requires_header():
+    """Reading output without a header fails."""
+    line = json.dumps(ndjson.to_record(RESULT))
+    with pytest.raises(ValueError):
+        list(ndjson.read([line]))
+
+
+def test_cli_ndjson_output(sample_plan_file, sample_policy_file, tmp_path):
+    """Test CLI with NDJSON output."""
+    output_file = tmp_path / "output.ndjson"
+    result = CliRunner().invoke(
+        app,
+        [
+            str(sample_plan_file),
+            "--policy",
+            str(sample_policy_file),
+            "--format",
+            "ndjson",
+            "--output",
+            str(output_file),
+        ],
+    )
+
+    assert result.exit_code == 1
+    with open(output_file) as f:
+        [(plan, plan_result)] = list(ndjson.read(f))
+    assert plan == str(sample_plan_file)
+    assert plan_result.status == Status.ERROR
+    assert plan_result.errors
@@ -4,15 +4,24 @@ Tests for the Open Policy Agent (OPA) integration module.
 
 import json
 import os
+import shutil
 import subprocess
 import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
+import pytest
+
+from plan_lint import opa
+from plan_lint.core import validate_plan
+from plan_lint.loader import load_policy
 from plan_lint.opa import (
+    OPAError,
+    PartialPolicy,
     evaluate_with_opa,
     is_rego_policy,
     load_rego_policy_file,
+    plan_to_opa_input,
     policy_to_rego,
 )
 from plan_lint.types import ErrorCode, Plan, PlanError, Policy, Status, ValidationResult
@@ -92,14 +101,38 @@ class TestOPAModule(unittest.TestCase):
 
         # Basic checks
         self.assertIn("package planlint", rego_policy)
-        self.assertIn("default allow = false", rego_policy)
-        self.assertIn("allowed_tools = [", rego_policy)
-        self.assertIn('"allowed_tool"', rego_policy)
+        self.assertIn("import rego.v1", rego_policy)
+        self.assertIn("default allow := false", rego_policy)
+        self.assertIn('allowed_tools := {"allowed_tool"}', rego_policy)
 
         # Functional checks (would parse and compile correctly)
-        self.assertIn("all_tools_allowed {", rego_policy)
-        self.assertIn("steps_within_limit {", rego_policy)
-        self.assertIn("violations[", rego_policy)
+        self.assertIn("not allowed_tools[step.tool]", rego_policy)
+        self.assertIn("count(input.steps) > max_steps", rego_policy)
+        self.assertIn("violations contains", rego_policy)
+
+    def test_policy_to_rego_indexable_shapes(self):
+        """Bounds are keyed by tool and arguments are serialised once per step."""
+        policy = Policy(
+            bounds={
+                "payments.transfer.amount": [0, 1000],
+                "payments.transfer.fee": [0, 5],
+                "api.call.retries": ["context.max", 3],
+            },
+            deny_tokens_regex=[r"\d{16}", 'say "hi"'],
+        )
+        rego_policy = policy_to_rego(policy)
+
+        self.assertIn(
+            'bounds := {"payments.transfer": {"amount": [0, 1000], "fee": [0, 5]}}',
+            rego_policy,
+        )
+        self.assertIn("bounds[step.tool]", rego_policy)
+        self.assertEqual(rego_policy.count("json.marshal"), 1)
+        self.assertIn(
+            'sensitive_patterns := ["\\\\d{16}", "say \\"hi\\""]', rego_policy
+        )
+        # Without an allowlist every tool is allowed, as in built-in validation
+        self.assertNotIn("TOOL_DENY", rego_policy)
 
     @patch("subprocess.run")
     def test_is_opa_installed(self, mock_run):
@@ -214,6 +247,383 @@ class TestOPAModule(unittest.TestCase):
         self.assertEqual(result.errors[0].code, ErrorCode.SCHEMA_INVALID)
         self.assertTrue("OPA evaluation failed" in result.errors[0].msg)
 
+    @patch("subprocess.run")
+    def test_evaluate_with_opa_pipes_input(self, mock_run):
+        """The plan is serialised once and piped to OPA through stdin."""
+        opa._opa_available = False
+        mock_process = MagicMock()
+        mock_process.stdout = b'{"result": [{"expressions": [{"value": {}}]}]}'
+        mock_run.return_value = mock_process
+
+        evaluate_with_opa(SAMPLE_PLAN, SAMPLE_POLICY)
+        evaluate_with_opa(SAMPLE_PLAN, SAMPLE_POLICY, raw_input=b'{"steps": []}')
+
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        # `opa version` is only checked once
+        self.assertEqual(commands.count(["opa", "version"]), 1)
+
+        evals = [c for c in mock_run.call_args_list if c.args[0][1] == "eval"]
+        first, second = evals
+        self.assertIn("--stdin-input", first.args[0])
+        self.assertNotIn("-i", first.args[0])
+        self.assertEqual(first.kwargs["input"], plan_to_opa_input(SAMPLE_PLAN))
+        self.assertEqual(
+            json.loads(first.kwargs["input"]), SAMPLE_PLAN.model_dump(mode="json")
+        )
+        self.assertEqual(second.kwargs["input"], b'{"steps": []}')
+
+        # The generated policy is written once and reused
+        policy_path = first.args[0][first.args[0].index("-d") + 1]
+        self.assertEqual(policy_path, second.args[0][second.args[0].index("-d") + 1])
+        with open(policy_path) as f:
+            self.assertEqual(f.read(), policy_to_rego(SAMPLE_POLICY))
+
+    @patch("subprocess.run")
+    def test_evaluate_with_opa_not_installed(self, mock_run):
+        """A missing OPA executable raises OPAError."""
+        opa._opa_available = False
+        mock_run.side_effect = FileNotFoundError("opa")
+
+        with self.assertRaises(OPAError):
+            evaluate_with_opa(SAMPLE_PLAN, SAMPLE_POLICY)
+
+
+def test_policy_files_evicted_lru_and_never_while_in_use(monkeypatch):
+    """Least recently used files are deleted first, and only once released."""
+    monkeypatch.setattr(opa, "_MAX_POLICY_FILES", 2)
+    monkeypatch.setattr(opa, "_policy_paths", opa.OrderedDict())
+    monkeypatch.setattr(opa, "_policy_users", {})
+
+    with opa._policy_file("package a") as held:
+        with opa._policy_file("package b") as b_path:
+            pass
+        with opa._policy_file("package c") as c_path:
+            pass
+        # "a" is the oldest but still in use, so "b" is evicted instead
+        assert os.path.exists(held)
+        assert not os.path.exists(b_path)
+
+        with opa._policy_file("package d"):
+            pass
+        assert os.path.exists(held)
+        assert not os.path.exists(c_path)
+
+    # Using "a" again makes it the most recently used
+    with opa._policy_file("package a") as again:
+        assert again == held
+    with opa._policy_file("package e"):
+        pass
+    assert os.path.exists(held)
+    assert len(opa._policy_paths) == 2
+
+
+def test_untranslated_bounds_checked_alongside_opa(tmp_path, monkeypatch):
+    """Bounds the generated Rego cannot express are still enforced."""
+    policy_path = tmp_path / "policy.yaml"
+    policy_path.write_text(
+        "bounds:\n"
+        '  payments.transfer.amount: "(0, context.daily_limit]"\n'
+        "  orders.create.items[*].qty: [1, 100]\n"
+    )
+    policy, _ = load_policy(str(policy_path))
+    plan = Plan(
+        goal="pay",
+        context={"daily_limit": 100},
+        steps=[
+            {"id": "s1", "tool": "payments.transfer", "args": {"amount": 500}},
+            {
+                "id": "s2",
+                "tool": "orders.create",
+                "args": {"items": [{"qty": 5}, {"qty": 0}]},
+            },
+        ],
+    )
+
+    rego_policy = policy_to_rego(policy)
+    assert "bounds :=" not in rego_policy
+    assert "items[*]" not in rego_policy
+
+    monkeypatch.setattr(opa, "_opa_available", True)
+    process = MagicMock(stdout=b'{"result": [{"expressions": [{"value": {}}]}]}')
+    with patch("subprocess.run", return_value=process):
+        result = validate_plan(plan, policy, use_opa=True)
+
+    bound_errors = [e for e in result.errors if e.code == ErrorCode.BOUND_VIOLATION]
+    assert sorted(e.step for e in bound_errors) == [0, 1]
+    assert result.status == Status.ERROR
+
+
+STEP_POLICY = """package planlint
+
+import rego.v1
+
+step_violations contains {"code": "BOUND_VIOLATION", "msg": "too much"} if {
+    input.step.tool == "payments.transfer"
+    input.step.args.amount > 1000
+}
+"""
+
+
+def _var(name):
+    return {"type": "var", "value": name}
+
+
+def _ref(*path):
+    return {
+        "type": "ref",
+        "value": [_var(path[0])] + [{"type": "string", "value": p} for p in path[1:]],
+    }
+
+
+# `opa eval --partial --format json` for payments.transfer
+PAYMENTS_RESIDUAL = {
+    "partial": {
+        "queries": [
+            [
+                {
+                    "index": 0,
+                    "terms": [
+                        _ref("eq"),
+                        _ref("data", "partial", "planlint", "big"),
+                        _var("_term_0_0"),
+                    ],
+                },
+                {
+                    "index": 1,
+                    "terms": [
+                        _ref("eq"),
+                        _var("violation"),
+                        {
+                            "type": "object",
+                            "value": [
+                                [
+                                    {"type": "string", "value": "code"},
+                                    {"type": "string", "value": "BOUND_VIOLATION"},
+                                ],
+                                [{"type": "string", "value": "msg"}, _var("_term_0_0")],
+                            ],
+                        },
+                    ],
+                },
+            ]
+        ],
+        "support": [
+            {
+                "package": {"path": _ref("data", "partial", "planlint")["value"]},
+                "rules": [
+                    {
+                        "head": {
+                            "name": "big",
+                            "ref": [_var("big")],
+                            "value": {"type": "string", "value": "too much"},
+                            "assign": True,
+                        },
+                        "body": [
+                            {
+                                "index": 0,
+                                "terms": [
+                                    _ref("gt"),
+                                    _ref("input", "step", "args", "amount"),
+                                    {"type": "number", "value": 1000},
+                                ],
+                            }
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+}
+
+
+class FakeRunner:
+    """Answers partial evaluations per tool and records every call."""
+
+    def __init__(self, violations):
+        self.calls = []
+        self.violations = violations
+
+    def __call__(self, args, input_bytes):
+        self.calls.append((args, input_bytes))
+        if "--partial" in args:
+            tool = json.loads(input_bytes)["step"]["tool"]
+            if tool == "payments.transfer":
+                return json.dumps(PAYMENTS_RESIDUAL).encode()
+            return b"{}"
+        result = {"result": [{"expressions": [{"value": self.violations}]}]}
+        return json.dumps(result).encode()
+
+
+def test_partial_policy_specialises_per_tool():
+    """Step rules are partially evaluated once per tool and cached."""
+    runner = FakeRunner([])
+    partial = PartialPolicy(STEP_POLICY, tools=["payments.transfer"], runner=runner)
+
+    [(args, input_bytes)] = runner.calls
+    assert args[-1] == "data.planlint.step_violations[violation]"
+    assert "input.step.args" in args and "input.step.tool" not in args
+    assert json.loads(input_bytes) == {"step": {"tool": "payments.transfer"}}
+
+    plan = Plan(
+        goal="pay",
+        steps=[
+            {"id": "s1", "tool": "sql.query", "args": {}},
+            {"id": "s2", "tool": "payments.transfer", "args": {"amount": 5}},
+            {"id": "s3", "tool": "sql.query", "args": {}},
+        ],
+    )
+    partial.evaluate(plan, Policy())
+    partial.evaluate(plan, Policy())
+
+    partials = [args for args, _ in runner.calls if "--partial" in args]
+    assert len(partials) == 2
+    assert partial.tools == ["payments.transfer", "sql.query"]
+
+    # One evaluation per plan, against the original policy and the residuals
+    evals = [args for args, _ in runner.calls if "--partial" not in args]
+    assert len(evals) == 2
+    assert evals[0][-1] == "data.planlint_specialised.violations"
+    module_dir = evals[0][evals[0].index("-d", 3) + 1]
+    with open(os.path.join(module_dir, "0.rego")) as f:
+        wrapper = f.read()
+    with open(os.path.join(module_dir, "1.rego")) as f:
+        support = f.read()
+
+    assert 'specialised_tools := {"payments.transfer", "sql.query"}' in wrapper
+    # sql.query has no residual, so only payments.transfer gets a rule
+    assert wrapper.count('input.step.tool == "payments.transfer"') == 1
+    assert 'input.step.tool == "sql.query"' not in wrapper
+    assert "found := step_violations with input.step as step" in wrapper
+    # Support modules are moved to a package per tool
+    namespace = support.split("package partial.")[1].split(".")[0]
+    assert namespace.startswith("t")
+    assert f"data.partial.{namespace}.planlint.big = _term_0_0" in wrapper
+    assert 'violation = {"code": "BOUND_VIOLATION", "msg": _term_0_0}' in wrapper
+    assert 'big := "too much" if {\n    input.step.args.amount > 1000\n}' in support
+
+
+def test_partial_policy_results_and_limit():
+    """Violations map to errors, and tools past the limit are not specialised."""
+    runner = FakeRunner([{"step": 1, "code": "BOUND_VIOLATION", "msg": "too much"}])
+    partial = PartialPolicy(STEP_POLICY, runner=runner, max_tools=1)
+    plan = Plan(
+        goal="pay",
+        steps=[
+            {"id": "s1", "tool": "payments.transfer", "args": {"amount": 5000}},
+            {"id": "s2", "tool": "sql.query", "args": {}},
+        ],
+    )
+
+    result = partial.evaluate(plan, Policy())
+    assert result.status == Status.ERROR
+    assert [(e.step, e.code) for e in result.errors] == [(1, ErrorCode.BOUND_VIOLATION)]
+    assert partial.tools == ["payments.transfer"]
+
+
+def test_rego_printer_shapes():
+    """Support modules are printed as Rego v1 from OPA's JSON AST."""
+
+    def num(n):
+        return {"type": "number", "value": n}
+
+    def expr(*terms, **extra):
+        return {"terms": list(terms) if len(terms) > 1 else terms[0], **extra}
+
+    plus = {"type": "call", "value": [_ref("plus"), _var("x"), num(1)]}
+    empty = {"type": "set", "value": []}
+    module = {
+        "package": {"path": _ref("data", "partial", "planlint")["value"]},
+        "rules": [
+            {"default": True, "head": {"name": "p", "value": num(0)}, "body": []},
+            {
+                "head": {"name": "names", "ref": [_var("names")], "key": _var("n")},
+                "body": [
+                    expr(_ref("eq"), _var("n"), _ref("input", "step", "args", "a-b")),
+                    expr(_ref("gt"), plus, num(2), negated=True),
+                ],
+            },
+            {
+                "head": {
+                    "name": "f",
+                    "ref": [_var("f")],
+                    "args": [_var("x")],
+                    "value": {"type": "boolean", "value": True},
+                },
+                "body": [
+                    {
+                        "terms": _ref("data", "partial", "planlint", "q"),
+                        "with": [{"target": _ref("input", "step"), "value": empty}],
+                    }
+                ],
+                "else": {
+                    "head": {"value": {"type": "boolean", "value": False}},
+                    "body": [expr({"type": "boolean", "value": True})],
+                },
+            },
+        ],
+    }
+
+    assert opa._RegoPrinter("t1").module(module) == (
+        "package partial.t1.planlint\n"
+        "\n"
+        "import rego.v1\n"
+        "\n"
+        "default p = 0\n"
+        "\n"
+        "names contains n if {\n"
+        '    n = input.step.args["a-b"]\n'
+        "    not (x + 1) > 2\n"
+        "}\n"
+        "\n"
+        "f(x) = true if {\n"
+        "    data.partial.t1.planlint.q with input.step as set()\n"
+        "} else = false if {\n"
+        "    true\n"
+        "}\n"
+    )
+
+
+@pytest.mark.skipif(shutil.which("opa") is None, reason="OPA is not installed")
+def test_partial_policy_agrees_with_opa():
+    """The specialised policy finds what OPA finds with the original policy."""
+    rego_policy = STEP_POLICY + """
+step_violations contains {"code": "TOOL_DENY", "msg": msg} if {
+    not input.step.tool in {"payments.transfer", "sql.query"}
+    msg := sprintf("%s is not allowed", [input.step.tool])
+}
+
+step_violations contains {"code": "RAW_SECRET", "msg": "secret"} if {
+    some value in input.step.args
+    contains(lower(sprintf("%v", [value])), "password")
+}
+"""
+    # The same findings from the unspecialised policy, tagged with their step
+    reference = rego_policy + """
+violations contains tagged if {
+    some i, step in input.steps
+    found := data.planlint.step_violations with input.step as step
+    some violation in found
+    tagged := object.union(violation, {"step": i})
+}
+"""
+    plan = Plan(
+        goal="pay",
+        steps=[
+            {"id": "s1", "tool": "payments.transfer", "args": {"amount": 5000}},
+            {"id": "s2", "tool": "payments.transfer", "args": {"amount": 5}},
+            {"id": "s3", "tool": "sql.query", "args": {"q": "password=1"}},
+            {"id": "s4", "tool": "shell.exec", "args": {}},
+        ],
+    )
+    partial = PartialPolicy(rego_policy, tools=["payments.transfer", "sql.query"])
+
+    def findings(result):
+        return sorted((e.step, e.code, e.msg) for e in result.errors)
+
+    expected = evaluate_with_opa(plan, Policy(), rego_policy=reference)
+    assert len(expected.errors) == 3
+    assert findings(partial.evaluate(plan, Policy())) == findings(expected)
+
 
 if __name__ == "__main__":
     unittest.main()
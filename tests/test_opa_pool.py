@@ -0,0 +1,192 @@
+"""
+Tests for the pool of OPA servers.
+"""
+
+import json
+import shutil
+import threading
+
+import pytest
+
+from plan_lint.opa import OPAError
+from plan_lint.opa_pool import OPAPool, OPAPoolFull
+from plan_lint.types import ErrorCode, Plan, Policy, Status
+
+POLICY = Policy(allow_tools=["sql.query"])
+
+
+def _plan(tool):
+    return Plan(goal="test", steps=[{"id": "s1", "tool": tool, "args": {}}])
+
+
+class FakeServer:
+    """Denies every tool but sql.query, like the generated policy."""
+
+    started = []
+
+    def __init__(self, policy_path, barrier=None, gate=None):
+        self.policy_path = policy_path
+        self.barrier = barrier
+        self.gate = gate
+        self.memory = 1000
+        self.closed = False
+        self.fail = False
+        FakeServer.started.append(self)
+
+    def evaluate(self, input_bytes):
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if self.fail:
+            raise OPAError("server died")
+        steps = json.loads(input_bytes)["steps"]
+        return {
+            "violations": [
+                {"step": i, "code": "TOOL_DENY", "msg": f"{step['tool']} denied"}
+                for i, step in enumerate(steps)
+                if step["tool"] != "sql.query"
+            ]
+        }
+
+    def rss(self):
+        return self.memory
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _reset_started():
+    FakeServer.started = []
+
+
+def test_pool_evaluates_in_parallel_and_in_order():
+    """Every server works at once, and map keeps the order of the plans."""
+    barrier = threading.Barrier(3)
+    plans = [_plan("sql.query" if i % 2 else "shell.exec") for i in range(9)]
+
+    with OPAPool(
+        POLICY, size=3, worker_factory=lambda path: FakeServer(path, barrier)
+    ) as pool:
+        assert pool.size == 3
+        results = list(pool.map(plans))
+
+    assert [r.status for r in results] == [
+        Status.PASS if i % 2 else Status.ERROR for i in range(9)
+    ]
+    assert results[0].errors[0].code == ErrorCode.TOOL_DENY
+    assert all(server.closed for server in FakeServer.started)
+    # The generated policy is written once and loaded by every server
+    assert len({server.policy_path for server in FakeServer.started}) == 1
+
+
+def test_pool_recycles_servers():
+    """Servers are replaced after max_evaluations and on memory growth."""
+    with OPAPool(POLICY, size=1, max_evaluations=2, worker_factory=FakeServer) as pool:
+        for _ in range(5):
+            pool.evaluate(_plan("sql.query"))
+        assert pool.recycled == 2
+
+    with OPAPool(
+        POLICY, size=1, max_memory_growth=500, worker_factory=FakeServer
+    ) as pool:
+        pool.evaluate(_plan("sql.query"))
+        assert pool.recycled == 0
+        FakeServer.started[-1].memory = 2000
+        pool.evaluate(_plan("sql.query"))
+        assert pool.recycled == 1
+        assert FakeServer.started[-2].closed
+
+
+def test_pool_backpressure():
+    """A full queue blocks submitters, or raises when they will not wait."""
+    gate = threading.Event()
+    pool = OPAPool(
+        POLICY,
+        size=1,
+        queue_size=1,
+        worker_factory=lambda path: FakeServer(path, gate=gate),
+    )
+    running = pool.submit(_plan("sql.query"))
+    while pool.pending:
+        pass
+    queued = pool.submit(_plan("sql.query"))
+    assert pool.pending == 1
+
+    with pytest.raises(OPAPoolFull):
+        pool.submit(_plan("sql.query"), timeout=0)
+
+    gate.set()
+    assert running.result().status == Status.PASS
+    assert queued.result().status == Status.PASS
+    pool.close()
+    with pytest.raises(OPAError):
+        pool.submit(_plan("sql.query"))
+
+
+def test_pool_replaces_failed_servers():
+    """A failing server fails its plan and is replaced."""
+    with OPAPool(POLICY, size=1, worker_factory=FakeServer) as pool:
+        FakeServer.started[0].fail = True
+        with pytest.raises(OPAError, match="server died"):
+            pool.evaluate(_plan("sql.query"))
+        assert pool.evaluate(_plan("sql.query")).status == Status.PASS
+        assert FakeServer.started[0].closed
+        assert len(FakeServer.started) == 2
+
+
+def test_pool_replaces_servers_on_unexpected_errors():
+    """Any exception fails only its plan, and a broken factory is survived."""
+
+    class BadResponseServer(FakeServer):
+        def evaluate(self, input_bytes):
+            if len(FakeServer.started) == 1:
+                raise ValueError("malformed response")
+            return super().evaluate(input_bytes)
+
+    with OPAPool(POLICY, size=1, worker_factory=BadResponseServer) as pool:
+        with pytest.raises(ValueError, match="malformed response"):
+            pool.evaluate(_plan("sql.query"))
+        assert pool.evaluate(_plan("sql.query")).status == Status.PASS
+        assert FakeServer.started[0].closed
+
+    FakeServer.started = []
+
+    def factory(path):
+        if FakeServer.started:
+            raise RuntimeError("cannot start")
+        return FakeServer(path)
+
+    with OPAPool(POLICY, size=1, worker_factory=factory) as pool:
+        FakeServer.started[0].fail = True
+        with pytest.raises(OPAError, match="server died"):
+            pool.evaluate(_plan("sql.query"))
+        with pytest.raises(OPAError, match="No OPA server"):
+            pool.evaluate(_plan("sql.query"))
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_pool_close_fails_plans_when_servers_are_gone():
+    """Closing does not block on a full queue nobody is draining."""
+
+    class DeadServer(FakeServer):
+        def rss(self):
+            raise RuntimeError("no process")
+
+    pool = OPAPool(POLICY, size=1, queue_size=1, worker_factory=DeadServer)
+    pool._threads[0].join(timeout=5)
+    future = pool.submit(_plan("sql.query"))
+
+    pool.close()
+    with pytest.raises(OPAError, match="closed"):
+        future.result(timeout=5)
+
+
+@pytest.mark.skipif(shutil.which("opa") is None, reason="OPA is not installed")
+def test_pool_with_opa():
+    """Real OPA servers agree with the built-in validator."""
+    with OPAPool(POLICY, size=2, max_evaluations=3) as pool:
+        results = list(pool.map([_plan("shell.exec"), _plan("sql.query")] * 4))
+    assert [r.status for r in results] == [Status.ERROR, Status.PASS] * 4
+    assert results[0].errors[0].code == ErrorCode.TOOL_DENY
@@ -0,0 +1,88 @@
+"""
+Tests for the adaptive check ordering module.
+"""
+
+import pytest
+
+from plan_lint import core
+from plan_lint.ordering import AdaptiveCheckOrder, CheckStats
+from plan_lint.types import ErrorCode, Plan, PlanStep, Policy
+
+
+def test_check_stats_rolling_average():
+    """Early samples use a plain mean, later ones an exponential average."""
+    stats = CheckStats()
+    stats.update(100, True, alpha=0.1)
+    stats.update(300, False, alpha=0.1)
+    assert stats.cost_ns == 200
+    assert stats.hit_rate == 0.5
+    assert stats.runs == 2
+
+
+def test_reorder_prefers_cheap_selective_checks():
+    """Checks are ordered by cost per rejection."""
+    ordering = AdaptiveCheckOrder(checks=["tools", "secrets", "cycles"])
+    for _ in range(10):
+        ordering.record("tools", 1000, False)
+        ordering.record("secrets", 500, True)
+        ordering.record("cycles", 100000, True)
+
+    # Checks that have not run yet stay at the front
+    assert ordering.reorder() == ("max_steps", "bounds", "secrets", "cycles", "tools")
+
+
+def test_orderings_cover_every_check():
+    """Left-out checks are appended and unknown names are rejected."""
+    ordering = AdaptiveCheckOrder(checks=["secrets", "tools"])
+    assert ordering.order == ("secrets", "tools", "max_steps", "bounds", "cycles")
+    assert set(ordering.stats) == set(core.FAIL_FAST_ORDER)
+
+    with pytest.raises(ValueError, match="secret"):
+        AdaptiveCheckOrder(checks=["tools", "secret"])
+    with pytest.raises(ValueError):
+        ordering.load({"version": 1, "order": ["tools", "typo"]})
+    assert ordering.order == ("secrets", "tools", "max_steps", "bounds", "cycles")
+
+
+def test_export_and_seed():
+    """Exported statistics seed a new instance with the same order."""
+    ordering = AdaptiveCheckOrder(checks=["tools", "secrets"])
+    ordering.record("tools", 1000, False)
+    ordering.record("secrets", 10, True)
+    ordering.reorder()
+
+    expected = ("max_steps", "bounds", "cycles", "secrets", "tools")
+    assert ordering.order == expected
+
+    warm = AdaptiveCheckOrder(checks=["tools", "secrets", "cycles"])
+    warm.load(ordering.export())
+    assert warm.order == expected
+    assert warm.stats["secrets"].runs == 1
+
+    seeded = AdaptiveCheckOrder(checks=["tools", "secrets"], seed=ordering.export())
+    assert seeded.order == expected
+
+    with pytest.raises(ValueError):
+        warm.load({"version": 99})
+
+
+def test_validate_plan_with_adaptive_ordering():
+    """Validation records statistics and reorders after enough plans."""
+    plan = Plan(
+        goal="Test goal",
+        steps=[
+            PlanStep(id="step-001", tool="api.call", args={"token": "AWS_SECRET_1"}),
+        ],
+    )
+    policy = Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET"])
+    ordering = AdaptiveCheckOrder(reorder_every=5)
+    assert ordering.order == core.FAIL_FAST_ORDER
+
+    for _ in range(5):
+        result = core.validate_plan(plan, policy, mode="first_error", ordering=ordering)
+        assert [e.code for e in result.errors] == [ErrorCode.RAW_SECRET]
+
+    # Only the secrets check ever rejects, so it moves ahead of the others
+    assert ordering.stats["secrets"].hit_rate == 1.0
+    assert ordering.stats["cycles"].runs == 0
+    assert ordering.order.index("secrets") < ordering.order.index("tools")
@@ -0,0 +1,100 @@
+"""
+Tests for the on-disk policy cache.
+"""
+
+import os
+
+from typer.testing import CliRunner
+
+from plan_lint import loader
+from plan_lint.cli import app
+from plan_lint.policy_cache import PolicyCache
+
+POLICY = """\
+extends: base.yaml
+allow_tools:
+  - api.call
+bounds:
+  api.call.retries: [0, 3]
+"""
+
+
+def _policy_files(tmp_path):
+    (tmp_path / "base.yaml").write_text(
+        "deny_tokens_regex:\n  - AWS_SECRET\nrisk_weights:\n  raw_secret: 0.5\n"
+    )
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text(POLICY)
+    return policy_file
+
+
+def test_cached_policy_matches_parsed(tmp_path, monkeypatch):
+    """A cache hit returns the same policy without parsing YAML."""
+    policy_file = _policy_files(tmp_path)
+    cache = PolicyCache(str(tmp_path / "cache"))
+    parsed, _ = loader.load_policy(str(policy_file), cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    def fail(path):
+        raise AssertionError("YAML was parsed")
+
+    monkeypatch.setattr(loader, "read_policy_document", fail)
+    files = []
+    cached, rego = loader.load_policy(str(policy_file), files, cache=cache)
+
+    assert cache.hits == 1
+    assert cached == parsed
+    assert rego is None
+    assert files == [str(policy_file), str(tmp_path / "base.yaml")]
+
+
+def test_changes_invalidate_entries(tmp_path):
+    """Editing the policy or a base it extends misses the cache."""
+    policy_file = _policy_files(tmp_path)
+    cache = PolicyCache(str(tmp_path / "cache"))
+    loader.load_policy(str(policy_file), cache=cache)
+
+    policy_file.write_text(POLICY + "max_steps: 5\n")
+    policy, _ = loader.load_policy(str(policy_file), cache=cache)
+    assert policy.max_steps == 5
+
+    (tmp_path / "base.yaml").write_text("deny_tokens_regex:\n  - API_KEY\n")
+    policy, _ = loader.load_policy(str(policy_file), cache=cache)
+    assert policy.deny_tokens_regex == ["API_KEY"]
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    loader.load_policy(str(policy_file), cache=cache)
+    assert cache.hits == 1
+
+
+def test_corrupt_entries_are_ignored(tmp_path):
+    """Unreadable entries are treated as misses and rewritten."""
+    policy_file = _policy_files(tmp_path)
+    cache = PolicyCache(str(tmp_path / "cache"))
+    loader.load_policy(str(policy_file), cache=cache)
+    [entry] = os.listdir(cache.directory)
+    (tmp_path / "cache" / entry).write_text('{"format": 1, "policy": [')
+
+    policy, _ = loader.load_policy(str(policy_file), cache=cache)
+    assert policy.allow_tools == ["api.call"]
+    loader.load_policy(str(policy_file), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
+def test_cli_uses_cache_from_environment(
+    sample_plan_file, sample_policy_file, tmp_path, monkeypatch
+):
+    """PLAN_LINT_POLICY_CACHE enables the cache for the CLI."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("PLAN_LINT_POLICY_CACHE", str(cache_dir))
+    args = [str(sample_plan_file), "--policy", str(sample_policy_file)]
+
+    first = CliRunner().invoke(app, args)
+    second = CliRunner().invoke(app, args)
+
+    assert len(os.listdir(cache_dir)) == 1
+    assert first.exit_code == second.exit_code == 1
+    assert first.output == second.output
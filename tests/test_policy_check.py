@@ -0,0 +1,144 @@
+"""
+Tests for the policy checker.
+"""
+
+import json
+import logging
+
+import pytest
+from typer.testing import CliRunner
+
+from plan_lint.cli import app
+from plan_lint.loader import load_policy
+from plan_lint.policy_check import (
+    analyze_pattern,
+    check_policy,
+    measure_pattern,
+    reject_unsafe,
+)
+from plan_lint.policy_store import PolicyStore
+from plan_lint.registry import PolicyRegistry
+from plan_lint.types import Policy
+
+UNSAFE = r"(\w+\s?)*$"
+
+
+def _codes(issues):
+    return [issue.code for issue in issues]
+
+
+@pytest.mark.parametrize(
+    "pattern, codes",
+    [
+        (UNSAFE, ["NESTED_QUANTIFIER"]),
+        (r"(a+)+b", ["NESTED_QUANTIFIER"]),
+        (r"(a|aa)*b", ["OVERLAPPING_ALTERNATION"]),
+        (r"(", ["INVALID_REGEX"]),
+        # Each iteration starts with a character the inner repeat cannot match
+        (r"(ab+)*c", []),
+        (r"(\d+,)*\d", []),
+        (r"(\w++\s?)*$", []),
+        (r"sk_live_[0-9a-zA-Z]{24}", []),
+        (r"(?i)(password|passwd)\s*[:=]\s*\S+", []),
+    ],
+)
+def test_analyze_pattern(pattern, codes):
+    """Nested quantifiers and ambiguous alternations are flagged statically."""
+    assert _codes(analyze_pattern(pattern)) == codes
+
+
+def test_measure_pattern():
+    """Catastrophic patterns are caught within a few budgets of time."""
+    cost = measure_pattern(UNSAFE, budget=0.02)
+    assert cost.catastrophic
+    assert cost.us_per_kb is None
+    assert cost.worst_seconds > 0.02
+
+    cost = measure_pattern("AWS_SECRET")
+    assert not cost.catastrophic
+    assert cost.us_per_kb is not None
+
+
+def test_check_policy():
+    """Patterns, bounds and tools are all checked."""
+    policy = Policy(
+        allow_tools=["sql.query", "sql.query", "payments.transfer"],
+        bounds={
+            "payments.transfer.amount": [1000, 10],
+            "api.call.retries": [0, 3],
+            "payments.transfer.fee": [1],
+        },
+        deny_tokens_regex=["AWS_SECRET", UNSAFE, "AWS_SECRET", "x?"],
+    )
+    report = check_policy(policy)
+
+    assert set(_codes(report.issues)) == {
+        "DUPLICATE_TOOL",
+        "DUPLICATE_PATTERN",
+        "NESTED_QUANTIFIER",
+        "EMPTY_MATCH",
+        "CATASTROPHIC_BACKTRACKING",
+        "UNSATISFIABLE_BOUND",
+        "UNREACHABLE_BOUND",
+        "IGNORED_BOUND",
+    }
+    assert {(e.code, e.subject) for e in report.errors} == {
+        ("CATASTROPHIC_BACKTRACKING", UNSAFE),
+        ("UNSATISFIABLE_BOUND", "payments.transfer.amount"),
+    }
+    assert [cost.pattern for cost in report.costs] == ["AWS_SECRET", UNSAFE, "x?"]
+
+    static = check_policy(policy, measure=False)
+    assert not static.costs
+    assert "CATASTROPHIC_BACKTRACKING" not in _codes(static.issues)
+
+
+def test_loader_warns_about_unsafe_patterns(tmp_path, caplog):
+    """Loading a policy logs patterns prone to catastrophic backtracking."""
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text(f"deny_tokens_regex:\n  - '{UNSAFE}'\n")
+    with caplog.at_level(logging.WARNING, logger="plan_lint.loader"):
+        load_policy(str(policy_file))
+    [record] = caplog.records
+    assert record.args[0] == UNSAFE
+    assert "Nested quantifier" in record.getMessage()
+
+
+def test_reject_unsafe(tmp_path):
+    """Stores and registries can refuse policies with errors."""
+    policy_file = tmp_path / "acme.yaml"
+    policy_file.write_text("deny_tokens_regex:\n  - AWS_SECRET\n")
+    store = PolicyStore(str(policy_file), check=reject_unsafe)
+
+    policy_file.write_text(f"deny_tokens_regex:\n  - '{UNSAFE}'\n")
+    assert not store.reload()
+    assert "exponentially" in store.last_error
+    assert store.current.policy.deny_tokens_regex == ["AWS_SECRET"]
+
+    registry = PolicyRegistry(str(tmp_path), check=reject_unsafe)
+    with pytest.raises(ValueError, match="Policy check failed"):
+        registry.get("acme")
+
+
+def test_cli_policy_check(tmp_path):
+    """The policy check command fails on errors, or on warnings with --strict."""
+    good = tmp_path / "good.yaml"
+    good.write_text("allow_tools: [sql.query, sql.query]\n")
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("bounds:\n  payments.transfer.amount: [10, 1]\n")
+    runner = CliRunner()
+
+    result = runner.invoke(app, ["policy", "check", str(good), "--no-measure"])
+    assert result.exit_code == 0
+    assert "DUPLICATE_TOOL" in result.output
+
+    result = runner.invoke(app, ["policy", "check", str(good), "--strict"])
+    assert result.exit_code == 1
+
+    result = runner.invoke(
+        app, ["policy", "check", str(good), str(bad), "--format", "json"]
+    )
+    assert result.exit_code == 1
+    reports = json.loads(result.output)
+    [issue] = reports[str(bad)]["issues"]
+    assert issue["code"] == "UNSATISFIABLE_BOUND"
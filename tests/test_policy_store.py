@@ -0,0 +1,159 @@
+"""
+Tests for the policy store.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from plan_lint import metrics
+from plan_lint.policy_store import PolicyStore
+from plan_lint.types import Plan, PlanStep, Status
+
+PLAN = Plan(
+    goal="Test goal",
+    steps=[PlanStep(id="step-001", tool="sql.write", args={"query": "UPDATE"})],
+)
+
+
+def _write(path, tools):
+    path.write_text("allow_tools:\n" + "".join(f"  - {tool}\n" for tool in tools))
+
+
+def _replace(path, text):
+    """Replace a file by renaming a new one over it, as deploy tools do."""
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_reload_activates_new_policy(tmp_path):
+    """A reload swaps in a new snapshot and leaves the old one intact."""
+    policy_file = tmp_path / "policy.yaml"
+    _write(policy_file, ["sql.query"])
+    store = PolicyStore(str(policy_file))
+    before = store.current
+    assert store.validate(PLAN).status == Status.ERROR
+
+    _write(policy_file, ["sql.write"])
+    assert store.reload()
+
+    assert store.version == 2
+    assert store.reloads == 1
+    assert store.last_reload == store.current.loaded_at
+    assert store.validate(PLAN).status == Status.PASS
+    assert before.policy.allow_tools == ["sql.query"]
+
+
+def test_invalid_policy_keeps_previous(tmp_path):
+    """A policy that fails to load is recorded and not activated."""
+    policy_file = tmp_path / "policy.yaml"
+    _write(policy_file, ["sql.write"])
+    store = PolicyStore(str(policy_file))
+    active = metrics.enable()
+    try:
+        policy_file.write_text("bounds:\n  amount: '>= nonsense'\n")
+        assert not store.reload()
+    finally:
+        metrics.disable()
+
+    assert store.version == 1
+    assert store.failures == 1
+    assert "Failed to load policy" in store.last_error
+    assert store.validate(PLAN).status == Status.PASS
+    assert active.policy_reloads.value(outcome="error") == 1
+
+    _write(policy_file, ["sql.write"])
+    assert store.reload()
+    assert store.last_error is None
+
+
+def test_check_can_reject_policy(tmp_path):
+    """The check callable runs before activation and can veto a policy."""
+    policy_file = tmp_path / "policy.yaml"
+    _write(policy_file, ["sql.write"])
+
+    def check(snapshot):
+        if not snapshot.policy.allow_tools:
+            raise ValueError("policy allows no tools")
+
+    store = PolicyStore(str(policy_file), check=check)
+    policy_file.write_text("allow_tools: []\n")
+    assert not store.reload()
+    assert store.last_error == "policy allows no tools"
+    assert store.current.policy.allow_tools == ["sql.write"]
+
+
+def test_initial_load_failure_raises(tmp_path):
+    """A store cannot be created without a valid policy."""
+    with pytest.raises(ValueError):
+        PolicyStore(str(tmp_path / "missing.yaml"))
+
+
+@pytest.mark.parametrize("watcher", ["poll", "auto"])
+def test_watcher_reloads_on_change(tmp_path, watcher):
+    """The watcher thread reloads a policy file replaced on disk."""
+    policy_file = tmp_path / "policy.yaml"
+    _write(policy_file, ["sql.query"])
+
+    with PolicyStore(str(policy_file), interval=0.02, watcher=watcher) as store:
+        _replace(policy_file, "allow_tools:\n  - sql.write\n")
+        assert _wait_for(lambda: store.version >= 2)
+
+    assert store.validate(PLAN).status == Status.PASS
+    assert store._thread is None
+
+
+def test_watcher_follows_extended_policies(tmp_path):
+    """Changes to a policy's base reload the policy."""
+    base_file = tmp_path / "base.yaml"
+    _write(base_file, ["sql.query"])
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text("extends: base.yaml\n")
+
+    with PolicyStore(str(policy_file), interval=0.02) as store:
+        assert store.current.sources == (str(policy_file), str(base_file))
+        _replace(base_file, "allow_tools:\n  - sql.write\n")
+        assert _wait_for(lambda: store.version >= 2)
+
+    assert store.validate(PLAN).status == Status.PASS
+
+
+def test_validations_see_whole_snapshots(tmp_path):
+    """Validations running during reloads always see a complete policy."""
+    policy_file = tmp_path / "policy.yaml"
+    _write(policy_file, ["sql.write"])
+    store = PolicyStore(str(policy_file))
+    stop = threading.Event()
+    mismatches = []
+
+    def validate():
+        while not stop.is_set():
+            snapshot = store.current
+            if snapshot.compiled.policy is not snapshot.policy:
+                mismatches.append(snapshot.version)
+            store.validate(PLAN)
+
+    threads = [threading.Thread(target=validate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for tools in (["sql.query"], ["sql.write"]) * 10:
+        _write(policy_file, tools)
+        store.reload()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not mismatches
+    assert store.reloads == 20
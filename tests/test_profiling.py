@@ -0,0 +1,84 @@
+"""
+Tests for the profiling module.
+"""
+
+from typer.testing import CliRunner
+
+from plan_lint import core
+from plan_lint.cli import app
+from plan_lint.profiling import CheckEvent, ProfileAggregator, percentile
+from plan_lint.types import Plan, PlanStep, Policy
+
+PLAN = Plan(
+    goal="Test goal",
+    steps=[
+        PlanStep(id="step-001", tool="api.call", args={"token": "AWS_SECRET_1"}),
+        PlanStep(id="step-002", tool="sql.write", args={"query": "DROP"}),
+    ],
+)
+POLICY = Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET"])
+
+
+def test_percentile():
+    """Percentiles use the nearest-rank method."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_collector_receives_check_events():
+    """Every check run is reported with its step and findings."""
+    events = []
+    core.validate_plan(PLAN, POLICY, collector=events.append)
+
+    assert all(isinstance(event, CheckEvent) for event in events)
+    assert {(e.check, e.step) for e in events} == {
+        ("max_steps", None),
+        ("cycles", None),
+        ("tools", 0),
+        ("tools", 1),
+        ("bounds", 0),
+        ("bounds", 1),
+        ("secrets", 0),
+        ("secrets", 1),
+    }
+    findings = {(e.check, e.step): e.findings for e in events}
+    assert findings[("tools", 1)] == 1
+    assert findings[("secrets", 0)] == 1
+
+
+def test_collector_in_fail_fast_mode():
+    """Fail-fast modes only report the checks that actually ran."""
+    events = []
+    core.validate_plan(PLAN, POLICY, mode="first_error", collector=events.append)
+    assert [(e.check, e.step) for e in events] == [
+        ("max_steps", None),
+        ("tools", 0),
+        ("tools", 1),
+    ]
+
+
+def test_profile_aggregator_summary():
+    """The aggregator summarises counts, findings and latencies per check."""
+    profiler = ProfileAggregator(max_samples=10)
+    for i in range(20):
+        profiler(CheckEvent("tools", i, 1000 * (i + 1), i % 2))
+
+    summary = profiler.summary()["tools"]
+    assert summary["count"] == 20
+    assert summary["findings"] == 10
+    assert summary["total_ms"] == 0.21
+    assert len(profiler.checks["tools"].samples) == 10
+
+
+def test_cli_profile(sample_plan_file, sample_policy_file):
+    """Test CLI profiling output."""
+    result = CliRunner().invoke(
+        app, [str(sample_plan_file), "--policy", str(sample_policy_file), "--profile"]
+    )
+
+    assert result.exit_code == 1
+    assert "Validation Profile" in result.output
+    assert "rule:no_raw_secret" in result.output
@@ -0,0 +1,176 @@
+"""
+Tests for policy inheritance and the policy registry.
+"""
+
+import pytest
+
+from plan_lint.compiler import compile_policy
+from plan_lint.loader import load_policy, merge_policy_data
+from plan_lint.registry import PolicyRegistry
+from plan_lint.types import Plan, PlanStep, Policy, Status
+
+BASE = """\
+allow_tools:
+  - sql.query
+  - api.call
+bounds:
+  payments.transfer.amount: [0, 1000]
+  payments.refund.amount: [0, 100]
+deny_tokens_regex:
+  - AWS_SECRET
+  - API_KEY
+risk_weights:
+  tool_deny: 0.4
+  raw_secret: 0.5
+"""
+
+PLAN = Plan(
+    goal="Test goal",
+    steps=[PlanStep(id="step-001", tool="payments.transfer", args={"amount": 5000})],
+)
+
+
+@pytest.fixture
+def policy_dir(tmp_path):
+    """A directory of tenant policies extending a shared base."""
+    (tmp_path / "base").mkdir()
+    (tmp_path / "base" / "common.yaml").write_text(BASE)
+    (tmp_path / "acme.yaml").write_text(
+        "extends: base/common.yaml\n"
+        "allow_tools: [payments.transfer]\n"
+        "bounds:\n"
+        "  payments.transfer.amount: [0, 10000]\n"
+        "  payments.refund.amount: null\n"
+    )
+    (tmp_path / "globex.yaml").write_text(
+        "extends: base/common.yaml\nallow_tools: [payments.transfer]\n"
+    )
+    (tmp_path / "umbrella.yaml").write_text(
+        "extends: base/common.yaml\n"
+        "bounds:\n"
+        "  payments.transfer.amount: [0, 10]\n"
+    )
+    return tmp_path
+
+
+def test_merge_policy_data():
+    """Mapping sections merge key by key; other settings are replaced."""
+    base = {"allow_tools": ["a"], "risk_weights": {"x": 1.0, "y": 2.0}}
+    merged = merge_policy_data(
+        base, {"allow_tools": ["b"], "risk_weights": {"y": 3.0, "x": None}}
+    )
+
+    assert merged == {"allow_tools": ["b"], "risk_weights": {"y": 3.0}}
+    assert base["risk_weights"] == {"x": 1.0, "y": 2.0}
+
+
+def test_load_policy_extends(policy_dir):
+    """A policy inherits from the policy it extends."""
+    files = []
+    policy, _ = load_policy(str(policy_dir / "acme.yaml"), files)
+
+    assert policy.allow_tools == ["payments.transfer"]
+    assert policy.bounds == {"payments.transfer.amount": [0, 10000]}
+    assert policy.deny_tokens_regex == ["AWS_SECRET", "API_KEY"]
+    assert policy.risk_weights == {"tool_deny": 0.4, "raw_secret": 0.5}
+    assert files == [
+        str(policy_dir / "acme.yaml"),
+        str(policy_dir / "base" / "common.yaml"),
+    ]
+
+
+def test_extends_list_and_cycles(tmp_path):
+    """Several bases merge in order, and cycles are rejected."""
+    (tmp_path / "a.yaml").write_text("max_steps: 5\nfail_risk_threshold: 0.5\n")
+    (tmp_path / "b.yaml").write_text("max_steps: 7\n")
+    (tmp_path / "c.yaml").write_text("extends: [a.yaml, b.yaml]\n")
+    policy, _ = load_policy(str(tmp_path / "c.yaml"))
+    assert (policy.max_steps, policy.fail_risk_threshold) == (7, 0.5)
+
+    (tmp_path / "a.yaml").write_text("extends: c.yaml\n")
+    with pytest.raises(ValueError, match="cycle"):
+        load_policy(str(tmp_path / "c.yaml"))
+
+
+def test_registry_shares_compiled_components(policy_dir):
+    """Tenants share the compiled parts they have in common."""
+    registry = PolicyRegistry(str(policy_dir))
+    acme = registry.get("acme")
+    globex = registry.get("globex")
+    umbrella = registry.get("umbrella")
+
+    assert acme.compiled.allowed_tools is globex.compiled.allowed_tools
+    assert acme.compiled.deny_patterns is umbrella.compiled.deny_patterns
+    # Bounds sections differ, but the checks of the shared bound are reused
+    assert globex.compiled.bounds is not umbrella.compiled.bounds
+    [globex_refund] = globex.compiled.bounds.for_tool("payments.refund")
+    [umbrella_refund] = umbrella.compiled.bounds.for_tool("payments.refund")
+    assert globex_refund.checks is umbrella_refund.checks
+
+    assert registry.validate("acme", PLAN).status == Status.PASS
+    assert registry.validate("globex", PLAN).status == Status.ERROR
+    assert (registry.hits, registry.misses) == (2, 3)
+
+
+def test_registry_lru(policy_dir):
+    """Only the most recently used tenant policies are kept."""
+    registry = PolicyRegistry(str(policy_dir), max_policies=1)
+    registry.get("acme")
+    registry.get("globex")
+
+    assert "acme" not in registry
+    assert len(registry) == 1
+    assert registry.evictions == 1
+
+
+def test_registry_reloads_changed_base(policy_dir):
+    """Invalidated tenants pick up changes to their base."""
+    registry = PolicyRegistry(str(policy_dir))
+    assert registry.get("globex").policy.max_steps == 100
+
+    (policy_dir / "base" / "common.yaml").write_text(BASE + "max_steps: 3\n")
+    registry.invalidate()
+    assert registry.get("globex").policy.max_steps == 3
+
+
+def test_registry_rejects_unknown_tenants(policy_dir):
+    """Tenant names cannot escape the policy directory."""
+    registry = PolicyRegistry(str(policy_dir))
+    with pytest.raises(KeyError):
+        registry.get("initech")
+    with pytest.raises(ValueError):
+        registry.get("../acme")
+
+
+def test_registry_reloads_changed_tenant(policy_dir):
+    """An edited tenant file is picked up without invalidating it."""
+    registry = PolicyRegistry(str(policy_dir))
+    assert registry.get("globex").policy.max_steps == 100
+
+    (policy_dir / "globex.yaml").write_text(
+        "extends: base/common.yaml\nallow_tools: [payments.transfer]\nmax_steps: 4\n"
+    )
+    assert registry.get("globex").policy.max_steps == 4
+    assert registry.get("globex").policy.max_steps == 4
+    assert (registry.hits, registry.misses) == (1, 2)
+
+
+def test_components_shared_beyond_compile_caches():
+    """Equal components stay shared while in use, past the recent-compile caches."""
+    first = compile_policy(Policy(allow_tools=["a", "b"], deny_tokens_regex=["X"]))
+    others = [
+        compile_policy(
+            Policy(
+                allow_tools=[f"tool{i}"],
+                bounds={f"tool{i}.n": [0, i]},
+                deny_tokens_regex=[f"P{i}"],
+            )
+        )
+        for i in range(600)
+    ]
+    again = compile_policy(Policy(allow_tools=["b", "a"], deny_tokens_regex=["X"]))
+
+    assert again.allowed_tools is first.allowed_tools
+    assert again.bounds is first.bounds
+    assert again.deny_patterns is first.deny_patterns
+    assert len(others) == 600
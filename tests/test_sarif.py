@@ -0,0 +1,143 @@
+"""
+Tests for the SARIF reporter.
+"""
+
+import json
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from plan_lint.cli import app
+from plan_lint.reporters import sarif
+from plan_lint.sourcemap import scan_source_map
+from plan_lint.types import (
+    ErrorCode,
+    PlanError,
+    PlanWarning,
+    Status,
+    ValidationResult,
+)
+
+PLAN_TEXT = """{
+  "goal": "pay",
+  "steps": [
+    {"id": "s1", "tool": "sql.write", "args": {"query": "x"}},
+    {
+      "id": "s2",
+      "tool": "payments.transfer",
+      "args": {"amount": 9000, "token": "AWS_SECRET_1"}
+    }
+  ]
+}
+"""
+
+RESULT = ValidationResult(
+    status=Status.ERROR,
+    risk_score=0.6,
+    errors=[
+        PlanError(step=0, code=ErrorCode.TOOL_DENY, msg="denied"),
+        PlanError(step=1, code=ErrorCode.BOUND_VIOLATION, msg="big", arg="amount"),
+        PlanError(code=ErrorCode.LOOP_DETECTED, msg="loop"),
+    ],
+    warnings=[PlanWarning(step=1, code="SLOW", msg="slow")],
+)
+
+
+def test_sarif_log_structure():
+    """The log names the tool and its rules."""
+    log = json.loads(sarif.report(RESULT))
+    assert log["version"] == "2.1.0"
+    driver = log["runs"][0]["tool"]["driver"]
+    assert driver["name"] == "plan-lint"
+    assert [rule["id"] for rule in driver["rules"]] == [c.value for c in ErrorCode]
+
+    results = log["runs"][0]["results"]
+    assert [r["ruleId"] for r in results] == [
+        "TOOL_DENY",
+        "BOUND_VIOLATION",
+        "LOOP_DETECTED",
+        "SLOW",
+    ]
+    assert driver["rules"][results[1]["ruleIndex"]]["id"] == "BOUND_VIOLATION"
+    assert results[3]["level"] == "warning"
+    assert results[0]["locations"] == []
+
+
+def test_sarif_regions_from_source_map():
+    """Findings point to their argument, or to their step."""
+    log = json.loads(
+        sarif.report(
+            RESULT, uri="plans/pay.json", source_map=scan_source_map(PLAN_TEXT)
+        )
+    )
+    tool, bound, loop, warning = log["runs"][0]["results"]
+
+    assert tool["locations"][0]["physicalLocation"] == {
+        "artifactLocation": {"uri": "plans/pay.json"},
+        "region": {"startLine": 4, "startColumn": 5, "endLine": 4, "endColumn": 62},
+    }
+    assert bound["locations"][0]["physicalLocation"]["region"] == {
+        "startLine": 8,
+        "startColumn": 16,
+        "endLine": 8,
+        "endColumn": 30,
+    }
+    assert bound["locations"][0]["logicalLocations"] == [
+        {"fullyQualifiedName": "steps[1].args.amount"}
+    ]
+    assert "region" not in loop["locations"][0]["physicalLocation"]
+    assert warning["locations"][0]["physicalLocation"]["region"]["startLine"] == 5
+
+
+def test_cli_sarif_output(tmp_path):
+    """Test CLI with SARIF output."""
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(PLAN_TEXT)
+    policy_file = tmp_path / "policy.yaml"
+    policy_file.write_text(
+        "allow_tools: [payments.transfer]\n"
+        "bounds:\n  payments.transfer.amount: [0, 100]\n"
+        "deny_tokens_regex: [AWS_SECRET]\n"
+    )
+    output_file = tmp_path / "output.sarif"
+
+    result = CliRunner().invoke(
+        app,
+        [
+            str(plan_file),
+            "--policy",
+            str(policy_file),
+            "--format",
+            "sarif",
+            "--output",
+            str(output_file),
+        ],
+    )
+
+    assert result.exit_code == 1
+    with open(output_file) as f:
+        results = json.load(f)["runs"][0]["results"]
+    lines = {
+        r["ruleId"]: r["locations"][0]["physicalLocation"]["region"]["startLine"]
+        for r in results
+    }
+    assert lines == {"TOOL_DENY": 4, "BOUND_VIOLATION": 8, "RAW_SECRET": 8}
+
+
+def test_cli_sarif_batch(tmp_path):
+    """A batch produces one run with the findings of every plan."""
+    plan_files = []
+    for name in ("a.json", "b.json"):
+        plan_file = tmp_path / name
+        plan_file.write_text(PLAN_TEXT)
+        plan_files.append(str(plan_file))
+
+    result = CliRunner().invoke(app, plan_files + ["--format", "sarif", "--compact"])
+
+    assert result.exit_code == 1
+    results = json.loads(result.output)["runs"][0]["results"]
+    uris = {
+        r["locations"][0]["physicalLocation"]["artifactLocation"]["uri"]
+        for r in results
+    }
+    assert uris == {Path(f).as_posix() for f in plan_files}
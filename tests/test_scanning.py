@@ -0,0 +1,112 @@
+"""
+Tests for budgeted secret scanning.
+"""
+
+import itertools
+
+import pytest
+
+from plan_lint import scanning
+from plan_lint.core import check_raw_secrets, validate_plan, validate_plan_multi
+from plan_lint.rules import no_raw_secret
+from plan_lint.types import ErrorCode, Plan, PlanStep, Policy, ScanLimits, Status
+
+
+@pytest.fixture
+def slow_clock(monkeypatch):
+    """A clock that advances 10 ms every time it is read."""
+    ticks = itertools.count()
+    monkeypatch.setattr(scanning.time, "monotonic", lambda: next(ticks) / 100)
+
+
+def _step(text):
+    return PlanStep(id="step-001", tool="api.call", args={"body": text})
+
+
+def test_chunks_overlap():
+    """Matches that fit in the overlap are found across window boundaries."""
+    limits = ScanLimits(chunk_chars=100, chunk_overlap=20)
+    for offset in range(0, 400, 7):
+        text = "x" * offset + "AWS_SECRET" + "x" * 400
+        [error] = check_raw_secrets(_step(text), ["AWS_SECRET"], 0, limits)
+        assert error.arg == "body"
+
+
+def test_max_value_chars():
+    """Only the start of each value is scanned."""
+    text = "x" * 1000 + "AWS_SECRET"
+    limits = ScanLimits(max_value_chars=1000)
+    assert check_raw_secrets(_step(text), ["AWS_SECRET"], 0, limits) == []
+    limits = ScanLimits(max_value_chars=1010, chunk_chars=64, chunk_overlap=16)
+    assert len(check_raw_secrets(_step(text), ["AWS_SECRET"], 0, limits)) == 1
+
+
+def test_overlap_must_be_smaller_than_chunk():
+    """Windows must advance."""
+    with pytest.raises(ValueError):
+        ScanLimits(chunk_chars=10, chunk_overlap=10)
+
+
+def test_step_timeout(slow_clock):
+    """Running out of step budget stops scanning and reports SCAN_TIMEOUT."""
+    limits = ScanLimits(chunk_chars=1000, chunk_overlap=10, step_timeout_ms=25)
+    text = "x" * 100_000 + "AWS_SECRET"
+    errors = check_raw_secrets(_step(text), ["AWS_SECRET", "API_KEY"], 3, limits)
+
+    [error] = errors
+    assert error.code == ErrorCode.SCAN_TIMEOUT
+    assert error.step == 3
+    assert "25 ms" in error.msg
+
+
+def test_plan_timeout_reported_once(slow_clock):
+    """The plan budget is shared by all steps and reported on the first."""
+    policy = Policy(
+        deny_tokens_regex=["AWS_SECRET"],
+        secret_scan=ScanLimits(plan_timeout_ms=25),
+    )
+    plan = Plan(goal="Test goal", steps=[_step(f"value {i}") for i in range(10)])
+    result = validate_plan(plan, policy)
+
+    [error] = result.errors
+    assert error.code == ErrorCode.SCAN_TIMEOUT
+    assert error.step == 1
+    assert "plan budget" in error.msg
+    assert result.status == Status.ERROR
+
+    # Every plan gets a fresh budget
+    assert validate_plan(plan, policy).errors[0].step == 1
+
+
+def test_limits_apply_to_multi_and_rule(slow_clock):
+    """Multi-policy validation and the secret rule honour the limits."""
+    limited = Policy(
+        deny_tokens_regex=["AWS_SECRET"],
+        secret_scan=ScanLimits(step_timeout_ms=5),
+    )
+    unlimited = Policy(deny_tokens_regex=["AWS_SECRET"])
+    plan = Plan(goal="Test goal", steps=[_step("AWS_SECRET")])
+
+    result = validate_plan_multi(plan, [limited, unlimited])
+    assert [e.code for e in result.results[0].errors] == [ErrorCode.SCAN_TIMEOUT]
+    assert [e.code for e in result.results[1].errors] == [ErrorCode.RAW_SECRET]
+
+    errors = no_raw_secret.check_plan(plan, limited)
+    assert [e.code for e in errors] == [ErrorCode.SCAN_TIMEOUT]
+
+
+def test_multi_charges_each_policy_for_its_own_patterns():
+    """A policy's slow pattern does not use up another policy's budget."""
+    limits = ScanLimits(plan_timeout_ms=20)
+    slow = Policy(deny_tokens_regex=["(x+x+)+y"], secret_scan=limits)
+    fast = Policy(deny_tokens_regex=["AWS_SECRET"], secret_scan=limits)
+    plan = Plan(
+        goal="Test goal",
+        steps=[_step("x" * 21), _step("AWS_SECRET"), _step("AWS_SECRET")],
+    )
+
+    result = validate_plan_multi(plan, [slow, fast])
+    single = [validate_plan(plan, slow), validate_plan(plan, fast)]
+    assert [r.errors for r in result.results] == [r.errors for r in single]
+    assert [e.code for e in result.results[0].errors] == [ErrorCode.SCAN_TIMEOUT]
+    assert [e.code for e in result.results[1].errors] == [ErrorCode.RAW_SECRET] * 2
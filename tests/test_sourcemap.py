@@ -0,0 +1,66 @@
+"""
+Tests for the source map module.
+"""
+
+import json
+
+from plan_lint.loader import load_plan_with_source_map
+from plan_lint.sourcemap import SourceSpan, scan_source_map
+
+TEXT = """{
+  "goal": "brackets [ { and \\" in strings",
+  "steps": [
+    {"id": "s1", "tool": "t", "args": {"a": {"n": [1, {"b": "]}"}]}, "b\\u00e9": -1.5e3}},
+    {
+      "id": "s2",
+      "args": {"amount": 9000, "s": "é"},
+      "tool": "pay"
+    }
+  ],
+  "meta": {"steps": []}
+}"""
+
+
+def region(text, span):
+    """Return the text a single-line span covers."""
+    line = text.split("\n")[span.start_line - 1]
+    assert span.start_line == span.end_line
+    return line[span.start_column - 1 : span.end_column - 1]
+
+
+def test_step_and_arg_spans():
+    """Steps and top-level args are located by line and column."""
+    json.loads(TEXT)
+    source_map = scan_source_map(TEXT)
+
+    assert source_map.step(1) == SourceSpan(5, 5, 9, 6)
+    assert region(TEXT, source_map.arg(1, "amount")) == '"amount": 9000'
+    assert region(TEXT, source_map.arg(0, "a")) == '"a": {"n": [1, {"b": "]}"}]}'
+    assert region(TEXT, source_map.arg(0, "bé")) == '"b\\u00e9": -1.5e3'
+    assert source_map.step(0).start_line == 4
+
+
+def test_missing_locations():
+    """Unknown steps and args have no location."""
+    source_map = scan_source_map(TEXT)
+    assert source_map.step(2) is None
+    assert source_map.arg(1, "missing") is None
+    assert source_map.locate(1, "missing") == source_map.step(1)
+    assert source_map.locate(None) is None
+
+
+def test_compact_json():
+    """Plans written on a single line are located by column."""
+    text = json.dumps(json.loads(TEXT))
+    source_map = scan_source_map(text)
+    assert region(text, source_map.arg(1, "s")) == '"s": "\\u00e9"'
+
+
+def test_load_plan_with_source_map(tmp_path):
+    """The loader returns the plan with its source map."""
+    plan_file = tmp_path / "plan.json"
+    plan_file.write_text(TEXT, encoding="utf-8")
+
+    plan, source_map = load_plan_with_source_map(str(plan_file))
+    assert [step.id for step in plan.steps] == ["s1", "s2"]
+    assert source_map.arg(1, "amount").start_line == 7
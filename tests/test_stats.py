@@ -0,0 +1,202 @@
+"""
+Tests for the corpus statistics module.
+"""
+
+import json
+import random
+
+import pytest
+from typer.testing import CliRunner
+
+from plan_lint import cli, core
+from plan_lint.cli import app
+from plan_lint.stats import CorpusStats, LinearHistogram, LogHistogram, TopK
+from plan_lint.types import Plan, PlanStep, Policy
+
+POLICY = Policy(
+    allow_tools=["api.call", "db.query"],
+    bounds={"db.query.limit": [1, 100]},
+    deny_tokens_regex=["AWS_SECRET"],
+)
+
+
+def make_plans(count=40, seed=3):
+    """Build random plans, some of which break the policy."""
+    rng = random.Random(seed)
+    tools = ["api.call", "db.query", "sql.write", "email.send"]
+    plans = []
+    for _ in range(count):
+        steps = [
+            PlanStep(
+                id=f"s{i}",
+                tool=rng.choice(tools),
+                args={
+                    "limit": rng.randint(0, 150),
+                    "token": rng.choice(["x", "AWS_SECRET"]),
+                },
+            )
+            for i in range(rng.randint(1, 12))
+        ]
+        plans.append(Plan(goal="corpus", steps=steps))
+    return plans
+
+
+def corpus_stats(plans):
+    """Validate plans into a CorpusStats."""
+    stats = CorpusStats()
+    for plan in plans:
+        stats.add(core.validate_plan(plan, POLICY, collector=stats.collect), plan)
+    return stats
+
+
+def test_log_histogram_quantiles():
+    """Log-linear buckets keep quantiles within their relative error."""
+    histogram = LogHistogram(precision=16)
+    for value in range(1, 10001):
+        histogram.record(value)
+
+    assert histogram.count == 10000
+    assert histogram.mean == pytest.approx(5000.5)
+    for q in (0.5, 0.9, 0.99):
+        assert histogram.quantile(q) == pytest.approx(q * 10000, rel=1 / 16)
+    assert histogram.quantile(1.0) == 10000
+    assert LogHistogram().quantile(0.5) == 0.0
+
+    small = LogHistogram()
+    for value in (0, 3, 7, 16):
+        small.record(value)
+    assert [small.quantile(q) for q in (0.25, 0.5, 0.75)] == [0, 3, 7]
+
+
+def test_linear_histogram():
+    """Linear buckets report values to within their width."""
+    histogram = LinearHistogram(1.0, 100)
+    for value in (0.0, 0.2, 0.2, 0.4, 1.0):
+        histogram.record(value)
+    assert histogram.quantile(0.5) == pytest.approx(0.2)
+    assert histogram.max == 1.0
+    with pytest.raises(ValueError):
+        histogram.merge(LinearHistogram(1.0, 10))
+
+
+def test_top_k_space_saving():
+    """Frequent keys survive eviction and counts are upper bounds."""
+    summary = TopK(capacity=3)
+    stream = ["a"] * 50 + ["b"] * 30 + [f"rare{i}" for i in range(20)] + ["a"] * 10
+    for key in stream:
+        summary.add(key)
+
+    top = dict(summary.top(2))
+    assert set(top) == {"a", "b"}
+    assert top["a"] == 60
+    assert top["b"] >= 30
+    assert len(summary.counts) == 3
+    assert TopK.from_dict(summary.to_dict()).top() == summary.top()
+
+
+def test_topk_merge_counts_evicted_keys():
+    """A key evicted from one shard keeps an upper bound on its count."""
+    first = TopK(capacity=2)
+    for key in ["a"] * 5 + ["b"] * 4 + ["c"] * 3:
+        first.add(key)
+    # "c" pushed "b" out of the first shard
+    assert dict(first.top()) == {"a": 5, "c": 7}
+
+    second = TopK(capacity=2)
+    for key in ["b"] * 6 + ["a"]:
+        second.add(key)
+    assert len(second.counts) == 2
+
+    first.merge(second)
+    merged = dict(first.top())
+    # b occurred 10 times; the first shard may have seen it up to 5 times
+    assert merged == {"b": 11, "c": 8}
+    assert first.errors == {"b": 5, "c": 5}
+    assert first.total == 19
+    for key, true_count in {"a": 6, "b": 10, "c": 3}.items():
+        if key in merged:
+            assert merged[key] - first.errors[key] <= true_count <= merged[key]
+
+
+def test_merge_matches_single_pass():
+    """Statistics merged from shards equal those of one pass."""
+    plans = make_plans()
+    whole = corpus_stats(plans)
+    merged = corpus_stats(plans[:15]).merge(corpus_stats(plans[15:]))
+
+    assert merged.to_dict() == whole.to_dict()
+    assert whole.plans == len(plans)
+    assert sum(whole.by_code.values()) == sum(whole.by_check.values())
+    assert whole.offending_tools.top(1)[0][0] in ("sql.write", "email.send")
+
+
+def test_round_trip():
+    """Statistics survive serialisation."""
+    stats = corpus_stats(make_plans())
+    data = json.loads(json.dumps(stats.to_dict()))
+    assert CorpusStats.from_dict(data).to_dict() == stats.to_dict()
+    with pytest.raises(ValueError):
+        CorpusStats.from_dict({"version": 99})
+
+
+def test_cli_stats(tmp_path, sample_plan, sample_policy_file):
+    """plan-lint stats aggregates a directory and merges saved shards."""
+    corpus = tmp_path / "corpus"
+    (corpus / "nested").mkdir(parents=True)
+    for i in range(3):
+        (corpus / f"plan{i}.json").write_text(json.dumps(sample_plan))
+    (corpus / "nested" / "broken.json").write_text("{")
+    (corpus / "notes.txt").write_text("not a plan")
+
+    runner = CliRunner()
+    shard = tmp_path / "shard.json"
+    result = runner.invoke(
+        app,
+        [
+            "stats",
+            str(corpus),
+            "--policy",
+            str(sample_policy_file),
+            "--format",
+            "json",
+            "--output",
+            str(shard),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    data = json.loads(shard.read_text())
+    assert data["plans"] == 4
+    assert data["by_code"]["SCHEMA_INVALID"] == 1
+    assert data["steps"]["count"] == 3
+
+    result = runner.invoke(
+        app, ["stats", "--merge", str(shard), "--merge", str(shard), "-f", "json"]
+    )
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["plans"] == 8
+
+    result = runner.invoke(app, ["stats", "--merge", str(shard)])
+    assert "Corpus Statistics" in result.output
+
+
+def test_cli_lint_command_is_default(sample_plan_file):
+    """Plans can be linted with or without naming the lint command."""
+    runner = CliRunner()
+    implicit = runner.invoke(app, [str(sample_plan_file), "-f", "json"])
+    explicit = runner.invoke(app, ["lint", str(sample_plan_file), "-f", "json"])
+    assert implicit.exit_code == explicit.exit_code
+    assert implicit.output == explicit.output
+
+
+def test_cli_stats_parallel(tmp_path, sample_plan, sample_policy_file, monkeypatch):
+    """Worker processes produce the same statistics as a single process."""
+    for i in range(5):
+        (tmp_path / f"plan{i}.json").write_text(json.dumps(sample_plan))
+    monkeypatch.setattr(cli, "_STATS_CHUNK_SIZE", 2)
+
+    args = ["stats", str(tmp_path), "--policy", str(sample_policy_file), "-f", "json"]
+    serial = CliRunner().invoke(app, args)
+    parallel = CliRunner().invoke(app, args + ["--jobs", "2"])
+
+    assert parallel.exit_code == 0, parallel.output
+    assert json.loads(parallel.output) == json.loads(serial.output)
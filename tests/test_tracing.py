@@ -0,0 +1,132 @@
+"""
+Tests for the tracing module.
+"""
+
+import pytest
+from typer.testing import CliRunner
+
+from plan_lint import core, tracing
+from plan_lint.cli import app
+from plan_lint.tracing import InMemoryTracer, OpenTelemetryTracer, Span, Tracer
+from plan_lint.types import Plan, PlanStep, Policy
+
+PLAN = Plan(
+    goal="Test goal",
+    steps=[
+        PlanStep(id="step-001", tool="api.call", args={"token": "AWS_SECRET_1"}),
+        PlanStep(id="step-002", tool="sql.write", args={"query": "DROP"}),
+    ],
+)
+POLICY = Policy(allow_tools=["api.call"], deny_tokens_regex=["AWS_SECRET"])
+
+
+@pytest.fixture
+def tracer():
+    """Install an in-memory tracer for a test."""
+    tracer = InMemoryTracer()
+    tracing.set_tracer(tracer)
+    yield tracer
+    tracing.set_tracer(None)
+
+
+def test_default_tracer_is_noop():
+    """The default tracer returns a span that records nothing."""
+    assert type(tracing.get_tracer()) is Tracer
+    with tracing.span("anything", {"key": 1}) as span:
+        assert not span.is_recording
+        span.set_attribute("key", 2)
+
+
+def test_in_memory_tracer_nesting(tracer):
+    """Spans record their parent, attributes and errors."""
+    with pytest.raises(ValueError):
+        with tracing.span("outer", {"a": 1}) as outer:
+            outer.set_attribute("b", 2)
+            with tracing.span("inner"):
+                raise ValueError("boom")
+
+    inner, outer_record = tracer.spans
+    assert inner.parent_id == outer_record.span_id
+    assert outer_record.parent_id is None
+    assert outer_record.attributes == {"a": 1, "b": 2}
+    assert inner.error == "ValueError: boom"
+    assert outer_record.duration_ns >= inner.duration_ns
+
+
+def test_validate_plan_span(tracer):
+    """validate_plan attaches step, finding and per-check attributes."""
+    core.validate_plan(PLAN, POLICY)
+
+    (span,) = tracer.find("plan_lint.validate_plan")
+    assert span.attributes["plan_lint.plan.steps"] == 2
+    assert span.attributes["plan_lint.findings"] == 2
+    assert span.attributes["plan_lint.backend"] == "builtin"
+    assert span.attributes["plan_lint.check.secrets.findings"] == 1
+    assert "plan_lint.check.cycles.duration_ms" in span.attributes
+
+
+def test_cli_spans(tracer, sample_plan_file, sample_policy_file):
+    """The CLI traces loading, validation, each rule and reporting."""
+    CliRunner().invoke(
+        app, [str(sample_plan_file), "--policy", str(sample_policy_file)]
+    )
+
+    names = {span.name for span in tracer.spans}
+    assert {
+        "plan_lint.lint",
+        "plan_lint.load_plan",
+        "plan_lint.schema",
+        "plan_lint.load_policy",
+        "plan_lint.validate_plan",
+        "plan_lint.rule",
+        "plan_lint.report",
+    } <= names
+
+    (lint,) = tracer.find("plan_lint.lint")
+    (load,) = tracer.find("plan_lint.load_plan")
+    assert load.parent_id == lint.span_id
+    assert load.attributes["plan_lint.plan.bytes"] > 0
+    assert lint.attributes["plan_lint.status"] == "error"
+    assert {s.attributes["plan_lint.rule"] for s in tracer.find("plan_lint.rule")}
+
+
+def test_opentelemetry_adapter():
+    """The OpenTelemetry adapter forwards names, attributes and context."""
+
+    class FakeSpan:
+        def __init__(self):
+            self.attributes = {}
+
+        def set_attribute(self, key, value):
+            self.attributes[key] = value
+
+    class FakeContext:
+        def __init__(self, span):
+            self.span = span
+            self.exited = False
+
+        def __enter__(self):
+            return self.span
+
+        def __exit__(self, *exc_info):
+            self.exited = True
+
+    class FakeTracer:
+        def __init__(self):
+            self.started = []
+
+        def start_as_current_span(self, name, attributes=None):
+            context = FakeContext(FakeSpan())
+            self.started.append((name, attributes, context))
+            return context
+
+    fake = FakeTracer()
+    tracer = OpenTelemetryTracer(fake)
+    with tracer.start_span("plan_lint.lint", {"a": 1}) as span:
+        assert isinstance(span, Span) and span.is_recording
+        span.set_attribute("b", 2)
+
+    name, attributes, context = fake.started[0]
+    assert (name, attributes) == ("plan_lint.lint", {"a": 1})
+    assert context.span.attributes == {"b": 2}
+    assert context.exited